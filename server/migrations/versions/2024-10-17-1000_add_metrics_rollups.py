@@ -0,0 +1,189 @@
+"""Add metrics rollups
+
+Revision ID: 5b1e8a6f2c3d
+Revises: 3bd3e1bf77fb
+Create Date: 2024-10-17 10:00:12.381044
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# Polar Custom Imports
+
+# revision identifiers, used by Alembic.
+revision = "5b1e8a6f2c3d"
+down_revision = "3bd3e1bf77fb"
+branch_labels: tuple[str] | None = None
+depends_on: tuple[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "order_metrics_rollups",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("organization_id", sa.Uuid(), nullable=False),
+        sa.Column("product_id", sa.Uuid(), nullable=False),
+        sa.Column("product_price_type", sa.String(), nullable=False),
+        sa.Column("subscription_id", sa.Uuid(), nullable=True),
+        sa.Column("timestamp", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("orders", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+            name=op.f("order_metrics_rollups_organization_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+            name=op.f("order_metrics_rollups_product_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.ForeignKeyConstraint(
+            ["subscription_id"],
+            ["subscriptions.id"],
+            name=op.f("order_metrics_rollups_subscription_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("order_metrics_rollups_pkey")),
+        sa.UniqueConstraint(
+            "organization_id",
+            "product_id",
+            "product_price_type",
+            "subscription_id",
+            "timestamp",
+            name="order_metrics_rollups_unique_key",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+    op.create_index(
+        "ix_order_metrics_rollups_organization_id_timestamp",
+        "order_metrics_rollups",
+        ["organization_id", "timestamp"],
+        unique=False,
+    )
+
+    op.create_table(
+        "subscription_metrics_rollups",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("organization_id", sa.Uuid(), nullable=False),
+        sa.Column("product_id", sa.Uuid(), nullable=False),
+        sa.Column("product_price_type", sa.String(), nullable=False),
+        sa.Column("timestamp", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column("started_count", sa.Integer(), nullable=False),
+        sa.Column("started_amount", sa.Integer(), nullable=False),
+        sa.Column("ended_count", sa.Integer(), nullable=False),
+        sa.Column("ended_amount", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+            name=op.f("subscription_metrics_rollups_organization_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+            name=op.f("subscription_metrics_rollups_product_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("subscription_metrics_rollups_pkey")),
+        sa.UniqueConstraint(
+            "organization_id",
+            "product_id",
+            "product_price_type",
+            "timestamp",
+            name="subscription_metrics_rollups_unique_key",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+    op.create_index(
+        "ix_subscription_metrics_rollups_organization_id_timestamp",
+        "subscription_metrics_rollups",
+        ["organization_id", "timestamp"],
+        unique=False,
+    )
+
+    # Backfill from existing orders and subscriptions
+    op.execute(
+        """
+        INSERT INTO order_metrics_rollups (
+            id, organization_id, product_id, product_price_type, subscription_id,
+            timestamp, orders, revenue
+        )
+        SELECT
+            gen_random_uuid(),
+            products.organization_id,
+            orders.product_id,
+            product_prices.type,
+            orders.subscription_id,
+            date_trunc('hour', orders.created_at),
+            count(orders.id),
+            sum(orders.amount)
+        FROM orders
+        JOIN products ON orders.product_id = products.id
+        JOIN product_prices ON orders.product_price_id = product_prices.id
+        GROUP BY 2, 3, 4, 5, 6
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO subscription_metrics_rollups (
+            id, organization_id, product_id, product_price_type, timestamp,
+            started_count, started_amount, ended_count, ended_amount
+        )
+        SELECT
+            gen_random_uuid(),
+            events.organization_id,
+            events.product_id,
+            events.product_price_type,
+            events.timestamp,
+            sum(events.started_count),
+            sum(events.started_amount),
+            sum(events.ended_count),
+            sum(events.ended_amount)
+        FROM (
+            SELECT
+                products.organization_id,
+                subscriptions.product_id,
+                product_prices.type AS product_price_type,
+                date_trunc('hour', subscriptions.started_at) AS timestamp,
+                1 AS started_count,
+                coalesce(subscriptions.amount, 0) AS started_amount,
+                0 AS ended_count,
+                0 AS ended_amount
+            FROM subscriptions
+            JOIN products ON subscriptions.product_id = products.id
+            JOIN product_prices ON subscriptions.price_id = product_prices.id
+            UNION ALL
+            SELECT
+                products.organization_id,
+                subscriptions.product_id,
+                product_prices.type,
+                date_trunc('hour', subscriptions.ended_at),
+                0,
+                0,
+                1,
+                coalesce(subscriptions.amount, 0)
+            FROM subscriptions
+            JOIN products ON subscriptions.product_id = products.id
+            JOIN product_prices ON subscriptions.price_id = product_prices.id
+            WHERE subscriptions.ended_at IS NOT NULL
+        ) AS events
+        GROUP BY 2, 3, 4, 5
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_subscription_metrics_rollups_organization_id_timestamp",
+        table_name="subscription_metrics_rollups",
+    )
+    op.drop_table("subscription_metrics_rollups")
+    op.drop_index(
+        "ix_order_metrics_rollups_organization_id_timestamp",
+        table_name="order_metrics_rollups",
+    )
+    op.drop_table("order_metrics_rollups")
@@ -0,0 +1,67 @@
+"""Add account balances
+
+Revision ID: 8c4f2d7e9a1b
+Revises: 5b1e8a6f2c3d
+Create Date: 2024-10-18 10:00:27.193511
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# Polar Custom Imports
+
+# revision identifiers, used by Alembic.
+revision = "8c4f2d7e9a1b"
+down_revision = "5b1e8a6f2c3d"
+branch_labels: tuple[str] | None = None
+depends_on: tuple[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "account_balances",
+        sa.Column("account_id", sa.Uuid(), nullable=False),
+        sa.Column("amount", sa.BigInteger(), nullable=False),
+        sa.Column("account_amount", sa.BigInteger(), nullable=False),
+        sa.Column("payout_amount", sa.BigInteger(), nullable=False),
+        sa.Column("account_payout_amount", sa.BigInteger(), nullable=False),
+        sa.Column("transfers_amount", sa.BigInteger(), nullable=False),
+        sa.Column("modified_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["account_id"],
+            ["accounts.id"],
+            name=op.f("account_balances_account_id_fkey"),
+            ondelete="cascade",
+        ),
+        sa.PrimaryKeyConstraint("account_id", name=op.f("account_balances_pkey")),
+    )
+
+    op.execute(
+        """
+        INSERT INTO account_balances (
+            account_id,
+            amount,
+            account_amount,
+            payout_amount,
+            account_payout_amount,
+            transfers_amount,
+            modified_at
+        )
+        SELECT
+            transactions.account_id,
+            SUM(transactions.amount),
+            SUM(transactions.account_amount),
+            COALESCE(SUM(transactions.amount) FILTER (WHERE transactions.type = 'payout'), 0),
+            COALESCE(SUM(transactions.account_amount) FILTER (WHERE transactions.type = 'payout'), 0),
+            COALESCE(SUM(transactions.amount) FILTER (WHERE transactions.type = 'balance'), 0),
+            NOW()
+        FROM transactions
+        JOIN accounts ON accounts.id = transactions.account_id
+        GROUP BY transactions.account_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("account_balances")
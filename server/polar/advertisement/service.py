@@ -3,14 +3,30 @@ from collections.abc import Sequence
 from enum import StrEnum
 from typing import Any
 
-from sqlalchemy import UUID, Select, UnaryExpression, asc, desc, select, update
-
+from sqlalchemy import (
+    UUID,
+    Integer,
+    Select,
+    UnaryExpression,
+    Uuid,
+    asc,
+    column,
+    desc,
+    select,
+    update,
+    values,
+)
+
+from polar.counter import BufferedCounter
 from polar.kit.db.postgres import AsyncSession
 from polar.kit.pagination import PaginationParams, paginate
 from polar.kit.services import ResourceServiceReader
 from polar.kit.sorting import Sorting
 from polar.models import AdvertisementCampaign, BenefitGrant
 from polar.models.benefit import BenefitAds
+from polar.redis import Redis
+
+views_counter = BufferedCounter("advertisement_campaign_views")
 
 
 class AdvertisementSortProperty(StrEnum):
@@ -65,20 +81,38 @@ class AdvertisementCampaignService(ResourceServiceReader[AdvertisementCampaign])
         return result.scalar_one_or_none()
 
     async def track_view(
-        self,
-        session: AsyncSession,
-        advertisement_campaign: AdvertisementCampaign,
-    ) -> AdvertisementCampaign:
-        statement = (
-            update(AdvertisementCampaign)
-            .where(AdvertisementCampaign.id == advertisement_campaign.id)
-            .values({"views": AdvertisementCampaign.views + 1})
-            .returning(AdvertisementCampaign)
+        self, redis: Redis, advertisement_campaign: AdvertisementCampaign
+    ) -> None:
+        await views_counter.increment(redis, str(advertisement_campaign.id))
+
+    async def get_views(
+        self, redis: Redis, advertisement_campaigns: Sequence[AdvertisementCampaign]
+    ) -> dict[uuid.UUID, int]:
+        """
+        Return the views of the campaigns, including the ones not flushed yet.
+        """
+        pending_views = await views_counter.get_pending(
+            redis, [str(campaign.id) for campaign in advertisement_campaigns]
         )
+        return {
+            campaign.id: campaign.views + pending_views[str(campaign.id)]
+            for campaign in advertisement_campaigns
+        }
+
+    async def flush_views(self, session: AsyncSession, redis: Redis) -> int:
+        async def _apply(increments: dict[str, int]) -> None:
+            increments_values = values(
+                column("id", Uuid), column("views", Integer), name="increments"
+            ).data([(uuid.UUID(id), views) for id, views in increments.items()])
+            statement = (
+                update(AdvertisementCampaign)
+                .where(AdvertisementCampaign.id == increments_values.c.id)
+                .values(views=AdvertisementCampaign.views + increments_values.c.views)
+            )
+            await session.execute(statement)
+            await session.commit()
 
-        result = await session.execute(statement)
-
-        return result.scalar_one()
+        return await views_counter.flush(redis, _apply)
 
     def _get_readable_advertisement_statement(
         self,
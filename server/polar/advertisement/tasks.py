@@ -0,0 +1,15 @@
+from polar.worker import (
+    AsyncSessionMaker,
+    CronTrigger,
+    JobContext,
+    get_worker_redis,
+    task,
+)
+
+from .service import advertisement_campaign as advertisement_campaign_service
+
+
+@task("advertisement.flush_views", cron_trigger=CronTrigger(second="*/10"))
+async def advertisement_flush_views(ctx: JobContext) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        await advertisement_campaign_service.flush_views(session, get_worker_redis(ctx))
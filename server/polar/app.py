@@ -1,3 +1,4 @@
+import asyncio
 import contextlib
 from collections.abc import AsyncIterator
 from typing import TypedDict
@@ -8,8 +9,10 @@ from fastapi.routing import APIRoute
 
 from polar import receivers, worker  # noqa
 from polar.api import router
+from polar.auth.cache import auth_subject_cache
 from polar.checkout import ip_geolocation
 from polar.config import settings
+from polar.eventstream.multiplexer import EventStreamMultiplexer, uvicorn_should_exit
 from polar.exception_handlers import add_exception_handlers
 from polar.health.endpoints import router as health_router
 from polar.kit.cors import CORSConfig, CORSMatcherMiddleware, Scope
@@ -31,6 +34,7 @@ from polar.logging import Logger
 from polar.logging import configure as configure_logging
 from polar.middlewares import (
     FlushEnqueuedWorkerJobsMiddleware,
+    FlushPublishedEventsMiddleware,
     LogCorrelationIdMiddleware,
     PathRewriteMiddleware,
     SandboxResponseHeaderMiddleware,
@@ -92,6 +96,7 @@ class State(TypedDict):
     sync_sessionmaker: SyncSessionMaker
     arq_pool: ArqRedis
     redis: Redis
+    eventstream_multiplexer: EventStreamMultiplexer
     ip_geolocation_client: ip_geolocation.IPGeolocationClient | None
 
 
@@ -109,6 +114,16 @@ async def lifespan(app: FastAPI) -> AsyncIterator[State]:
             sync_sessionmaker = create_sync_sessionmaker(sync_engine)
             instrument_sqlalchemy(sync_engine)
 
+            eventstream_multiplexer = EventStreamMultiplexer(
+                redis,
+                max_queue_size=settings.EVENTSTREAM_SUBSCRIBER_QUEUE_SIZE,
+                should_exit=uvicorn_should_exit,
+            )
+
+            auth_subject_cache_listener = asyncio.create_task(
+                auth_subject_cache.listen(eventstream_multiplexer)
+            )
+
             try:
                 ip_geolocation_client = ip_geolocation.get_client()
             except FileNotFoundError:
@@ -127,9 +142,14 @@ async def lifespan(app: FastAPI) -> AsyncIterator[State]:
                 "sync_sessionmaker": sync_sessionmaker,
                 "arq_pool": arq_pool,
                 "redis": redis,
+                "eventstream_multiplexer": eventstream_multiplexer,
                 "ip_geolocation_client": ip_geolocation_client,
             }
 
+            auth_subject_cache_listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await auth_subject_cache_listener
+            await eventstream_multiplexer.close()
             await async_engine.dispose()
             sync_engine.dispose()
             if ip_geolocation_client is not None:
@@ -148,6 +168,7 @@ def create_app() -> FastAPI:
 
     app.add_middleware(PathRewriteMiddleware, pattern=r"^/api/v1", replacement="/v1")
     app.add_middleware(FlushEnqueuedWorkerJobsMiddleware)
+    app.add_middleware(FlushPublishedEventsMiddleware)
     app.add_middleware(LogCorrelationIdMiddleware)
     if settings.is_sandbox():
         app.add_middleware(SandboxResponseHeaderMiddleware)
@@ -1,18 +1,18 @@
-import os
 from uuid import UUID
 
-from fastapi import BackgroundTasks, Depends, Query
-from fastapi.responses import FileResponse
+from fastapi import Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import UUID4
 
 from polar.authz.service import AccessType, Authz
 from polar.exceptions import NotPermitted, ResourceNotFound
+from polar.kit.db.postgres import AsyncSessionMaker
 from polar.kit.pagination import ListResource, PaginationParamsQuery
 from polar.kit.schemas import MultipleQueryFilter
 from polar.models.article import ArticleVisibility
 from polar.openapi import IN_DEVELOPMENT_ONLY, APITag
 from polar.organization.schemas import OrganizationID
-from polar.postgres import AsyncSession, get_db_session
+from polar.postgres import AsyncSession, get_db_session, get_db_sessionmaker
 from polar.routing import APIRouter
 
 from . import auth
@@ -86,18 +86,17 @@ async def list(
 @router.get("/export", summary="Export Articles")
 async def export(
     auth_subject: auth.ArticlesWrite,
-    background_tasks: BackgroundTasks,
     organization_id: UUID4 = Query(),
     session: AsyncSession = Depends(get_db_session),
+    sessionmaker: AsyncSessionMaker = Depends(get_db_sessionmaker),
     authz: Authz = Depends(Authz.authz),
-) -> FileResponse:
+) -> StreamingResponse:
     """Export organization articles."""
-    zip_file = await article_service.export(
-        session, organization_id, auth_subject, authz
+    content = await article_service.export(
+        session, sessionmaker, organization_id, auth_subject, authz
     )
-    background_tasks.add_task(os.remove, zip_file)
-    return FileResponse(
-        zip_file,
+    return StreamingResponse(
+        content,
         media_type="application/zip",
         headers={"Content-Disposition": "attachment; filename=articles.zip"},
     )
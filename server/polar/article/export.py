@@ -0,0 +1,196 @@
+import asyncio
+import collections
+import dataclasses
+import re
+from collections.abc import AsyncIterator
+
+import httpx
+import structlog
+
+from polar.kit.db.postgres import AsyncSessionMaker
+from polar.kit.zip import IterableZipWriter
+from polar.logging import Logger
+from polar.models import Article
+from polar.postgres import sql
+
+log: Logger = structlog.get_logger()
+
+MAX_CONCURRENT_DOWNLOADS = 8
+"""Maximum number of assets downloaded at the same time."""
+PREFETCH_ARTICLES = 8
+"""Number of articles whose assets are downloaded ahead of the one being written."""
+DOWNLOAD_BUFFER_CHUNKS = 16
+"""Maximum number of chunks buffered in memory for each download."""
+
+VERCEL_IMAGE_PATTERN = re.compile(
+    r"(https://7vk6rcnylug0u6hg\.public\.blob\.vercel-storage\.com/(.+))\)$",
+    re.MULTILINE,
+)
+
+
+class _AssetDownload:
+    """
+    Download an asset in the background, as soon as a slot is available.
+
+    Chunks are buffered in a bounded queue until they're written to the archive.
+    """
+
+    def __init__(
+        self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str
+    ) -> None:
+        self.url = url
+        self._queue: asyncio.Queue[bytes | None | Exception] = asyncio.Queue(
+            DOWNLOAD_BUFFER_CHUNKS
+        )
+        self._task = asyncio.create_task(self._download(client, semaphore, url))
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+    async def _download(
+        self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str
+    ) -> None:
+        try:
+            async with semaphore:
+                async with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes():
+                        await self._queue.put(chunk)
+        except Exception as e:
+            await self._queue.put(e)
+        else:
+            await self._queue.put(None)
+
+
+@dataclasses.dataclass
+class _ArticleEntry:
+    slug: str
+    content: str
+    assets: list[tuple[str, _AssetDownload]]
+
+
+def _prepare_article(
+    client: httpx.AsyncClient, semaphore: asyncio.Semaphore, article: Article
+) -> _ArticleEntry:
+    assets: list[tuple[str, _AssetDownload]] = []
+
+    frontmatter_dict = {
+        "title": article.title,
+        "slug": article.slug,
+        "created_at": article.created_at.isoformat(),
+    }
+    if article.og_description is not None:
+        frontmatter_dict["og_description"] = article.og_description
+    if article.og_image_url is not None:
+        image_filename = article.og_image_url.split("/")[-1]
+        assets.append(
+            (image_filename, _AssetDownload(client, semaphore, article.og_image_url))
+        )
+        frontmatter_dict["og_image_url"] = f"./{image_filename}"
+
+    # Find images hosted on Vercel and download them
+    body = article.body
+    for match in VERCEL_IMAGE_PATTERN.finditer(body):
+        assets.append(
+            (match.group(2), _AssetDownload(client, semaphore, match.group(1)))
+        )
+        body = body.replace(match.group(0), f"./{match.group(2)}")
+
+    frontmatter = f"""---\n{"\n".join(f"{k}: {v}" for k, v in frontmatter_dict.items())}\n---\n\n"""
+    return _ArticleEntry(
+        slug=article.slug, content=f"{frontmatter}{body}", assets=assets
+    )
+
+
+async def _write_article(
+    writer: IterableZipWriter, entry: _ArticleEntry
+) -> AsyncIterator[bytes]:
+    for filename, download in entry.assets:
+        path = f"articles/{entry.slug}/{filename}"
+        chunks = aiter(download)
+        # The response has already started: a failed download can't abort it,
+        # so we leave a note in the archive instead.
+        try:
+            first_chunk = await anext(chunks, None)
+        except Exception as e:
+            _write_asset_error(writer, path, download.url, e)
+            yield writer.getchunk()
+            continue
+
+        error: Exception | None = None
+        with writer.open(path) as f:
+            if first_chunk is not None:
+                f.write(first_chunk)
+                yield writer.getchunk()
+            try:
+                async for chunk in chunks:
+                    f.write(chunk)
+                    yield writer.getchunk()
+            except Exception as e:
+                error = e
+
+        # The asset is truncated
+        if error is not None:
+            _write_asset_error(writer, path, download.url, error)
+        yield writer.getchunk()
+
+    writer.writestr(f"articles/{entry.slug}/{entry.slug}.md", entry.content)
+    yield writer.getchunk()
+
+
+def _write_asset_error(
+    writer: IterableZipWriter, path: str, url: str, error: Exception
+) -> None:
+    log.warning("article.export.asset_download_failed", url=url, error=str(error))
+    writer.writestr(
+        f"{path}.error.txt", f"The image {url} couldn't be downloaded: {error}\n"
+    )
+
+
+async def export_articles(
+    sessionmaker: AsyncSessionMaker, statement: sql.Select[tuple[Article, bool]]
+) -> AsyncIterator[bytes]:
+    """
+    Generate a ZIP archive of the articles and their images, by chunks.
+
+    Articles are streamed from the database, while the images of the next ones
+    are downloaded concurrently.
+    """
+    writer = IterableZipWriter()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+    pending: collections.deque[_ArticleEntry] = collections.deque()
+
+    # StreamingResponse is running its own async task to exhaust the iterator:
+    # we create a new session instead of relying on the request one.
+    async with sessionmaker() as session, httpx.AsyncClient() as client:
+        try:
+            results = await session.stream(statement)
+            async for result in results.unique():
+                article, _ = result._tuple()
+                pending.append(_prepare_article(client, semaphore, article))
+                if len(pending) > PREFETCH_ARTICLES:
+                    async for chunk in _write_article(writer, pending[0]):
+                        yield chunk
+                    pending.popleft()
+
+            while pending:
+                async for chunk in _write_article(writer, pending[0]):
+                    yield chunk
+                pending.popleft()
+        finally:
+            # Stop the downloads if we're interrupted, e.g. the client went away
+            for entry in pending:
+                for _, download in entry.assets:
+                    download.cancel()
+
+    writer.close()
+    yield writer.getchunk()
@@ -1,15 +1,11 @@
 from __future__ import annotations
 
-import re
-import tempfile
 import uuid
-import zipfile
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
 from datetime import datetime
 from operator import and_, or_
 from uuid import UUID
 
-import httpx
 from discord_webhook import AsyncDiscordWebhook, DiscordEmbed
 from slugify import slugify
 from sqlalchemy import Select, desc, false, func, nullsfirst, select, true, update
@@ -30,6 +26,7 @@ from polar.exceptions import (
     PolarRequestValidationError,
     ResourceNotFound,
 )
+from polar.kit.db.postgres import AsyncSessionMaker
 from polar.kit.pagination import PaginationParams, paginate
 from polar.kit.services import ResourceServiceReader
 from polar.kit.utils import utc_now
@@ -44,8 +41,12 @@ from polar.postgres import AsyncSession, sql
 from polar.user.service.user import user as user_service
 from polar.worker import enqueue_job
 
+from .export import export_articles
 from .schemas import ArticleCreate, ArticlePreview, ArticleUpdate
 
+SEND_CHUNK_SIZE = 100
+"""Number of receivers handled by a single `articles.send_to_users` job."""
+
 
 def polar_slugify(input: str) -> str:
     return slugify(
@@ -316,20 +317,22 @@ class ArticleService(ResourceServiceReader[Article]):
         article.notifications_sent_at = utc_now()
         session.add(article)
 
-        receivers = await article_service.list_receivers(
-            session, article.organization_id, article.paid_subscribers_only
-        )
-
-        for receiver_user_id, _, _ in receivers:
+        count = 0
+        async for receivers in self.stream_receivers(
+            session,
+            article.organization_id,
+            article.paid_subscribers_only,
+            chunk_size=SEND_CHUNK_SIZE,
+        ):
             enqueue_job(
-                "articles.send_to_user",
+                "articles.send_to_users",
                 article_id=article.id,
-                user_id=receiver_user_id,
-                is_test=False,
+                receivers=receivers,
             )
+            count += len(receivers)
 
         # after scheduling is complete
-        article.email_sent_to_count = len(receivers)
+        article.email_sent_to_count = count
         session.add(article)
 
         return article
@@ -404,40 +407,53 @@ class ArticleService(ResourceServiceReader[Article]):
     async def list_receivers(
         self, session: AsyncSession, organization_id: UUID, paid_subscribers_only: bool
     ) -> Sequence[tuple[UUID, bool, bool]]:
-        user_subscription_clause = (
-            ArticlesSubscription.organization_id == organization_id
+        statement = self._get_receivers_statement(
+            organization_id, paid_subscribers_only
         )
-        if paid_subscribers_only:
-            user_subscription_clause &= ArticlesSubscription.paid_subscriber.is_(True)
+        result = await session.execute(statement)
+        return result.tuples().all()
 
+    async def stream_receivers(
+        self,
+        session: AsyncSession,
+        organization_id: UUID,
+        paid_subscribers_only: bool,
+        *,
+        chunk_size: int,
+    ) -> AsyncIterator[Sequence[tuple[UUID, bool, bool]]]:
+        """
+        Same as `list_receivers`, but yield them by chunks,
+        without loading them all in memory.
+        """
+        statement = self._get_receivers_statement(
+            organization_id, paid_subscribers_only
+        ).execution_options(yield_per=chunk_size)
+        result = await session.stream(statement)
+
+        receivers: list[tuple[UUID, bool, bool]] = []
+        async for row in result:
+            receivers.append(row._tuple())
+            if len(receivers) == chunk_size:
+                yield receivers
+                receivers = []
+        if receivers:
+            yield receivers
+
+    async def list_receiver_users(
+        self, session: AsyncSession, organization_id: UUID, user_ids: Sequence[UUID]
+    ) -> Sequence[tuple[User, ArticlesSubscription | None]]:
         statement = (
-            select(
-                User.id,
-                func.coalesce(ArticlesSubscription.paid_subscriber, False),
-                UserOrganization.user_id.is_not(None),
-            )
-            .join(
-                UserOrganization,
-                onclause=(UserOrganization.user_id == User.id)
-                & (UserOrganization.organization_id == organization_id),
-                isouter=True,
-            )
+            select(User, ArticlesSubscription)
             .join(
                 ArticlesSubscription,
                 onclause=(ArticlesSubscription.user_id == User.id)
-                & (ArticlesSubscription.organization_id == organization_id)
-                & (ArticlesSubscription.emails_unsubscribed_at.is_(None)),
+                & (ArticlesSubscription.organization_id == organization_id),
                 isouter=True,
             )
-        ).where(
-            or_(
-                user_subscription_clause,
-                UserOrganization.organization_id == organization_id,
-            )
+            .where(User.id.in_(user_ids), User.deleted_at.is_(None))
         )
-
         result = await session.execute(statement)
-        return result.tuples().all()
+        return result.unique().tuples().all()
 
     async def release_paid_subscribers_only(self, session: AsyncSession) -> None:
         statement = (
@@ -469,10 +485,11 @@ class ArticleService(ResourceServiceReader[Article]):
     async def export(
         self,
         session: AsyncSession,
+        sessionmaker: AsyncSessionMaker,
         organization_id: UUID,
         auth_subject: AuthSubject[User | Organization],
         authz: Authz,
-    ) -> str:
+    ) -> AsyncIterator[bytes]:
         organization = await organization_service.get_by_id(
             session, auth_subject, organization_id
         )
@@ -484,48 +501,7 @@ class ArticleService(ResourceServiceReader[Article]):
         statement = self._get_readable_articles_statement(auth_subject).where(
             Article.organization_id == organization.id
         )
-        results = await session.stream(statement)
-
-        zip_file = tempfile.NamedTemporaryFile(delete=False, delete_on_close=False)
-        async with httpx.AsyncClient() as client:
-            with zipfile.ZipFile(zip_file, "w", zipfile.ZIP_DEFLATED) as archive:
-                async for result in results.unique():
-                    article, _ = result._tuple()
-                    frontmatter_dict = {
-                        "title": article.title,
-                        "slug": article.slug,
-                        "created_at": article.created_at.isoformat(),
-                    }
-                    if article.og_description is not None:
-                        frontmatter_dict["og_description"] = article.og_description
-                    if article.og_image_url is not None:
-                        image_filename = article.og_image_url.split("/")[-1]
-                        async with client.stream("GET", article.og_image_url) as stream:
-                            stream.raise_for_status()
-                            archive.writestr(
-                                f"articles/{article.slug}/{image_filename}",
-                                await stream.aread(),
-                            )
-                        frontmatter_dict["og_image_url"] = f"./{image_filename}"
-
-                    # Find images hosted on Vercel and download them
-                    body = article.body
-                    pattern = r"(https://7vk6rcnylug0u6hg\.public\.blob\.vercel-storage\.com/(.+))\)$"
-                    for match in re.finditer(pattern, body, re.MULTILINE):
-                        async with client.stream("GET", match.group(1)) as stream:
-                            stream.raise_for_status()
-                            archive.writestr(
-                                f"articles/{article.slug}/{match.group(2)}",
-                                await stream.aread(),
-                            )
-                        body = body.replace(match.group(0), f"./{match.group(2)}")
-
-                    frontmatter = f"""---\n{"\n".join(f"{k}: {v}" for k, v in frontmatter_dict.items())}\n---\n\n"""
-                    content = f"{frontmatter}{body}"
-                    archive.writestr(
-                        f"articles/{article.slug}/{article.slug}.md", content
-                    )
-        return zip_file.name
+        return export_articles(sessionmaker, statement)
 
     def _get_readable_articles_statement(
         self, auth_subject: AuthSubject[Subject], *, include_hidden: bool = True
@@ -597,6 +573,41 @@ class ArticleService(ResourceServiceReader[Article]):
 
         return statement
 
+    def _get_receivers_statement(
+        self, organization_id: UUID, paid_subscribers_only: bool
+    ) -> Select[tuple[UUID, bool, bool]]:
+        user_subscription_clause = (
+            ArticlesSubscription.organization_id == organization_id
+        )
+        if paid_subscribers_only:
+            user_subscription_clause &= ArticlesSubscription.paid_subscriber.is_(True)
+
+        return (
+            select(
+                User.id,
+                func.coalesce(ArticlesSubscription.paid_subscriber, False),
+                UserOrganization.user_id.is_not(None),
+            )
+            .join(
+                UserOrganization,
+                onclause=(UserOrganization.user_id == User.id)
+                & (UserOrganization.organization_id == organization_id),
+                isouter=True,
+            )
+            .join(
+                ArticlesSubscription,
+                onclause=(ArticlesSubscription.user_id == User.id)
+                & (ArticlesSubscription.organization_id == organization_id)
+                & (ArticlesSubscription.emails_unsubscribed_at.is_(None)),
+                isouter=True,
+            )
+        ).where(
+            or_(
+                user_subscription_clause,
+                UserOrganization.organization_id == organization_id,
+            )
+        )
+
     async def _get_available_slug(
         self,
         session: AsyncSession,
@@ -6,16 +6,18 @@ from sqlalchemy.orm import joinedload
 
 from polar.auth.service import AuthService
 from polar.config import settings
-from polar.email.sender import get_email_sender
+from polar.email.sender import Email, get_email_sender
 from polar.logging import Logger
-from polar.models import Article
+from polar.models import Article, ArticlesSubscription, User
 from polar.models.article import ArticleByline
+from polar.redis import Redis
 from polar.user.service.user import user as user_service
 from polar.worker import (
     AsyncSessionMaker,
     CronTrigger,
     JobContext,
     PolarWorkerContext,
+    get_worker_redis,
     task,
 )
 
@@ -23,6 +25,154 @@ from .service import article_service
 
 log: Logger = structlog.get_logger()
 
+UNSUBSCRIBE_ID_PLACEHOLDER = "polar_unsubscribe_subscriber_id"
+RENDER_CACHE_TTL = 3600
+
+
+def _get_unsubscribe_link(article: Article, subscriber_id: str) -> str:
+    return f"https://polar.sh/unsubscribe?org={article.organization.slug}&id={subscriber_id}"
+
+
+async def _render_article(
+    client: httpx.AsyncClient,
+    article: Article,
+    user: User,
+    *,
+    unsubscribe_link: str | None,
+) -> str | None:
+    (jwt, _) = AuthService.generate_token(user)
+
+    # _, magic_link_token = await magic_link_service.request(
+    #     session,
+    #     user.email,
+    #     source="article_links",
+    #     expires_at=utc_now() + timedelta(hours=24),
+    # )
+
+    render_data = {
+        # Add pre-authenticated tokens to the end of all links in the email
+        # "inject_magic_link_token": magic_link_token,
+    }
+    if unsubscribe_link is not None:
+        render_data["unsubscribe_link"] = unsubscribe_link
+
+    response = await client.post(
+        f"{settings.FRONTEND_BASE_URL}/email/article/{article.id}",
+        json=render_data,
+        # Authenticating to the renderer as the user we're sending the email to
+        headers={"Cookie": f"polar_session={jwt};"},
+        # Increase the default timeout because it can be slow to render
+        timeout=60,
+    )
+
+    if not response.is_success:
+        log.error(f"failed to get rendered article: code={response.status_code}")
+        return None
+
+    return response.text
+
+
+def _get_email(
+    article: Article,
+    user: User,
+    html_content: str,
+    *,
+    unsubscribe_link: str | None,
+    is_test: bool,
+) -> Email:
+    assert user.email is not None
+
+    subject = "[TEST] " if is_test else ""
+    subject += article.title
+
+    email_headers: dict[str, str] = {}
+    if unsubscribe_link is not None:
+        email_headers["List-Unsubscribe"] = f"<{unsubscribe_link}>"
+
+    from_name = ""
+    if article.byline == ArticleByline.user and article.user is not None:
+        from_name = article.user.public_name
+        if article.user.email:
+            email_headers["Reply-To"] = f"{from_name} <{article.user.email}>"
+    else:
+        from_name = article.organization.name or article.organization.slug
+        if article.organization.email:
+            email_headers["Reply-To"] = f"{from_name} <{article.organization.email}>"
+
+    return Email(
+        to_email_addr=user.email,
+        subject=subject,
+        html_content=html_content,
+        from_name=from_name,
+        from_email_addr=f"{article.organization.slug}@posts.polar.sh",
+        email_headers=email_headers,
+    )
+
+
+class _ArticleVariantRenderer:
+    """
+    Render an article email once per variant of the content:
+    paid subscriber or not, organization member or not, and subscribed or not.
+
+    Unsubscribe links are rendered with a placeholder instead of the subscriber ID,
+    which is substituted for each receiver. Rendered variants are cached in Redis,
+    so the chunks of a newsletter share them.
+    """
+
+    def __init__(
+        self, redis: Redis, client: httpx.AsyncClient, article: Article
+    ) -> None:
+        self.redis = redis
+        self.client = client
+        self.article = article
+        self._rendered: dict[tuple[bool, bool, bool], str | None] = {}
+
+    async def render(
+        self,
+        user: User,
+        *,
+        paid_subscriber: bool,
+        member: bool,
+        subscriber: ArticlesSubscription | None,
+    ) -> str | None:
+        variant = (paid_subscriber, member, subscriber is not None)
+        if variant not in self._rendered:
+            self._rendered[variant] = await self._get_variant(user, variant)
+
+        html_content = self._rendered[variant]
+        if html_content is not None and subscriber is not None:
+            html_content = html_content.replace(
+                UNSUBSCRIBE_ID_PLACEHOLDER, str(subscriber.id)
+            )
+        return html_content
+
+    async def _get_variant(
+        self, user: User, variant: tuple[bool, bool, bool]
+    ) -> str | None:
+        # Include the revision, so an edited article is rendered again
+        revision = (self.article.modified_at or self.article.created_at).timestamp()
+        key = f"article_email:{self.article.id}:{revision}:" + "".join(
+            str(int(flag)) for flag in variant
+        )
+
+        if (html_content := await self.redis.get(key)) is not None:
+            return html_content
+
+        _, _, subscribed = variant
+        html_content = await _render_article(
+            self.client,
+            self.article,
+            user,
+            unsubscribe_link=_get_unsubscribe_link(
+                self.article, UNSUBSCRIBE_ID_PLACEHOLDER
+            )
+            if subscribed
+            else None,
+        )
+        if html_content is not None:
+            await self.redis.set(key, html_content, ex=RENDER_CACHE_TTL)
+        return html_content
+
 
 @task("articles.send_to_user")
 async def articles_send_to_user(
@@ -34,7 +184,7 @@ async def articles_send_to_user(
 ) -> None:
     async with AsyncSessionMaker(ctx) as session:
         user = await user_service.get(session, user_id)
-        if not user:
+        if not user or not user.email:
             # err?
             return
 
@@ -49,71 +199,97 @@ async def articles_send_to_user(
         if not article:
             return
 
-        subject = "[TEST] " if is_test else ""
-        subject += article.title
-
-        (jwt, _) = AuthService.generate_token(user)
-
-        # _, magic_link_token = await magic_link_service.request(
-        #     session,
-        #     user.email,
-        #     source="article_links",
-        #     expires_at=utc_now() + timedelta(hours=24),
-        # )
-
-        email_headers: dict[str, str] = {}
-
-        render_data = {
-            # Add pre-authenticated tokens to the end of all links in the email
-            # "inject_magic_link_token": magic_link_token,
-        }
-
         # Get subscriber ID (if exists)
         subscriber = await article_service.get_subscriber(
             session, user_id, article.organization_id
         )
-        if subscriber:
-            unsubscribe_link = f"https://polar.sh/unsubscribe?org={article.organization.slug}&id={subscriber.id}"
-            render_data["unsubscribe_link"] = unsubscribe_link
-            email_headers["List-Unsubscribe"] = f"<{unsubscribe_link}>"
+        unsubscribe_link = (
+            _get_unsubscribe_link(article, str(subscriber.id)) if subscriber else None
+        )
 
         async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.FRONTEND_BASE_URL}/email/article/{article.id}",
-                json=render_data,
-                # Authenticating to the renderer as the user we're sending the email to
-                headers={"Cookie": f"polar_session={jwt};"},
-                # Increase the default timeout because it can be slow to render
-                timeout=60,
+            html_content = await _render_article(
+                client, article, user, unsubscribe_link=unsubscribe_link
             )
+        if html_content is None:
+            return
 
-        if not response.is_success:
-            log.error(f"failed to get rendered article: code={response.status_code}")
-            return None
-
-        from_name = ""
-        if article.byline == ArticleByline.user and article.user is not None:
-            from_name = article.user.public_name
-            if article.user.email:
-                email_headers["Reply-To"] = f"{from_name} <{article.user.email}>"
-        else:
-            from_name = article.organization.name or article.organization.slug
-            if article.organization.email:
-                email_headers["Reply-To"] = (
-                    f"{from_name} <{article.organization.email}>"
+        email_sender = get_email_sender()
+        await email_sender.send_many(
+            [
+                _get_email(
+                    article,
+                    user,
+                    html_content,
+                    unsubscribe_link=unsubscribe_link,
+                    is_test=is_test,
                 )
+            ]
+        )
 
-        email_sender = get_email_sender()
 
-        email_sender.send_to_user(
-            to_email_addr=user.email,
-            subject=subject,
-            html_content=response.text,
-            from_name=from_name,
-            from_email_addr=f"{article.organization.slug}@posts.polar.sh",
-            email_headers=email_headers,
+@task("articles.send_to_users")
+async def articles_send_to_users(
+    ctx: JobContext,
+    article_id: UUID,
+    receivers: list[tuple[UUID, bool, bool]],
+    polar_context: PolarWorkerContext,
+) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        article = await article_service.get(
+            session,
+            article_id,
+            options=(
+                joinedload(Article.user),
+                joinedload(Article.organization),
+            ),
+        )
+        if not article:
+            return
+
+        variants = {
+            user_id: (paid_subscriber, member)
+            for user_id, paid_subscriber, member in receivers
+        }
+        receiver_users = await article_service.list_receiver_users(
+            session, article.organization_id, list(variants.keys())
         )
 
+        emails: list[Email] = []
+        async with httpx.AsyncClient() as client:
+            renderer = _ArticleVariantRenderer(get_worker_redis(ctx), client, article)
+            for user, subscriber in receiver_users:
+                if not user.email:
+                    continue
+
+                paid_subscriber, member = variants[user.id]
+                html_content = await renderer.render(
+                    user,
+                    paid_subscriber=paid_subscriber,
+                    member=member,
+                    subscriber=subscriber,
+                )
+                if html_content is None:
+                    continue
+
+                emails.append(
+                    _get_email(
+                        article,
+                        user,
+                        html_content,
+                        unsubscribe_link=_get_unsubscribe_link(
+                            article, str(subscriber.id)
+                        )
+                        if subscriber
+                        else None,
+                        is_test=False,
+                    )
+                )
+
+        if emails:
+            email_sender = get_email_sender()
+            await email_sender.send_many(emails)
+
 
 @task("articles.send_scheduled", cron_trigger=CronTrigger(second=0))
 async def articles_send_scheduled(
@@ -0,0 +1,146 @@
+import asyncio
+import dataclasses
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from uuid import UUID
+
+import structlog
+
+from polar.config import settings
+from polar.eventstream.multiplexer import EventStreamMultiplexer
+from polar.eventstream.service import enqueue_message
+from polar.logging import Logger
+from polar.models import Organization, User
+
+from .models import AuthMethod
+from .scope import Scope
+
+log: Logger = structlog.get_logger()
+
+INVALIDATION_CHANNEL = "auth:invalidate"
+
+
+@dataclasses.dataclass(frozen=True)
+class CachedAuthSubject:
+    subject_type: type[User] | type[Organization]
+    subject_id: UUID
+    scopes: frozenset[Scope]
+    method: AuthMethod
+    expires_at: float
+    """Unix timestamp after which the entry can't be used anymore."""
+    personal_access_token_id: UUID | None = None
+
+
+class AuthSubjectCache:
+    """
+    In-process LRU cache of the subjects resolved from access tokens, keyed by the
+    token hash.
+
+    Entries are short-lived and dropped as soon as the token is revoked, in every
+    process, thanks to invalidation messages sent through Redis.
+    The cache is only used while we listen to those messages.
+
+    Only the subject identity is cached: the subject itself is loaded again on
+    each request, so blocking a user or an organization takes effect immediately.
+    """
+
+    def __init__(self, *, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, CachedAuthSubject] = OrderedDict()
+        self._listening = False
+
+    def get(self, token_hash: str) -> CachedAuthSubject | None:
+        if not self._listening:
+            return None
+
+        entry = self._entries.get(token_hash)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= time.time():
+            del self._entries[token_hash]
+            return None
+
+        self._entries.move_to_end(token_hash)
+        return entry
+
+    def set(
+        self,
+        token_hash: str,
+        *,
+        subject: User | Organization,
+        scopes: Iterable[Scope],
+        method: AuthMethod,
+        expires_at: float,
+        personal_access_token_id: UUID | None = None,
+    ) -> None:
+        if not self._listening:
+            return
+
+        self._entries[token_hash] = CachedAuthSubject(
+            subject_type=type(subject),
+            subject_id=subject.id,
+            scopes=frozenset(scopes),
+            method=method,
+            expires_at=min(time.time() + self.ttl, expires_at),
+            personal_access_token_id=personal_access_token_id,
+        )
+        self._entries.move_to_end(token_hash)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *token_hashes: str) -> None:
+        """
+        Drop the given tokens from the cache of every process.
+
+        The invalidation message is sent at the end of the current request or job.
+        """
+        self._discard(token_hashes)
+        enqueue_message(
+            json.dumps({"token_hashes": list(token_hashes)}), [INVALIDATION_CHANNEL]
+        )
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def listen(
+        self, multiplexer: EventStreamMultiplexer, *, retry_delay: float = 1.0
+    ) -> None:
+        while True:
+            try:
+                async with multiplexer.subscribe(
+                    [INVALIDATION_CHANNEL]
+                ) as subscription:
+                    self._listening = True
+                    async for message in subscription:
+                        self._handle_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("auth.cache.listen_error", error=str(e))
+            finally:
+                # We may have missed invalidations: start over
+                self._listening = False
+                self.clear()
+            await asyncio.sleep(retry_delay)
+
+    def _handle_message(self, message: str) -> None:
+        try:
+            token_hashes = json.loads(message)["token_hashes"]
+        except (ValueError, KeyError, TypeError):
+            log.warning("auth.cache.invalid_message", message=message)
+            return
+        self._discard(token_hashes)
+
+    def _discard(self, token_hashes: Iterable[str]) -> None:
+        for token_hash in token_hashes:
+            self._entries.pop(token_hash, None)
+
+
+auth_subject_cache = AuthSubjectCache(
+    max_size=settings.AUTH_SUBJECT_CACHE_MAX_SIZE,
+    ttl=settings.AUTH_SUBJECT_CACHE_TTL_SECONDS,
+)
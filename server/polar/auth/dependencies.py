@@ -1,19 +1,29 @@
 from inspect import Parameter, Signature
-from typing import Annotated
+from typing import Annotated, cast
+from uuid import UUID
 
 from fastapi import Depends, Request, Security
+from fastapi.security import HTTPAuthorizationCredentials
 from makefun import with_signature
 
 from polar.auth.scope import RESERVED_SCOPES, Scope
 from polar.config import settings
 from polar.exceptions import NotPermitted, Unauthorized
-from polar.models import OAuth2Token, PersonalAccessToken
-from polar.oauth2.dependencies import get_optional_token
+from polar.kit.crypto import get_token_hash
+from polar.kit.utils import utc_now
+from polar.models import Organization
+from polar.oauth2.dependencies import openid_scheme
 from polar.oauth2.exceptions import InsufficientScopeError, InvalidTokenError
-from polar.personal_access_token.dependencies import get_optional_personal_access_token
+from polar.oauth2.service.oauth2_token import oauth2_token as oauth2_token_service
+from polar.personal_access_token.dependencies import auth_header_scheme
+from polar.personal_access_token.service import (
+    personal_access_token as personal_access_token_service,
+)
 from polar.postgres import AsyncSession, get_db_session
 from polar.sentry import set_sentry_user
+from polar.worker import enqueue_job
 
+from .cache import auth_subject_cache
 from .models import (
     SUBJECTS,
     Anonymous,
@@ -31,12 +41,75 @@ async def _get_cookie_token(request: Request) -> str | None:
     return request.cookies.get(settings.AUTH_COOKIE_KEY)
 
 
+async def _get_token_auth_subject(
+    session: AsyncSession, token: str
+) -> AuthSubject[User | Organization] | None:
+    token_hash = get_token_hash(token, secret=settings.SECRET)
+
+    cached = auth_subject_cache.get(token_hash)
+    if cached is not None:
+        subject = cast(
+            User | Organization | None,
+            await session.get(cached.subject_type, cached.subject_id),
+        )
+        if subject is not None:
+            if subject.blocked_at is not None:
+                raise NotPermitted()
+            if cached.personal_access_token_id is not None:
+                _record_personal_access_token_usage(cached.personal_access_token_id)
+            return AuthSubject(subject, set(cached.scopes), cached.method)
+
+    oauth2_token = await oauth2_token_service.get_by_access_token(session, token)
+    if oauth2_token:
+        auth_subject = AuthSubject(
+            oauth2_token.sub, oauth2_token.scopes, AuthMethod.OAUTH2_ACCESS_TOKEN
+        )
+        auth_subject_cache.set(
+            token_hash,
+            subject=auth_subject.subject,
+            scopes=auth_subject.scopes,
+            method=auth_subject.method,
+            expires_at=oauth2_token.expires_at,
+        )
+        return auth_subject
+
+    personal_access_token = await personal_access_token_service.get_by_token(
+        session, token
+    )
+    if personal_access_token:
+        _record_personal_access_token_usage(personal_access_token.id)
+        auth_subject = AuthSubject(
+            personal_access_token.user,
+            personal_access_token.scopes,
+            AuthMethod.PERSONAL_ACCESS_TOKEN,
+        )
+        auth_subject_cache.set(
+            token_hash,
+            subject=auth_subject.subject,
+            scopes=auth_subject.scopes,
+            method=auth_subject.method,
+            expires_at=personal_access_token.expires_at.timestamp(),
+            personal_access_token_id=personal_access_token.id,
+        )
+        return auth_subject
+
+    return None
+
+
+def _record_personal_access_token_usage(personal_access_token_id: UUID) -> None:
+    enqueue_job(
+        "personal_access_token.record_usage",
+        personal_access_token_id=personal_access_token_id,
+        last_used_at=utc_now(),
+    )
+
+
 async def get_auth_subject(
     cookie_token: str | None = Depends(_get_cookie_token),
-    oauth2_credentials: tuple[OAuth2Token | None, bool] = Depends(get_optional_token),
-    personal_access_token_credentials: tuple[
-        PersonalAccessToken | None, bool
-    ] = Depends(get_optional_personal_access_token),
+    # Both schemes read the same bearer token: they are declared so the
+    # OpenAPI schema documents both authentication methods.
+    oauth2_authorization: str | None = Depends(openid_scheme),
+    auth_header: HTTPAuthorizationCredentials | None = Depends(auth_header_scheme),
     session: AsyncSession = Depends(get_db_session),
 ) -> AuthSubject[Subject]:
     if cookie_token is not None:
@@ -51,25 +124,11 @@ async def get_auth_subject(
                 scopes.add(Scope.admin)
             return AuthSubject(user, scopes, AuthMethod.COOKIE)
 
-    oauth2_token, oauth2_authorization_set = oauth2_credentials
-    personal_access_token, personal_access_token_authorization_set = (
-        personal_access_token_credentials
-    )
-
-    if oauth2_token:
-        return AuthSubject(
-            oauth2_token.sub, oauth2_token.scopes, AuthMethod.OAUTH2_ACCESS_TOKEN
-        )
-
-    if personal_access_token:
-        return AuthSubject(
-            personal_access_token.user,
-            personal_access_token.scopes,
-            AuthMethod.PERSONAL_ACCESS_TOKEN,
-        )
-
-    if oauth2_authorization_set or personal_access_token_authorization_set:
-        raise InvalidTokenError()
+    if auth_header is not None:
+        auth_subject = await _get_token_auth_subject(session, auth_header.credentials)
+        if auth_subject is None:
+            raise InvalidTokenError()
+        return auth_subject
 
     return AuthSubject(Anonymous(), set(), AuthMethod.NONE)
 
@@ -3,13 +3,10 @@ from typing import Self
 from uuid import UUID
 
 from fastapi import Depends
-from sqlalchemy.orm import joinedload
 
 from polar.auth.models import Anonymous, Subject
-from polar.external_organization.service import (
-    external_organization as external_organization_service,
-)
 from polar.issue.service import issue as issue_service
+from polar.loaders import Loaders
 from polar.models.account import Account
 from polar.models.article import Article
 from polar.models.benefit import Benefit
@@ -27,9 +24,6 @@ from polar.models.user import User
 from polar.models.webhook_endpoint import WebhookEndpoint
 from polar.postgres import AsyncSession, get_db_session
 from polar.repository.service import repository as repository_service
-from polar.user_organization.service import (
-    user_organization as user_organization_service,
-)
 
 
 class AccessType(StrEnum):
@@ -58,19 +52,23 @@ Object = (
 
 class Authz:
     session: AsyncSession
+    loaders: Loaders
 
     # request scoped caches
     _cache_can_user_read_repository_id: dict[tuple[UUID, UUID], bool]
-    _cache_is_member: dict[tuple[UUID, UUID], bool]
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, loaders: Loaders | None = None):
         self.session = session
+        self.loaders = loaders if loaders is not None else Loaders(session)
         self._cache_can_user_read_repository_id = {}
-        self._cache_is_member = {}
 
     @classmethod
-    async def authz(cls, session: AsyncSession = Depends(get_db_session)) -> Self:
-        return cls(session=session)
+    async def authz(
+        cls,
+        session: AsyncSession = Depends(get_db_session),
+        loaders: Loaders = Depends(Loaders.loaders),
+    ) -> Self:
+        return cls(session=session, loaders=loaders)
 
     async def can(
         self, subject: Subject, accessType: AccessType, object: Object
@@ -360,10 +358,8 @@ class Authz:
     async def _get_linked_organization_from_external_organization(
         self, external_organization_id: UUID
     ) -> Organization | None:
-        external_organization = await external_organization_service.get(
-            self.session,
-            external_organization_id,
-            options=(joinedload(ExternalOrganization.organization),),
+        external_organization = await self.loaders.external_organization.load(
+            external_organization_id
         )
 
         if external_organization is None:
@@ -407,21 +403,7 @@ class Authz:
         return False
 
     async def _is_member(self, user_id: UUID, organization_id: UUID) -> bool:
-        key = (user_id, organization_id)
-        if key in self._cache_is_member:
-            return self._cache_is_member[key]
-
-        memberships = await user_organization_service.list_by_user_id(
-            self.session, user_id
-        )
-
-        for m in memberships:
-            if m.organization_id == organization_id:
-                self._cache_is_member[key] = True
-                return True
-
-        self._cache_is_member[key] = False
-        return False
+        return await self.loaders.is_member(user_id, organization_id)
 
     #
     # Account
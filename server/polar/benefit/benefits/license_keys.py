@@ -41,6 +41,7 @@ class BenefitLicenseKeysService(
 
         key = await license_key_service.user_grant(
             self.session,
+            self.redis,
             user=user,
             benefit=benefit,
             license_key_id=current_lk_id,
@@ -70,6 +71,7 @@ class BenefitLicenseKeysService(
 
         await license_key_service.user_revoke(
             self.session,
+            self.redis,
             user=user,
             benefit=benefit,
             license_key_id=UUID(license_key_id),
@@ -5,6 +5,10 @@ from pydantic import UUID4
 from sse_starlette.sse import EventSourceResponse
 
 from polar.eventstream.endpoints import subscribe
+from polar.eventstream.multiplexer import (
+    EventStreamMultiplexer,
+    get_eventstream_multiplexer,
+)
 from polar.eventstream.service import Receivers
 from polar.exceptions import ResourceNotFound
 from polar.kit.pagination import ListResource, PaginationParamsQuery
@@ -109,10 +113,11 @@ async def create(
     auth_subject: auth.CheckoutWrite,
     ip_geolocation_client: ip_geolocation.IPGeolocationClient,
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> Checkout:
     """Create a checkout session."""
     return await checkout_service.create(
-        session, checkout_create, auth_subject, ip_geolocation_client
+        session, redis, checkout_create, auth_subject, ip_geolocation_client
     )
 
 
@@ -131,6 +136,7 @@ async def update(
     auth_subject: auth.CheckoutWrite,
     ip_geolocation_client: ip_geolocation.IPGeolocationClient,
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> Checkout:
     """Update a checkout session."""
     checkout = await checkout_service.get_by_id(session, auth_subject, id)
@@ -139,7 +145,7 @@ async def update(
         raise ResourceNotFound()
 
     return await checkout_service.update(
-        session, checkout, checkout_update, ip_geolocation_client
+        session, redis, checkout, checkout_update, ip_geolocation_client
     )
 
 
@@ -175,11 +181,17 @@ async def client_create(
     auth_subject: auth.CheckoutWeb,
     ip_geolocation_client: ip_geolocation.IPGeolocationClient,
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> Checkout:
     """Create a checkout session from a client. Suitable to build checkout links."""
     ip_address = request.client.host if request.client else None
     return await checkout_service.client_create(
-        session, checkout_create, auth_subject, ip_geolocation_client, ip_address
+        session,
+        redis,
+        checkout_create,
+        auth_subject,
+        ip_geolocation_client,
+        ip_address,
     )
 
 
@@ -197,6 +209,7 @@ async def client_update(
     checkout_update: CheckoutUpdatePublic,
     ip_geolocation_client: ip_geolocation.IPGeolocationClient,
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> Checkout:
     """Update a checkout session by client secret."""
     checkout = await checkout_service.get_by_client_secret(session, client_secret)
@@ -205,7 +218,7 @@ async def client_update(
         raise ResourceNotFound()
 
     return await checkout_service.update(
-        session, checkout, checkout_update, ip_geolocation_client
+        session, redis, checkout, checkout_update, ip_geolocation_client
     )
 
 
@@ -222,6 +235,7 @@ async def client_confirm(
     client_secret: CheckoutClientSecret,
     checkout_confirm: CheckoutConfirm,
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> Checkout:
     """
     Confirm a checkout session by client secret.
@@ -233,15 +247,14 @@ async def client_confirm(
     if checkout is None:
         raise ResourceNotFound()
 
-    return await checkout_service.confirm(session, checkout, checkout_confirm)
+    return await checkout_service.confirm(session, redis, checkout, checkout_confirm)
 
 
 @router.get("/client/{client_secret}/stream", include_in_schema=False)
 async def client_stream(
-    request: Request,
     client_secret: CheckoutClientSecret,
     session: AsyncSession = Depends(get_db_session),
-    redis: Redis = Depends(get_redis),
+    multiplexer: EventStreamMultiplexer = Depends(get_eventstream_multiplexer),
 ) -> EventSourceResponse:
     checkout = await checkout_service.get_by_client_secret(session, client_secret)
 
@@ -249,4 +262,4 @@ async def client_stream(
         raise ResourceNotFound()
 
     receivers = Receivers(checkout_client_secret=checkout.client_secret)
-    return EventSourceResponse(subscribe(redis, receivers.get_channels(), request))
+    return EventSourceResponse(subscribe(multiplexer, receivers.get_channels()))
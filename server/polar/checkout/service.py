@@ -53,6 +53,7 @@ from polar.organization.service import organization as organization_service
 from polar.postgres import AsyncSession
 from polar.product.service.product import product as product_service
 from polar.product.service.product_price import product_price as product_price_service
+from polar.redis import Redis
 from polar.user.service.user import user as user_service
 from polar.webhook.service import webhook as webhook_service
 from polar.worker import enqueue_job
@@ -200,6 +201,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
     async def create(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_create: CheckoutCreate,
         auth_subject: AuthSubject[User | Organization],
         ip_geolocation_client: ip_geolocation.IPGeolocationClient | None = None,
@@ -347,7 +349,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
         )
 
         try:
-            checkout = await self._update_checkout_tax(session, checkout)
+            checkout = await self._update_checkout_tax(session, redis, checkout)
         # Swallow incomplete tax calculation error: require it only on confirm
         except TaxCalculationError:
             pass
@@ -360,6 +362,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
     async def client_create(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_create: CheckoutCreatePublic,
         auth_subject: AuthSubject[User | Anonymous],
         ip_geolocation_client: ip_geolocation.IPGeolocationClient | None = None,
@@ -451,7 +454,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
         )
 
         try:
-            checkout = await self._update_checkout_tax(session, checkout)
+            checkout = await self._update_checkout_tax(session, redis, checkout)
         # Swallow incomplete tax calculation error: require it only on confirm
         except TaxCalculationError:
             pass
@@ -466,6 +469,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
     async def checkout_link_create(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_link: CheckoutLink,
         ip_geolocation_client: ip_geolocation.IPGeolocationClient | None = None,
         ip_address: str | None = None,
@@ -530,7 +534,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
         )
 
         try:
-            checkout = await self._update_checkout_tax(session, checkout)
+            checkout = await self._update_checkout_tax(session, redis, checkout)
         # Swallow incomplete tax calculation error: require it only on confirm
         except TaxCalculationError:
             pass
@@ -543,6 +547,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
     async def update(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout: Checkout,
         checkout_update: CheckoutUpdate | CheckoutUpdatePublic,
         ip_geolocation_client: ip_geolocation.IPGeolocationClient | None = None,
@@ -551,7 +556,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
             session, checkout, checkout_update, ip_geolocation_client
         )
         try:
-            checkout = await self._update_checkout_tax(session, checkout)
+            checkout = await self._update_checkout_tax(session, redis, checkout)
         # Swallow incomplete tax calculation error: require it only on confirm
         except TaxCalculationError:
             pass
@@ -562,6 +567,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
     async def confirm(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout: Checkout,
         checkout_confirm: CheckoutConfirm,
     ) -> Checkout:
@@ -569,7 +575,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
 
         errors: list[ValidationError] = []
         try:
-            checkout = await self._update_checkout_tax(session, checkout)
+            checkout = await self._update_checkout_tax(session, redis, checkout)
         except TaxCalculationError as e:
             errors.append(
                 {
@@ -1071,7 +1077,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
         return checkout
 
     async def _update_checkout_tax(
-        self, session: AsyncSession, checkout: Checkout
+        self, session: AsyncSession, redis: Redis, checkout: Checkout
     ) -> Checkout:
         if (
             checkout.currency is not None
@@ -1081,6 +1087,7 @@ class CheckoutService(ResourceServiceReader[Checkout]):
         ):
             try:
                 tax_amount = await calculate_tax(
+                    redis,
                     checkout.currency,
                     checkout.amount,
                     checkout.product.stripe_product_id,
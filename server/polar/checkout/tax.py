@@ -1,11 +1,15 @@
+import collections
+import datetime
 import hashlib
 import json
+import time
 from collections.abc import Sequence
 from enum import StrEnum
 from typing import Any, LiteralString
 
 import stdnum.exceptions
 import stripe as stripe_lib
+import structlog
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.engine.interfaces import Dialect
 from sqlalchemy.types import TypeDecorator
@@ -14,6 +18,10 @@ from stdnum import get_cc_module
 from polar.exceptions import PolarError
 from polar.integrations.stripe.service import stripe as stripe_service
 from polar.kit.address import Address
+from polar.logging import Logger
+from polar.redis import Redis
+
+log: Logger = structlog.get_logger()
 
 
 class TaxIDFormat(StrEnum):
@@ -284,14 +292,129 @@ class InvalidTaxLocation(TaxCalculationError):
         )
 
 
+TaxCalculationResult = int | IncompleteTaxLocation | InvalidTaxLocation
+
+
+class TaxCalculationCache:
+    """
+    Cache of tax calculations, keyed by a digest of their inputs.
+
+    Lookups go through an in-process LRU first, then through Redis, so repeated
+    checkout updates with the same inputs don't reach Stripe.
+
+    Tax location errors are cached as well, for a shorter time: while the customer
+    is filling the address, the same incomplete one is usually submitted again.
+
+    Results are kept in their serialized form, and a new exception is built
+    from it on every hit, so errors are never shared between requests.
+
+    Hits and misses are counted in `stats` and logged, so the hit rate can be
+    followed.
+    """
+
+    def __init__(
+        self,
+        *,
+        local_size: int = 1024,
+        ttl: datetime.timedelta = datetime.timedelta(hours=1),
+        error_ttl: datetime.timedelta = datetime.timedelta(minutes=1),
+    ) -> None:
+        self.local_size = local_size
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.stats: collections.Counter[str] = collections.Counter()
+        self._local: collections.OrderedDict[str, tuple[float, dict[str, Any]]] = (
+            collections.OrderedDict()
+        )
+
+    async def get(self, redis: Redis, key: str) -> TaxCalculationResult | None:
+        if (local := self._local.get(key)) is not None:
+            expires_at, data = local
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                self._hit("local")
+                return self._deserialize(data)
+            del self._local[key]
+
+        value = await redis.get(self._get_redis_key(key))
+        if value is None:
+            self._hit("miss")
+            return None
+
+        data = json.loads(value)
+        ttl = await redis.pttl(self._get_redis_key(key))
+        self._set_local(key, data, ttl / 1000 if ttl > 0 else 0)
+        self._hit("redis")
+        return self._deserialize(data)
+
+    async def set(self, redis: Redis, key: str, result: TaxCalculationResult) -> None:
+        ttl = self.ttl if isinstance(result, int) else self.error_ttl
+        data = self._serialize(result)
+        await redis.set(self._get_redis_key(key), json.dumps(data), ex=ttl)
+        self._set_local(key, data, ttl.total_seconds())
+
+    def clear(self) -> None:
+        self._local.clear()
+        self.stats.clear()
+
+    def _hit(self, source: str) -> None:
+        self.stats[source] += 1
+        total = sum(self.stats.values())
+        log.debug(
+            "checkout.tax.cache",
+            source=source,
+            hit_rate=round((total - self.stats["miss"]) / total, 4),
+        )
+
+    def _set_local(self, key: str, data: dict[str, Any], ttl: float) -> None:
+        self._local[key] = (time.monotonic() + ttl, data)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def _get_redis_key(self, key: str) -> str:
+        return f"checkout:tax_calculation:{key}"
+
+    def _serialize(self, result: TaxCalculationResult) -> dict[str, Any]:
+        if isinstance(result, int):
+            return {"tax_amount": result}
+        error = result.stripe_error
+        return {
+            "error": "incomplete"
+            if isinstance(result, IncompleteTaxLocation)
+            else "invalid",
+            "message": error.user_message,
+            "param": getattr(error, "param", None),
+            "code": error.code,
+        }
+
+    def _deserialize(self, data: dict[str, Any]) -> TaxCalculationResult:
+        if "tax_amount" in data:
+            return data["tax_amount"]
+        if data["error"] == "incomplete":
+            return IncompleteTaxLocation(
+                stripe_lib.InvalidRequestError(
+                    data["message"], data["param"], code=data["code"]
+                )
+            )
+        return InvalidTaxLocation(
+            stripe_lib.StripeError(data["message"], code=data["code"])
+        )
+
+
+tax_calculation_cache = TaxCalculationCache()
+
+
 async def calculate_tax(
+    redis: Redis,
     currency: str,
     amount: int,
     stripe_product_id: str,
     address: Address,
     tax_ids: list[TaxID],
 ) -> int:
-    # Compute an idempotency key based on the input parameters to work as a sort of cache
+    # Compute a key based on the input parameters, used both for our cache
+    # and as Stripe idempotency key
     address_str = address.model_dump_json()
     tax_ids_str = ",".join(f"{tax_id[0]}:{tax_id[1]}" for tax_id in tax_ids)
     idempotency_key_str = (
@@ -299,6 +422,12 @@ async def calculate_tax(
     )
     idempotency_key = hashlib.sha256(idempotency_key_str.encode()).hexdigest()
 
+    cached = await tax_calculation_cache.get(redis, idempotency_key)
+    if isinstance(cached, TaxCalculationError):
+        raise cached
+    if cached is not None:
+        return cached
+
     try:
         calculation = await stripe_service.create_tax_calculation(
             currency=currency,
@@ -323,11 +452,18 @@ async def calculate_tax(
             and e.error.param is not None
             and e.error.param.startswith("customer_details[address]")
         ):
-            raise IncompleteTaxLocation(e) from e
+            incomplete_error = IncompleteTaxLocation(e)
+            await tax_calculation_cache.set(redis, idempotency_key, incomplete_error)
+            raise incomplete_error from e
         raise
     except stripe_lib.StripeError as e:
         if e.error is None or e.error.code != "customer_tax_location_invalid":
             raise
-        raise InvalidTaxLocation(e) from e
+        invalid_error = InvalidTaxLocation(e)
+        await tax_calculation_cache.set(redis, idempotency_key, invalid_error)
+        raise invalid_error from e
     else:
+        await tax_calculation_cache.set(
+            redis, idempotency_key, calculation.tax_amount_exclusive
+        )
         return calculation.tax_amount_exclusive
@@ -20,6 +20,7 @@ class Environment(StrEnum):
 class EmailSender(StrEnum):
     logger = "logger"
     resend = "resend"
+    file = "file"
 
 
 env = Environment(os.getenv("POLAR_ENV", Environment.development))
@@ -60,6 +61,10 @@ class Settings(BaseSettings):
     AUTH_COOKIE_TTL_SECONDS: int = 60 * 60 * 24 * 31  # 31 days
     AUTH_COOKIE_DOMAIN: str = "127.0.0.1"
 
+    # Resolved access tokens cache
+    AUTH_SUBJECT_CACHE_TTL_SECONDS: int = 60
+    AUTH_SUBJECT_CACHE_MAX_SIZE: int = 10_000
+
     # Magic link
     MAGIC_LINK_TTL_SECONDS: int = 60 * 30  # 30 minutes
 
@@ -84,9 +89,13 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
 
+    # Eventstream
+    EVENTSTREAM_SUBSCRIBER_QUEUE_SIZE: int = 100
+
     # Emails
     EMAIL_SENDER: EmailSender = EmailSender.logger
     RESEND_API_KEY: str = ""
+    EMAIL_FILE_DIRECTORY: str = ".emails"
     EMAIL_FROM_NAME: str = "Polar"
     EMAIL_FROM_EMAIL_ADDRESS: str = "noreply@notifications.polar.sh"
 
@@ -163,6 +172,18 @@ class Settings(BaseSettings):
     MINIO_USER: str = "polar"
     MINIO_PWD: str = "polarpolar"
 
+    # Outgoing webhooks
+    WEBHOOK_DELIVERY_TIMEOUT_SECONDS: float = 20.0
+    WEBHOOK_DELIVERY_MAX_CONNECTIONS: int = 100
+    WEBHOOK_DELIVERY_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    WEBHOOK_DELIVERY_MAX_CONCURRENCY_PER_ENDPOINT: int = 4
+    WEBHOOK_DELIVERY_ENDPOINT_SLOT_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_DNS_CACHE_TTL_SECONDS: int = 60
+    WEBHOOK_DNS_CACHE_SIZE: int = 1024
+
+    # Metrics
+    METRICS_CACHE_TTL_SECONDS: int = 60 * 60 * 24  # 1 day
+
     # Application behaviours
     API_PAGINATION_MAX_LIMIT: int = 100
 
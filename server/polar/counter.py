@@ -0,0 +1,127 @@
+from collections.abc import Awaitable, Callable, Sequence
+
+import structlog
+from redis.exceptions import ResponseError
+
+from polar.logging import Logger
+from polar.redis import Redis
+
+log: Logger = structlog.get_logger()
+
+FlushFunction = Callable[[dict[str, int]], Awaitable[None]]
+
+
+class BufferedCounter:
+    """
+    Counters accumulating increments in Redis, to be written to the database
+    in batch.
+
+    Increments are added with `HINCRBY` to a hash, under a field identifying
+    the counted row. When flushing, the hash is moved aside so new increments keep
+    accumulating while the batch is written. It's only deleted once the batch has
+    been applied, so a failed flush is retried on the next run. After `max_retries`
+    failed retries, the batch is moved to a dead-letter hash, so a batch that can't
+    be applied doesn't block the counter forever.
+
+    Increments are applied at least once: if the process dies between the
+    database commit and the deletion of the batch, it'll be applied again.
+    """
+
+    def __init__(
+        self, name: str, *, lock_timeout: int = 60, max_retries: int = 5
+    ) -> None:
+        self.name = name
+        self.key = f"counter:{name}"
+        self.flushing_key = f"counter:{name}:flushing"
+        self.retries_key = f"counter:{name}:flushing:retries"
+        self.dead_letter_key = f"counter:{name}:dead_letter"
+        self.lock_key = f"counter:{name}:lock"
+        self.lock_timeout = lock_timeout
+        self.max_retries = max_retries
+
+    async def increment(self, redis: Redis, field: str, amount: int = 1) -> None:
+        await redis.hincrby(self.key, field, amount)
+
+    async def get_pending(self, redis: Redis, fields: Sequence[str]) -> dict[str, int]:
+        """
+        Return the increments of the given fields not written to the database yet,
+        including the batch being flushed.
+
+        While a batch is being committed, its increments may be counted
+        both here and in the database.
+        """
+        if not fields:
+            return {}
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hmget(self.key, fields)
+            pipe.hmget(self.flushing_key, fields)
+            pending, flushing = await pipe.execute()
+        return {
+            field: int(value or 0) + int(flushing_value or 0)
+            for field, value, flushing_value in zip(fields, pending, flushing)
+        }
+
+    async def get_all_pending(self, redis: Redis) -> dict[str, int]:
+        """
+        Return all the increments not written to the database yet,
+        including the batch being flushed.
+        """
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(self.key)
+            pipe.hgetall(self.flushing_key)
+            pending, flushing = await pipe.execute()
+        increments: dict[str, int] = {}
+        for values in (pending, flushing):
+            for field, value in values.items():
+                increments[field] = increments.get(field, 0) + int(value)
+        return increments
+
+    async def flush(self, redis: Redis, apply: FlushFunction) -> int:
+        """
+        Pass the pending increments to `apply`, which should write them
+        to the database.
+
+        Returns:
+            The number of flushed fields.
+        """
+        # Plain `SET NX` lock: only one flush at a time, released at expiration
+        # if the process dies
+        if not await redis.set(self.lock_key, 1, nx=True, ex=self.lock_timeout):
+            log.info("counter.flush.already_running", name=self.name)
+            return 0
+
+        try:
+            # A previous flush failed: retry it before moving new increments
+            if await redis.exists(self.flushing_key):
+                retries = await redis.incr(self.retries_key)
+                if retries > self.max_retries:
+                    await self._dead_letter(redis)
+
+            if not await redis.exists(self.flushing_key):
+                try:
+                    await redis.rename(self.key, self.flushing_key)
+                except ResponseError:  # No increments
+                    return 0
+
+            values = await redis.hgetall(self.flushing_key)
+            increments = {field: int(value) for field, value in values.items()}
+            await apply(increments)
+            await redis.delete(self.flushing_key, self.retries_key)
+        finally:
+            await redis.delete(self.lock_key)
+
+        log.info("counter.flush", name=self.name, count=len(increments))
+        return len(increments)
+
+    async def _dead_letter(self, redis: Redis) -> None:
+        """
+        Move the pending batch to the dead-letter hash, where it can be inspected
+        and replayed manually.
+        """
+        values = await redis.hgetall(self.flushing_key)
+        async with redis.pipeline(transaction=True) as pipe:
+            for field, value in values.items():
+                pipe.hincrby(self.dead_letter_key, field, int(value))
+            pipe.delete(self.flushing_key, self.retries_key)
+            await pipe.execute()
+        log.error("counter.flush.dead_letter", name=self.name, count=len(values))
@@ -13,9 +13,6 @@ from polar.dashboard.schemas import (
     PaginationResponse,
 )
 from polar.exceptions import ResourceNotFound, Unauthorized
-from polar.external_organization.service import (
-    external_organization as external_organization_service,
-)
 from polar.funding.schemas import PledgesTypeSummaries
 from polar.issue.schemas import Issue as IssueSchema
 from polar.issue.service import issue
@@ -204,6 +201,10 @@ async def dashboard(
     user_memberships: Sequence[UserOrganization] = []
     user_memberships = await user_organization_service.list_by_user_id(session, user.id)
 
+    # batch load the external organizations of the issues
+    loaders = authz.loaders
+    await loaders.external_organization.load_many({i.organization_id for i in issues})
+
     # add pledges to included
     issue_pledges: dict[UUID, list[PledgeSchema]] = {}
     for i in issues:
@@ -212,7 +213,7 @@ async def dashboard(
             if pled.state not in pledge_statuses:
                 continue
 
-            pledge_schema = await pledge_to_schema(session, user, pled)
+            pledge_schema = await pledge_to_schema(session, user, pled, loaders)
 
             # Add user-specific metadata
             pledge_schema.authed_can_admin_sender = (
@@ -221,8 +222,8 @@ async def dashboard(
                 )
             )
 
-            external_organization = await external_organization_service.get_linked(
-                session, i.organization_id
+            external_organization = await loaders.get_linked_external_organization(
+                i.organization_id
             )
             pledge_schema.authed_can_admin_received = (
                 external_organization is not None
@@ -249,6 +250,9 @@ async def dashboard(
     issue_rewards: dict[UUID, list[Reward]] = {}
     if for_org:
         rewards = await reward_service.list(session, issue_ids=[i.id for i in issues])
+        await loaders.external_organization.load_many(
+            {pledge.organization_id for pledge, _, _ in rewards}
+        )
         for pledge, reward, transaction in rewards:
             reward_resource = to_resource(
                 pledge,
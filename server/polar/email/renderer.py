@@ -1,4 +1,6 @@
 import datetime
+import hashlib
+from collections import OrderedDict
 from collections.abc import Mapping
 from typing import Any
 
@@ -8,14 +10,21 @@ from jinja2 import (
     PackageLoader,
     PrefixLoader,
     StrictUndefined,
+    Template,
     select_autoescape,
 )
 
 EMAIL_TEMPLATES_FOLDER_NAME = "email_templates"
+STRING_TEMPLATES_CACHE_SIZE = 256
 
 
 class EmailRenderer:
-    def __init__(self, extras_templates_packages: Mapping[str, str] = {}) -> None:
+    def __init__(
+        self,
+        extras_templates_packages: Mapping[str, str] = {},
+        *,
+        string_templates_cache_size: int = STRING_TEMPLATES_CACHE_SIZE,
+    ) -> None:
         """
         Args:
             extras_templates_package: Optional mapping to load additional templates.
@@ -23,6 +32,8 @@ class EmailRenderer:
                 e.g. `magic_link/template.html`.
                 Value is the namespace of the package containing an `email_templates`
                 directory containing Jinja templates.
+            string_templates_cache_size: Maximum number of templates compiled
+                from strings to keep in memory.
 
         Example:
 
@@ -45,11 +56,13 @@ class EmailRenderer:
             autoescape=select_autoescape(),
             undefined=StrictUndefined,
         )
+        self.string_templates_cache_size = string_templates_cache_size
+        self._string_templates: OrderedDict[str, Template] = OrderedDict()
 
     def render_from_string(
         self, subject: str, body: str, context: dict[str, Any]
     ) -> tuple[str, str]:
-        rendered_subject = self.env.from_string(subject).render(context).strip()
+        rendered_subject = self._from_string(subject).render(context).strip()
 
         wrapped_body = f"""
         {{% extends 'base.html' %}}
@@ -61,18 +74,47 @@ class EmailRenderer:
 
         context["current_year"] = datetime.datetime.now().year
 
-        rendered_body = self.env.from_string(wrapped_body).render(context).strip()
+        rendered_body = self._from_string(wrapped_body).render(context).strip()
         return rendered_subject, rendered_body
 
     def render_from_template(
         self, subject: str, body_template: str, context: dict[str, Any]
     ) -> tuple[str, str]:
-        rendered_subject = self.env.from_string(subject).render(context).strip()
+        rendered_subject = self._from_string(subject).render(context).strip()
         rendered_body = self.env.get_template(body_template).render(context).strip()
         return rendered_subject, rendered_body
 
+    def _from_string(self, source: str) -> Template:
+        """
+        Compile a template from a string, or get it from the LRU cache
+        if it was already compiled.
+        """
+        key = hashlib.sha256(source.encode()).hexdigest()
+        template = self._string_templates.get(key)
+        if template is not None:
+            self._string_templates.move_to_end(key)
+            return template
+
+        template = self.env.from_string(source)
+        self._string_templates[key] = template
+        while len(self._string_templates) > self.string_templates_cache_size:
+            self._string_templates.popitem(last=False)
+        return template
+
+
+_email_renderers: dict[tuple[tuple[str, str], ...], EmailRenderer] = {}
+
 
 def get_email_renderer(
     extras_templates_packages: Mapping[str, str] = {},
 ) -> EmailRenderer:
-    return EmailRenderer(extras_templates_packages)
+    """
+    Get an `EmailRenderer`, reused for the same set of additional templates
+    so compiled templates are shared.
+    """
+    key = tuple(sorted(extras_templates_packages.items()))
+    email_renderer = _email_renderers.get(key)
+    if email_renderer is None:
+        email_renderer = EmailRenderer(extras_templates_packages)
+        _email_renderers[key] = email_renderer
+    return email_renderer
@@ -1,6 +1,14 @@
+import asyncio
+import dataclasses
+import functools
+import uuid
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any
 
-import resend
+import httpx
 import structlog
 
 from polar.config import EmailSender as EmailSenderType
@@ -15,88 +23,195 @@ DEFAULT_REPLY_TO_NAME = "Polar Support"
 DEFAULT_REPLY_TO_EMAIL_ADDRESS = "support@polar.sh"
 
 
-class EmailSender(ABC):
-    @abstractmethod
-    def send_to_user(
-        self,
-        *,
-        to_email_addr: str,
-        subject: str,
-        html_content: str,
-        from_name: str = DEFAULT_FROM_NAME,
-        from_email_addr: str = DEFAULT_FROM_EMAIL_ADDRESS,
-        email_headers: dict[str, str] = {},
-        reply_to_name: str | None = DEFAULT_REPLY_TO_NAME,
-        reply_to_email_addr: str | None = DEFAULT_REPLY_TO_EMAIL_ADDRESS,
-    ) -> None:
-        pass
+@dataclasses.dataclass
+class Email:
+    to_email_addr: str
+    subject: str
+    html_content: str
+    from_name: str = DEFAULT_FROM_NAME
+    from_email_addr: str | None = None
+    """Sender address. If `None`, the default address of the backend is used."""
+    email_headers: dict[str, str] = dataclasses.field(default_factory=dict)
+    reply_to_name: str | None = DEFAULT_REPLY_TO_NAME
+    reply_to_email_addr: str | None = DEFAULT_REPLY_TO_EMAIL_ADDRESS
 
+    @property
+    def reply_to(self) -> str | None:
+        if self.reply_to_name and self.reply_to_email_addr:
+            return f"{self.reply_to_name} <{self.reply_to_email_addr}>"
+        return None
 
-class LoggingEmailSender(EmailSender):
-    def send_to_user(
+
+class EmailSender(ABC):
+    default_from_email_addr = DEFAULT_FROM_EMAIL_ADDRESS
+
+    async def send_to_user(
         self,
         *,
         to_email_addr: str,
         subject: str,
         html_content: str,
         from_name: str = DEFAULT_FROM_NAME,
-        from_email_addr: str = DEFAULT_FROM_EMAIL_ADDRESS,
+        from_email_addr: str | None = None,
         email_headers: dict[str, str] = {},
         reply_to_name: str | None = DEFAULT_REPLY_TO_NAME,
         reply_to_email_addr: str | None = DEFAULT_REPLY_TO_EMAIL_ADDRESS,
     ) -> None:
-        log.info(
-            "logging email",
-            to_email_addr=to_email_addr,
-            subject=subject,
-            html_content=html_content,
-            from_name=from_name,
-            from_email_addr=from_email_addr,
-            email_headers=email_headers,
+        await self.send_many(
+            [
+                Email(
+                    to_email_addr=to_email_addr,
+                    subject=subject,
+                    html_content=html_content,
+                    from_name=from_name,
+                    from_email_addr=from_email_addr,
+                    email_headers=email_headers,
+                    reply_to_name=reply_to_name,
+                    reply_to_email_addr=reply_to_email_addr,
+                )
+            ]
         )
 
+    @abstractmethod
+    async def send_many(self, emails: Sequence[Email]) -> None:
+        """Send several emails, in as few requests as the backend allows."""
+        pass
+
+    def get_from(self, email: Email) -> str:
+        from_email_addr = email.from_email_addr or self.default_from_email_addr
+        return f"{email.from_name} <{from_email_addr}>"
 
-class ResendEmailSender(EmailSender):
-    def __init__(self) -> None:
-        super().__init__()
-        resend.api_key = settings.RESEND_API_KEY
 
-    def send_to_user(
-        self,
-        *,
-        to_email_addr: str,
-        subject: str,
-        html_content: str,
-        from_name: str = DEFAULT_FROM_NAME,
-        from_email_addr: str = "polarsource@posts.polar.sh",
-        email_headers: dict[str, str] = {},
-        reply_to_name: str | None = DEFAULT_REPLY_TO_NAME,
-        reply_to_email_addr: str | None = DEFAULT_REPLY_TO_EMAIL_ADDRESS,
-    ) -> None:
-        params: resend.Emails.SendParams = {
-            "from": f"{from_name} <{from_email_addr}>",
-            "to": [to_email_addr],
-            "subject": subject,
-            "html": html_content,
-            "headers": email_headers,
-        }
+class LoggingEmailSender(EmailSender):
+    async def send_many(self, emails: Sequence[Email]) -> None:
+        for email in emails:
+            log.info(
+                "logging email",
+                to_email_addr=email.to_email_addr,
+                subject=email.subject,
+                html_content=email.html_content,
+                from_name=email.from_name,
+                from_email_addr=email.from_email_addr or self.default_from_email_addr,
+                email_headers=email.email_headers,
+            )
+
+
+class FileEmailSender(EmailSender):
+    """
+    Write emails as `.eml` files in a directory, instead of sending them.
+
+    Useful to inspect the emails sent in development or in tests.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    async def send_many(self, emails: Sequence[Email]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for email in emails:
+            message = EmailMessage()
+            message["From"] = self.get_from(email)
+            message["To"] = email.to_email_addr
+            message["Subject"] = email.subject
+            if reply_to := email.reply_to:
+                message["Reply-To"] = reply_to
+            for name, value in email.email_headers.items():
+                message[name] = value
+            message.set_content(email.html_content, subtype="html")
+
+            path = self.directory / f"{uuid.uuid4()}.eml"
+            path.write_bytes(message.as_bytes())
+            log.info("file_email.send", to_email_addr=email.to_email_addr, path=path)
 
-        if reply_to_name and reply_to_email_addr:
-            params["reply_to"] = f"{reply_to_name} <{reply_to_email_addr}>"
 
-        email = resend.Emails.send(params)
+class ResendEmailSender(EmailSender):
+    """
+    Send emails through the Resend API.
 
-        log.info(
-            "resend.send",
-            to_email_addr=to_email_addr,
-            subject=subject,
-            email_id=email["id"],
-        )
+    A single `httpx.AsyncClient` is kept per event loop, so connections are reused
+    between emails. Several emails are sent with the batch endpoint.
+    """
 
+    default_from_email_addr = "polarsource@posts.polar.sh"
+    batch_size = 100
+    """Maximum number of emails accepted by Resend batch endpoint."""
 
+    def __init__(
+        self, api_key: str, *, transport: httpx.AsyncBaseTransport | None = None
+    ) -> None:
+        self.api_key = api_key
+        self.transport = transport
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: httpx.AsyncClient | None = None
+
+    async def send_many(self, emails: Sequence[Email]) -> None:
+        if len(emails) == 1:
+            email = emails[0]
+            response = await self._request("/emails", self._get_params(email))
+            log.info(
+                "resend.send",
+                to_email_addr=email.to_email_addr,
+                subject=email.subject,
+                email_id=response["id"],
+            )
+            return
+
+        for i in range(0, len(emails), self.batch_size):
+            batch = emails[i : i + self.batch_size]
+            response = await self._request(
+                "/emails/batch", [self._get_params(email) for email in batch]
+            )
+            log.info(
+                "resend.send_batch",
+                count=len(batch),
+                email_ids=[email["id"] for email in response["data"]],
+            )
+
+    def _get_params(self, email: Email) -> dict[str, Any]:
+        params: dict[str, Any] = {
+            "from": self.get_from(email),
+            "to": [email.to_email_addr],
+            "subject": email.subject,
+            "html": email.html_content,
+            "headers": email.email_headers,
+        }
+        if reply_to := email.reply_to:
+            params["reply_to"] = reply_to
+        return params
+
+    async def _request(self, path: str, json: Any) -> Any:
+        client = await self._get_client()
+        response = await client.post(path, json=json)
+        response.raise_for_status()
+        return response.json()
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # The client is bound to the event loop it was created in
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            client, self._client = self._client, None
+            # Its connections may belong to a loop which is already closed
+            try:
+                await client.aclose()
+            except RuntimeError as e:
+                log.warning("resend.client_close_error", error=str(e))
+        if self._client is None:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                base_url="https://api.resend.com",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                transport=self.transport,
+            )
+        return self._client
+
+
+@functools.cache
 def get_email_sender() -> EmailSender:
     if settings.EMAIL_SENDER == EmailSenderType.resend:
-        return ResendEmailSender()
+        return ResendEmailSender(settings.RESEND_API_KEY)
+
+    if settings.EMAIL_SENDER == EmailSenderType.file:
+        return FileEmailSender(Path(settings.EMAIL_FILE_DIRECTORY))
 
     # Logging in development
     return LoggingEmailSender()
@@ -0,0 +1,224 @@
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Callable, Sequence
+
+import structlog
+from fastapi import Request
+from redis.asyncio.client import PubSub
+from uvicorn import Server
+
+from polar.logging import Logger
+from polar.redis import Redis
+
+log: Logger = structlog.get_logger()
+
+_uvicorn_server: Server | None = None
+
+
+def uvicorn_should_exit() -> bool:
+    """
+    Hacky way to check if Uvicorn server is shutting down, by retrieving
+    it from the running asyncio tasks.
+
+    We do this because the exit signal handler monkey-patch made by sse_starlette
+    doesn't work when running Uvicorn from the CLI,
+    preventing a graceful shutdown when a SSE connection is open.
+
+    The server is looked up only once, then remembered.
+    """
+    global _uvicorn_server
+    if _uvicorn_server is None:
+        try:
+            for task in asyncio.all_tasks():
+                coroutine = task.get_coro()
+                if coroutine is not None:
+                    frame = getattr(coroutine, "cr_frame", None)
+                    if frame is not None:
+                        args = frame.f_locals
+                        if self := args.get("self"):
+                            if isinstance(self, Server):
+                                _uvicorn_server = self
+                                break
+        except RuntimeError:
+            pass
+    return _uvicorn_server is not None and _uvicorn_server.should_exit
+
+
+class Subscription:
+    """
+    Stream of messages received on a set of channels by a single client.
+
+    Messages are buffered in a bounded queue. If the client can't keep up, the
+    subscription is closed instead of letting the buffer grow unbounded: it's up to
+    the client to reconnect, which is what browsers do with Server-Sent Events.
+    """
+
+    def __init__(self, channels: Sequence[str], max_size: int) -> None:
+        self.channels = list(channels)
+        self._queue: asyncio.Queue[str | None] = asyncio.Queue(max_size)
+        self.closed = False
+
+    def put(self, message: str) -> bool:
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.close()
+            return False
+        return True
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        # Make room for the end-of-stream marker
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while True:
+            message = await self._queue.get()
+            if message is None:
+                return
+            yield message
+
+
+class EventStreamMultiplexer:
+    """
+    Shares a single Redis Pub/Sub connection between all the eventstream clients
+    of the process.
+
+    Redis channels are subscribed when their first client arrives and unsubscribed
+    when the last one leaves. A single reader task dispatches the messages to the
+    matching clients.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        max_queue_size: int = 100,
+        should_exit: Callable[[], bool] | None = None,
+        should_exit_interval: float = 5.0,
+    ) -> None:
+        self.redis = redis
+        self.max_queue_size = max_queue_size
+        self.should_exit = should_exit
+        self.should_exit_interval = should_exit_interval
+
+        self._pubsub: PubSub | None = None
+        self._channels: dict[str, set[Subscription]] = {}
+        self._lock = asyncio.Lock()
+        self._reader: asyncio.Task[None] | None = None
+        self._watcher: asyncio.Task[None] | None = None
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channels: Sequence[str]) -> AsyncIterator[Subscription]:
+        subscription = Subscription(channels, self.max_queue_size)
+        await self._add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscription.close()
+            await self._remove(subscription)
+
+    @property
+    def channels(self) -> set[str]:
+        return set(self._channels)
+
+    async def close(self) -> None:
+        for task in (self._reader, self._watcher):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        self._reader = None
+        self._watcher = None
+
+        for subscriptions in self._channels.values():
+            for subscription in subscriptions:
+                subscription.close()
+        self._channels = {}
+
+        if self._pubsub is not None:
+            await self._pubsub.aclose()  # type: ignore[attr-defined]
+            self._pubsub = None
+
+    async def _add(self, subscription: Subscription) -> None:
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+
+            new_channels = [c for c in subscription.channels if c not in self._channels]
+            if new_channels:
+                await self._pubsub.subscribe(*new_channels)
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+            if self.should_exit is not None and (
+                self._watcher is None or self._watcher.done()
+            ):
+                self._watcher = asyncio.create_task(self._watch_exit())
+
+    async def _remove(self, subscription: Subscription) -> None:
+        async with self._lock:
+            unused_channels: list[str] = []
+            for channel in subscription.channels:
+                subscriptions = self._channels.get(channel)
+                if subscriptions is None:
+                    continue
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._channels[channel]
+                    unused_channels.append(channel)
+
+            if unused_channels and self._pubsub is not None:
+                await self._pubsub.unsubscribe(*unused_channels)
+
+    async def _read(self) -> None:
+        assert self._pubsub is not None
+        pubsub = self._pubsub
+        while True:
+            try:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True,
+                    timeout=None,  # type: ignore[arg-type]
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Connection lost: close the clients, they'll reconnect
+                log.warning("eventstream.multiplexer.read_error", error=str(e))
+                for subscriptions in list(self._channels.values()):
+                    for subscription in list(subscriptions):
+                        subscription.close()
+                return
+
+            if message is None:
+                continue
+
+            channel = message["channel"]
+            data = message["data"]
+            log.info("redis.pubsub", message=data)
+            for subscription in list(self._channels.get(channel, ())):
+                if not subscription.put(data):
+                    log.warning(
+                        "eventstream.multiplexer.slow_client_dropped",
+                        channels=subscription.channels,
+                    )
+
+    async def _watch_exit(self) -> None:
+        assert self.should_exit is not None
+        while not self.should_exit():
+            await asyncio.sleep(self.should_exit_interval)
+        for subscriptions in list(self._channels.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+
+
+async def get_eventstream_multiplexer(request: Request) -> EventStreamMultiplexer:
+    return request.state.eventstream_multiplexer
@@ -1,3 +1,4 @@
+import contextvars
 from typing import Any
 from uuid import UUID
 
@@ -6,12 +7,7 @@ from pydantic import BaseModel
 
 from polar.kit.utils import generate_uuid
 from polar.logging import Logger
-from polar.postgres import AsyncSession
 from polar.redis import Redis
-from polar.user_organization.service import (
-    user_organization as user_organization_service,
-)
-from polar.worker import enqueue_job
 
 log: Logger = structlog.get_logger()
 
@@ -54,6 +50,13 @@ async def send_event(redis: Redis, event_json: str, channels: list[str]) -> None
     )
 
 
+EventToPublish = tuple[str, list[str]]
+
+_events_to_publish = contextvars.ContextVar[list[EventToPublish]](
+    "polar_eventstream_events_to_publish", default=[]
+)
+
+
 async def publish(
     key: str,
     payload: dict[str, Any],
@@ -61,9 +64,15 @@ async def publish(
     organization_id: UUID | None = None,
     checkout_client_secret: str | None = None,
     *,
-    run_in_worker: bool = True,
     redis: Redis | None = None,
 ) -> None:
+    """
+    Publish an event to the eventstream.
+
+    By default, the event is buffered until the end of the current request or job,
+    when all the buffered events are sent at once by `flush_published_events`.
+    If a Redis instance is given, the event is sent immediately instead.
+    """
     receivers = Receivers(
         user_id=user_id,
         organization_id=organization_id,
@@ -76,41 +85,32 @@ async def publish(
         payload=payload,
     ).model_dump_json()
 
-    if run_in_worker:
-        enqueue_job("eventstream.publish", event, channels)
-    else:
-        if redis is None:
-            raise RuntimeError("Redis instance is required when run_in_worker is False")
+    if redis is not None:
         await send_event(redis, event, channels)
-
-
-async def publish_members(
-    session: AsyncSession,
-    key: str,
-    payload: dict[str, Any],
-    organization_id: UUID,
-    *,
-    run_in_worker: bool = True,
-    redis: Redis | None = None,
-) -> None:
-    members = await user_organization_service.list_by_org(
-        session, org_id=organization_id
-    )
-
-    for m in members:
-        receivers = Receivers(user_id=m.user_id)
-        channels = receivers.get_channels()
-        event = Event(
-            id=generate_uuid(),
-            key=key,
-            payload=payload,
-        ).model_dump_json()
-
-        if run_in_worker:
-            enqueue_job("eventstream.publish", event, channels)
-        else:
-            if redis is None:
-                raise RuntimeError(
-                    "Redis instance is required when run_in_worker is False"
-                )
-            await send_event(redis, event, channels)
+        return
+
+    enqueue_message(event, channels)
+
+
+def enqueue_message(message: str, channels: list[str]) -> None:
+    """
+    Buffer a raw message to publish on the given Redis channels, along with the
+    eventstream events.
+    """
+    _events_to_publish_list = _events_to_publish.get([])
+    _events_to_publish_list.append((message, channels))
+    _events_to_publish.set(_events_to_publish_list)
+
+
+async def flush_published_events(redis: Redis) -> None:
+    if _events_to_publish_list := _events_to_publish.get([]):
+        pipeline = redis.pipeline(transaction=False)
+        for event, channels in _events_to_publish_list:
+            for channel in channels:
+                pipeline.publish(channel, event)
+        await pipeline.execute()
+        log.debug(
+            "polar.eventstream.flush_published_events",
+            count=len(_events_to_publish_list),
+        )
+        _events_to_publish.set([])
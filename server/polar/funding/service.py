@@ -120,7 +120,7 @@ class FundingService:
         inner_statement = inner_statement.order_by(*order_by_clauses)
 
         # paginate on inner query (issue listing)
-        page, limit = pagination
+        page, limit = pagination.page, pagination.limit
         offset = limit * (page - 1)
         inner_statement = inner_statement.offset(offset).limit(limit)
 
@@ -1,9 +1,18 @@
+import base64
 import datetime
+import hashlib
+import json
+from typing import Any
 
+import httpx
+import structlog
 from githubkit.cache.base import BaseCache
 
+from polar.logging import Logger
 from polar.redis import Redis
 
+log: Logger = structlog.get_logger()
+
 
 class RedisCache(BaseCache):
     """Redis Backed Cache"""
@@ -23,3 +32,131 @@ class RedisCache(BaseCache):
 
     async def aset(self, key: str, value: str, ex: datetime.timedelta) -> None:
         await self.redis.setex(f"githubkit:{self.app}:{key}", time=ex, value=value)
+
+
+HTTP_CACHE_TTL = datetime.timedelta(days=1)
+HTTP_CACHE_STATS_KEY = "github:http_cache:stats"
+# Hop-by-hop and framing headers can't be replayed on a rebuilt response
+_HTTP_CACHE_SKIPPED_HEADERS = {"connection", "keep-alive", "transfer-encoding"}
+
+
+class RedisHTTPCacheTransport(httpx.AsyncBaseTransport):
+    """
+    HTTP transport sending conditional requests to the GitHub API.
+
+    The body and headers of successful `GET` responses having an `ETag`
+    or a `Last-Modified` header are stored in Redis. Subsequent requests
+    to the same URL send them back as `If-None-Match` and `If-Modified-Since`:
+    if GitHub answers with `304 Not Modified`, which doesn't count against
+    the rate limit, the cached response is served instead.
+
+    Responses are cached per `scope`, identifying the app or the installation
+    the client authenticates as, so data is never shared between installations.
+    It doesn't depend on the access token, which is rotated hourly.
+
+    Hits and misses are counted in the `HTTP_CACHE_STATS_KEY` hash.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        scope: str,
+        transport: httpx.AsyncBaseTransport | None = None,
+        ttl: datetime.timedelta = HTTP_CACHE_TTL,
+    ) -> None:
+        self.redis = redis
+        self.scope = scope
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.ttl = ttl
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if (
+            request.method != "GET"
+            or "If-None-Match" in request.headers
+            or "If-Modified-Since" in request.headers
+        ):
+            return await self.transport.handle_async_request(request)
+
+        key = self._get_key(request)
+        cached_value = await self.redis.get(key)
+        cached: dict[str, Any] | None = (
+            json.loads(cached_value) if cached_value is not None else None
+        )
+        if cached is not None:
+            cached_headers = httpx.Headers(cached["headers"])
+            if etag := cached_headers.get("ETag"):
+                request.headers["If-None-Match"] = etag
+            if last_modified := cached_headers.get("Last-Modified"):
+                request.headers["If-Modified-Since"] = last_modified
+
+        response = await self.transport.handle_async_request(request)
+
+        if response.status_code == 304 and cached is not None:
+            await response.aclose()
+            await self.redis.hincrby(HTTP_CACHE_STATS_KEY, "hit", 1)
+            log.debug("github.http_cache.hit", url=str(request.url))
+            await self.redis.expire(key, self.ttl)
+            return httpx.Response(
+                status_code=200,
+                headers=cached["headers"],
+                content=base64.b64decode(cached["content"]),
+                request=request,
+            )
+
+        await self.redis.hincrby(HTTP_CACHE_STATS_KEY, "miss", 1)
+        log.debug("github.http_cache.miss", url=str(request.url))
+
+        if response.status_code != 200 or not (
+            "ETag" in response.headers or "Last-Modified" in response.headers
+        ):
+            return response
+
+        # Keep the raw body: it's decoded according to the stored headers
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        try:
+            content = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        headers = [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in _HTTP_CACHE_SKIPPED_HEADERS
+        ]
+        await self.redis.setex(
+            key,
+            self.ttl,
+            json.dumps(
+                {
+                    "headers": headers,
+                    "content": base64.b64encode(content).decode("ascii"),
+                }
+            ),
+        )
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=content,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    def _get_key(self, request: httpx.Request) -> str:
+        digest = hashlib.sha256()
+        for part in (
+            self.scope,
+            str(request.url),
+            request.headers.get("Accept", ""),
+        ):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return f"github:http_cache:{digest.hexdigest()}"
+
+
+async def get_http_cache_stats(redis: Redis) -> dict[str, int]:
+    stats = await redis.hgetall(HTTP_CACHE_STATS_KEY)
+    return {field: int(value) for field, value in stats.items()}
@@ -1,12 +1,13 @@
 import time
 from enum import StrEnum
-from typing import Any
+from typing import Any, TypeVar
 
 import httpx
 import structlog
 from githubkit import (
     AppAuthStrategy,
     AppInstallationAuthStrategy,
+    BaseAuthStrategy,
     GitHub,
     Response,
     TokenAuthStrategy,
@@ -18,7 +19,7 @@ from githubkit.utils import UNSET, Unset
 from pydantic import BaseModel, Field
 
 from polar.config import settings
-from polar.integrations.github.cache import RedisCache
+from polar.integrations.github.cache import RedisCache, RedisHTTPCacheTransport
 from polar.locker import Locker
 from polar.models.user import OAuthAccount, OAuthPlatform, User
 from polar.postgres import AsyncSession
@@ -77,6 +78,29 @@ def ensure_expected_response(
 # GITHUB API CLIENTS
 ###############################################################################
 
+A = TypeVar("A", bound=BaseAuthStrategy)
+
+
+class CachedGitHub(GitHub[A]):
+    """
+    GitHub client sending conditional requests, using a response cache
+    shared in Redis. See `RedisHTTPCacheTransport`.
+
+    `cache_scope` identifies the app or installation the client authenticates as.
+    """
+
+    def __init__(self, auth: A, *, redis: Redis, cache_scope: str) -> None:
+        # Replaces the default in-memory cache, which only lives as long as the client
+        super().__init__(auth, http_cache=False)
+        self.redis = redis
+        self.cache_scope = cache_scope
+
+    def _create_async_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            **self._get_client_defaults(),
+            transport=RedisHTTPCacheTransport(self.redis, scope=self.cache_scope),
+        )
+
 
 class RefreshAccessToken(BaseModel):
     access_token: str = Field(default=...)
@@ -213,24 +237,28 @@ def get_app_client(
     redis: Redis, app: GitHubApp = GitHubApp.polar
 ) -> GitHub[AppAuthStrategy]:
     if app == GitHubApp.polar:
-        return GitHub(
+        return CachedGitHub(
             AppAuthStrategy(
                 app_id=settings.GITHUB_APP_IDENTIFIER,
                 private_key=settings.GITHUB_APP_PRIVATE_KEY,
                 client_id=settings.GITHUB_CLIENT_ID,
                 client_secret=settings.GITHUB_CLIENT_SECRET,
                 cache=RedisCache(app, redis),
-            )
+            ),
+            redis=redis,
+            cache_scope=f"{app}:app",
         )
     elif app == GitHubApp.repository_benefit:
-        return GitHub(
+        return CachedGitHub(
             AppAuthStrategy(
                 app_id=settings.GITHUB_REPOSITORY_BENEFITS_APP_IDENTIFIER,
                 private_key=settings.GITHUB_REPOSITORY_BENEFITS_APP_PRIVATE_KEY,
                 client_id=settings.GITHUB_REPOSITORY_BENEFITS_CLIENT_ID,
                 client_secret=settings.GITHUB_REPOSITORY_BENEFITS_CLIENT_SECRET,
                 cache=RedisCache(app, redis),
-            )
+            ),
+            redis=redis,
+            cache_scope=f"{app}:app",
         )
 
 
@@ -245,11 +273,12 @@ def get_app_installation_client(
         raise Exception("unable to create github client: no installation_id provided")
 
     # Using the RedisCache() below to cache generated JWTs
-    # This improves ETag/If-None-Match cache hits over the default in-memory cache, as
-    # they can be reused across restarts of the python process and by multiple workers.
+    # Responses are cached in Redis too, and revalidated with ETag/If-None-Match,
+    # so they can be reused across restarts of the python process and by multiple
+    # workers.
 
     if app == GitHubApp.polar:
-        return GitHub(
+        return CachedGitHub(
             AppInstallationAuthStrategy(
                 app_id=settings.GITHUB_APP_IDENTIFIER,
                 private_key=settings.GITHUB_APP_PRIVATE_KEY,
@@ -258,10 +287,12 @@ def get_app_installation_client(
                 installation_id=installation_id,
                 permissions=permissions,
                 cache=RedisCache(app, redis),
-            )
+            ),
+            redis=redis,
+            cache_scope=f"{app}:installation:{installation_id}",
         )
     elif app == GitHubApp.repository_benefit:
-        return GitHub(
+        return CachedGitHub(
             AppInstallationAuthStrategy(
                 app_id=settings.GITHUB_REPOSITORY_BENEFITS_APP_IDENTIFIER,
                 private_key=settings.GITHUB_REPOSITORY_BENEFITS_APP_PRIVATE_KEY,
@@ -270,7 +301,9 @@ def get_app_installation_client(
                 installation_id=installation_id,
                 permissions=permissions,
                 cache=RedisCache(app, redis),
-            )
+            ),
+            redis=redis,
+            cache_scope=f"{app}:installation:{installation_id}",
         )
 
 
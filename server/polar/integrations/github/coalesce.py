@@ -0,0 +1,141 @@
+"""
+Coalescing of bursty GitHub webhook events.
+
+Editing, labeling or assigning an issue several times in a row triggers as many
+webhooks, each of them carrying the whole state of the issue. Instead of
+processing each of them, issues events are buffered in Redis for
+`COALESCE_WINDOW`, by (installation, repository, issue number).
+When the window ends, only the latest payload of each event type is processed.
+
+Events of different types are all kept, since their handlers don't do the same
+work, e.g. `issues.labeled` may embed the badge while `issues.edited` doesn't.
+For the same reason, `issues.labeled` and `issues.unlabeled` events are only merged
+when they're about the same label.
+They're processed in the order of their latest occurrence.
+"""
+
+import datetime
+import json
+from typing import Any
+
+import structlog
+
+from polar.logging import Logger
+from polar.redis import Redis
+from polar.worker import enqueue_job
+
+log: Logger = structlog.get_logger()
+
+COALESCE_WINDOW = datetime.timedelta(seconds=10)
+# Safety net if the flush job is lost: new events will schedule another one
+COALESCE_SCHEDULED_TTL = datetime.timedelta(minutes=5)
+COALESCE_EVENTS_TTL = datetime.timedelta(hours=1)
+
+COALESCED_EVENTS = {
+    "issues.opened",
+    "issues.edited",
+    "issues.closed",
+    "issues.reopened",
+    "issues.labeled",
+    "issues.unlabeled",
+    "issues.assigned",
+    "issues.unassigned",
+}
+"""Events that can be merged with the following ones on the same issue."""
+
+DISCARDING_EVENTS = {
+    "issues.deleted",
+    "issues.transferred",
+}
+"""
+Events processed immediately, discarding the pending events on the same issue,
+since the issue they refer to is gone.
+"""
+
+LABEL_EVENTS = {
+    "issues.labeled",
+    "issues.unlabeled",
+}
+"""Events only merged with the following ones on the same label."""
+
+WebhookEvent = tuple[str, str, str | None, dict[str, Any]]
+"""Event name, scope, action and payload."""
+
+
+def _get_key(payload: dict[str, Any]) -> str | None:
+    try:
+        installation_id = payload["installation"]["id"]
+        repository_id = payload["repository"]["id"]
+        issue_number = payload["issue"]["number"]
+    except (KeyError, TypeError):
+        return None
+    return f"github:webhook:coalesce:{installation_id}:{repository_id}:{issue_number}"
+
+
+def _get_merge_key(event_name: str, payload: dict[str, Any]) -> str:
+    if event_name in LABEL_EVENTS:
+        label = payload.get("label") or {}
+        return f"{event_name}:{label.get('name', '')}"
+    return event_name
+
+
+async def coalesce_event(
+    redis: Redis,
+    event_name: str,
+    scope: str,
+    action: str | None,
+    payload: dict[str, Any],
+) -> bool:
+    """
+    Buffer an event, if it can be coalesced with the following ones.
+
+    Returns:
+        `True` if the event was buffered; `False` if it should be processed
+        immediately.
+    """
+    key = _get_key(payload)
+    if key is None:
+        return False
+
+    if event_name in DISCARDING_EVENTS:
+        await redis.delete(key)
+        return False
+
+    if event_name not in COALESCED_EVENTS:
+        return False
+
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.rpush(key, json.dumps([event_name, scope, action, payload]))
+        pipe.expire(key, COALESCE_EVENTS_TTL)
+        pipe.set(f"{key}:scheduled", 1, nx=True, ex=COALESCE_SCHEDULED_TTL)
+        _, _, scheduled = await pipe.execute()
+
+    # First event of the window: schedule the flush
+    if scheduled:
+        enqueue_job("github.webhook.coalesced", key, _defer_by=COALESCE_WINDOW)
+
+    log.info("github.webhook.coalesced", event_name=event_name, key=key)
+    return True
+
+
+async def pop_events(redis: Redis, key: str) -> list[WebhookEvent]:
+    """
+    Get the buffered events of an issue, keeping only the latest one of each type,
+    or of each label for label events.
+    """
+    async with redis.pipeline(transaction=True) as pipe:
+        # Events received from now on will schedule another flush
+        pipe.delete(f"{key}:scheduled")
+        pipe.lrange(key, 0, -1)
+        pipe.delete(key)
+        _, values, _ = await pipe.execute()
+
+    latest: dict[str, tuple[int, WebhookEvent]] = {}
+    for index, value in enumerate(values):
+        event_name, scope, action, payload = json.loads(value)
+        latest[_get_merge_key(event_name, payload)] = (
+            index,
+            (event_name, scope, action, payload),
+        )
+
+    return [event for _, event in sorted(latest.values(), key=lambda e: e[0])]
@@ -49,6 +49,7 @@ from polar.user.schemas.user import UserSignupAttribution, UserSignupAttribution
 from polar.worker import enqueue_job
 
 from . import types
+from .coalesce import coalesce_event
 from .schemas import (
     GithubUser,
     InstallationCreate,
@@ -449,7 +450,7 @@ def not_implemented() -> WebhookResponse:
     return WebhookResponse(success=False, message="Not implemented")
 
 
-async def enqueue(request: Request) -> WebhookResponse:
+async def enqueue(request: Request, redis: Redis) -> WebhookResponse:
     json_body = await request.json()
     event_scope = request.headers["X-GitHub-Event"]
     event_action = json_body["action"] if "action" in json_body else None
@@ -458,6 +459,9 @@ async def enqueue(request: Request) -> WebhookResponse:
     if event_name not in IMPLEMENTED_WEBHOOKS:
         return not_implemented()
 
+    if await coalesce_event(redis, event_name, event_scope, event_action, json_body):
+        return WebhookResponse(success=True)
+
     task_name = f"github.webhook.{event_name}"
     enqueue_job(task_name, event_scope, event_action, json_body)
 
@@ -466,14 +470,16 @@ async def enqueue(request: Request) -> WebhookResponse:
 
 
 @router.post("/webhook", response_model=WebhookResponse)
-async def webhook(request: Request) -> WebhookResponse:
+async def webhook(
+    request: Request, redis: Redis = Depends(get_redis)
+) -> WebhookResponse:
     valid_signature = github.webhooks.verify(
         settings.GITHUB_APP_WEBHOOK_SECRET,
         await request.body(),
         request.headers["X-Hub-Signature-256"],
     )
     if valid_signature:
-        return await enqueue(request)
+        return await enqueue(request, redis)
 
     # Should be 403 Forbidden, but...
     # Throwing unsophisticated hackers/scrapers/bots off the scent
@@ -32,6 +32,7 @@ from polar.redis import Redis
 from polar.repository.hooks import (
     repository_issue_synced,
     repository_issues_sync_completed,
+    repository_issues_synced,
 )
 
 from .. import client as github
@@ -653,9 +654,10 @@ class GithubIssueService(IssueService):
         state: Literal["open", "closed", "all"] = "open",
         sort: Literal["created", "updated", "comments"] = "updated",
         direction: Literal["asc", "desc"] = "desc",
-        per_page: int = 30,
+        per_page: int = 100,
         crawl_with_installation_id: int
         | None = None,  # Override which installation to use when crawling
+        batch: bool = True,
     ) -> tuple[SyncedCount, ErrorCount]:
         # We get PRs in the issues list too, but super slim versions of them.
         # Since we sync PRs separately, we therefore skip them here.
@@ -676,6 +678,34 @@ class GithubIssueService(IssueService):
 
         client = github.get_app_installation_client(installation_id, redis=redis)
 
+        if batch:
+
+            async def fetch_page(page: int) -> list[types.Issue]:
+                response = await client.rest.issues.async_list_for_repo(
+                    owner=organization.name,
+                    repo=repository.name,
+                    state=state,
+                    sort=sort,
+                    direction=direction,
+                    per_page=per_page,
+                    page=page,
+                )
+                return response.parsed_data
+
+            return await github_paginated_service.store_paginated_resource_batch(
+                session,
+                redis,
+                fetch_page=fetch_page,
+                per_page=per_page,
+                store_resources_method=github_issue.store_many,
+                organization=organization,
+                repository=repository,
+                skip_condition=skip_if_pr,
+                on_batch_sync_signal=repository_issues_synced,
+                on_completed_signal=repository_issues_sync_completed,
+                resource_type="issue",
+            )
+
         paginator: Paginator[types.Issue] = client.paginate(
             client.rest.issues.async_list_for_repo,
             owner=organization.name,
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from collections.abc import Callable, Coroutine
+import asyncio
+from collections.abc import Callable, Coroutine, Sequence
 from typing import Any, Literal
 
 import structlog
@@ -10,7 +11,7 @@ from polar.kit.hook import Hook
 from polar.models import ExternalOrganization, Issue, Repository
 from polar.postgres import AsyncSession
 from polar.redis import Redis
-from polar.repository.hooks import SyncCompletedHook, SyncedHook
+from polar.repository.hooks import SyncCompletedHook, SyncedBatchHook, SyncedHook
 
 from .. import types
 
@@ -20,6 +21,8 @@ log = structlog.get_logger()
 SyncedCount = int
 ErrorCount = int
 
+PageData = list[types.Issue] | list[types.PullRequestSimple]
+
 
 class GitHubPaginatedService:
     async def store_paginated_resource(
@@ -100,5 +103,117 @@ class GitHubPaginatedService:
 
         return (synced, errors)
 
+    async def store_paginated_resource_batch(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        *,
+        fetch_page: Callable[[int], Coroutine[Any, Any, PageData]],
+        per_page: int,
+        store_resources_method: Callable[..., Coroutine[Any, Any, Sequence[Issue]]],
+        organization: ExternalOrganization,
+        repository: Repository,
+        resource_type: Literal["issue", "pull_request"],
+        skip_condition: Callable[[types.Issue | types.PullRequestSimple], bool]
+        | None = None,
+        on_batch_sync_signal: Hook[SyncedBatchHook] | None = None,
+        on_completed_signal: Hook[SyncCompletedHook] | None = None,
+    ) -> tuple[SyncedCount, ErrorCount]:
+        """
+        Batch version of `store_paginated_resource`.
+
+        Each page is upserted with a single statement, while the next one is
+        fetched from GitHub. Synced hooks are called once per page.
+        """
+        synced, errors = 0, 0
+        page = 1
+        next_page_task = asyncio.create_task(fetch_page(page))
+        try:
+            while True:
+                data = await next_page_task
+                if not data:
+                    break
+                current_page = page
+
+                # A partial page is the last one: don't request an empty one
+                has_next_page = len(data) >= per_page
+                if has_next_page:
+                    page += 1
+                    next_page_task = asyncio.create_task(fetch_page(page))
+
+                synced += len(data)
+
+                # Pages may overlap if resources are updated during the sync;
+                # the same row can't be upserted twice in one statement.
+                batch = list(
+                    {
+                        item.id: item
+                        for item in data
+                        if not (skip_condition and skip_condition(item))
+                    }.values()
+                )
+
+                if batch:
+                    records = await store_resources_method(
+                        session,
+                        redis,
+                        data=batch,
+                        organization=organization,
+                        repository=repository,
+                    )
+
+                    if len(records) < len(batch):
+                        log.warning(
+                            f"{resource_type}.sync.failed",
+                            error="save was unsuccessful",
+                            expected=len(batch),
+                            stored=len(records),
+                        )
+                        errors += len(batch) - len(records)
+
+                    log.debug(
+                        f"{resource_type}.synced_batch",
+                        organization_id=organization.id,
+                        repository_id=repository.id,
+                        page=current_page,
+                        count=len(records),
+                    )
+
+                    if on_batch_sync_signal and records:
+                        await on_batch_sync_signal.call(
+                            SyncedBatchHook(
+                                repository=repository,
+                                organization=organization,
+                                records=records,
+                                synced=synced,
+                                redis=redis,
+                            )
+                        )
+
+                if not has_next_page:
+                    break
+        finally:
+            next_page_task.cancel()
+
+        log.info(
+            f"{resource_type}.sync.completed",
+            organization_id=organization.id,
+            repository_id=repository.id,
+            synced=synced,
+            errors=errors,
+        )
+
+        if on_completed_signal:
+            await on_completed_signal.call(
+                SyncCompletedHook(
+                    repository=repository,
+                    organization=organization,
+                    synced=synced,
+                    redis=redis,
+                )
+            )
+
+        return (synced, errors)
+
 
 github_paginated_service = GitHubPaginatedService()
@@ -5,7 +5,7 @@ from uuid import UUID
 import structlog
 
 from polar.context import ExecutionContext
-from polar.eventstream.service import publish_members
+from polar.eventstream.service import publish
 from polar.exceptions import PolarTaskError
 from polar.integrations.github import client as github
 from polar.kit.extensions.sqlalchemy import sql
@@ -17,11 +17,13 @@ from polar.worker import (
     AsyncSessionMaker,
     JobContext,
     PolarWorkerContext,
+    enqueue_job,
     get_worker_redis,
     task,
 )
 
 from .. import service, types
+from ..coalesce import pop_events
 from .utils import (
     get_external_organization_and_repo,
     github_rate_limit_retry,
@@ -425,6 +427,18 @@ async def repository_transferred(
 # ------------------------------------------------------------------------------
 
 
+@task("github.webhook.coalesced")
+async def issue_events_coalesced(
+    ctx: JobContext, key: str, polar_context: PolarWorkerContext
+) -> None:
+    with polar_context.to_execution_context():
+        events = await pop_events(get_worker_redis(ctx), key)
+        for event_name, scope, action, payload in events:
+            enqueue_job(f"github.webhook.{event_name}", scope, action, payload)
+
+        log.info("github.webhook.coalesced.flushed", key=key, count=len(events))
+
+
 async def handle_issue(
     session: AsyncSession,
     redis: Redis,
@@ -905,12 +919,9 @@ async def installation_new_permissions_accepted(
             )
 
             if external_organization.organization_id:
-                await publish_members(
-                    session=session,
-                    key="organization.updated",
-                    payload={
-                        "organization_id": external_organization.organization_id,
-                    },
+                await publish(
+                    "organization.updated",
+                    {"organization_id": external_organization.organization_id},
                     organization_id=external_organization.organization_id,
                 )
 
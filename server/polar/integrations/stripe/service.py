@@ -471,6 +471,7 @@ class StripeService:
         account_id: str | None = None,
         payout: str | None = None,
         type: str | None = None,
+        created_gte: int | None = None,
     ) -> AsyncIterator[stripe_lib.BalanceTransaction]:
         params: stripe_lib.BalanceTransaction.ListParams = {
             "limit": 100,
@@ -481,6 +482,8 @@ class StripeService:
             params["payout"] = payout
         if type is not None:
             params["type"] = type
+        if created_gte is not None:
+            params["created"] = {"gte": created_gte}
 
         result = await stripe_lib.BalanceTransaction.list_async(**params)
         return result.auto_paging_iter()
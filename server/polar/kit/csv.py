@@ -1,13 +1,21 @@
 import collections
 import csv
-from collections.abc import Iterable
-from typing import TYPE_CHECKING, Any, BinaryIO
+from collections.abc import AsyncIterator, Callable, Iterable
+from typing import TYPE_CHECKING, Any, BinaryIO, TypeVar
+
+from sqlalchemy import Select
 
 if TYPE_CHECKING:
     import _csv
 
+from .db.postgres import AsyncSessionMaker
 from .email import EmailNotValidError, validate_email
 
+T = TypeVar("T")
+
+EXPORT_YIELD_PER = 1000
+"""Number of rows fetched from the server-side cursor at once during an export."""
+
 
 def get_iterable_from_binary_io(file: BinaryIO) -> Iterable[str]:
     for line in file:
@@ -82,8 +90,43 @@ class IterableCSVWriter:
         self.writer.writerow(row)
         return self.read()
 
+    def getrows(self, rows: Iterable[Iterable[Any]]) -> str:
+        self.writer.writerows(rows)
+        lines = "".join(self._lines)
+        self._lines.clear()
+        return lines
+
     def write(self, line: str) -> None:
         self._lines.append(line)
 
     def read(self) -> str:
         return self._lines.popleft()
+
+
+async def export_csv(
+    sessionmaker: AsyncSessionMaker,
+    statement: Select[tuple[T]],
+    header: Iterable[str],
+    get_row: Callable[[T], Iterable[Any]],
+    *,
+    yield_per: int = EXPORT_YIELD_PER,
+) -> AsyncIterator[str]:
+    """
+    Generate a CSV export of the results of a statement, by chunks.
+
+    The statement is run once, through a server-side cursor: rows are fetched
+    and written `yield_per` at a time, so memory use doesn't depend on the size
+    of the export.
+
+    Intended to be passed to a StreamingResponse. Since it runs in its own task,
+    a new session is created from `sessionmaker`, instead of using the request one.
+    """
+    csv_writer = IterableCSVWriter(dialect="excel")
+    yield csv_writer.getrow(header)
+
+    async with sessionmaker() as session:
+        results = await session.stream_scalars(
+            statement.execution_options(yield_per=yield_per)
+        )
+        async for partition in results.partitions():
+            yield csv_writer.getrows(get_row(item) for item in partition)
@@ -0,0 +1,95 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterable, Mapping, Sequence
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchLoadFunction = Callable[[Sequence[K]], Awaitable[Mapping[K, V]]]
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Coalesce keyed lookups into batches, and cache their results.
+
+    Every key requested during the same event loop iteration is passed to a single
+    call of the batch function, which returns the found values keyed by their key.
+    Keys missing from the result resolve to `None`.
+
+    Loaders are meant to be short-lived, typically scoped to a request:
+    the cache is never invalidated.
+
+    Example:
+
+    ```py
+    async def load_users(ids: Sequence[UUID]) -> dict[UUID, User]:
+        result = await session.execute(select(User).where(User.id.in_(ids)))
+        return {user.id: user for user in result.scalars()}
+
+    users = DataLoader(load_users)
+    user_a, user_b = await users.load_many([user_a_id, user_b_id])
+    user_a = await users.load(user_a_id)  # Cached, no query
+    ```
+    """
+
+    def __init__(self, batch_load: BatchLoadFunction[K, V]) -> None:
+        self._batch_load = batch_load
+        self._cache: dict[K, asyncio.Future[V | None]] = {}
+        self._queue: dict[K, asyncio.Future[V | None]] = {}
+        self._dispatch_scheduled = False
+        # Keep a reference to running dispatches, so they're not garbage collected
+        self._dispatch_tasks: set[asyncio.Task[None]] = set()
+
+    async def load(self, key: K) -> V | None:
+        return await self._get_future(key)
+
+    async def load_many(self, keys: Iterable[K]) -> list[V | None]:
+        futures = [self._get_future(key) for key in keys]
+        return list(await asyncio.gather(*futures))
+
+    def prime(self, key: K, value: V | None) -> None:
+        """Set the value of a key, unless it's already loaded or being loaded."""
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+    def _get_future(self, key: K) -> asyncio.Future[V | None]:
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        self._queue[key] = future
+
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            loop.call_soon(self._schedule_dispatch)
+
+        return future
+
+    def _schedule_dispatch(self) -> None:
+        task = asyncio.get_running_loop().create_task(self._dispatch())
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(self) -> None:
+        queue = self._queue
+        self._queue = {}
+        self._dispatch_scheduled = False
+
+        try:
+            values = await self._batch_load(list(queue.keys()))
+        except Exception as e:
+            for key, future in queue.items():
+                # Don't cache failures, so the key can be retried
+                del self._cache[key]
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in queue.items():
+            if not future.done():
+                future.set_result(values.get(key))
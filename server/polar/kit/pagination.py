@@ -1,15 +1,46 @@
+import base64
+import binascii
+import hashlib
+import json
 import math
+import uuid
 from collections.abc import Sequence
-from typing import Annotated, Any, Generic, NamedTuple, Self, TypeVar, overload
+from datetime import date, datetime
+from decimal import Decimal
+from enum import StrEnum
+from typing import (
+    Annotated,
+    Any,
+    Generic,
+    NamedTuple,
+    Self,
+    TypeVar,
+    cast,
+    overload,
+)
 
 from fastapi import Depends, Query
-from pydantic import BaseModel, GetCoreSchemaHandler
+from pydantic import BaseModel, Field, GetCoreSchemaHandler
 from pydantic._internal._repr import display_as_type
 from pydantic_core import CoreSchema
-from sqlalchemy import Select, func, over
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    UnaryExpression,
+    and_,
+    false,
+    func,
+    inspect,
+    or_,
+    over,
+    select,
+)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import ClauseElement, Executable, operators
 from sqlalchemy.sql._typing import _ColumnsClauseArgument
 
 from polar.config import settings
+from polar.exceptions import PolarRequestValidationError
 from polar.kit.db.models import RecordModel
 from polar.kit.db.models.base import Model
 from polar.kit.db.postgres import AsyncSession
@@ -20,9 +51,36 @@ RM = TypeVar("RM", bound=RecordModel)
 M = TypeVar("M", bound=Model)
 
 
+class PaginationCount(StrEnum):
+    skip = "skip"
+    exact = "exact"
+    estimate = "estimate"
+
+
+class CursorPagination:
+    """
+    Keyset pagination state.
+
+    Instead of skipping `OFFSET` rows, the query resumes right after the sort key
+    of the last item of the previous page, which is encoded in an opaque cursor.
+
+    `next_cursor` is set by `paginate` once the page is fetched. It also carries
+    the total count of the first page, so the following pages don't have to count
+    the rows again unless `count` asks for it.
+    """
+
+    def __init__(
+        self, cursor: str | None = None, count: PaginationCount = PaginationCount.skip
+    ) -> None:
+        self.cursor = cursor
+        self.count = count
+        self.next_cursor: str | None = None
+
+
 class PaginationParams(NamedTuple):
     page: int
     limit: int
+    cursor: CursorPagination | None = None
 
 
 @overload
@@ -62,7 +120,18 @@ async def paginate(
     pagination: PaginationParams,
     count_clause: _ColumnsClauseArgument[Any] | None = None,
 ) -> tuple[Sequence[Any], int]:
-    page, limit = pagination
+    page, limit, cursor = pagination
+
+    if cursor is not None:
+        return await _paginate_cursor(
+            session,
+            statement,
+            page=page,
+            limit=limit,
+            cursor=cursor,
+            count_clause=count_clause,
+        )
+
     offset = limit * (page - 1)
     statement = statement.offset(offset).limit(limit)
 
@@ -86,6 +155,253 @@ async def paginate(
     return results, count
 
 
+class _SortKey(NamedTuple):
+    key: ColumnElement[Any]
+    is_desc: bool
+    nulls_first: bool
+
+
+def _get_sort_keys(statement: Select[Any]) -> list[_SortKey]:
+    """
+    Return the sort expressions of the statement, whether they're descending and
+    whether `NULL` values come first, with the primary key of the selected entity
+    as final tie-breaker.
+
+    Follows PostgreSQL default ordering unless `NULLS FIRST` or `NULLS LAST`
+    is set: `NULL` values come last in ascending order and first in descending
+    order.
+    """
+    sort_keys: list[_SortKey] = []
+    for order_by_clause in statement._order_by_clauses:
+        clause: ColumnElement[Any] = order_by_clause
+        nulls_first: bool | None = None
+        if isinstance(clause, UnaryExpression) and clause.modifier in {
+            operators.nulls_first_op,
+            operators.nulls_last_op,
+        }:
+            nulls_first = clause.modifier == operators.nulls_first_op
+            clause = cast(ColumnElement[Any], clause.element)
+
+        key = clause
+        is_desc = False
+        if isinstance(clause, UnaryExpression) and clause.modifier in {
+            operators.desc_op,
+            operators.asc_op,
+        }:
+            key = cast(ColumnElement[Any], clause.element)
+            is_desc = clause.modifier == operators.desc_op
+
+        sort_keys.append(
+            _SortKey(key, is_desc, is_desc if nulls_first is None else nulls_first)
+        )
+
+    entity = statement.column_descriptions[0]["entity"]
+    if entity is None:
+        raise ValueError("Cursor pagination requires to select an ORM entity.")
+    for column in inspect(entity).primary_key:
+        if not any(column is sort_key.key for sort_key in sort_keys):
+            sort_keys.append(_SortKey(column, False, False))
+
+    return sort_keys
+
+
+def _get_order_by_clause(sort_key: _SortKey) -> UnaryExpression[Any]:
+    key, is_desc, nulls_first = sort_key
+    clause = key.desc() if is_desc else key.asc()
+    return clause.nulls_first() if nulls_first else clause.nulls_last()
+
+
+def _get_sort_keys_fingerprint(sort_keys: list[_SortKey]) -> str:
+    signature = ",".join(
+        f"{key}:{is_desc}:{nulls_first}" for key, is_desc, nulls_first in sort_keys
+    )
+    return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+
+
+def _encode_cursor_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"u": str(value)}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return value
+
+
+def _decode_cursor_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        ((kind, v),) = value.items()
+        if kind == "dt":
+            return datetime.fromisoformat(v)
+        if kind == "d":
+            return date.fromisoformat(v)
+        if kind == "u":
+            return uuid.UUID(v)
+        if kind == "n":
+            return Decimal(v)
+        raise ValueError(kind)
+    return value
+
+
+def _encode_cursor(fingerprint: str, values: Sequence[Any], count: int) -> str:
+    payload = json.dumps(
+        [fingerprint, [_encode_cursor_value(v) for v in values], count]
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, fingerprint: str, length: int) -> tuple[list[Any], int]:
+    try:
+        cursor_fingerprint, values, count = json.loads(base64.urlsafe_b64decode(cursor))
+        if (
+            cursor_fingerprint != fingerprint
+            or len(values) != length
+            or not isinstance(count, int)
+        ):
+            raise ValueError(cursor)
+        return [_decode_cursor_value(value) for value in values], count
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise PolarRequestValidationError(
+            [
+                {
+                    "loc": ("query", "cursor"),
+                    "input": cursor,
+                    "msg": "Invalid cursor.",
+                    "type": "value_error",
+                }
+            ]
+        ) from e
+
+
+def _get_after_clause(
+    sort_keys: list[_SortKey], values: Sequence[Any]
+) -> ColumnElement[bool]:
+    """
+    Build the clause selecting the rows sorted after the given sort key values.
+    """
+    clauses: list[ColumnElement[bool]] = []
+    equal_clauses: list[ColumnElement[bool]] = []
+    for (key, is_desc, nulls_first), value in zip(sort_keys, values):
+        after: ColumnElement[bool]
+        if value is None:
+            after = key.is_not(None) if nulls_first else false()
+        else:
+            after = key < value if is_desc else key > value
+            if not nulls_first:
+                after = or_(after, key.is_(None))
+        clauses.append(and_(*equal_clauses, after))
+        equal_clauses.append(key.is_(None) if value is None else key == value)
+    return or_(*clauses)
+
+
+class _Explain(Executable, ClauseElement):
+    """
+    `EXPLAIN (FORMAT JSON)` of a statement, executed with its bound parameters.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select[Any]) -> None:
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler: Any, **kw: Any) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}"
+
+
+async def _count(
+    session: AsyncSession, statement: Select[Any], count: PaginationCount
+) -> int:
+    statement = statement.order_by(None)
+
+    if count == PaginationCount.estimate:
+        explain_result = await session.execute(_Explain(statement))
+        plan = explain_result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    result = await session.execute(
+        select(func.count()).select_from(statement.subquery())
+    )
+    return result.scalar_one()
+
+
+async def _paginate_cursor(
+    session: AsyncSession,
+    statement: Select[Any],
+    *,
+    page: int,
+    limit: int,
+    cursor: CursorPagination,
+    count_clause: _ColumnsClauseArgument[Any] | None = None,
+) -> tuple[Sequence[Any], int]:
+    sort_keys = _get_sort_keys(statement)
+    fingerprint = _get_sort_keys_fingerprint(sort_keys)
+    count_statement = statement
+
+    cursor_count: int | None = None
+    if cursor.cursor is not None:
+        values, cursor_count = _decode_cursor(
+            cursor.cursor, fingerprint, len(sort_keys)
+        )
+        statement = statement.where(_get_after_clause(sort_keys, values))
+    else:
+        statement = statement.offset(limit * (page - 1))
+
+    # Fetch one more row to know if there is a next page
+    statement = (
+        statement.order_by(None)
+        .order_by(*(_get_order_by_clause(sort_key) for sort_key in sort_keys))
+        .limit(limit + 1)
+    )
+    statement = statement.add_columns(*(sort_key.key for sort_key in sort_keys))
+
+    # On the first page, keep the window count, unless the caller wants an estimate.
+    # The following pages reuse the count carried by the cursor, unless the caller
+    # explicitly asks to count again.
+    window_count = cursor.cursor is None and cursor.count != PaginationCount.estimate
+    if window_count:
+        statement = statement.add_columns(
+            count_clause if count_clause is not None else over(func.count())
+        )
+
+    result = await session.execute(statement)
+
+    results: list[Any] = []
+    last_values: Sequence[Any] = []
+    count = 0
+    has_next = False
+    for row in result.unique().all():
+        if len(results) == limit:
+            has_next = True
+            break
+        columns = row._tuple()
+        if window_count:
+            *columns, c = columns
+            count = int(c)
+        queried_data = columns[: -len(sort_keys)]
+        last_values = columns[-len(sort_keys) :]
+        if len(queried_data) == 1:
+            results.append(queried_data[0])
+        else:
+            results.append(queried_data)
+
+    if cursor_count is not None and cursor.count == PaginationCount.skip:
+        count = cursor_count
+    elif not window_count:
+        count = await _count(session, count_statement, cursor.count)
+
+    cursor.next_cursor = (
+        _encode_cursor(fingerprint, last_values, count) if has_next else None
+    )
+
+    return results, count
+
+
 async def get_pagination_params(
     page: int = Query(1, description="Page number, defaults to 1.", gt=0),
     limit: int = Query(
@@ -103,9 +419,57 @@ async def get_pagination_params(
 PaginationParamsQuery = Annotated[PaginationParams, Depends(get_pagination_params)]
 
 
+async def get_cursor_pagination_params(
+    page: int = Query(1, description="Page number, defaults to 1.", gt=0),
+    limit: int = Query(
+        10,
+        description=(
+            f"Size of a page, defaults to 10. "
+            f"Maximum is {settings.API_PAGINATION_MAX_LIMIT}."
+        ),
+        gt=0,
+    ),
+    cursor: str | None = Query(
+        None,
+        description=(
+            "Cursor to the next page, as returned in the `next_cursor` field "
+            "of the previous page. Takes precedence over `page`, and is faster "
+            "for large lists."
+        ),
+    ),
+    count: PaginationCount = Query(
+        PaginationCount.skip,
+        description=(
+            "How to compute `total_count`. "
+            "`skip` counts on the first page only, and reuses this count "
+            "on the following pages. "
+            "`exact` counts again on every page. "
+            "`estimate` is much faster for large lists, but is only approximate."
+        ),
+    ),
+) -> PaginationParams:
+    return PaginationParams(
+        page,
+        min(settings.API_PAGINATION_MAX_LIMIT, limit),
+        CursorPagination(cursor, count),
+    )
+
+
+CursorPaginationParamsQuery = Annotated[
+    PaginationParams, Depends(get_cursor_pagination_params)
+]
+
+
 class Pagination(Schema):
     total_count: int
     max_page: int
+    next_cursor: str | None = Field(
+        default=None,
+        description=(
+            "Cursor to pass to get the next page. "
+            "Only set on endpoints supporting cursor pagination."
+        ),
+    )
 
 
 class ListResource(BaseModel, Generic[T]):
@@ -121,6 +485,9 @@ class ListResource(BaseModel, Generic[T]):
             pagination=Pagination(
                 total_count=total_count,
                 max_page=math.ceil(total_count / pagination_params.limit),
+                next_cursor=pagination_params.cursor.next_cursor
+                if pagination_params.cursor is not None
+                else None,
             ),
         )
 
@@ -0,0 +1,50 @@
+import collections
+import zipfile
+from typing import IO
+
+
+class IterableZipWriter:
+    """
+    Utility class wrapping the built-in zipfile.ZipFile allowing
+    to generate a ZIP archive as chunks of bytes, without a seekable file.
+
+    It's useful to generate archives with StreamingResponse, for example.
+
+    Example:
+
+    ```py
+    writer = IterableZipWriter()
+    with writer.open("hello.txt") as f:
+        f.write(b"Hello")
+        yield writer.getchunk()
+    writer.close()
+    yield writer.getchunk()
+    ```
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED) -> None:
+        self._chunks: collections.deque[bytes] = collections.deque()
+        # The output isn't seekable: ZipFile writes data descriptors after each entry
+        self.archive = zipfile.ZipFile(self, "w", compression)
+
+    def open(self, name: str) -> IO[bytes]:
+        return self.archive.open(name, "w", force_zip64=True)
+
+    def writestr(self, name: str, data: str | bytes) -> None:
+        self.archive.writestr(name, data)
+
+    def close(self) -> None:
+        self.archive.close()
+
+    def getchunk(self) -> bytes:
+        """Return the bytes written since the last call."""
+        chunk = b"".join(self._chunks)
+        self._chunks.clear()
+        return chunk
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
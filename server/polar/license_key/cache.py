@@ -0,0 +1,68 @@
+"""
+Cache of the license keys attributes needed to validate them.
+
+License keys are validated by customers' apps on every launch, so we keep a
+compact projection of the key in Redis, keyed by (organization, key). It only
+holds attributes that change when the key is updated, granted or revoked, which
+invalidate it. Counters like `usage` and `validations` are never read from the
+cache: they're updated and returned by the validation query.
+"""
+
+import datetime
+import hashlib
+from uuid import UUID
+
+from pydantic import UUID4
+
+from polar.benefit.schemas import BenefitID
+from polar.kit.schemas import Schema
+from polar.models import LicenseKey
+from polar.models.license_key import LicenseKeyStatus
+from polar.redis import Redis
+
+from .schemas import LicenseKeyUser
+
+CACHE_TTL = datetime.timedelta(hours=1)
+
+
+class LicenseKeyProjection(Schema):
+    id: UUID4
+    organization_id: UUID4
+    user_id: UUID4
+    user: LicenseKeyUser
+    benefit_id: BenefitID
+    key: str
+    display_key: str
+    status: LicenseKeyStatus
+    limit_activations: int | None
+    limit_usage: int | None
+    expires_at: datetime.datetime | None
+
+
+def _get_key(organization_id: UUID, key: str) -> str:
+    # Don't leak the license key in Redis keys
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"license_key:{organization_id}:{digest}"
+
+
+async def get(
+    redis: Redis, organization_id: UUID, key: str
+) -> LicenseKeyProjection | None:
+    value = await redis.get(_get_key(organization_id, key))
+    if value is None:
+        return None
+    return LicenseKeyProjection.model_validate_json(value)
+
+
+async def store(redis: Redis, license_key: LicenseKey) -> LicenseKeyProjection:
+    projection = LicenseKeyProjection.model_validate(license_key)
+    await redis.set(
+        _get_key(license_key.organization_id, license_key.key),
+        projection.model_dump_json(),
+        ex=CACHE_TTL,
+    )
+    return projection
+
+
+async def invalidate(redis: Redis, license_key: LicenseKey) -> None:
+    await redis.delete(_get_key(license_key.organization_id, license_key.key))
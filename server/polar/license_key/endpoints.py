@@ -10,6 +10,7 @@ from polar.models import LicenseKey, LicenseKeyActivation
 from polar.openapi import APITag
 from polar.organization.schemas import OrganizationID
 from polar.postgres import get_db_session
+from polar.redis import Redis, get_redis
 from polar.routing import APIRouter
 
 from . import auth
@@ -104,6 +105,7 @@ async def update(
     id: UUID4,
     updates: LicenseKeyUpdate,
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
     authz: Authz = Depends(Authz.authz),
 ) -> LicenseKey:
     """Update a license key."""
@@ -114,7 +116,9 @@ async def update(
     if not await authz.can(auth_subject.subject, AccessType.write, lk):
         raise Unauthorized()
 
-    updated = await license_key_service.update(session, license_key=lk, updates=updates)
+    updated = await license_key_service.update(
+        session, redis, license_key=lk, updates=updates
+    )
     return updated
 
 
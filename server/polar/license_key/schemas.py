@@ -5,7 +5,7 @@ from dateutil.relativedelta import relativedelta
 from pydantic import UUID4, Field
 
 from polar.benefit.schemas import BenefitID
-from polar.exceptions import ResourceNotFound, Unauthorized
+from polar.exceptions import PolarError, ResourceNotFound, Unauthorized
 from polar.kit.schemas import Schema
 from polar.kit.utils import generate_uuid, utc_now
 from polar.models.benefit import (
@@ -58,6 +58,25 @@ class LicenseKeyDeactivate(Schema):
     activation_id: UUID4
 
 
+LICENSE_KEY_BATCH_MAX_SIZE = 500
+
+
+class LicenseKeyValidateBatch(Schema):
+    items: list[LicenseKeyValidate] = Field(
+        min_length=1,
+        max_length=LICENSE_KEY_BATCH_MAX_SIZE,
+        description="License keys to validate.",
+    )
+
+
+class LicenseKeyActivateBatch(Schema):
+    items: list[LicenseKeyActivate] = Field(
+        min_length=1,
+        max_length=LICENSE_KEY_BATCH_MAX_SIZE,
+        description="License keys to activate.",
+    )
+
+
 class LicenseKeyUser(Schema):
     id: UUID4
     public_name: str
@@ -103,6 +122,36 @@ class LicenseKeyActivationRead(LicenseKeyActivationBase):
     license_key: LicenseKeyRead
 
 
+class LicenseKeyBatchError(Schema):
+    error: str = Field(description="Type of the error.")
+    detail: str
+    status_code: int = Field(
+        description="HTTP status code the single-key endpoint would have returned."
+    )
+
+    @classmethod
+    def from_exception(cls, exception: PolarError) -> Self:
+        return cls(
+            error=type(exception).__name__,
+            detail=exception.message,
+            status_code=exception.status_code,
+        )
+
+
+class LicenseKeyBatchResultBase(Schema):
+    key: str
+    organization_id: UUID4
+    error: LicenseKeyBatchError | None = None
+
+
+class ValidatedLicenseKeyBatchResult(LicenseKeyBatchResultBase):
+    license_key: ValidatedLicenseKey | None = None
+
+
+class LicenseKeyActivationBatchResult(LicenseKeyBatchResultBase):
+    activation: LicenseKeyActivationRead | None = None
+
+
 class LicenseKeyUpdate(Schema):
     status: LicenseKeyStatus | None = None
     usage: int = 0
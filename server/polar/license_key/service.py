@@ -1,12 +1,26 @@
 from collections.abc import Sequence
+from datetime import datetime
 from uuid import UUID
 
 import structlog
-from sqlalchemy import Select, and_, func, select
+from sqlalchemy import (
+    Integer,
+    Row,
+    Select,
+    Uuid,
+    and_,
+    column,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
 from sqlalchemy.orm import contains_eager, joinedload
 
 from polar.auth.models import AuthSubject, is_organization, is_user
-from polar.exceptions import BadRequest, NotPermitted, ResourceNotFound
+from polar.exceptions import BadRequest, NotPermitted, PolarError, ResourceNotFound
 from polar.kit.pagination import PaginationParams, paginate
 from polar.kit.services import ResourceService
 from polar.kit.utils import utc_now
@@ -19,14 +33,25 @@ from polar.models import (
     UserOrganization,
 )
 from polar.models.benefit import BenefitLicenseKeys
+from polar.models.license_key import LicenseKeyStatus
 from polar.postgres import AsyncSession
+from polar.redis import Redis
+from polar.worker import enqueue_job
 
+from . import cache
+from .cache import LicenseKeyProjection
 from .schemas import (
     LicenseKeyActivate,
+    LicenseKeyActivationBase,
+    LicenseKeyActivationBatchResult,
+    LicenseKeyActivationRead,
+    LicenseKeyBatchError,
     LicenseKeyCreate,
     LicenseKeyDeactivate,
     LicenseKeyUpdate,
     LicenseKeyValidate,
+    ValidatedLicenseKey,
+    ValidatedLicenseKeyBatchResult,
 )
 
 log = structlog.get_logger()
@@ -62,6 +87,21 @@ class LicenseKeyService(
 
         return lk
 
+    async def get_by_keys(
+        self,
+        session: AsyncSession,
+        keys: Sequence[tuple[UUID, str]],
+    ) -> dict[tuple[UUID, str], LicenseKey]:
+        """Get license keys by (organization_id, key), in a single query."""
+        query = self._get_select_base().where(
+            tuple_(LicenseKey.organization_id, LicenseKey.key).in_(keys)
+        )
+        result = await session.execute(query)
+        return {
+            (license_key.organization_id, license_key.key): license_key
+            for license_key in result.unique().scalars().all()
+        }
+
     async def get_loaded(
         self,
         session: AsyncSession,
@@ -122,16 +162,9 @@ class LicenseKeyService(
     async def get_activation_or_raise(
         self, session: AsyncSession, *, license_key: LicenseKey, activation_id: UUID
     ) -> LicenseKeyActivation:
-        query = select(LicenseKeyActivation).where(
-            LicenseKeyActivation.id == activation_id,
-            LicenseKeyActivation.license_key_id == license_key.id,
-            LicenseKeyActivation.deleted_at.is_(None),
+        record = await self._get_activation_or_raise(
+            session, license_key_id=license_key.id, activation_id=activation_id
         )
-        result = await session.execute(query)
-        record = result.scalar_one_or_none()
-        if not record:
-            raise ResourceNotFound()
-
         record.license_key = license_key
         return record
 
@@ -186,6 +219,7 @@ class LicenseKeyService(
     async def update(
         self,
         session: AsyncSession,
+        redis: Redis,
         *,
         license_key: LicenseKey,
         updates: LicenseKeyUpdate,
@@ -196,6 +230,7 @@ class LicenseKeyService(
 
         session.add(license_key)
         await session.flush()
+        await self._invalidate_cache(redis, license_key)
         return license_key
 
     async def validate(
@@ -205,26 +240,7 @@ class LicenseKeyService(
         license_key: LicenseKey,
         validate: LicenseKeyValidate,
     ) -> tuple[LicenseKey, LicenseKeyActivation | None]:
-        if not license_key.is_active():
-            log.info(
-                "license_key.validate.invalid_status",
-                license_key_id=license_key.id,
-                organization_id=license_key.organization_id,
-                user=license_key.user_id,
-                benefit_id=license_key.benefit_id,
-            )
-            raise ResourceNotFound("License key is no longer active.")
-
-        if license_key.expires_at:
-            if utc_now() >= license_key.expires_at:
-                log.info(
-                    "license_key.validate.invalid_ttl",
-                    license_key_id=license_key.id,
-                    organization_id=license_key.organization_id,
-                    user=license_key.user_id,
-                    benefit_id=license_key.benefit_id,
-                )
-                raise ResourceNotFound("License key has expired.")
+        self._check_validate(license_key, validate)
 
         activation = None
         if validate.activation_id:
@@ -233,55 +249,49 @@ class LicenseKeyService(
                 license_key=license_key,
                 activation_id=validate.activation_id,
             )
-            if activation.conditions and validate.conditions != activation.conditions:
-                # Skip logging UGC conditions
-                log.info(
-                    "license_key.validate.invalid_conditions",
-                    license_key_id=license_key.id,
-                    organization_id=license_key.organization_id,
-                    user=license_key.user_id,
-                    benefit_id=license_key.benefit_id,
-                )
-                raise ResourceNotFound("License key does not match required conditions")
+            self._check_activation_conditions(license_key, activation, validate)
 
-        if validate.benefit_id and validate.benefit_id != license_key.benefit_id:
-            log.info(
-                "license_key.validate.invalid_benefit",
-                license_key_id=license_key.id,
-                organization_id=license_key.organization_id,
-                user=license_key.user_id,
-                benefit_id=license_key.benefit_id,
-                validate_benefit_id=validate.benefit_id,
-            )
-            raise ResourceNotFound("License key does not match given benefit.")
+        # The license key attributes are synchronized by the update statement
+        await self._mark_validated(session, license_key, validate.increment_usage)
+        log.info(
+            "license_key.validate",
+            license_key_id=license_key.id,
+            organization_id=license_key.organization_id,
+            user=license_key.user_id,
+            benefit_id=license_key.benefit_id,
+        )
+        return (license_key, activation)
 
-        if validate.user_id and validate.user_id != license_key.user_id:
-            log.warn(
-                "license_key.validate.invalid_owner",
+    async def validate_by_key(
+        self, session: AsyncSession, redis: Redis, validate: LicenseKeyValidate
+    ) -> ValidatedLicenseKey:
+        """
+        Validate a license key by its value, from its cached projection.
+
+        Same rules as `validate`, but it doesn't load the license key from
+        the database unless it's not cached: usage is checked and incremented by
+        the validation query itself.
+        """
+        license_key = await self.get_projection_or_raise_by_key(
+            session,
+            redis,
+            organization_id=validate.organization_id,
+            key=validate.key,
+        )
+        self._check_validate(license_key, validate)
+
+        activation = None
+        if validate.activation_id:
+            activation = await self._get_activation_or_raise(
+                session,
                 license_key_id=license_key.id,
-                organization_id=license_key.organization_id,
-                user=license_key.user_id,
-                benefit_id=license_key.benefit_id,
-                validate_user_id=validate.user_id,
+                activation_id=validate.activation_id,
             )
-            raise ResourceNotFound("License key does not match given user.")
-
-        if validate.increment_usage and license_key.limit_usage:
-            remaining = license_key.limit_usage - license_key.usage
-            if validate.increment_usage > remaining:
-                log.info(
-                    "license_key.validate.insufficient_usage",
-                    license_key_id=license_key.id,
-                    organization_id=license_key.organization_id,
-                    user=license_key.user_id,
-                    benefit_id=license_key.benefit_id,
-                    usage_remaining=remaining,
-                    usage_requested=validate.increment_usage,
-                )
-                raise BadRequest(f"License key only has {remaining} more usages.")
+            self._check_activation_conditions(license_key, activation, validate)
 
-        license_key.mark_validated(increment_usage=validate.increment_usage)
-        session.add(license_key)
+        usage, validations, last_validated_at = await self._mark_validated(
+            session, license_key, validate.increment_usage
+        )
         log.info(
             "license_key.validate",
             license_key_id=license_key.id,
@@ -289,7 +299,32 @@ class LicenseKeyService(
             user=license_key.user_id,
             benefit_id=license_key.benefit_id,
         )
-        return (license_key, activation)
+        return ValidatedLicenseKey(
+            **license_key.model_dump(),
+            usage=usage,
+            validations=validations,
+            last_validated_at=last_validated_at,
+            activation=LicenseKeyActivationBase.model_validate(activation)
+            if activation is not None
+            else None,
+        )
+
+    async def get_projection_or_raise_by_key(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        *,
+        organization_id: UUID,
+        key: str,
+    ) -> LicenseKeyProjection:
+        projection = await cache.get(redis, organization_id, key)
+        if projection is not None:
+            return projection
+
+        license_key = await self.get_or_raise_by_key(
+            session, organization_id=organization_id, key=key
+        )
+        return await cache.store(redis, license_key)
 
     async def get_activation_count(
         self,
@@ -306,34 +341,39 @@ class LicenseKeyService(
             return count
         return 0
 
+    async def get_activation_counts(
+        self,
+        session: AsyncSession,
+        license_keys: Sequence[LicenseKey],
+    ) -> dict[UUID, int]:
+        license_key_ids = [license_key.id for license_key in license_keys]
+        query = (
+            select(
+                LicenseKeyActivation.license_key_id, func.count(LicenseKeyActivation.id)
+            )
+            .where(
+                LicenseKeyActivation.license_key_id.in_(license_key_ids),
+                LicenseKeyActivation.deleted_at.is_(None),
+            )
+            .group_by(LicenseKeyActivation.license_key_id)
+        )
+        res = await session.execute(query)
+        counts = dict.fromkeys(license_key_ids, 0)
+        counts.update(res.tuples().all())
+        return counts
+
     async def activate(
         self,
         session: AsyncSession,
         license_key: LicenseKey,
         activate: LicenseKeyActivate,
     ) -> LicenseKeyActivation:
-        if not license_key.limit_activations:
-            raise NotPermitted("License key does not require activation")
-
         current_activation_count = await self.get_activation_count(
             session,
             license_key=license_key,
         )
-        if current_activation_count >= license_key.limit_activations:
-            log.info(
-                "license_key.activate.limit_reached",
-                license_key_id=license_key.id,
-                organization_id=license_key.organization_id,
-                user=license_key.user_id,
-                benefit_id=license_key.benefit_id,
-            )
-            raise NotPermitted("License key activation limit already reached")
-
-        instance = LicenseKeyActivation(
-            license_key=license_key,
-            label=activate.label,
-            conditions=activate.conditions,
-            meta=activate.meta,
+        instance = self._build_activation(
+            license_key, activate, current_activation_count
         )
         session.add(instance)
         await session.flush()
@@ -348,6 +388,118 @@ class LicenseKeyService(
         )
         return instance
 
+    async def validate_batch(
+        self, session: AsyncSession, validates: Sequence[LicenseKeyValidate]
+    ) -> list[ValidatedLicenseKeyBatchResult]:
+        """
+        Validate several license keys, with the same rules as `validate`.
+
+        License keys and activations are loaded in one query each, and the counters
+        are updated in a single statement. Errors are returned for each key instead
+        of being raised.
+        """
+        license_keys = await self.get_by_keys(
+            session,
+            [(validate.organization_id, validate.key) for validate in validates],
+        )
+
+        activation_ids: list[tuple[UUID, UUID]] = []
+        for validate in validates:
+            license_key = license_keys.get((validate.organization_id, validate.key))
+            if license_key is not None and validate.activation_id is not None:
+                activation_ids.append((license_key.id, validate.activation_id))
+        activations = await self._get_activations(session, activation_ids)
+
+        results: list[ValidatedLicenseKeyBatchResult] = []
+        validated: list[
+            tuple[ValidatedLicenseKeyBatchResult, LicenseKeyValidate, LicenseKey]
+        ] = []
+        for validate in validates:
+            result = ValidatedLicenseKeyBatchResult(
+                key=validate.key, organization_id=validate.organization_id
+            )
+            results.append(result)
+            try:
+                license_key = license_keys.get((validate.organization_id, validate.key))
+                if license_key is None:
+                    raise ResourceNotFound()
+                self._check_validate(license_key, validate)
+                activation = None
+                if validate.activation_id:
+                    activation = activations.get(
+                        (license_key.id, validate.activation_id)
+                    )
+                    if activation is None:
+                        raise ResourceNotFound()
+                    self._check_activation_conditions(license_key, activation, validate)
+            except PolarError as e:
+                result.error = LicenseKeyBatchError.from_exception(e)
+            else:
+                result.license_key = ValidatedLicenseKey.model_validate(license_key)
+                if activation is not None:
+                    result.license_key.activation = (
+                        LicenseKeyActivationBase.model_validate(activation)
+                    )
+                validated.append((result, validate, license_key))
+
+        await self._mark_validated_batch(session, validated)
+
+        return results
+
+    async def activate_batch(
+        self, session: AsyncSession, activates: Sequence[LicenseKeyActivate]
+    ) -> list[LicenseKeyActivationBatchResult]:
+        """
+        Activate several license keys, with the same rules as `activate`.
+
+        Errors are returned for each key instead of being raised.
+        """
+        license_keys = await self.get_by_keys(
+            session,
+            [(activate.organization_id, activate.key) for activate in activates],
+        )
+        activation_counts = await self.get_activation_counts(
+            session, list(license_keys.values())
+        )
+
+        results: list[LicenseKeyActivationBatchResult] = []
+        activations: list[
+            tuple[LicenseKeyActivationBatchResult, LicenseKeyActivation]
+        ] = []
+        for activate in activates:
+            result = LicenseKeyActivationBatchResult(
+                key=activate.key, organization_id=activate.organization_id
+            )
+            results.append(result)
+            try:
+                license_key = license_keys.get((activate.organization_id, activate.key))
+                if license_key is None:
+                    raise ResourceNotFound()
+                instance = self._build_activation(
+                    license_key, activate, activation_counts[license_key.id]
+                )
+            except PolarError as e:
+                result.error = LicenseKeyBatchError.from_exception(e)
+            else:
+                session.add(instance)
+                activation_counts[license_key.id] += 1
+                activations.append((result, instance))
+
+        await session.flush()
+        for result, instance in activations:
+            result.activation = LicenseKeyActivationRead.model_validate(instance)
+            license_key = instance.license_key
+            log.info(
+                "license_key.activate",
+                license_key_id=license_key.id,
+                organization_id=license_key.organization_id,
+                user=license_key.user_id,
+                benefit_id=license_key.benefit_id,
+                activation_id=instance.id,
+            )
+
+        return results
+
     async def deactivate(
         self,
         session: AsyncSession,
@@ -376,6 +528,7 @@ class LicenseKeyService(
     async def user_grant(
         self,
         session: AsyncSession,
+        redis: Redis,
         *,
         user: User,
         benefit: BenefitLicenseKeys,
@@ -400,6 +553,7 @@ class LicenseKeyService(
         if license_key_id:
             return await self.user_update_grant(
                 session,
+                redis,
                 create_schema=create_schema,
                 license_key_id=license_key_id,
             )
@@ -412,6 +566,7 @@ class LicenseKeyService(
     async def user_update_grant(
         self,
         session: AsyncSession,
+        redis: Redis,
         *,
         license_key_id: UUID,
         create_schema: LicenseKeyCreate,
@@ -438,6 +593,7 @@ class LicenseKeyService(
 
         session.add(key)
         await session.flush()
+        await self._invalidate_cache(redis, key)
         assert key.id is not None
         log.info(
             "license_key.grant.update",
@@ -470,6 +626,7 @@ class LicenseKeyService(
     async def user_revoke(
         self,
         session: AsyncSession,
+        redis: Redis,
         user: User,
         benefit: BenefitLicenseKeys,
         license_key_id: UUID,
@@ -484,6 +641,7 @@ class LicenseKeyService(
         key.mark_revoked()
         session.add(key)
         await session.flush()
+        await self._invalidate_cache(redis, key)
         log.info(
             "license_key.revoke",
             license_key_id=key.id,
@@ -493,6 +651,302 @@ class LicenseKeyService(
         )
         return key
 
+    def _build_activation(
+        self,
+        license_key: LicenseKey,
+        activate: LicenseKeyActivate,
+        current_activation_count: int,
+    ) -> LicenseKeyActivation:
+        if not license_key.limit_activations:
+            raise NotPermitted("License key does not require activation")
+
+        if current_activation_count >= license_key.limit_activations:
+            log.info(
+                "license_key.activate.limit_reached",
+                license_key_id=license_key.id,
+                organization_id=license_key.organization_id,
+                user=license_key.user_id,
+                benefit_id=license_key.benefit_id,
+            )
+            raise NotPermitted("License key activation limit already reached")
+
+        return LicenseKeyActivation(
+            license_key=license_key,
+            label=activate.label,
+            conditions=activate.conditions,
+            meta=activate.meta,
+        )
+
+    async def _invalidate_cache(self, redis: Redis, license_key: LicenseKey) -> None:
+        await cache.invalidate(redis, license_key)
+        # A concurrent validation may cache the previous state again until our
+        # transaction is committed: enqueued jobs only run after the commit.
+        enqueue_job("license_key.invalidate_cache", license_key.id)
+
+    async def _get_activation_or_raise(
+        self, session: AsyncSession, *, license_key_id: UUID, activation_id: UUID
+    ) -> LicenseKeyActivation:
+        query = select(LicenseKeyActivation).where(
+            LicenseKeyActivation.id == activation_id,
+            LicenseKeyActivation.license_key_id == license_key_id,
+            LicenseKeyActivation.deleted_at.is_(None),
+        )
+        result = await session.execute(query)
+        record = result.scalar_one_or_none()
+        if not record:
+            raise ResourceNotFound()
+
+        return record
+
+    async def _get_activations(
+        self, session: AsyncSession, ids: Sequence[tuple[UUID, UUID]]
+    ) -> dict[tuple[UUID, UUID], LicenseKeyActivation]:
+        """Get activations by their license key ID and ID."""
+        if not ids:
+            return {}
+        query = select(LicenseKeyActivation).where(
+            tuple_(LicenseKeyActivation.license_key_id, LicenseKeyActivation.id).in_(
+                ids
+            ),
+            LicenseKeyActivation.deleted_at.is_(None),
+        )
+        result = await session.execute(query)
+        return {
+            (activation.license_key_id, activation.id): activation
+            for activation in result.scalars().all()
+        }
+
+    def _check_validate(
+        self,
+        license_key: LicenseKey | LicenseKeyProjection,
+        validate: LicenseKeyValidate,
+    ) -> None:
+        if license_key.status != LicenseKeyStatus.granted:
+            log.info(
+                "license_key.validate.invalid_status",
+                license_key_id=license_key.id,
+                organization_id=license_key.organization_id,
+                user=license_key.user_id,
+                benefit_id=license_key.benefit_id,
+            )
+            raise ResourceNotFound("License key is no longer active.")
+
+        if license_key.expires_at:
+            if utc_now() >= license_key.expires_at:
+                log.info(
+                    "license_key.validate.invalid_ttl",
+                    license_key_id=license_key.id,
+                    organization_id=license_key.organization_id,
+                    user=license_key.user_id,
+                    benefit_id=license_key.benefit_id,
+                )
+                raise ResourceNotFound("License key has expired.")
+
+        if validate.benefit_id and validate.benefit_id != license_key.benefit_id:
+            log.info(
+                "license_key.validate.invalid_benefit",
+                license_key_id=license_key.id,
+                organization_id=license_key.organization_id,
+                user=license_key.user_id,
+                benefit_id=license_key.benefit_id,
+                validate_benefit_id=validate.benefit_id,
+            )
+            raise ResourceNotFound("License key does not match given benefit.")
+
+        if validate.user_id and validate.user_id != license_key.user_id:
+            log.warn(
+                "license_key.validate.invalid_owner",
+                license_key_id=license_key.id,
+                organization_id=license_key.organization_id,
+                user=license_key.user_id,
+                benefit_id=license_key.benefit_id,
+                validate_user_id=validate.user_id,
+            )
+            raise ResourceNotFound("License key does not match given user.")
+
+    def _check_activation_conditions(
+        self,
+        license_key: LicenseKey | LicenseKeyProjection,
+        activation: LicenseKeyActivation,
+        validate: LicenseKeyValidate,
+    ) -> None:
+        if activation.conditions and validate.conditions != activation.conditions:
+            # Skip logging UGC conditions
+            log.info(
+                "license_key.validate.invalid_conditions",
+                license_key_id=license_key.id,
+                organization_id=license_key.organization_id,
+                user=license_key.user_id,
+                benefit_id=license_key.benefit_id,
+            )
+            raise ResourceNotFound("License key does not match required conditions")
+
+    async def _mark_validated(
+        self,
+        session: AsyncSession,
+        license_key: LicenseKey | LicenseKeyProjection,
+        increment_usage: int | None,
+    ) -> Row[tuple[int, int, datetime | None]]:
+        """
+        Increment the validations and usage counters in a single statement.
+
+        The usage limit is checked by the statement itself, so concurrent
+        validations can't exceed it.
+        """
+        increment_usage = increment_usage or 0
+        statement = (
+            update(LicenseKey)
+            .where(LicenseKey.id == license_key.id)
+            .values(
+                usage=LicenseKey.usage + increment_usage,
+                validations=LicenseKey.validations + 1,
+                last_validated_at=utc_now(),
+            )
+            .returning(
+                LicenseKey.usage, LicenseKey.validations, LicenseKey.last_validated_at
+            )
+        )
+        if increment_usage:
+            statement = statement.where(
+                or_(
+                    LicenseKey.limit_usage.is_(None),
+                    LicenseKey.usage + increment_usage <= LicenseKey.limit_usage,
+                )
+            )
+
+        result = await session.execute(statement)
+        row = result.one_or_none()
+        if row is not None:
+            return row
+
+        usage_result = await session.execute(
+            select(LicenseKey.usage, LicenseKey.limit_usage).where(
+                LicenseKey.id == license_key.id
+            )
+        )
+        usage, limit_usage = usage_result.one()
+        remaining = limit_usage - usage
+        log.info(
+            "license_key.validate.insufficient_usage",
+            license_key_id=license_key.id,
+            organization_id=license_key.organization_id,
+            user=license_key.user_id,
+            benefit_id=license_key.benefit_id,
+            usage_remaining=remaining,
+            usage_requested=increment_usage,
+        )
+        raise BadRequest(f"License key only has {remaining} more usages.")
+
+    async def _mark_validated_batch(
+        self,
+        session: AsyncSession,
+        validated: Sequence[
+            tuple[ValidatedLicenseKeyBatchResult, LicenseKeyValidate, LicenseKey]
+        ],
+    ) -> None:
+        """
+        Increment the validations and usage counters of several license keys
+        in a single statement, and set them on the batch results.
+
+        Increments of a key validated several times in the batch are summed.
+        Like in `_mark_validated`, the usage limit is checked by the statement:
+        if the sum exceeds it, the validations of this key are applied one by one
+        instead, so the first ones still succeed.
+        """
+        increments: dict[UUID, tuple[int, int]] = {}
+        for _, validate, license_key in validated:
+            usage, validations = increments.get(license_key.id, (0, 0))
+            increments[license_key.id] = (
+                usage + (validate.increment_usage or 0),
+                validations + 1,
+            )
+        if not increments:
+            return
+
+        increments_values = values(
+            column("id", Uuid),
+            column("usage", Integer),
+            column("validations", Integer),
+            name="increments",
+        ).data(
+            [
+                (id, usage, validations)
+                for id, (usage, validations) in increments.items()
+            ]
+        )
+        statement = (
+            update(LicenseKey)
+            .where(
+                LicenseKey.id == increments_values.c.id,
+                or_(
+                    increments_values.c.usage == 0,
+                    LicenseKey.limit_usage.is_(None),
+                    LicenseKey.usage + increments_values.c.usage
+                    <= LicenseKey.limit_usage,
+                ),
+            )
+            .values(
+                usage=LicenseKey.usage + increments_values.c.usage,
+                validations=LicenseKey.validations + increments_values.c.validations,
+                last_validated_at=utc_now(),
+            )
+            .returning(
+                LicenseKey.id,
+                LicenseKey.usage,
+                LicenseKey.validations,
+                LicenseKey.last_validated_at,
+            )
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await session.execute(statement)
+        counters = {
+            id: (usage, validations, last_validated_at)
+            for id, usage, validations, last_validated_at in result.tuples().all()
+        }
+
+        # Rewind the counters from their final values, so each result gets
+        # the values right after its own validation
+        for batch_result, validate, license_key in reversed(validated):
+            if license_key.id not in counters:
+                continue
+            usage, validations, last_validated_at = counters[license_key.id]
+            assert batch_result.license_key is not None
+            batch_result.license_key.usage = usage
+            batch_result.license_key.validations = validations
+            batch_result.license_key.last_validated_at = last_validated_at
+            counters[license_key.id] = (
+                usage - (validate.increment_usage or 0),
+                validations - 1,
+                last_validated_at,
+            )
+
+        for batch_result, validate, license_key in validated:
+            if license_key.id not in counters:
+                try:
+                    (
+                        usage,
+                        validations,
+                        last_validated_at,
+                    ) = await self._mark_validated(
+                        session, license_key, validate.increment_usage
+                    )
+                except PolarError as e:
+                    batch_result.license_key = None
+                    batch_result.error = LicenseKeyBatchError.from_exception(e)
+                    continue
+                assert batch_result.license_key is not None
+                batch_result.license_key.usage = usage
+                batch_result.license_key.validations = validations
+                batch_result.license_key.last_validated_at = last_validated_at
+
+            log.info(
+                "license_key.validate",
+                license_key_id=license_key.id,
+                organization_id=license_key.organization_id,
+                user=license_key.user_id,
+                benefit_id=license_key.benefit_id,
+            )
+
     def _get_select_base(self) -> Select[tuple[LicenseKey]]:
         return (
             select(LicenseKey)
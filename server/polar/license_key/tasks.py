@@ -0,0 +1,23 @@
+import uuid
+
+from polar.worker import (
+    AsyncSessionMaker,
+    JobContext,
+    PolarWorkerContext,
+    get_worker_redis,
+    task,
+)
+
+from . import cache
+from .service import license_key as license_key_service
+
+
+@task("license_key.invalidate_cache")
+async def invalidate_cache(
+    ctx: JobContext, license_key_id: uuid.UUID, polar_context: PolarWorkerContext
+) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        license_key = await license_key_service.get(session, license_key_id)
+
+    if license_key is not None:
+        await cache.invalidate(get_worker_redis(ctx), license_key)
@@ -0,0 +1,80 @@
+from collections.abc import Sequence
+from typing import Self
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from polar.kit.dataloader import DataLoader
+from polar.models import ExternalOrganization, UserOrganization
+from polar.postgres import AsyncSession, get_db_session
+
+
+class Loaders:
+    """
+    Request-scoped batch loaders, to resolve related resources of a list of items
+    in a constant number of queries.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self.external_organization = DataLoader[UUID, ExternalOrganization](
+            self._load_external_organizations
+        )
+        self.member_organization_ids = DataLoader[UUID, frozenset[UUID]](
+            self._load_member_organization_ids
+        )
+
+    @classmethod
+    async def loaders(cls, session: AsyncSession = Depends(get_db_session)) -> Self:
+        return cls(session)
+
+    async def get_linked_external_organization(
+        self, id: UUID
+    ) -> ExternalOrganization | None:
+        """Get an ExternalOrganization by ID if it's linked to an Organization."""
+        external_organization = await self.external_organization.load(id)
+        if (
+            external_organization is None
+            or external_organization.organization_id is None
+        ):
+            return None
+        return external_organization
+
+    async def is_member(self, user_id: UUID, organization_id: UUID) -> bool:
+        organization_ids = await self.member_organization_ids.load(user_id)
+        return organization_ids is not None and organization_id in organization_ids
+
+    async def _load_external_organizations(
+        self, ids: Sequence[UUID]
+    ) -> dict[UUID, ExternalOrganization]:
+        statement = (
+            select(ExternalOrganization)
+            .where(
+                ExternalOrganization.id.in_(ids),
+                ExternalOrganization.deleted_at.is_(None),
+            )
+            .options(joinedload(ExternalOrganization.organization))
+        )
+        result = await self.session.execute(statement)
+        return {
+            external_organization.id: external_organization
+            for external_organization in result.scalars().unique().all()
+        }
+
+    async def _load_member_organization_ids(
+        self, user_ids: Sequence[UUID]
+    ) -> dict[UUID, frozenset[UUID]]:
+        statement = select(
+            UserOrganization.user_id, UserOrganization.organization_id
+        ).where(
+            UserOrganization.user_id.in_(user_ids),
+            UserOrganization.deleted_at.is_(None),
+        )
+        result = await self.session.execute(statement)
+
+        organization_ids: dict[UUID, set[UUID]] = {id: set() for id in user_ids}
+        for user_id, organization_id in result.all():
+            organization_ids[user_id].add(organization_id)
+        return {id: frozenset(ids) for id, ids in organization_ids.items()}
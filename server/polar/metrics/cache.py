@@ -0,0 +1,91 @@
+import hashlib
+import json
+import uuid
+from collections.abc import Sequence
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from polar.config import settings
+from polar.models.product_price import ProductPriceType
+from polar.redis import Redis
+
+from .queries import Interval
+from .schemas import MetricsPeriod
+
+
+class CachedMetrics(BaseModel):
+    """
+    Metrics periods that are fully closed, i.e. that won't change anymore unless
+    an order or a subscription is created or updated.
+    """
+
+    periods: list[MetricsPeriod]
+    next_timestamp: datetime | None
+    """Timestamp of the first period that was still open when cached."""
+
+
+def _get_version_key(organization_id: uuid.UUID) -> str:
+    return f"metrics:version:{organization_id}"
+
+
+async def get_cache_key(
+    redis: Redis,
+    organization_ids: Sequence[uuid.UUID],
+    *,
+    start_timestamp: datetime,
+    end_timestamp: datetime,
+    interval: Interval,
+    product_id: Sequence[uuid.UUID] | None = None,
+    product_price_type: Sequence[ProductPriceType] | None = None,
+) -> str:
+    """
+    Build the cache key of a metrics query.
+
+    The key includes the current cache version of every organization,
+    so bumping one of them invalidates every entry involving that organization.
+    """
+    organization_ids = sorted(organization_ids)
+    versions = (
+        await redis.mget([_get_version_key(id) for id in organization_ids])
+        if organization_ids
+        else []
+    )
+    parameters = {
+        "organizations": {
+            str(id): int(version) if version is not None else 0
+            for id, version in zip(organization_ids, versions)
+        },
+        "start_timestamp": start_timestamp.isoformat(),
+        "end_timestamp": end_timestamp.isoformat(),
+        "interval": interval,
+        "product_id": sorted(str(id) for id in product_id)
+        if product_id is not None
+        else None,
+        "product_price_type": sorted(product_price_type)
+        if product_price_type is not None
+        else None,
+    }
+    digest = hashlib.sha256(
+        json.dumps(parameters, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return f"metrics:cache:{digest}"
+
+
+async def get_cached_metrics(redis: Redis, key: str) -> CachedMetrics | None:
+    value = await redis.get(key)
+    if value is None:
+        return None
+    return CachedMetrics.model_validate_json(value)
+
+
+async def set_cached_metrics(
+    redis: Redis, key: str, cached_metrics: CachedMetrics
+) -> None:
+    await redis.setex(
+        key, settings.METRICS_CACHE_TTL_SECONDS, cached_metrics.model_dump_json()
+    )
+
+
+async def invalidate_organization(redis: Redis, organization_id: uuid.UUID) -> None:
+    await redis.incr(_get_version_key(organization_id))
@@ -9,6 +9,7 @@ from polar.openapi import APITag
 from polar.organization.schemas import OrganizationID
 from polar.postgres import AsyncSession, get_db_session
 from polar.product.schemas import ProductID
+from polar.redis import Redis, get_redis
 from polar.routing import APIRouter
 
 from . import auth
@@ -47,6 +48,7 @@ async def get(
         ),
     ),
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> MetricsResponse:
     """Get metrics about your orders and subscriptions."""
 
@@ -74,6 +76,7 @@ async def get(
         organization_id=organization_id,
         product_id=product_id,
         product_price_type=product_price_type,
+        redis=redis,
     )
 
 
@@ -2,9 +2,17 @@ from datetime import datetime
 from enum import StrEnum
 from typing import ClassVar, Protocol, cast
 
-from sqlalchemy import ColumnElement, Integer, SQLColumnExpression, func
-
-from polar.models import Order, Subscription
+from sqlalchemy import (
+    ColumnElement,
+    FromClause,
+    Integer,
+    Numeric,
+    SQLColumnExpression,
+    func,
+    or_,
+)
+
+from polar.models import Subscription
 
 from .queries import Interval, MetricQuery
 
@@ -22,10 +30,17 @@ class Metric(Protocol):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]: ...
 
 
+def _ended_before(
+    t: ColumnElement[datetime], i: Interval, q: FromClause
+) -> ColumnElement[bool]:
+    # Subscriptions remain active during the period they ended in
+    return or_(q.c.timestamp.is_(None), q.c.timestamp < i.sql_date_trunc(t))
+
+
 class OrdersMetric(Metric):
     slug = "orders"
     display_name = "Orders"
@@ -34,9 +49,9 @@ class OrdersMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.count(Order.id)
+        return func.sum(q.c.orders)
 
 
 class RevenueMetric(Metric):
@@ -47,9 +62,9 @@ class RevenueMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.sum(Order.amount)
+        return func.sum(q.c.revenue)
 
 
 class AverageOrderValueMetric(Metric):
@@ -60,9 +75,15 @@ class AverageOrderValueMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.cast(func.ceil(func.avg(Order.amount)), Integer)
+        return func.cast(
+            func.ceil(
+                func.cast(func.sum(q.c.revenue), Numeric)
+                / func.nullif(func.sum(q.c.orders), 0)
+            ),
+            Integer,
+        )
 
 
 class OneTimeProductsMetric(Metric):
@@ -73,9 +94,9 @@ class OneTimeProductsMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.count(Order.id).filter(Order.subscription_id.is_(None))
+        return func.sum(q.c.orders).filter(q.c.subscription_id.is_(None))
 
 
 class OneTimeProductsRevenueMetric(Metric):
@@ -86,9 +107,9 @@ class OneTimeProductsRevenueMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.sum(Order.amount).filter(Order.subscription_id.is_(None))
+        return func.sum(q.c.revenue).filter(q.c.subscription_id.is_(None))
 
 
 class NewSubscriptionsMetric(Metric):
@@ -99,14 +120,9 @@ class NewSubscriptionsMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.count(Subscription.id).filter(
-            i.sql_date_trunc(
-                cast(SQLColumnExpression[datetime], Subscription.started_at)
-            )
-            == i.sql_date_trunc(t)
-        )
+        return func.sum(q.c.started_count).filter(q.c.timestamp == i.sql_date_trunc(t))
 
 
 class NewSubscriptionsRevenueMetric(Metric):
@@ -117,9 +133,9 @@ class NewSubscriptionsRevenueMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.sum(Order.amount).filter(
+        return func.sum(q.c.revenue).filter(
             i.sql_date_trunc(
                 cast(SQLColumnExpression[datetime], Subscription.started_at)
             )
@@ -135,9 +151,9 @@ class RenewedSubscriptionsMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.count(Subscription.id.distinct()).filter(
+        return func.count(q.c.subscription_id.distinct()).filter(
             i.sql_date_trunc(
                 cast(SQLColumnExpression[datetime], Subscription.started_at)
             )
@@ -153,9 +169,9 @@ class RenewedSubscriptionsRevenueMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.sum(Order.amount).filter(
+        return func.sum(q.c.revenue).filter(
             i.sql_date_trunc(
                 cast(SQLColumnExpression[datetime], Subscription.started_at)
             )
@@ -171,9 +187,11 @@ class ActiveSubscriptionsMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.count(Subscription.id)
+        return func.sum(q.c.started_count) - func.coalesce(
+            func.sum(q.c.ended_count).filter(_ended_before(t, i, q)), 0
+        )
 
 
 class MonthlyRecurringRevenueMetric(Metric):
@@ -184,9 +202,11 @@ class MonthlyRecurringRevenueMetric(Metric):
 
     @classmethod
     def get_sql_expression(
-        cls, t: ColumnElement[datetime], i: Interval
+        cls, t: ColumnElement[datetime], i: Interval, q: FromClause
     ) -> ColumnElement[int]:
-        return func.coalesce(func.sum(Subscription.amount), 0)
+        return func.sum(q.c.started_amount) - func.coalesce(
+            func.sum(q.c.ended_amount).filter(_ended_before(t, i, q)), 0
+        )
 
 
 METRICS: list[type[Metric]] = [
@@ -2,29 +2,35 @@ import uuid
 from collections.abc import Generator, Sequence
 from datetime import datetime
 from enum import StrEnum
-from typing import TYPE_CHECKING, Protocol, cast
+from typing import TYPE_CHECKING, Protocol
 
 from sqlalchemy import (
     CTE,
     ColumnElement,
+    FromClause,
     Function,
     SQLColumnExpression,
     TextClause,
-    and_,
+    case,
     cte,
     func,
+    literal,
+    null,
     or_,
     select,
     text,
+    union_all,
 )
 
 from polar.auth.models import AuthSubject, is_organization, is_user
 from polar.models import (
     Order,
+    OrderMetricsRollup,
     Organization,
     Product,
     ProductPrice,
     Subscription,
+    SubscriptionMetricsRollup,
     User,
     UserOrganization,
 )
@@ -71,17 +77,76 @@ def _get_metrics_columns(
     metric_cte: MetricQuery,
     timestamp_column: ColumnElement[datetime],
     interval: Interval,
+    query: FromClause,
     metrics: list["type[Metric]"],
 ) -> Generator[ColumnElement[int], None, None]:
     return (
-        func.coalesce(metric.get_sql_expression(timestamp_column, interval), 0).label(
-            metric.slug
-        )
+        func.coalesce(
+            metric.get_sql_expression(timestamp_column, interval, query), 0
+        ).label(metric.slug)
         for metric in metrics
         if metric.query == metric_cte
     )
 
 
+def _get_bounds(
+    timestamp_series: CTE, interval: Interval
+) -> tuple[ColumnElement[datetime], ColumnElement[datetime], ColumnElement[datetime]]:
+    """
+    Return the lower and upper bounds of the timestamp series, and the start of the
+    current bucket, which is still open and can't be answered from the rollups.
+    """
+    timestamp_column: ColumnElement[datetime] = timestamp_series.c.timestamp
+    lower_bound = (
+        select(interval.sql_date_trunc(func.min(timestamp_column)))
+        .select_from(timestamp_series)
+        .scalar_subquery()
+    )
+    upper_bound = (
+        select(
+            interval.sql_date_trunc(func.max(timestamp_column))
+            + interval.sql_interval()
+        )
+        .select_from(timestamp_series)
+        .scalar_subquery()
+    )
+    open_bucket = interval.sql_date_trunc(func.now())
+    return lower_bound, upper_bound, open_bucket
+
+
+def _get_readable_rollups_clauses(
+    model: type[OrderMetricsRollup] | type[SubscriptionMetricsRollup],
+    auth_subject: AuthSubject[User | Organization],
+    *,
+    organization_id: Sequence[uuid.UUID] | None = None,
+    product_id: Sequence[uuid.UUID] | None = None,
+    product_price_type: Sequence[ProductPriceType] | None = None,
+) -> list[ColumnElement[bool]]:
+    clauses: list[ColumnElement[bool]] = []
+    if is_user(auth_subject):
+        clauses.append(
+            model.organization_id.in_(
+                select(UserOrganization.organization_id).where(
+                    UserOrganization.user_id == auth_subject.subject.id,
+                    UserOrganization.deleted_at.is_(None),
+                )
+            )
+        )
+    elif is_organization(auth_subject):
+        clauses.append(model.organization_id == auth_subject.subject.id)
+
+    if organization_id is not None:
+        clauses.append(model.organization_id.in_(organization_id))
+
+    if product_id is not None:
+        clauses.append(model.product_id.in_(product_id))
+
+    if product_price_type is not None:
+        clauses.append(model.product_price_type.in_(product_price_type))
+
+    return clauses
+
+
 class QueryCallable(Protocol):
     def __call__(
         self,
@@ -107,6 +172,7 @@ def get_orders_cte(
     product_price_type: Sequence[ProductPriceType] | None = None,
 ) -> CTE:
     timestamp_column: ColumnElement[datetime] = timestamp_series.c.timestamp
+    lower_bound, upper_bound, open_bucket = _get_bounds(timestamp_series, interval)
 
     readable_orders_statement = select(Order.id).join(
         Product, onclause=Order.product_id == Product.id
@@ -141,26 +207,53 @@ def get_orders_cte(
             onclause=Order.product_price_id == ProductPrice.id,
         ).where(ProductPrice.type.in_(product_price_type))
 
+    # Closed buckets are answered from the rollups, the open one from the orders
+    orders = union_all(
+        select(
+            OrderMetricsRollup.timestamp.label("timestamp"),
+            OrderMetricsRollup.subscription_id.label("subscription_id"),
+            OrderMetricsRollup.orders.label("orders"),
+            OrderMetricsRollup.revenue.label("revenue"),
+        ).where(
+            OrderMetricsRollup.timestamp >= lower_bound,
+            OrderMetricsRollup.timestamp < func.least(open_bucket, upper_bound),
+            *_get_readable_rollups_clauses(
+                OrderMetricsRollup,
+                auth_subject,
+                organization_id=organization_id,
+                product_id=product_id,
+                product_price_type=product_price_type,
+            ),
+        ),
+        select(
+            Order.created_at.label("timestamp"),
+            Order.subscription_id.label("subscription_id"),
+            literal(1).label("orders"),
+            Order.amount.label("revenue"),
+        ).where(
+            Order.created_at >= func.greatest(open_bucket, lower_bound),
+            Order.created_at < upper_bound,
+            Order.id.in_(readable_orders_statement),
+        ),
+    ).subquery()
+
     return cte(
         select(
             timestamp_column.label("timestamp"),
             *_get_metrics_columns(
-                MetricQuery.orders, timestamp_column, interval, metrics
+                MetricQuery.orders, timestamp_column, interval, orders, metrics
             ),
         )
         .select_from(
             timestamp_series.join(
-                Order,
+                orders,
                 isouter=True,
-                onclause=and_(
-                    interval.sql_date_trunc(Order.created_at)
-                    == interval.sql_date_trunc(timestamp_column),
-                    Order.id.in_(readable_orders_statement),
-                ),
+                onclause=interval.sql_date_trunc(orders.c.timestamp)
+                == interval.sql_date_trunc(timestamp_column),
             ).join(
                 Subscription,
                 isouter=True,
-                onclause=Order.subscription_id == Subscription.id,
+                onclause=orders.c.subscription_id == Subscription.id,
             )
         )
         .group_by(timestamp_column)
@@ -179,6 +272,7 @@ def get_active_subscriptions_cte(
     product_price_type: Sequence[ProductPriceType] | None = None,
 ) -> CTE:
     timestamp_column: ColumnElement[datetime] = timestamp_series.c.timestamp
+    lower_bound, upper_bound, open_bucket = _get_bounds(timestamp_series, interval)
 
     readable_subscriptions_statement = select(Subscription.id).join(
         Product, onclause=Subscription.product_id == Product.id
@@ -213,38 +307,94 @@ def get_active_subscriptions_cte(
             onclause=Subscription.price_id == ProductPrice.id,
         ).where(ProductPrice.type.in_(product_price_type))
 
+    # Closed buckets are answered from the rollups, the open one from the
+    # subscriptions. Each row counts subscriptions started and ended at `timestamp`.
+    subscription_amount = func.coalesce(Subscription.amount, 0)
+    events = union_all(
+        select(
+            SubscriptionMetricsRollup.timestamp.label("timestamp"),
+            SubscriptionMetricsRollup.started_count.label("started_count"),
+            SubscriptionMetricsRollup.started_amount.label("started_amount"),
+            SubscriptionMetricsRollup.ended_count.label("ended_count"),
+            SubscriptionMetricsRollup.ended_amount.label("ended_amount"),
+        ).where(
+            or_(
+                SubscriptionMetricsRollup.timestamp.is_(None),
+                SubscriptionMetricsRollup.timestamp
+                < func.least(open_bucket, upper_bound),
+            ),
+            *_get_readable_rollups_clauses(
+                SubscriptionMetricsRollup,
+                auth_subject,
+                organization_id=organization_id,
+                product_id=product_id,
+                product_price_type=product_price_type,
+            ),
+        ),
+        select(
+            Subscription.started_at.label("timestamp"),
+            literal(1).label("started_count"),
+            subscription_amount.label("started_amount"),
+            literal(0).label("ended_count"),
+            literal(0).label("ended_amount"),
+        ).where(
+            Subscription.started_at >= open_bucket,
+            Subscription.started_at < upper_bound,
+            Subscription.id.in_(readable_subscriptions_statement),
+        ),
+        select(
+            Subscription.ended_at.label("timestamp"),
+            literal(0).label("started_count"),
+            literal(0).label("started_amount"),
+            literal(1).label("ended_count"),
+            subscription_amount.label("ended_amount"),
+        ).where(
+            Subscription.ended_at >= open_bucket,
+            Subscription.ended_at < upper_bound,
+            Subscription.id.in_(readable_subscriptions_statement),
+        ),
+    ).subquery()
+
+    # Everything that happened before the series is collapsed in a `NULL` bucket
+    events_timestamp = interval.sql_date_trunc(events.c.timestamp)
+    events_bucket = case(
+        (
+            or_(events.c.timestamp.is_(None), events_timestamp < lower_bound),
+            null(),
+        ),
+        else_=events_timestamp,
+    )
+    buckets = (
+        select(
+            events_bucket.label("timestamp"),
+            func.sum(events.c.started_count).label("started_count"),
+            func.sum(events.c.started_amount).label("started_amount"),
+            func.sum(events.c.ended_count).label("ended_count"),
+            func.sum(events.c.ended_amount).label("ended_amount"),
+        )
+        .group_by(events_bucket)
+        .subquery()
+    )
+
     return cte(
         select(
             timestamp_column.label("timestamp"),
             *_get_metrics_columns(
-                MetricQuery.active_subscriptions, timestamp_column, interval, metrics
+                MetricQuery.active_subscriptions,
+                timestamp_column,
+                interval,
+                buckets,
+                metrics,
             ),
         )
         .select_from(
             timestamp_series.join(
-                Subscription,
+                buckets,
                 isouter=True,
-                onclause=and_(
-                    or_(
-                        Subscription.started_at.is_(None),
-                        interval.sql_date_trunc(
-                            cast(SQLColumnExpression[datetime], Subscription.started_at)
-                        )
-                        <= interval.sql_date_trunc(timestamp_column),
-                    ),
-                    or_(
-                        Subscription.ended_at.is_(None),
-                        interval.sql_date_trunc(
-                            cast(SQLColumnExpression[datetime], Subscription.ended_at)
-                        )
-                        >= interval.sql_date_trunc(timestamp_column),
-                    ),
-                    Subscription.id.in_(readable_subscriptions_statement),
+                onclause=or_(
+                    buckets.c.timestamp.is_(None),
+                    buckets.c.timestamp <= interval.sql_date_trunc(timestamp_column),
                 ),
-            ).join(
-                ProductPrice,
-                isouter=True,
-                onclause=Subscription.price_id == ProductPrice.id,
             )
         )
         .group_by(timestamp_column)
@@ -0,0 +1,135 @@
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    SQLColumnExpression,
+    and_,
+    false,
+    func,
+    literal,
+    or_,
+    select,
+    union_all,
+)
+
+from polar.models import (
+    Order,
+    Product,
+    ProductPrice,
+    Subscription,
+)
+
+_HOUR = timedelta(hours=1)
+
+
+def truncate_hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def hours_clause(
+    column: SQLColumnExpression[Any], hours: Iterable[datetime | None]
+) -> ColumnElement[bool]:
+    clauses: list[ColumnElement[bool]] = []
+    for hour in hours:
+        if hour is None:
+            clauses.append(column.is_(None))
+        else:
+            clauses.append(and_(column >= hour, column < hour + _HOUR))
+    return or_(false(), *clauses)
+
+
+def get_order_rollups_statement(
+    organization_id: uuid.UUID | None = None,
+    hours: Iterable[datetime | None] | None = None,
+) -> Select[tuple[uuid.UUID, uuid.UUID, str, uuid.UUID | None, datetime, int, int]]:
+    timestamp = func.date_trunc("hour", Order.created_at)
+    statement = (
+        select(
+            Product.organization_id,
+            Order.product_id,
+            ProductPrice.type,
+            Order.subscription_id,
+            timestamp,
+            func.count(Order.id),
+            func.sum(Order.amount),
+        )
+        .join(Product, onclause=Order.product_id == Product.id)
+        .join(ProductPrice, onclause=Order.product_price_id == ProductPrice.id)
+        .group_by(
+            Product.organization_id,
+            Order.product_id,
+            ProductPrice.type,
+            Order.subscription_id,
+            timestamp,
+        )
+    )
+    if organization_id is not None:
+        statement = statement.where(Product.organization_id == organization_id)
+    if hours is not None:
+        statement = statement.where(hours_clause(Order.created_at, hours))
+    return statement
+
+
+def get_subscription_rollups_statement(
+    organization_id: uuid.UUID | None = None,
+    hours: Iterable[datetime | None] | None = None,
+) -> Select[tuple[uuid.UUID, uuid.UUID, str, datetime | None, int, int, int, int]]:
+    amount = func.coalesce(Subscription.amount, 0)
+
+    started_statement = select(
+        Product.organization_id.label("organization_id"),
+        Subscription.product_id.label("product_id"),
+        ProductPrice.type.label("product_price_type"),
+        func.date_trunc("hour", Subscription.started_at).label("timestamp"),
+        literal(1).label("started_count"),
+        amount.label("started_amount"),
+        literal(0).label("ended_count"),
+        literal(0).label("ended_amount"),
+    )
+    ended_statement = select(
+        Product.organization_id.label("organization_id"),
+        Subscription.product_id.label("product_id"),
+        ProductPrice.type.label("product_price_type"),
+        func.date_trunc("hour", Subscription.ended_at).label("timestamp"),
+        literal(0).label("started_count"),
+        literal(0).label("started_amount"),
+        literal(1).label("ended_count"),
+        amount.label("ended_amount"),
+    ).where(Subscription.ended_at.is_not(None))
+
+    events: list[Select] = []  # type: ignore[type-arg]
+    for event_statement, column in (
+        (started_statement, Subscription.started_at),
+        (ended_statement, Subscription.ended_at),
+    ):
+        event_statement = event_statement.join(
+            Product, onclause=Subscription.product_id == Product.id
+        ).join(ProductPrice, onclause=Subscription.price_id == ProductPrice.id)
+        if organization_id is not None:
+            event_statement = event_statement.where(
+                Product.organization_id == organization_id
+            )
+        if hours is not None:
+            event_statement = event_statement.where(hours_clause(column, hours))
+        events.append(event_statement)
+
+    events_subquery = union_all(*events).subquery()
+    return select(
+        events_subquery.c.organization_id,
+        events_subquery.c.product_id,
+        events_subquery.c.product_price_type,
+        events_subquery.c.timestamp,
+        func.sum(events_subquery.c.started_count),
+        func.sum(events_subquery.c.started_amount),
+        func.sum(events_subquery.c.ended_count),
+        func.sum(events_subquery.c.ended_amount),
+    ).group_by(
+        events_subquery.c.organization_id,
+        events_subquery.c.product_id,
+        events_subquery.c.product_price_type,
+        events_subquery.c.timestamp,
+    )
@@ -1,16 +1,31 @@
 import uuid
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 from datetime import UTC, date, datetime
+from typing import Any
 
-from sqlalchemy import ColumnElement, FromClause, select
+from sqlalchemy import ColumnElement, FromClause, Select, func, select
 
-from polar.auth.models import AuthSubject
-from polar.models import Organization, User
+from polar.auth.models import AuthSubject, is_organization
+from polar.models import (
+    OrderMetricsRollup,
+    Organization,
+    SubscriptionMetricsRollup,
+    User,
+    UserOrganization,
+)
 from polar.models.product_price import ProductPriceType
-from polar.postgres import AsyncSession
+from polar.postgres import AsyncSession, sql
+from polar.redis import Redis
 
+from . import cache as metrics_cache
 from .metrics import METRICS
 from .queries import QUERIES, Interval, get_timestamp_series_cte
+from .rollups import (
+    get_order_rollups_statement,
+    get_subscription_rollups_statement,
+    hours_clause,
+    truncate_hour,
+)
 from .schemas import MetricsPeriod, MetricsResponse
 
 
@@ -26,7 +41,15 @@ class MetricsService:
         organization_id: Sequence[uuid.UUID] | None = None,
         product_id: Sequence[uuid.UUID] | None = None,
         product_price_type: Sequence[ProductPriceType] | None = None,
+        redis: Redis | None = None,
     ) -> MetricsResponse:
+        """
+        Compute the metrics periods.
+
+        If `redis` is set, the closed periods are cached until an order
+        or a subscription of the involved organizations changes, so only
+        the open ones need to be computed on subsequent calls.
+        """
         start_timestamp = datetime(
             start_date.year, start_date.month, start_date.day, 0, 0, 0, 0, UTC
         )
@@ -34,6 +57,135 @@ class MetricsService:
             end_date.year, end_date.month, end_date.day, 23, 59, 59, 999999, UTC
         )
 
+        if redis is None:
+            periods, _ = await self._get_periods(
+                session,
+                auth_subject,
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                interval=interval,
+                organization_id=organization_id,
+                product_id=product_id,
+                product_price_type=product_price_type,
+            )
+        else:
+            periods = await self._get_cached_periods(
+                session,
+                redis,
+                auth_subject,
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                interval=interval,
+                organization_id=organization_id,
+                product_id=product_id,
+                product_price_type=product_price_type,
+            )
+
+        return MetricsResponse.model_validate(
+            {"periods": periods, "metrics": {m.slug: m for m in METRICS}}
+        )
+
+    async def invalidate_cache(self, redis: Redis, organization_id: uuid.UUID) -> None:
+        await metrics_cache.invalidate_organization(redis, organization_id)
+
+    async def _get_cached_periods(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        auth_subject: AuthSubject[User | Organization],
+        *,
+        start_timestamp: datetime,
+        end_timestamp: datetime,
+        interval: Interval,
+        organization_id: Sequence[uuid.UUID] | None = None,
+        product_id: Sequence[uuid.UUID] | None = None,
+        product_price_type: Sequence[ProductPriceType] | None = None,
+    ) -> list[MetricsPeriod]:
+        readable_organization_ids = await self._get_readable_organization_ids(
+            session, auth_subject, organization_id
+        )
+        cache_key = await metrics_cache.get_cache_key(
+            redis,
+            readable_organization_ids,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            interval=interval,
+            product_id=product_id,
+            product_price_type=product_price_type,
+        )
+
+        cached_metrics = await metrics_cache.get_cached_metrics(redis, cache_key)
+        cached_periods: list[MetricsPeriod] = []
+        if cached_metrics is not None:
+            cached_periods = cached_metrics.periods
+            if cached_metrics.next_timestamp is None:
+                return cached_periods
+            start_timestamp = cached_metrics.next_timestamp
+
+        periods, closed_count = await self._get_periods(
+            session,
+            auth_subject,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            interval=interval,
+            organization_id=organization_id,
+            product_id=product_id,
+            product_price_type=product_price_type,
+        )
+
+        if cached_metrics is None or closed_count > 0:
+            await metrics_cache.set_cached_metrics(
+                redis,
+                cache_key,
+                metrics_cache.CachedMetrics(
+                    periods=cached_periods + periods[:closed_count],
+                    next_timestamp=periods[closed_count].timestamp
+                    if closed_count < len(periods)
+                    else None,
+                ),
+            )
+
+        return cached_periods + periods
+
+    async def _get_readable_organization_ids(
+        self,
+        session: AsyncSession,
+        auth_subject: AuthSubject[User | Organization],
+        organization_id: Sequence[uuid.UUID] | None = None,
+    ) -> list[uuid.UUID]:
+        if is_organization(auth_subject):
+            organization_ids = [auth_subject.subject.id]
+        else:
+            statement = select(UserOrganization.organization_id).where(
+                UserOrganization.user_id == auth_subject.subject.id,
+                UserOrganization.deleted_at.is_(None),
+            )
+            result = await session.execute(statement)
+            organization_ids = list(result.scalars().all())
+
+        if organization_id is not None:
+            organization_ids = [id for id in organization_ids if id in organization_id]
+
+        return organization_ids
+
+    async def _get_periods(
+        self,
+        session: AsyncSession,
+        auth_subject: AuthSubject[User | Organization],
+        *,
+        start_timestamp: datetime,
+        end_timestamp: datetime,
+        interval: Interval,
+        organization_id: Sequence[uuid.UUID] | None = None,
+        product_id: Sequence[uuid.UUID] | None = None,
+        product_price_type: Sequence[ProductPriceType] | None = None,
+    ) -> tuple[list[MetricsPeriod], int]:
+        """
+        Compute the metrics periods between two timestamps.
+
+        Also return the number of leading periods that are closed, i.e. that end
+        before the current period.
+        """
         timestamp_series = get_timestamp_series_cte(
             start_timestamp, end_timestamp, interval
         )
@@ -62,6 +214,9 @@ class MetricsService:
         statement = (
             select(
                 timestamp_column.label("timestamp"),
+                (timestamp_column < interval.sql_date_trunc(func.now())).label(
+                    "closed"
+                ),
                 *queries,
             )
             .select_from(from_query)
@@ -70,10 +225,93 @@ class MetricsService:
 
         result = await session.stream(statement)
         periods: list[MetricsPeriod] = []
+        closed_count = 0
         async for row in result:
-            periods.append(MetricsPeriod(**row._asdict()))
-        return MetricsResponse.model_validate(
-            {"periods": periods, "metrics": {m.slug: m for m in METRICS}}
+            values = row._asdict()
+            if values.pop("closed"):
+                closed_count += 1
+            periods.append(MetricsPeriod(**values))
+        return periods, closed_count
+
+    async def refresh_rollups(
+        self,
+        session: AsyncSession,
+        organization_id: uuid.UUID | None = None,
+        timestamps: Iterable[datetime | None] | None = None,
+    ) -> None:
+        """
+        Recompute the metrics rollups from the raw orders and subscriptions.
+
+        Only the hourly buckets containing the given timestamps are recomputed;
+        `None` stands for subscriptions without a start date.
+        If `timestamps` is not set, every bucket is recomputed.
+        """
+        hours: set[datetime | None] | None = None
+        if timestamps is not None:
+            hours = {
+                truncate_hour(timestamp) if timestamp is not None else None
+                for timestamp in timestamps
+            }
+
+        await self._refresh_rollup(
+            session,
+            OrderMetricsRollup,
+            get_order_rollups_statement(organization_id, hours),
+            constraint="order_metrics_rollups_unique_key",
+            keys=[
+                "organization_id",
+                "product_id",
+                "product_price_type",
+                "subscription_id",
+                "timestamp",
+            ],
+            values=["orders", "revenue"],
+            organization_id=organization_id,
+            hours=hours,
+        )
+        await self._refresh_rollup(
+            session,
+            SubscriptionMetricsRollup,
+            get_subscription_rollups_statement(organization_id, hours),
+            constraint="subscription_metrics_rollups_unique_key",
+            keys=["organization_id", "product_id", "product_price_type", "timestamp"],
+            values=["started_count", "started_amount", "ended_count", "ended_amount"],
+            organization_id=organization_id,
+            hours=hours,
+        )
+
+    async def _refresh_rollup(
+        self,
+        session: AsyncSession,
+        model: type[OrderMetricsRollup] | type[SubscriptionMetricsRollup],
+        source_statement: Select[Any],
+        *,
+        constraint: str,
+        keys: list[str],
+        values: list[str],
+        organization_id: uuid.UUID | None,
+        hours: set[datetime | None] | None,
+    ) -> None:
+        delete_statement = sql.delete(model)
+        if organization_id is not None:
+            delete_statement = delete_statement.where(
+                model.organization_id == organization_id
+            )
+        if hours is not None:
+            delete_statement = delete_statement.where(
+                hours_clause(model.timestamp, hours)
+            )
+        await session.execute(delete_statement)
+
+        insert_statement = sql.insert(model).from_select(
+            ["id", *keys, *values],
+            select(func.gen_random_uuid(), *source_statement.subquery().c),
+        )
+        await session.execute(
+            insert_statement.on_conflict_do_update(
+                constraint=constraint,
+                set_={value: insert_statement.excluded[value] for value in values},
+            )
         )
 
 
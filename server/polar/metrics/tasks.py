@@ -0,0 +1,27 @@
+import uuid
+from datetime import datetime
+
+from polar.worker import (
+    AsyncSessionMaker,
+    JobContext,
+    PolarWorkerContext,
+    get_worker_redis,
+    task,
+)
+
+from .service import metrics as metrics_service
+
+
+@task("metrics.refresh_rollups")
+async def refresh_rollups(
+    ctx: JobContext,
+    organization_id: uuid.UUID,
+    timestamps: list[datetime | None],
+    polar_context: PolarWorkerContext,
+) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        await metrics_service.refresh_rollups(session, organization_id, timestamps)
+
+    # Invalidate once the refreshed rollups are committed, so the cache
+    # can't be filled again with the previous ones.
+    await metrics_service.invalidate_cache(get_worker_redis(ctx), organization_id)
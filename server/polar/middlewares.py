@@ -6,6 +6,7 @@ from starlette.datastructures import MutableHeaders
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from polar.config import settings
+from polar.eventstream.service import flush_published_events
 from polar.logging import Logger, generate_correlation_id
 from polar.worker import flush_enqueued_jobs
 
@@ -40,6 +41,17 @@ class FlushEnqueuedWorkerJobsMiddleware:
             await flush_enqueued_jobs(scope["state"]["arq_pool"])
 
 
+class FlushPublishedEventsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
+
+        if not settings.is_testing():
+            await flush_published_events(scope["state"]["redis"])
+
+
 class PathRewriteMiddleware:
     def __init__(
         self, app: ASGIApp, pattern: str | re.Pattern[str], replacement: str
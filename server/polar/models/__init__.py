@@ -1,6 +1,7 @@
 from polar.kit.db.models import Model, TimestampedModel
 
 from .account import Account
+from .account_balance import AccountBalance
 from .advertisement_campaign import AdvertisementCampaign
 from .article import Article
 from .articles_subscription import ArticlesSubscription
@@ -19,6 +20,7 @@ from .issue_reward import IssueReward
 from .license_key import LicenseKey
 from .license_key_activation import LicenseKeyActivation
 from .magic_link import MagicLink
+from .metrics_rollup import OrderMetricsRollup, SubscriptionMetricsRollup
 from .notification import Notification
 from .oauth2_authorization_code import OAuth2AuthorizationCode
 from .oauth2_client import OAuth2Client
@@ -53,6 +55,7 @@ __all__ = [
     "Model",
     "TimestampedModel",
     "Account",
+    "AccountBalance",
     "AdvertisementCampaign",
     "Article",
     "ArticlesSubscription",
@@ -71,6 +74,8 @@ __all__ = [
     "LicenseKey",
     "LicenseKeyActivation",
     "MagicLink",
+    "OrderMetricsRollup",
+    "SubscriptionMetricsRollup",
     "Notification",
     "OAuth2AuthorizationCode",
     "OAuth2Client",
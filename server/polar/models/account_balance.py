@@ -0,0 +1,94 @@
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import TIMESTAMP, BigInteger, Connection, ForeignKey, Uuid, event
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import Mapped, Mapper, mapped_column
+
+from polar.kit.db.models.base import Model
+from polar.kit.utils import utc_now
+
+from .transaction import Transaction, TransactionType
+
+
+class AccountBalance(Model):
+    """
+    Running totals of the transactions of an account.
+
+    It's updated in the same database transaction as each `Transaction` insert,
+    so balances don't need to be summed over the whole ledger.
+    The `account_balance.reconcile` task verifies it against the ledger.
+    """
+
+    __tablename__ = "account_balances"
+
+    account_id: Mapped[UUID] = mapped_column(
+        Uuid, ForeignKey("accounts.id", ondelete="cascade"), primary_key=True
+    )
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    """Sum of the transactions amounts, in USD cents."""
+    account_amount: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    """Sum of the transactions amounts, in the account currency."""
+    payout_amount: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    """Sum of the payout transactions amounts, in USD cents."""
+    account_payout_amount: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0
+    )
+    """Sum of the payout transactions amounts, in the account currency."""
+    transfers_amount: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    """Sum of the balance transactions amounts, in USD cents."""
+    modified_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, default=utc_now, onupdate=utc_now
+    )
+
+    @classmethod
+    def get_increments(
+        cls, *, type: TransactionType, amount: int, account_amount: int
+    ) -> dict[str, int]:
+        """Get the totals to add for a transaction."""
+        is_payout = type == TransactionType.payout
+        return {
+            "amount": amount,
+            "account_amount": account_amount,
+            "payout_amount": amount if is_payout else 0,
+            "account_payout_amount": account_amount if is_payout else 0,
+            "transfers_amount": amount if type == TransactionType.balance else 0,
+        }
+
+    @classmethod
+    def get_increment_statement(
+        cls, account_id: UUID, increments: dict[str, int]
+    ) -> Insert:
+        """
+        Get a statement adding the increments to the totals of an account,
+        creating its row if needed.
+        """
+        statement = insert(cls).values(
+            account_id=account_id, modified_at=utc_now(), **increments
+        )
+        return statement.on_conflict_do_update(
+            index_elements=[cls.account_id],
+            set_={
+                "modified_at": statement.excluded.modified_at,
+                **{
+                    column: getattr(cls, column) + statement.excluded[column]
+                    for column in increments
+                },
+            },
+        )
+
+
+@event.listens_for(Transaction, "after_insert")
+def update_account_balance(
+    mapper: Mapper[Any], connection: Connection, target: Transaction
+) -> None:
+    if target.account_id is None:
+        return
+
+    increments = AccountBalance.get_increments(
+        type=target.type, amount=target.amount, account_amount=target.account_amount
+    )
+    connection.execute(
+        AccountBalance.get_increment_statement(target.account_id, increments)
+    )
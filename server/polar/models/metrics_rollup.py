@@ -0,0 +1,110 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import (
+    TIMESTAMP,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    Uuid,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from polar.kit.db.models.base import Model
+from polar.kit.utils import generate_uuid
+from polar.models.product_price import ProductPriceType
+
+
+class OrderMetricsRollup(Model):
+    """
+    Hourly aggregate of orders.
+
+    Orders linked to a subscription are aggregated per subscription, so
+    subscription-based metrics can still be computed from it.
+    """
+
+    __tablename__ = "order_metrics_rollups"
+
+    __table_args__ = (
+        UniqueConstraint(
+            "organization_id",
+            "product_id",
+            "product_price_type",
+            "subscription_id",
+            "timestamp",
+            # the default generated name is too long (max 63 chars)
+            name="order_metrics_rollups_unique_key",
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index(
+            "ix_order_metrics_rollups_organization_id_timestamp",
+            "organization_id",
+            "timestamp",
+        ),
+    )
+
+    id: Mapped[UUID] = mapped_column(Uuid, primary_key=True, default=generate_uuid)
+
+    organization_id: Mapped[UUID] = mapped_column(
+        Uuid, ForeignKey("organizations.id", ondelete="cascade"), nullable=False
+    )
+    product_id: Mapped[UUID] = mapped_column(
+        Uuid, ForeignKey("products.id", ondelete="cascade"), nullable=False
+    )
+    product_price_type: Mapped[ProductPriceType] = mapped_column(String, nullable=False)
+    subscription_id: Mapped[UUID | None] = mapped_column(
+        Uuid, ForeignKey("subscriptions.id", ondelete="cascade"), nullable=True
+    )
+    timestamp: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False
+    )
+
+    orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class SubscriptionMetricsRollup(Model):
+    """
+    Hourly aggregate of subscriptions starts and ends.
+
+    Subscriptions without a start date are aggregated in a row
+    with a `NULL` timestamp.
+    """
+
+    __tablename__ = "subscription_metrics_rollups"
+
+    __table_args__ = (
+        UniqueConstraint(
+            "organization_id",
+            "product_id",
+            "product_price_type",
+            "timestamp",
+            name="subscription_metrics_rollups_unique_key",
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index(
+            "ix_subscription_metrics_rollups_organization_id_timestamp",
+            "organization_id",
+            "timestamp",
+        ),
+    )
+
+    id: Mapped[UUID] = mapped_column(Uuid, primary_key=True, default=generate_uuid)
+
+    organization_id: Mapped[UUID] = mapped_column(
+        Uuid, ForeignKey("organizations.id", ondelete="cascade"), nullable=False
+    )
+    product_id: Mapped[UUID] = mapped_column(
+        Uuid, ForeignKey("products.id", ondelete="cascade"), nullable=False
+    )
+    product_price_type: Mapped[ProductPriceType] = mapped_column(String, nullable=False)
+    timestamp: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True
+    )
+
+    started_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    started_amount: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    ended_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    ended_amount: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
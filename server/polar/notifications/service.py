@@ -8,6 +8,7 @@ from polar.kit.extensions.sqlalchemy import sql
 from polar.models.issue import Issue
 from polar.models.notification import Notification
 from polar.models.pledge import Pledge
+from polar.models.user import User
 from polar.models.user_notification import UserNotification
 from polar.notifications.notification import Notification as NotificationSchema
 from polar.notifications.notification import NotificationPayload, NotificationType
@@ -17,6 +18,10 @@ from polar.user_organization.service import (
 )
 from polar.worker import enqueue_job
 
+NotificationTypeAdapter: TypeAdapter[NotificationSchema] = TypeAdapter(
+    NotificationSchema
+)
+
 
 class PartialNotification(BaseModel):
     issue_id: UUID | None = None
@@ -66,6 +71,41 @@ class NotificationsService:
         enqueue_job("notifications.send", notification_id=notification.id)
         return True
 
+    async def send_to_users(
+        self,
+        session: AsyncSession,
+        user_ids: Sequence[UUID],
+        notif: PartialNotification,
+    ) -> Sequence[UUID]:
+        """
+        Create the notification for several users at once.
+
+        The rows are inserted in the current transaction, and a single job is
+        enqueued to email all of them.
+        """
+        if not user_ids:
+            return []
+
+        payload = notif.payload.model_dump(mode="json")
+        stmt = sql.insert(Notification).returning(Notification.id)
+        res = await session.execute(
+            stmt,
+            [
+                {
+                    "user_id": user_id,
+                    "type": notif.type,
+                    "issue_id": notif.issue_id,
+                    "pledge_id": notif.pledge_id,
+                    "payload": payload,
+                }
+                for user_id in user_ids
+            ],
+        )
+        notification_ids = res.scalars().all()
+
+        enqueue_job("notifications.send_batch", notification_ids=notification_ids)
+        return notification_ids
+
     async def send_to_org_members(
         self,
         session: AsyncSession,
@@ -73,12 +113,21 @@ class NotificationsService:
         notif: PartialNotification,
     ) -> None:
         members = await user_organization_service.list_by_org(session, org_id)
-        for member in members:
-            await self.send_to_user(
-                session=session,
-                user_id=member.user_id,
-                notif=notif,
+        await self.send_to_users(session, [member.user_id for member in members], notif)
+
+    async def list_with_users(
+        self, session: AsyncSession, notification_ids: Sequence[UUID]
+    ) -> Sequence[tuple[Notification, User]]:
+        stmt = (
+            sql.select(Notification, User)
+            .join(User, User.id == Notification.user_id)
+            .where(
+                Notification.id.in_(notification_ids),
+                User.deleted_at.is_(None),
             )
+        )
+        res = await session.execute(stmt)
+        return res.unique().tuples().all()
 
     async def send_to_anonymous_email(
         self,
@@ -129,9 +178,6 @@ class NotificationsService:
             return
 
     def parse_payload(self, n: Notification) -> NotificationPayload:
-        NotificationTypeAdapter: TypeAdapter[NotificationSchema] = TypeAdapter(
-            NotificationSchema
-        )
         notification = NotificationTypeAdapter.validate_python(n)
         return notification.payload
 
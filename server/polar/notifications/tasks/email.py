@@ -1,8 +1,9 @@
+import json
 from uuid import UUID
 
 import structlog
 
-from polar.email.sender import get_email_sender
+from polar.email.sender import Email, get_email_sender
 from polar.notifications.service import notifications
 from polar.user.service.user import user as user_service
 from polar.worker import AsyncSessionMaker, JobContext, PolarWorkerContext, task
@@ -48,8 +49,51 @@ async def notifications_send(
                 )
                 return
 
-            sender.send_to_user(
+            await sender.send_to_user(
                 to_email_addr=user.email,
                 subject=f"[Polar] {subject}",
                 html_content=body,
             )
+
+
+@task("notifications.send_batch")
+async def notifications_send_batch(
+    ctx: JobContext,
+    notification_ids: list[UUID],
+    polar_context: PolarWorkerContext,
+) -> None:
+    with polar_context.to_execution_context():
+        async with AsyncSessionMaker(ctx) as session:
+            rendered: dict[tuple[str, str], tuple[str, str]] = {}
+            emails: list[Email] = []
+            for notif, user in await notifications.list_with_users(
+                session, notification_ids
+            ):
+                if not user.email:
+                    log.warning("notifications.send.user_no_email", user_id=user.id)
+                    continue
+
+                # Members of an organization get the same payload: render it once
+                key = (notif.type, json.dumps(notif.payload, sort_keys=True))
+                if key not in rendered:
+                    rendered[key] = notifications.parse_payload(notif).render()
+                (subject, body) = rendered[key]
+
+                if not subject or not body:
+                    log.error(
+                        "notifications.send.could_not_render",
+                        user=user,
+                        notif=notif,
+                    )
+                    continue
+
+                emails.append(
+                    Email(
+                        to_email_addr=user.email,
+                        subject=f"[Polar] {subject}",
+                        html_content=body,
+                    )
+                )
+
+            if emails:
+                await sender.send_many(emails)
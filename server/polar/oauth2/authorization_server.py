@@ -21,6 +21,7 @@ from sqlalchemy.orm import Session
 from starlette.requests import Request
 from starlette.responses import Response
 
+from polar.auth.cache import auth_subject_cache
 from polar.config import settings
 from polar.kit.crypto import generate_token, get_token_hash
 from polar.logging import Logger
@@ -226,6 +227,7 @@ class RevocationEndpoint(_QueryTokenMixin, _RevocationEndpoint):
             token.refresh_token_revoked_at = now  # pyright: ignore
         self.server.session.add(token)
         self.server.session.flush()
+        auth_subject_cache.invalidate(typing.cast(str, token.access_token))
 
 
 class IntrospectionEndpoint(_QueryTokenMixin, _IntrospectionEndpoint):
@@ -4,6 +4,7 @@ import typing
 from authlib.oauth2.rfc6749.grants import RefreshTokenGrant as _RefreshTokenGrant
 from sqlalchemy import select
 
+from polar.auth.cache import auth_subject_cache
 from polar.config import settings
 from polar.kit.crypto import get_token_hash
 from polar.models import OAuth2Token
@@ -38,3 +39,4 @@ class RefreshTokenGrant(_RefreshTokenGrant):
         refresh_token.refresh_token_revoked_at = int(time.time())  # pyright: ignore
         self.server.session.add(refresh_token)
         self.server.session.flush()
+        auth_subject_cache.invalidate(typing.cast(str, refresh_token.access_token))
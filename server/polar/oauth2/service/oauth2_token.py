@@ -6,6 +6,7 @@ import structlog
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 
+from polar.auth.cache import auth_subject_cache
 from polar.config import settings
 from polar.email.renderer import get_email_renderer
 from polar.email.sender import get_email_sender
@@ -82,6 +83,7 @@ class OAuth2TokenService(ResourceServiceReader[OAuth2Token]):
         oauth2_token.access_token_revoked_at = int(time.time())  # pyright: ignore
         oauth2_token.refresh_token_revoked_at = int(time.time())  # pyright: ignore
         session.add(oauth2_token)
+        auth_subject_cache.invalidate(cast(str, oauth2_token.access_token))
 
         # Notify
         email_renderer = get_email_renderer({"oauth2": "polar.oauth2"})
@@ -113,7 +115,7 @@ class OAuth2TokenService(ResourceServiceReader[OAuth2Token]):
             )
 
             for recipient in recipients:
-                email_sender.send_to_user(
+                await email_sender.send_to_user(
                     to_email_addr=recipient, subject=subject, html_content=body
                 )
 
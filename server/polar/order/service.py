@@ -1,12 +1,12 @@
 import uuid
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
 from datetime import datetime
 from typing import Any
 
 import stripe as stripe_lib
 import structlog
 from sqlalchemy import Select, UnaryExpression, asc, desc, select
-from sqlalchemy.orm import aliased, contains_eager, joinedload
+from sqlalchemy.orm import aliased, contains_eager, defaultload, joinedload
 
 from polar.account.service import account as account_service
 from polar.auth.models import AuthSubject, is_organization, is_user
@@ -19,7 +19,8 @@ from polar.held_balance.service import held_balance as held_balance_service
 from polar.integrations.stripe.schemas import ProductType
 from polar.integrations.stripe.service import stripe as stripe_service
 from polar.integrations.stripe.utils import get_expandable_id
-from polar.kit.db.postgres import AsyncSession
+from polar.kit.csv import export_csv
+from polar.kit.db.postgres import AsyncSession, AsyncSessionMaker
 from polar.kit.pagination import PaginationParams, paginate
 from polar.kit.services import ResourceServiceReader
 from polar.kit.sorting import Sorting
@@ -151,12 +152,79 @@ class OrderService(ResourceServiceReader[Order]):
             (OrderSortProperty.created_at, True)
         ],
     ) -> tuple[Sequence[Order], int]:
-        statement = self._get_readable_order_statement(auth_subject)
+        statement = self._get_list_statement(
+            auth_subject,
+            organization_id=organization_id,
+            product_id=product_id,
+            product_price_type=product_price_type,
+            user_id=user_id,
+            sorting=sorting,
+        ).options(joinedload(Order.subscription))
+
+        return await paginate(session, statement, pagination=pagination)
 
-        statement = statement.options(
-            joinedload(Order.subscription),
+    def get_export_csv(
+        self,
+        sessionmaker: AsyncSessionMaker,
+        auth_subject: AuthSubject[User | Organization],
+        *,
+        organization_id: Sequence[uuid.UUID] | None = None,
+        product_id: Sequence[uuid.UUID] | None = None,
+    ) -> AsyncIterator[str]:
+        statement = self._get_list_statement(
+            auth_subject,
+            organization_id=organization_id,
+            product_id=product_id,
+            sorting=[(OrderSortProperty.created_at, True)],
+        ).options(
+            # Joined eager loading of collections can't be used with yield_per
+            defaultload(Order.user).selectinload(User.oauth_accounts)
         )
 
+        def get_row(order: Order) -> tuple[Any, ...]:
+            return (
+                order.created_at.isoformat(),
+                str(order.id),
+                order.user.email,
+                order.user.username_or_email,
+                order.product.name,
+                order.amount / 100,
+                order.tax_amount / 100,
+                order.currency,
+                order.billing_reason,
+                str(order.subscription_id) if order.subscription_id is not None else "",
+            )
+
+        return export_csv(
+            sessionmaker,
+            statement,
+            (
+                "Date",
+                "Order ID",
+                "Email",
+                "Name",
+                "Product",
+                "Amount",
+                "Tax Amount",
+                "Currency",
+                "Billing Reason",
+                "Subscription ID",
+            ),
+            get_row,
+        )
+
+    def _get_list_statement(
+        self,
+        auth_subject: AuthSubject[User | Organization],
+        *,
+        organization_id: Sequence[uuid.UUID] | None = None,
+        product_id: Sequence[uuid.UUID] | None = None,
+        product_price_type: Sequence[ProductPriceType] | None = None,
+        user_id: Sequence[uuid.UUID] | None = None,
+        sorting: Sequence[Sorting[OrderSortProperty]],
+    ) -> Select[tuple[Order]]:
+        statement = self._get_readable_order_statement(auth_subject)
+
         OrderProductPrice = aliased(ProductPrice)
         statement = statement.join(
             OrderProductPrice, onclause=Order.product_price_id == OrderProductPrice.id
@@ -194,7 +262,7 @@ class OrderService(ResourceServiceReader[Order]):
                 order_by_clauses.append(clause_function(Order.subscription_id))
         statement = statement.order_by(*order_by_clauses)
 
-        return await paginate(session, statement, pagination=pagination)
+        return statement
 
     async def get_by_id(
         self,
@@ -414,7 +482,7 @@ class OrderService(ResourceServiceReader[Order]):
                 order_id=order.id,
             )
 
-        await self._send_webhook(session, order)
+        await self._after_order_created(session, order)
 
         return order
 
@@ -455,7 +523,7 @@ class OrderService(ResourceServiceReader[Order]):
             },
         )
 
-        email_sender.send_to_user(
+        await email_sender.send_to_user(
             to_email_addr=user.email, subject=subject, html_content=body
         )
 
@@ -543,6 +611,16 @@ class OrderService(ResourceServiceReader[Order]):
             session, balance_transactions=balance_transactions
         )
 
+    async def _after_order_created(self, session: AsyncSession, order: Order) -> None:
+        await self._send_webhook(session, order)
+
+        # Rollups refresh also invalidates the metrics cache of the organization
+        enqueue_job(
+            "metrics.refresh_rollups",
+            organization_id=order.product.organization_id,
+            timestamps=[order.created_at],
+        )
+
     async def _send_webhook(self, session: AsyncSession, order: Order) -> None:
         await session.refresh(order.product, {"prices"})
 
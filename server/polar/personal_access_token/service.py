@@ -6,6 +6,7 @@ import structlog
 from sqlalchemy import Select, select, update
 from sqlalchemy.orm import joinedload
 
+from polar.auth.cache import auth_subject_cache
 from polar.auth.models import AuthSubject
 from polar.config import settings
 from polar.email.renderer import get_email_renderer
@@ -95,6 +96,7 @@ class PersonalAccessTokenService(ResourceServiceReader[PersonalAccessToken]):
     ) -> None:
         personal_access_token.set_deleted_at()
         session.add(personal_access_token)
+        auth_subject_cache.invalidate(personal_access_token.token)
 
     async def record_usage(
         self, session: AsyncSession, id: UUID, last_used_at: datetime
@@ -122,6 +124,7 @@ class PersonalAccessTokenService(ResourceServiceReader[PersonalAccessToken]):
 
         personal_access_token.set_deleted_at()
         session.add(personal_access_token)
+        auth_subject_cache.invalidate(personal_access_token.token)
 
         email_renderer = get_email_renderer(
             {"personal_access_token": "polar.personal_access_token"}
@@ -139,7 +142,7 @@ class PersonalAccessTokenService(ResourceServiceReader[PersonalAccessToken]):
             },
         )
 
-        email_sender.send_to_user(
+        await email_sender.send_to_user(
             to_email_addr=personal_access_token.user.email,
             subject=subject,
             html_content=body,
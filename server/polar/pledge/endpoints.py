@@ -10,6 +10,7 @@ from polar.authz.service import AccessType, Authz
 from polar.exceptions import BadRequest, ResourceNotFound, Unauthorized
 from polar.issue.service import issue as issue_service
 from polar.kit.pagination import ListResource, Pagination
+from polar.loaders import Loaders
 from polar.models.issue import Issue
 from polar.models.pledge import Pledge
 from polar.models.user import User
@@ -42,7 +43,7 @@ router = APIRouter(tags=["pledges"])
 
 
 async def include_receiver_admin_fields(
-    session: AsyncSession,
+    loaders: Loaders,
     subject: Subject,
     pledge: Pledge,
 ) -> bool:
@@ -54,17 +55,14 @@ async def include_receiver_admin_fields(
 
     # is member of receiver org
     if pledge.organization_id:
-        m = await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.organization_id
-        )
-        if m:
+        if await loaders.is_member(subject.id, pledge.organization_id):
             return True
 
     return False
 
 
 async def include_sender_admin_fields(
-    session: AsyncSession,
+    loaders: Loaders,
     subject: Subject,
     pledge: Pledge,
 ) -> bool:
@@ -80,24 +78,18 @@ async def include_sender_admin_fields(
 
     # is member of sending org
     if pledge.by_organization_id:
-        m = await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.by_organization_id
-        )
-        if m:
+        if await loaders.is_member(subject.id, pledge.by_organization_id):
             return True
 
     if pledge.on_behalf_of_organization_id:
-        m = await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.on_behalf_of_organization_id
-        )
-        if m:
+        if await loaders.is_member(subject.id, pledge.on_behalf_of_organization_id):
             return True
 
     return False
 
 
 async def include_sender_fields(
-    session: AsyncSession,
+    loaders: Loaders,
     subject: Subject,
     pledge: Pledge,
 ) -> bool:
@@ -113,30 +105,33 @@ async def include_sender_fields(
 
     # is member if sending org
     if pledge.by_organization_id:
-        if await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.by_organization_id
-        ):
+        if await loaders.is_member(subject.id, pledge.by_organization_id):
             return True
 
     if pledge.on_behalf_of_organization_id:
-        if await user_organization_service.get_by_user_and_org(
-            session, subject.id, pledge.on_behalf_of_organization_id
-        ):
+        if await loaders.is_member(subject.id, pledge.on_behalf_of_organization_id):
             return True
 
     return False
 
 
-async def to_schema(session: AsyncSession, subject: Subject, p: Pledge) -> PledgeSchema:
+async def to_schema(
+    session: AsyncSession,
+    subject: Subject,
+    p: Pledge,
+    loaders: Loaders | None = None,
+) -> PledgeSchema:
+    if loaders is None:
+        loaders = Loaders(session)
     return PledgeSchema.from_db(
         p,
         include_receiver_admin_fields=await include_receiver_admin_fields(
-            session, subject, p
+            loaders, subject, p
         ),
         include_sender_admin_fields=await include_sender_admin_fields(
-            session, subject, p
+            loaders, subject, p
         ),
-        include_sender_fields=await include_sender_fields(session, subject, p),
+        include_sender_fields=await include_sender_fields(loaders, subject, p),
     )
 
 
@@ -236,8 +231,11 @@ async def search(
         load_pledger=True,
     )
 
+    await authz.loaders.external_organization.load_many(
+        {p.organization_id for p in pledges}
+    )
     items = [
-        await to_schema(session, auth_subject.subject, p)
+        await to_schema(session, auth_subject.subject, p, authz.loaders)
         for p in pledges
         if await authz.can(auth_subject.subject, AccessType.read, p)
     ]
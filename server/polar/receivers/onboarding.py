@@ -4,9 +4,11 @@ from polar.eventstream.service import publish
 from polar.issue.hooks import IssueHook, issue_upserted
 from polar.repository.hooks import (
     SyncCompletedHook,
+    SyncedBatchHook,
     SyncedHook,
     repository_issue_synced,
     repository_issues_sync_completed,
+    repository_issues_synced,
 )
 
 log = structlog.get_logger()
@@ -31,7 +33,6 @@ async def on_issue_synced(hook: SyncedHook) -> None:
             "repository_id": hook.repository.id,
         },
         organization_id=hook.organization.id,
-        run_in_worker=False,
         redis=hook.redis,
     )
 
@@ -39,6 +40,21 @@ async def on_issue_synced(hook: SyncedHook) -> None:
 repository_issue_synced.add(on_issue_synced)
 
 
+async def on_issues_synced(hook: SyncedBatchHook) -> None:
+    await on_issue_synced(
+        SyncedHook(
+            repository=hook.repository,
+            organization=hook.organization,
+            record=hook.records[-1],
+            synced=hook.synced,
+            redis=hook.redis,
+        )
+    )
+
+
+repository_issues_synced.add(on_issues_synced)
+
+
 async def on_issue_sync_completed(
     hook: SyncCompletedHook,
 ) -> None:
@@ -51,7 +67,6 @@ async def on_issue_sync_completed(
             "repository_id": hook.repository.id,
         },
         organization_id=hook.organization.id,
-        run_in_worker=False,
         redis=hook.redis,
     )
 
@@ -73,7 +88,6 @@ async def on_issue_updated(hook: IssueHook) -> None:
             "repository_id": hook.issue.repository_id,
         },
         organization_id=hook.issue.organization_id,
-        run_in_worker=False,
         redis=hook.redis,
     )
 
@@ -1,3 +1,4 @@
+from collections.abc import Sequence
 from dataclasses import dataclass
 
 from polar.kit.hook import Hook
@@ -16,6 +17,15 @@ class SyncedHook:
     redis: Redis
 
 
+@dataclass
+class SyncedBatchHook:
+    repository: Repository
+    organization: ExternalOrganization
+    records: Sequence[Issue]
+    synced: int
+    redis: Redis
+
+
 @dataclass
 class SyncCompletedHook:
     repository: Repository
@@ -25,4 +35,5 @@ class SyncCompletedHook:
 
 
 repository_issue_synced: Hook[SyncedHook] = Hook()
+repository_issues_synced: Hook[SyncedBatchHook] = Hook()
 repository_issues_sync_completed: Hook[SyncCompletedHook] = Hook()
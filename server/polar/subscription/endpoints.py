@@ -1,19 +1,19 @@
-from collections.abc import AsyncGenerator
 from typing import Annotated
 
 import structlog
 from fastapi import Depends, Query, Response
 from fastapi.responses import StreamingResponse
 
-from polar.kit.csv import (
-    IterableCSVWriter,
+from polar.kit.db.postgres import AsyncSessionMaker
+from polar.kit.pagination import (
+    CursorPaginationParamsQuery,
+    ListResource,
 )
-from polar.kit.pagination import ListResource, PaginationParams, PaginationParamsQuery
 from polar.kit.schemas import MultipleQueryFilter
 from polar.kit.sorting import Sorting, SortingGetter
 from polar.openapi import APITag
 from polar.organization.schemas import OrganizationID
-from polar.postgres import AsyncSession, get_db_session
+from polar.postgres import AsyncSession, get_db_session, get_db_sessionmaker
 from polar.product.schemas import ProductID
 from polar.routing import APIRouter
 
@@ -38,7 +38,7 @@ SearchSorting = Annotated[
 )
 async def list(
     auth_subject: auth.SubscriptionsRead,
-    pagination: PaginationParamsQuery,
+    pagination: CursorPaginationParamsQuery,
     sorting: SearchSorting,
     organization_id: MultipleQueryFilter[OrganizationID] | None = Query(
         None, title="OrganizationID Filter", description="Filter by organization ID."
@@ -75,50 +75,16 @@ async def export(
     organization_id: MultipleQueryFilter[OrganizationID] | None = Query(
         None, description="Filter by organization ID."
     ),
-    session: AsyncSession = Depends(get_db_session),
+    sessionmaker: AsyncSessionMaker = Depends(get_db_sessionmaker),
 ) -> Response:
     """Export subscriptions as a CSV file."""
-
-    async def create_csv() -> AsyncGenerator[str, None]:
-        csv_writer = IterableCSVWriter(dialect="excel")
-        # CSV header
-        yield csv_writer.getrow(
-            (
-                "Email",
-                "Name",
-                "Created At",
-                "Active",
-                "Product",
-                "Price",
-                "Currency",
-                "Interval",
-            )
-        )
-
-        (subscribers, _) = await subscription_service.list(
-            session,
-            auth_subject,
-            organization_id=organization_id,
-            pagination=PaginationParams(limit=1000000, page=1),
-        )
-
-        for sub in subscribers:
-            yield csv_writer.getrow(
-                (
-                    sub.user.email,
-                    sub.user.username_or_email,
-                    sub.created_at.isoformat(),
-                    "true" if sub.active else "false",
-                    sub.product.name,
-                    sub.amount / 100 if sub.amount is not None else "",
-                    sub.currency if sub.currency is not None else "",
-                    sub.recurring_interval,
-                )
-            )
+    content = subscription_service.get_export_csv(
+        sessionmaker, auth_subject, organization_id=organization_id
+    )
 
     filename = "polar-subscribers.csv"
     return StreamingResponse(
-        create_csv(),
+        content,
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
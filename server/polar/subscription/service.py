@@ -1,6 +1,6 @@
 import typing
 import uuid
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
 from datetime import UTC, date, datetime
 from enum import StrEnum
 from typing import Any, Literal, cast, overload
@@ -22,7 +22,8 @@ from polar.enums import SubscriptionRecurringInterval
 from polar.exceptions import PolarError
 from polar.integrations.stripe.service import stripe as stripe_service
 from polar.integrations.stripe.utils import get_expandable_id
-from polar.kit.db.postgres import AsyncSession
+from polar.kit.csv import export_csv
+from polar.kit.db.postgres import AsyncSession, AsyncSessionMaker
 from polar.kit.pagination import PaginationParams, paginate
 from polar.kit.services import ResourceServiceReader
 from polar.kit.sorting import Sorting
@@ -175,6 +176,77 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
             (SubscriptionSortProperty.started_at, True)
         ],
     ) -> tuple[Sequence[Subscription], int]:
+        statement = self._get_list_statement(
+            auth_subject,
+            organization_id=organization_id,
+            product_id=product_id,
+            active=active,
+            sorting=sorting,
+        ).options(
+            contains_eager(Subscription.product).selectinload(Product.product_medias),
+            contains_eager(Subscription.price),
+            contains_eager(Subscription.user),
+        )
+
+        results, count = await paginate(session, statement, pagination=pagination)
+
+        return results, count
+
+    def get_export_csv(
+        self,
+        sessionmaker: AsyncSessionMaker,
+        auth_subject: AuthSubject[User | Organization],
+        *,
+        organization_id: Sequence[uuid.UUID] | None = None,
+    ) -> AsyncIterator[str]:
+        statement = self._get_list_statement(
+            auth_subject,
+            organization_id=organization_id,
+            sorting=[(SubscriptionSortProperty.started_at, True)],
+        ).options(
+            contains_eager(Subscription.product),
+            contains_eager(Subscription.price),
+            # Joined eager loading of collections can't be used with yield_per
+            contains_eager(Subscription.user).selectinload(User.oauth_accounts),
+        )
+
+        def get_row(subscription: Subscription) -> tuple[Any, ...]:
+            return (
+                subscription.user.email,
+                subscription.user.username_or_email,
+                subscription.created_at.isoformat(),
+                "true" if subscription.active else "false",
+                subscription.product.name,
+                subscription.amount / 100 if subscription.amount is not None else "",
+                subscription.currency if subscription.currency is not None else "",
+                subscription.recurring_interval,
+            )
+
+        return export_csv(
+            sessionmaker,
+            statement,
+            (
+                "Email",
+                "Name",
+                "Created At",
+                "Active",
+                "Product",
+                "Price",
+                "Currency",
+                "Interval",
+            ),
+            get_row,
+        )
+
+    def _get_list_statement(
+        self,
+        auth_subject: AuthSubject[User | Organization],
+        *,
+        organization_id: Sequence[uuid.UUID] | None = None,
+        product_id: Sequence[uuid.UUID] | None = None,
+        active: bool | None = None,
+        sorting: Sequence[Sorting[SubscriptionSortProperty]],
+    ) -> Select[tuple[Subscription]]:
         statement = self._get_readable_subscriptions_statement(auth_subject).where(
             Subscription.started_at.is_not(None)
         )
@@ -251,15 +323,7 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
                 order_by_clauses.append(clause_function(Product.name))
         statement = statement.order_by(*order_by_clauses)
 
-        statement = statement.options(
-            contains_eager(Subscription.product).selectinload(Product.product_medias),
-            contains_eager(Subscription.price),
-            contains_eager(Subscription.user),
-        )
-
-        results, count = await paginate(session, statement, pagination=pagination)
-
-        return results, count
+        return statement
 
     async def get_by_stripe_subscription_id(
         self, session: AsyncSession, stripe_subscription_id: str
@@ -472,6 +536,7 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
     async def _after_subscription_created(
         self, session: AsyncSession, subscription: Subscription
     ) -> None:
+        await self.enqueue_metrics_rollups_refresh(session, subscription)
         await self._send_webhook(
             session, subscription, WebhookEventType.subscription_created
         )
@@ -492,6 +557,8 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
 
         previous_status = subscription.status
         previous_cancel_at_period_end = subscription.cancel_at_period_end
+        previous_started_at = subscription.started_at
+        previous_ended_at = subscription.ended_at
 
         subscription.status = SubscriptionStatus(stripe_subscription.status)
         subscription.current_period_start = _from_timestamp(
@@ -526,6 +593,9 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
                 )
 
         await self.enqueue_benefits_grants(session, subscription)
+        await self.enqueue_metrics_rollups_refresh(
+            session, subscription, previous_started_at, previous_ended_at
+        )
 
         await self._after_subscription_updated(
             session, subscription, previous_status, previous_cancel_at_period_end
@@ -614,6 +684,27 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
             subscription_id=subscription.id,
         )
 
+    async def enqueue_metrics_rollups_refresh(
+        self,
+        session: AsyncSession,
+        subscription: Subscription,
+        *timestamps: datetime | None,
+    ) -> None:
+        """
+        Refresh the metrics rollups of the periods where the subscription started
+        and ended, plus the given ones, e.g. the previous start and end dates.
+        """
+        product = await product_service.get(session, subscription.product_id)
+        assert product is not None
+
+        enqueue_job(
+            "metrics.refresh_rollups",
+            organization_id=product.organization_id,
+            timestamps=list(
+                {subscription.started_at, subscription.ended_at, *timestamps}
+            ),
+        )
+
     async def update_product_benefits_grants(
         self, session: AsyncSession, product: Product
     ) -> None:
@@ -651,7 +742,7 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
             },
         )
 
-        email_sender.send_to_user(
+        await email_sender.send_to_user(
             to_email_addr=user.email, subject=subject, html_content=body
         )
 
@@ -683,7 +774,7 @@ class SubscriptionService(ResourceServiceReader[Subscription]):
             },
         )
 
-        email_sender.send_to_user(
+        await email_sender.send_to_user(
             to_email_addr=user.email, subject=subject, html_content=body
         )
 
@@ -1,4 +1,5 @@
 from polar.account import tasks as account
+from polar.advertisement import tasks as advertisement
 from polar.article import tasks as article
 from polar.benefit import tasks as benefit
 from polar.checkout import tasks as checkout
@@ -6,31 +7,38 @@ from polar.eventstream import tasks as eventstream
 from polar.integrations.github import tasks as github
 from polar.integrations.loops import tasks as loops
 from polar.integrations.stripe import tasks as stripe
+from polar.license_key import tasks as license_key
 from polar.magic_link import tasks as magic_link
+from polar.metrics import tasks as metrics
 from polar.notifications import tasks as notifications
 from polar.order import tasks as order
 from polar.organization import tasks as organization
 from polar.personal_access_token import tasks as personal_access_token
 from polar.subscription import tasks as subscription
+from polar.traffic import tasks as traffic
 from polar.transaction import tasks as transaction
 from polar.user import tasks as user
 from polar.webhook import tasks as webhook
 
 __all__ = [
     "account",
+    "advertisement",
     "article",
     "benefit",
     "checkout",
     "eventstream",
     "github",
+    "license_key",
     "loops",
     "stripe",
     "magic_link",
+    "metrics",
     "order",
     "notifications",
     "organization",
     "personal_access_token",
     "subscription",
+    "traffic",
     "transaction",
     "user",
     "webhook",
@@ -13,6 +13,7 @@ from polar.openapi import IN_DEVELOPMENT_ONLY
 from polar.organization.schemas import OrganizationID
 from polar.organization.service import organization as organization_service
 from polar.postgres import AsyncSession, get_db_session
+from polar.redis import Redis, get_redis
 from polar.routing import APIRouter
 
 from .schemas import (
@@ -32,11 +33,11 @@ router = APIRouter(prefix="", tags=["traffic"], include_in_schema=IN_DEVELOPMENT
 )
 async def track_page_view(
     track: TrackPageView,
-    session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> TrackPageViewResponse:
     if track.article_id or track.organization_id:
         await traffic_service.add(
-            session,
+            redis,
             location_href=track.location_href,
             referrer=track.referrer,
             article_id=track.article_id,
@@ -60,6 +61,7 @@ async def statistics(
     interval: Literal["month", "week", "day"] = Query(..., alias="trafficInterval"),
     group_by_article: bool = Query(False),
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
     authz: Authz = Depends(Authz.authz),
 ) -> TrafficStatistics:
     article_ids = []
@@ -95,6 +97,7 @@ async def statistics(
 
     res = await traffic_service.views_statistics(
         session,
+        redis,
         article_ids=article_ids,
         start_date=start_date,
         end_date=end_date,
@@ -117,6 +120,7 @@ async def referrers(
     start_date: datetime.date = Query(...),
     end_date: datetime.date = Query(...),
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
     authz: Authz = Depends(Authz.authz),
 ) -> ListResource[TrafficReferrer]:
     article_ids = []
@@ -138,6 +142,7 @@ async def referrers(
 
     results, count = await traffic_service.referrers(
         session,
+        redis,
         article_ids=article_ids,
         start_date=start_date,
         end_date=end_date,
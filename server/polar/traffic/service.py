@@ -1,21 +1,58 @@
 import datetime
+import json
 from collections.abc import Sequence
-from typing import Literal
+from typing import Any, Literal, NamedTuple
 from uuid import UUID
 
+import structlog
 from sqlalchemy import ColumnExpressionArgument, and_, desc, func, null, text
 
+from polar.counter import BufferedCounter
 from polar.kit.pagination import PaginationParams, paginate
 from polar.kit.utils import utc_now
+from polar.logging import Logger
+from polar.models import Article, Organization
 from polar.models.traffic import Traffic
 from polar.postgres import AsyncSession, sql
+from polar.redis import Redis
 from polar.traffic.schemas import TrafficReferrer, TrafficStatisticsPeriod
 
+log: Logger = structlog.get_logger()
+
+views_counter = BufferedCounter("traffic_views")
+
+FLUSH_BATCH_SIZE = 1000
+
+
+class _TrafficKey(NamedTuple):
+    organization_id: UUID | None
+    article_id: UUID | None
+    date: datetime.date
+    location_href: str
+    referrer: str | None
+
+
+def _decode_field(field: str) -> _TrafficKey:
+    organization_id, article_id, date, location_href, referrer = json.loads(field)
+    return _TrafficKey(
+        UUID(organization_id) if organization_id else None,
+        UUID(article_id) if article_id else None,
+        datetime.date.fromisoformat(date),
+        location_href,
+        referrer,
+    )
+
+
+def _as_date(value: datetime.date) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
 
 class TrafficService:
     async def add(
         self,
-        session: AsyncSession,
+        redis: Redis,
         *,
         location_href: str,
         date: datetime.date,
@@ -26,26 +63,96 @@ class TrafficService:
         if article_id is None and organization_id is None:
             raise Exception("article_id or organization_id must be set")
 
-        insert_stmt = sql.insert(Traffic).values(
-            location_href=location_href,
-            referrer=referrer,
-            article_id=article_id,
-            organization_id=organization_id,
-            date=date,
-            views=1,
+        field = json.dumps(
+            [
+                str(organization_id) if organization_id else None,
+                str(article_id) if article_id else None,
+                date.isoformat(),
+                location_href,
+                referrer,
+            ]
         )
+        await views_counter.increment(redis, field)
 
-        do_update = insert_stmt.on_conflict_do_update(
-            constraint="traffic_unique_key",
-            set_=dict(views=Traffic.views + 1),
-        )
+    async def flush_views(self, session: AsyncSession, redis: Redis) -> int:
+        async def _apply(increments: dict[str, int]) -> None:
+            rows: list[dict[str, Any]] = [
+                {**_decode_field(field)._asdict(), "views": views}
+                for field, views in increments.items()
+            ]
+
+            # Page views are tracked anonymously with unchecked ids:
+            # drop the ones that don't exist, which would violate the foreign keys
+            article_ids = await self._get_existing_ids(
+                session, Article, {row["article_id"] for row in rows}
+            )
+            organization_ids = await self._get_existing_ids(
+                session, Organization, {row["organization_id"] for row in rows}
+            )
+            valid_rows = [
+                row
+                for row in rows
+                if (row["article_id"] is None or row["article_id"] in article_ids)
+                and (
+                    row["organization_id"] is None
+                    or row["organization_id"] in organization_ids
+                )
+            ]
+            if len(valid_rows) < len(rows):
+                log.info(
+                    "traffic.flush_views.unknown_ids",
+                    count=len(rows) - len(valid_rows),
+                )
+            rows = valid_rows
 
-        await session.execute(do_update)
-        await session.commit()
+            for i in range(0, len(rows), FLUSH_BATCH_SIZE):
+                insert_stmt = sql.insert(Traffic).values(rows[i : i + FLUSH_BATCH_SIZE])
+                do_update = insert_stmt.on_conflict_do_update(
+                    constraint="traffic_unique_key",
+                    set_=dict(views=Traffic.views + insert_stmt.excluded.views),
+                )
+                await session.execute(do_update)
+            await session.commit()
+
+        return await views_counter.flush(redis, _apply)
+
+    async def _get_pending_views(
+        self,
+        redis: Redis,
+        *,
+        article_ids: list[UUID] | None = None,
+        organization_id: UUID | None = None,
+    ) -> list[tuple[_TrafficKey, int]]:
+        """
+        Return the views not flushed to the database yet, so they can be added
+        to the statistics.
+        """
+        pending_views: list[tuple[_TrafficKey, int]] = []
+        for field, views in (await views_counter.get_all_pending(redis)).items():
+            key = _decode_field(field)
+            if article_ids is not None and key.article_id not in article_ids:
+                continue
+            if organization_id is not None and key.organization_id != organization_id:
+                continue
+            pending_views.append((key, views))
+        return pending_views
+
+    async def _get_existing_ids(
+        self,
+        session: AsyncSession,
+        model: type[Article] | type[Organization],
+        ids: set[UUID | None],
+    ) -> set[UUID]:
+        ids.discard(None)
+        if not ids:
+            return set()
+        result = await session.execute(sql.select(model.id).where(model.id.in_(ids)))
+        return set(result.scalars().all())
 
     async def views_statistics(
         self,
         session: AsyncSession,
+        redis: Redis,
         *,
         article_ids: list[UUID] | None = None,
         organization_id: UUID | None = None,
@@ -105,19 +212,32 @@ class TrafficService:
 
         res = await session.execute(stmt)
 
-        return [
-            TrafficStatisticsPeriod(
-                start_date=row_start_date,
-                end_date=row_end_date,
-                article_id=article_id,
-                views=views,
+        pending_views = await self._get_pending_views(
+            redis, article_ids=article_ids, organization_id=organization_id
+        )
+
+        periods: list[TrafficStatisticsPeriod] = []
+        for row_start_date, row_end_date, article_id, views in res.tuples().all():
+            views += sum(
+                pending
+                for key, pending in pending_views
+                if _as_date(row_start_date) <= key.date < _as_date(row_end_date)
+                and (article_id is None or key.article_id == article_id)
+            )
+            periods.append(
+                TrafficStatisticsPeriod(
+                    start_date=row_start_date,
+                    end_date=row_end_date,
+                    article_id=article_id,
+                    views=views,
+                )
             )
-            for (row_start_date, row_end_date, article_id, views) in res.tuples().all()
-        ]
+        return periods
 
     async def referrers(
         self,
         session: AsyncSession,
+        redis: Redis,
         *,
         article_ids: list[UUID],
         start_date: datetime.date,
@@ -139,10 +259,15 @@ class TrafficService:
 
         results, count = await paginate(session, statement, pagination=pagination)
 
+        pending_views: dict[str, int] = {}
+        for key, views in await self._get_pending_views(redis, article_ids=article_ids):
+            if key.referrer and start_date <= key.date <= end_date:
+                pending_views[key.referrer] = pending_views.get(key.referrer, 0) + views
+
         return [
             TrafficReferrer(
                 referrer=referrer,
-                views=views,
+                views=views + pending_views.get(referrer, 0),
             )
             for (referrer, views) in results
         ], count
@@ -0,0 +1,15 @@
+from polar.worker import (
+    AsyncSessionMaker,
+    CronTrigger,
+    JobContext,
+    get_worker_redis,
+    task,
+)
+
+from .service import traffic_service
+
+
+@task("traffic.flush_views", cron_trigger=CronTrigger(second="*/10"))
+async def traffic_flush_views(ctx: JobContext) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        await traffic_service.flush_views(session, get_worker_redis(ctx))
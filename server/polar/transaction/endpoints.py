@@ -9,7 +9,7 @@ from polar.auth.dependencies import WebUser
 from polar.authz.service import AccessType, Authz
 from polar.exceptions import NotPermitted, ResourceNotFound
 from polar.kit.db.postgres import AsyncSessionMaker
-from polar.kit.pagination import ListResource, PaginationParamsQuery
+from polar.kit.pagination import CursorPaginationParamsQuery, ListResource
 from polar.kit.sorting import Sorting, SortingGetter
 from polar.models import Transaction as TransactionModel
 from polar.models.transaction import TransactionType
@@ -38,7 +38,7 @@ SearchSorting = Annotated[
 
 @router.get("/search", response_model=ListResource[Transaction])
 async def search_transactions(
-    pagination: PaginationParamsQuery,
+    pagination: CursorPaginationParamsQuery,
     sorting: SearchSorting,
     auth_subject: WebUser,
     type: TransactionType | None = Query(None),
@@ -1,6 +1,6 @@
 from collections.abc import AsyncIterable, Sequence
 from datetime import timedelta
-from typing import cast
+from typing import Any, cast
 
 import stripe as stripe_lib
 import structlog
@@ -12,7 +12,7 @@ from polar.config import settings
 from polar.enums import AccountType
 from polar.integrations.stripe.service import stripe as stripe_service
 from polar.integrations.stripe.utils import get_expandable_id
-from polar.kit.csv import IterableCSVWriter
+from polar.kit.csv import export_csv
 from polar.kit.db.postgres import AsyncSessionMaker
 from polar.kit.utils import generate_uuid, utc_now
 from polar.logging import Logger
@@ -315,7 +315,7 @@ class PayoutTransactionService(BaseTransactionService):
 
         return transaction
 
-    async def get_payout_csv(
+    def get_payout_csv(
         self, sessionmaker: AsyncSessionMaker, *, account: Account, payout: Transaction
     ) -> AsyncIterable[str]:
         statement = (
@@ -342,8 +342,47 @@ class PayoutTransactionService(BaseTransactionService):
             )
         )
 
-        csv_writer = IterableCSVWriter(dialect="excel")
-        yield csv_writer.getrow(
+        def get_row(transaction: Transaction) -> tuple[Any, ...]:
+            description = ""
+            if transaction.platform_fee_type is not None:
+                if transaction.platform_fee_type == "platform":
+                    description = "Polar fee"
+                else:
+                    description = (
+                        f"Payment processor fee ({transaction.platform_fee_type})"
+                    )
+            elif transaction.pledge is not None:
+                description = f"Pledge to {transaction.pledge.issue.reference_key}"
+            elif transaction.order is not None:
+                product = transaction.order.product
+                if transaction.order.subscription_id is not None:
+                    description = f"Subscription to {product.name}"
+                else:
+                    description = f"Order of {product.name}"
+            elif transaction.donation is not None:
+                description = f"Donation to {transaction.donation.to_organization.slug}"
+
+            transaction_id = (
+                str(transaction.id)
+                if transaction.incurred_by_transaction_id is None
+                else str(transaction.incurred_by_transaction_id)
+            )
+
+            return (
+                transaction.created_at.isoformat(),
+                str(payout.id),
+                transaction_id,
+                description,
+                transaction.currency,
+                transaction.amount / 100,
+                abs(payout.amount / 100),
+                account.currency,
+                abs(payout.account_amount / 100),
+            )
+
+        return export_csv(
+            sessionmaker,
+            statement,
             (
                 "Date",
                 "Payout ID",
@@ -354,57 +393,10 @@ class PayoutTransactionService(BaseTransactionService):
                 "Payout Total",
                 "Account Currency",
                 "Account Payout Total",
-            )
+            ),
+            get_row,
         )
 
-        # StreamingResponse is running its own async task to exhaust the iterator
-        # Thus, rely on the main session generated by the FastAPI dependency leads to
-        # garbage collection problems.
-        # We create a new session to avoid this.
-        async with sessionmaker() as session:
-            transactions = await session.stream_scalars(statement)
-            async for transaction in transactions:
-                description = ""
-                if transaction.platform_fee_type is not None:
-                    if transaction.platform_fee_type == "platform":
-                        description = "Polar fee"
-                    else:
-                        description = (
-                            f"Payment processor fee ({transaction.platform_fee_type})"
-                        )
-                elif transaction.pledge is not None:
-                    description = f"Pledge to {transaction.pledge.issue.reference_key}"
-                elif transaction.order is not None:
-                    product = transaction.order.product
-                    if transaction.order.subscription_id is not None:
-                        description = f"Subscription to {product.name}"
-                    else:
-                        description = f"Order of {product.name}"
-                elif transaction.donation is not None:
-                    description = (
-                        f"Donation to {transaction.donation.to_organization.slug}"
-                    )
-
-                transaction_id = (
-                    str(transaction.id)
-                    if transaction.incurred_by_transaction_id is None
-                    else str(transaction.incurred_by_transaction_id)
-                )
-
-                yield csv_writer.getrow(
-                    (
-                        transaction.created_at.isoformat(),
-                        str(payout.id),
-                        transaction_id,
-                        description,
-                        transaction.currency,
-                        transaction.amount / 100,
-                        abs(payout.amount / 100),
-                        account.currency,
-                        abs(payout.account_amount / 100),
-                    )
-                )
-
     async def _prepare_stripe_payout(
         self,
         session: AsyncSession,
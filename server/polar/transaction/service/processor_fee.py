@@ -1,6 +1,10 @@
+from collections.abc import Sequence
 from datetime import UTC, datetime
 from typing import Literal
 
+import stripe as stripe_lib
+from sqlalchemy import func, select
+
 from polar.integrations.stripe.service import stripe as stripe_service
 from polar.integrations.stripe.utils import get_expandable_id
 from polar.models import Transaction
@@ -9,6 +13,9 @@ from polar.postgres import AsyncSession
 
 from .base import BaseTransactionService, BaseTransactionServiceError
 
+SYNC_STRIPE_FEES_PAGE_SIZE = 100
+"""Number of Stripe fees checked and inserted at once."""
+
 
 class ProcessorFeeTransactionError(BaseTransactionServiceError): ...
 
@@ -161,19 +168,61 @@ class ProcessorFeeTransactionService(BaseTransactionService):
         return fee_transactions
 
     async def sync_stripe_fees(self, session: AsyncSession) -> list[Transaction]:
+        """
+        Create the transactions for the Stripe fees we don't know yet.
+
+        The sync starts from the latest fee we already synced: since it's stored
+        along the transactions, it's always consistent with them.
+        Stripe fees are then processed by pages, with a single query to
+        find the ones already synced and a single insert for the missing ones.
+        """
         transactions: list[Transaction] = []
 
+        checkpoint = await self._get_stripe_fees_checkpoint(session)
         balance_transactions = await stripe_service.list_balance_transactions(
-            type="stripe_fee"
+            type="stripe_fee",
+            # Inclusive: other fees may have been created in the same second
+            created_gte=int(checkpoint.timestamp()) if checkpoint else None,
         )
+
+        page: list[stripe_lib.BalanceTransaction] = []
         async for balance_transaction in balance_transactions:
-            transaction = await self.get_by(
-                session, fee_balance_transaction_id=balance_transaction.id
+            page.append(balance_transaction)
+            if len(page) == SYNC_STRIPE_FEES_PAGE_SIZE:
+                transactions += await self._sync_stripe_fees_page(session, page)
+                page = []
+        if page:
+            transactions += await self._sync_stripe_fees_page(session, page)
+
+        return transactions
+
+    async def _get_stripe_fees_checkpoint(
+        self, session: AsyncSession
+    ) -> datetime | None:
+        statement = select(func.max(Transaction.created_at)).where(
+            Transaction.type == TransactionType.processor_fee,
+            Transaction.fee_balance_transaction_id.is_not(None),
+        )
+        result = await session.execute(statement)
+        return result.scalar_one()
+
+    async def _sync_stripe_fees_page(
+        self,
+        session: AsyncSession,
+        balance_transactions: Sequence[stripe_lib.BalanceTransaction],
+    ) -> list[Transaction]:
+        statement = select(Transaction.fee_balance_transaction_id).where(
+            Transaction.fee_balance_transaction_id.in_(
+                [balance_transaction.id for balance_transaction in balance_transactions]
             )
+        )
+        result = await session.execute(statement)
+        synced_ids = set(result.scalars().all())
 
-            # We reached the point where we have already synced all the fees
-            if transaction is not None:
-                break
+        transactions: list[Transaction] = []
+        for balance_transaction in balance_transactions:
+            if balance_transaction.id in synced_ids:
+                continue
 
             if balance_transaction.description is None:
                 continue
@@ -181,21 +230,24 @@ class ProcessorFeeTransactionService(BaseTransactionService):
             processor_fee_type = _get_stripe_processor_fee_type(
                 balance_transaction.description
             )
-            transaction = Transaction(
-                created_at=datetime.fromtimestamp(balance_transaction.created, tz=UTC),
-                type=TransactionType.processor_fee,
-                processor=PaymentProcessor.stripe,
-                processor_fee_type=processor_fee_type,
-                currency=balance_transaction.currency,
-                amount=balance_transaction.net,
-                account_currency=balance_transaction.currency,
-                account_amount=balance_transaction.net,
-                tax_amount=0,
-                fee_balance_transaction_id=balance_transaction.id,
+            transactions.append(
+                Transaction(
+                    created_at=datetime.fromtimestamp(
+                        balance_transaction.created, tz=UTC
+                    ),
+                    type=TransactionType.processor_fee,
+                    processor=PaymentProcessor.stripe,
+                    processor_fee_type=processor_fee_type,
+                    currency=balance_transaction.currency,
+                    amount=balance_transaction.net,
+                    account_currency=balance_transaction.currency,
+                    account_amount=balance_transaction.net,
+                    tax_amount=0,
+                    fee_balance_transaction_id=balance_transaction.id,
+                )
             )
-            session.add(transaction)
-            transactions.append(transaction)
 
+        session.add_all(transactions)
         await session.flush()
 
         return transactions
@@ -1,18 +1,20 @@
 import uuid
 from collections.abc import Sequence
 from enum import StrEnum
-from typing import Any, cast
+from typing import Any
 
+import structlog
 from sqlalchemy import Select, UnaryExpression, asc, desc, func, or_, select
-from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import aliased, joinedload, subqueryload
 
 from polar.authz.service import AccessType, Authz
 from polar.exceptions import NotPermitted, ResourceNotFound
 from polar.kit.pagination import PaginationParams, paginate
 from polar.kit.sorting import Sorting
+from polar.logging import Logger
 from polar.models import (
     Account,
+    AccountBalance,
     Issue,
     Order,
     Pledge,
@@ -32,12 +34,29 @@ from ..schemas import (
 )
 from .base import BaseTransactionService
 
+log: Logger = structlog.get_logger()
+
 
 class TransactionSortProperty(StrEnum):
     created_at = "created_at"
     amount = "amount"
 
 
+ACCOUNT_BALANCE_COLUMNS = (
+    "amount",
+    "account_amount",
+    "payout_amount",
+    "account_payout_amount",
+    "transfers_amount",
+)
+ACCOUNT_BALANCE_TOTALS: dict[TransactionType | None, str] = {
+    None: "amount",
+    TransactionType.payout: "payout_amount",
+    TransactionType.balance: "transfers_amount",
+}
+"""`AccountBalance` column matching the sum of transactions of a given type."""
+
+
 class TransactionService(BaseTransactionService):
     async def search(
         self,
@@ -186,60 +205,24 @@ class TransactionService(BaseTransactionService):
         if not await authz.can(user, AccessType.read, account):
             raise NotPermitted()
 
-        statement = select(
-            cast(type[int], func.coalesce(func.sum(Transaction.amount), 0)),
-            cast(type[int], func.coalesce(func.sum(Transaction.account_amount), 0)),
-            cast(
-                type[int],
-                func.coalesce(
-                    func.sum(Transaction.amount).filter(
-                        Transaction.type == TransactionType.payout
-                    ),
-                    0,
-                ),
-            ),
-            cast(
-                type[int],
-                func.coalesce(
-                    func.sum(Transaction.account_amount).filter(
-                        Transaction.type == TransactionType.payout
-                    ),
-                    0,
-                ),
-            ),
-        ).where(Transaction.account_id == account.id)
-
-        result = await session.execute(statement)
+        account_balance = await self.get_account_balance(session, account.id)
 
         currency = "usd"  # FIXME: Main Polar currency
         account_currency = account.currency
         assert account_currency is not None
 
-        try:
-            (
-                amount,
-                account_amount,
-                payout_amount,
-                account_payout_amount,
-            ) = result.one()._tuple()
-        except NoResultFound:
-            amount = 0
-            account_amount = 0
-            payout_amount = 0
-            account_payout_amount = 0
-
         return TransactionsSummary(
             balance=TransactionsBalance(
                 currency=currency,
-                amount=amount,
+                amount=account_balance.amount,
                 account_currency=account_currency,
-                account_amount=account_amount,
+                account_amount=account_balance.account_amount,
             ),
             payout=TransactionsBalance(
                 currency=currency,
-                amount=payout_amount,
+                amount=account_balance.payout_amount,
                 account_currency=account_currency,
-                account_amount=account_payout_amount,
+                account_amount=account_balance.account_payout_amount,
             ),
         )
 
@@ -250,6 +233,11 @@ class TransactionService(BaseTransactionService):
         *,
         type: TransactionType | None = None,
     ) -> int:
+        # Read the maintained totals when we have them
+        if account_id is not None and type in ACCOUNT_BALANCE_TOTALS:
+            account_balance = await self.get_account_balance(session, account_id)
+            return getattr(account_balance, ACCOUNT_BALANCE_TOTALS[type])
+
         statement = select(func.coalesce(func.sum(Transaction.amount), 0)).where(
             Transaction.account_id == account_id
         )
@@ -260,6 +248,102 @@ class TransactionService(BaseTransactionService):
         result = await session.execute(statement)
         return result.scalar_one()
 
+    async def get_account_balance(
+        self, session: AsyncSession, account_id: uuid.UUID
+    ) -> AccountBalance:
+        """
+        Get the running totals of an account.
+
+        If the account has no transactions, empty totals are returned.
+        """
+        statement = (
+            select(AccountBalance)
+            .where(AccountBalance.account_id == account_id)
+            # Totals are updated outside of the ORM, don't reuse a loaded instance
+            .execution_options(populate_existing=True)
+        )
+        result = await session.execute(statement)
+        account_balance = result.scalar_one_or_none()
+        if account_balance is None:
+            return AccountBalance(
+                account_id=account_id,
+                amount=0,
+                account_amount=0,
+                payout_amount=0,
+                account_payout_amount=0,
+                transfers_amount=0,
+            )
+        return account_balance
+
+    async def reconcile_account_balances(
+        self, session: AsyncSession
+    ) -> list[uuid.UUID]:
+        """
+        Verify the running totals of the accounts against the sums of their
+        transactions, and fix them if they diverged.
+
+        Both are read in the same statement, so they're consistent. Fixes are
+        applied as increments, so transactions created meanwhile aren't lost.
+
+        Returns:
+            The IDs of the accounts whose totals were fixed.
+        """
+        is_payout = Transaction.type == TransactionType.payout
+        ledger = (
+            select(
+                Transaction.account_id,
+                func.sum(Transaction.amount).label("amount"),
+                func.sum(Transaction.account_amount).label("account_amount"),
+                func.coalesce(func.sum(Transaction.amount).filter(is_payout), 0).label(
+                    "payout_amount"
+                ),
+                func.coalesce(
+                    func.sum(Transaction.account_amount).filter(is_payout), 0
+                ).label("account_payout_amount"),
+                func.coalesce(
+                    func.sum(Transaction.amount).filter(
+                        Transaction.type == TransactionType.balance
+                    ),
+                    0,
+                ).label("transfers_amount"),
+            )
+            .where(Transaction.account_id.is_not(None))
+            .group_by(Transaction.account_id)
+            .subquery()
+        )
+        statement = select(
+            func.coalesce(ledger.c.account_id, AccountBalance.account_id),
+            *(
+                func.coalesce(ledger.c[column], 0)
+                - func.coalesce(getattr(AccountBalance, column), 0)
+                for column in ACCOUNT_BALANCE_COLUMNS
+            ),
+        ).join_from(
+            ledger,
+            AccountBalance,
+            AccountBalance.account_id == ledger.c.account_id,
+            full=True,
+        )
+
+        reconciled: list[uuid.UUID] = []
+        result = await session.execute(statement)
+        for account_id, *deltas in result.tuples().all():
+            increments = dict(zip(ACCOUNT_BALANCE_COLUMNS, deltas))
+            if not any(increments.values()):
+                continue
+            log.warning(
+                "account_balance.reconcile.mismatch",
+                account_id=account_id,
+                **increments,
+            )
+            await session.execute(
+                AccountBalance.get_increment_statement(account_id, increments)
+            )
+            reconciled.append(account_id)
+
+        log.info("account_balance.reconcile", reconciled=len(reconciled))
+        return reconciled
+
     def _get_readable_transactions_statement(self, user: User) -> Select[Any]:
         PaymentUserOrganization = aliased(UserOrganization)
         statement = (
@@ -18,6 +18,7 @@ from .service.payout import payout_transaction as payout_transaction_service
 from .service.processor_fee import (
     processor_fee_transaction as processor_fee_transaction_service,
 )
+from .service.transaction import transaction as transaction_service
 
 
 class TransactionTaskError(PolarTaskError): ...
@@ -36,6 +37,12 @@ async def sync_stripe_fees(ctx: JobContext) -> None:
         await processor_fee_transaction_service.sync_stripe_fees(session)
 
 
+@task("account_balance.reconcile", cron_trigger=CronTrigger(hour=1, minute=0))
+async def reconcile_account_balances(ctx: JobContext) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        await transaction_service.reconcile_account_balances(session)
+
+
 @task("payout.created")
 async def payout_created(
     ctx: JobContext, payout_id: uuid.UUID, polar_context: PolarWorkerContext
@@ -3,6 +3,9 @@ from typing import Annotated
 from fastapi import Depends, Path
 from pydantic import UUID4
 
+from polar.advertisement.service import (
+    advertisement_campaign as advertisement_campaign_service,
+)
 from polar.exceptions import ResourceNotFound
 from polar.kit.db.postgres import AsyncSession
 from polar.kit.pagination import ListResource, PaginationParamsQuery
@@ -10,6 +13,7 @@ from polar.kit.sorting import Sorting, SortingGetter
 from polar.models import AdvertisementCampaign
 from polar.openapi import APITag
 from polar.postgres import get_db_session
+from polar.redis import Redis, get_redis
 from polar.routing import APIRouter
 
 from .. import auth
@@ -48,6 +52,7 @@ async def list(
     pagination: PaginationParamsQuery,
     sorting: ListSorting,
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> ListResource[UserAdvertisementCampaign]:
     """List advertisement campaigns."""
     results, count = await user_advertisement_service.list(
@@ -56,9 +61,15 @@ async def list(
         pagination=pagination,
         sorting=sorting,
     )
+    views = await advertisement_campaign_service.get_views(redis, results)
 
     return ListResource.from_paginated_results(
-        [UserAdvertisementCampaign.model_validate(result) for result in results],
+        [
+            UserAdvertisementCampaign.model_validate(result).model_copy(
+                update={"views": views[result.id]}
+            )
+            for result in results
+        ],
         count,
         pagination,
     )
@@ -74,7 +85,8 @@ async def get(
     id: AdvertisementCampaignID,
     auth_subject: auth.UserAdvertisementCampaignsRead,
     session: AsyncSession = Depends(get_db_session),
-) -> AdvertisementCampaign:
+    redis: Redis = Depends(get_redis),
+) -> UserAdvertisementCampaign:
     """Get an advertisement campaign by ID."""
     advertisement_campaign = await user_advertisement_service.get_by_id(
         session, auth_subject, id
@@ -83,7 +95,12 @@ async def get(
     if advertisement_campaign is None:
         raise ResourceNotFound()
 
-    return advertisement_campaign
+    views = await advertisement_campaign_service.get_views(
+        redis, [advertisement_campaign]
+    )
+    return UserAdvertisementCampaign.model_validate(advertisement_campaign).model_copy(
+        update={"views": views[advertisement_campaign.id]}
+    )
 
 
 @router.post(
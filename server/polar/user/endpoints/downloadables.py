@@ -7,6 +7,7 @@ from polar.kit.schemas import MultipleQueryFilter
 from polar.openapi import APITag
 from polar.organization.schemas import OrganizationID
 from polar.postgres import AsyncSession, get_db_session
+from polar.redis import Redis, get_redis
 from polar.routing import APIRouter
 
 from .. import auth
@@ -35,6 +36,7 @@ async def list(
         description=("Filter by given benefit ID. "),
     ),
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> ListResource[DownloadableRead]:
     subject = auth_subject.subject
 
@@ -47,7 +49,7 @@ async def list(
     )
 
     return ListResource.from_paginated_results(
-        downloadable_service.generate_downloadable_schemas(results),
+        await downloadable_service.generate_downloadable_schemas(redis, results),
         count,
         pagination,
     )
@@ -67,11 +69,12 @@ async def get(
     token: str,
     auth_subject: auth.UserDownloadablesRead,
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> RedirectResponse:
     subject = auth_subject.subject
 
     downloadable = await downloadable_service.get_from_token_or_raise(
-        session, user=subject, token=token
+        session, redis, user=subject, token=token
     )
     signed = downloadable_service.generate_download_schema(downloadable)
     return RedirectResponse(signed.file.download.url, 302)
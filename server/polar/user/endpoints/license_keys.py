@@ -1,3 +1,5 @@
+from collections.abc import Sequence
+
 from fastapi import Depends, Query
 from pydantic import UUID4
 
@@ -8,21 +10,25 @@ from polar.kit.pagination import ListResource, PaginationParamsQuery
 from polar.kit.schemas import MultipleQueryFilter
 from polar.license_key.schemas import (
     LicenseKeyActivate,
-    LicenseKeyActivationBase,
+    LicenseKeyActivateBatch,
+    LicenseKeyActivationBatchResult,
     LicenseKeyActivationRead,
     LicenseKeyDeactivate,
     LicenseKeyRead,
     LicenseKeyValidate,
+    LicenseKeyValidateBatch,
     LicenseKeyWithActivations,
     NotFoundResponse,
     UnauthorizedResponse,
     ValidatedLicenseKey,
+    ValidatedLicenseKeyBatchResult,
 )
 from polar.license_key.service import license_key as license_key_service
 from polar.models import LicenseKeyActivation
 from polar.openapi import APITag
 from polar.organization.schemas import OrganizationID
 from polar.postgres import get_db_session
+from polar.redis import Redis, get_redis
 from polar.routing import APIRouter
 
 from .. import auth
@@ -115,25 +121,28 @@ async def get(
 async def validate(
     validate: LicenseKeyValidate,
     session: AsyncSession = Depends(get_db_session),
+    redis: Redis = Depends(get_redis),
 ) -> ValidatedLicenseKey:
     """Validate a license key."""
-    lk = await license_key_service.get_or_raise_by_key(
-        session,
-        organization_id=validate.organization_id,
-        key=validate.key,
-    )
-    license_key, activation = await license_key_service.validate(
-        session,
-        license_key=lk,
-        validate=validate,
-    )
-    activation_schema = None
-    if activation:
-        activation_schema = LicenseKeyActivationBase.model_validate(activation)
+    return await license_key_service.validate_by_key(session, redis, validate)
 
-    ret = ValidatedLicenseKey.model_validate(license_key)
-    ret.activation = activation_schema
-    return ret
+
+@router.post(
+    "/validate/batch",
+    summary="Validate License Keys",
+    response_model=Sequence[ValidatedLicenseKeyBatchResult],
+)
+async def validate_batch(
+    validate_batch: LicenseKeyValidateBatch,
+    session: AsyncSession = Depends(get_db_session),
+) -> Sequence[ValidatedLicenseKeyBatchResult]:
+    """
+    Validate several license keys at once.
+
+    Results are returned in the same order as the given keys,
+    with an error for each key that couldn't be validated.
+    """
+    return await license_key_service.validate_batch(session, validate_batch.items)
 
 
 @router.post(
@@ -160,6 +169,24 @@ async def activate(
     )
 
 
+@router.post(
+    "/activate/batch",
+    summary="Activate License Keys",
+    response_model=Sequence[LicenseKeyActivationBatchResult],
+)
+async def activate_batch(
+    activate_batch: LicenseKeyActivateBatch,
+    session: AsyncSession = Depends(get_db_session),
+) -> Sequence[LicenseKeyActivationBatchResult]:
+    """
+    Activate several license key instances at once.
+
+    Results are returned in the same order as the given keys,
+    with an error for each key that couldn't be activated.
+    """
+    return await license_key_service.activate_batch(session, activate_batch.items)
+
+
 @router.post(
     "/deactivate",
     summary="Deactivate License Key",
@@ -4,9 +4,11 @@ from uuid import UUID
 
 import structlog
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from sqlalchemy import Integer, Uuid, column, values
 from sqlalchemy.orm import contains_eager
 
 from polar.config import settings
+from polar.counter import BufferedCounter
 from polar.exceptions import (
     BadRequest,
     ResourceNotFound,
@@ -21,6 +23,7 @@ from polar.models import Benefit, User
 from polar.models.downloadable import Downloadable, DownloadableStatus
 from polar.models.file import File
 from polar.postgres import AsyncSession, sql
+from polar.redis import Redis
 
 from ..schemas.downloadables import (
     DownloadableCreate,
@@ -31,6 +34,8 @@ from ..schemas.downloadables import (
 
 log = structlog.get_logger()
 
+downloads_counter = BufferedCounter("downloadable_downloads")
+
 token_serializer = URLSafeTimedSerializer(
     settings.S3_FILES_DOWNLOAD_SECRET, settings.S3_FILES_DOWNLOAD_SALT
 )
@@ -136,29 +141,48 @@ class DownloadableService(
         await session.execute(statement)
 
     async def increment_download_count(
-        self,
-        session: AsyncSession,
-        downloadable: Downloadable,
-    ) -> Downloadable:
-        downloadable.downloaded += 1
-        downloadable.last_downloaded_at = utc_now()
-        session.add(downloadable)
-        await session.flush()
-        return downloadable
+        self, redis: Redis, downloadable: Downloadable
+    ) -> None:
+        await downloads_counter.increment(redis, str(downloadable.id))
+
+    async def flush_download_counts(self, session: AsyncSession, redis: Redis) -> int:
+        async def _apply(increments: dict[str, int]) -> None:
+            increments_values = values(
+                column("id", Uuid),
+                column("downloaded", Integer),
+                name="increments",
+            ).data([(UUID(id), count) for id, count in increments.items()])
+            statement = (
+                sql.update(Downloadable)
+                .where(Downloadable.id == increments_values.c.id)
+                .values(
+                    downloaded=Downloadable.downloaded + increments_values.c.downloaded,
+                    last_downloaded_at=utc_now(),
+                )
+            )
+            await session.execute(statement)
+            await session.commit()
 
-    def generate_downloadable_schemas(
-        self, downloadables: Sequence[Downloadable]
+        return await downloads_counter.flush(redis, _apply)
+
+    async def generate_downloadable_schemas(
+        self, redis: Redis, downloadables: Sequence[Downloadable]
     ) -> list[DownloadableRead]:
+        pending_downloads = await downloads_counter.get_pending(
+            redis, [str(downloadable.id) for downloadable in downloadables]
+        )
         items = []
         for downloadable in downloadables:
-            item = self.generate_downloadable_schema(downloadable)
+            item = self.generate_downloadable_schema(
+                downloadable, pending_downloads[str(downloadable.id)]
+            )
             items.append(item)
         return items
 
     def generate_downloadable_schema(
-        self, downloadable: Downloadable
+        self, downloadable: Downloadable, pending_downloads: int = 0
     ) -> DownloadableRead:
-        token = self.create_download_token(downloadable)
+        token = self.create_download_token(downloadable, pending_downloads)
         file_download = FileDownload.from_presigned(
             downloadable.file,
             url=token.url,
@@ -170,7 +194,9 @@ class DownloadableService(
             file=file_download,
         )
 
-    def create_download_token(self, downloadable: Downloadable) -> DownloadableURL:
+    def create_download_token(
+        self, downloadable: Downloadable, pending_downloads: int = 0
+    ) -> DownloadableURL:
         expires_at = utc_now() + timedelta(seconds=settings.S3_FILES_PRESIGN_TTL)
 
         last_downloaded_at = 0.0
@@ -181,7 +207,7 @@ class DownloadableService(
             dict(
                 id=str(downloadable.id),
                 # Not used initially, but good for future rate limiting
-                downloaded=downloadable.downloaded,
+                downloaded=downloadable.downloaded + pending_downloads,
                 last_downloaded_at=last_downloaded_at,
             )
         )
@@ -189,7 +215,7 @@ class DownloadableService(
         return DownloadableURL(url=redirect_to, expires_at=expires_at)
 
     async def get_from_token_or_raise(
-        self, session: AsyncSession, user: User, token: str
+        self, session: AsyncSession, redis: Redis, user: User, token: str
     ) -> Downloadable:
         try:
             unpacked = token_serializer.loads(
@@ -209,7 +235,7 @@ class DownloadableService(
         if not downloadable:
             raise ResourceNotFound()
 
-        await self.increment_download_count(session, downloadable)
+        await self.increment_download_count(redis, downloadable)
         return downloadable
 
     def generate_download_schema(self, downloadable: Downloadable) -> DownloadableRead:
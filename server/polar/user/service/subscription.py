@@ -268,6 +268,10 @@ class UserSubscriptionService(ResourceServiceReader[Subscription]):
             subscription.recurring_interval = price.recurring_interval
         session.add(subscription)
 
+        await subscription_service.enqueue_metrics_rollups_refresh(
+            session, subscription
+        )
+
         return subscription
 
     async def cancel(
@@ -288,6 +292,9 @@ class UserSubscriptionService(ResourceServiceReader[Subscription]):
             # free subscriptions end immediately (vs at end of billing period)
             # queue removal of grants
             await subscription_service.enqueue_benefits_grants(session, subscription)
+            await subscription_service.enqueue_metrics_rollups_refresh(
+                session, subscription
+            )
 
         session.add(subscription)
 
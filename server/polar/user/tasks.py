@@ -1,8 +1,16 @@
 import uuid
 
 from polar.exceptions import PolarTaskError
-from polar.worker import AsyncSessionMaker, JobContext, PolarWorkerContext, task
-
+from polar.worker import (
+    AsyncSessionMaker,
+    CronTrigger,
+    JobContext,
+    PolarWorkerContext,
+    get_worker_redis,
+    task,
+)
+
+from .service.downloadables import downloadable as downloadable_service
 from .service.user import user as user_service
 
 
@@ -27,3 +35,9 @@ async def user_on_after_signup(
 
         if user is None:
             raise UserDoesNotExist(user_id)
+
+
+@task("user.flush_download_counts", cron_trigger=CronTrigger(second="*/10"))
+async def user_flush_download_counts(ctx: JobContext) -> None:
+    async with AsyncSessionMaker(ctx) as session:
+        await downloadable_service.flush_download_counts(session, get_worker_redis(ctx))
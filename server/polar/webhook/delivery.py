@@ -0,0 +1,212 @@
+import asyncio
+import socket
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+from uuid import UUID
+
+import httpx
+import structlog
+from netaddr import IPAddress
+
+from polar.config import settings
+from polar.exceptions import PolarError
+from polar.logging import Logger
+
+log: Logger = structlog.get_logger()
+
+
+class WebhookEndpointBusy(PolarError):
+    def __init__(self, endpoint_id: UUID, timeout: float) -> None:
+        self.endpoint_id = endpoint_id
+        self.timeout = timeout
+        message = (
+            f"No delivery slot available for endpoint {endpoint_id} "
+            f"after {timeout} seconds"
+        )
+        super().__init__(message)
+
+
+class _EndpointSemaphore:
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, value: int) -> None:
+        self.semaphore = asyncio.Semaphore(value)
+        self.users = 0
+
+
+class WebhookDeliveryEngine:
+    """
+    Delivers webhook payloads to customer endpoints.
+
+    A single `httpx.AsyncClient` is shared by all deliveries of the running event
+    loop, so connections to the same host are pooled and kept alive between jobs.
+
+    DNS checks are made asynchronously and cached for a short amount of time,
+    and the number of in-flight requests to a single endpoint is capped so one
+    slow receiver can't hog the whole worker. If no slot frees up in time,
+    `WebhookEndpointBusy` is raised so the job can be retried later instead of
+    waiting indefinitely.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        max_concurrency_per_endpoint: int,
+        endpoint_slot_timeout: float,
+        dns_cache_ttl: int,
+        dns_cache_size: int,
+    ) -> None:
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_concurrency_per_endpoint = max_concurrency_per_endpoint
+        self.endpoint_slot_timeout = endpoint_slot_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.dns_cache_size = dns_cache_size
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._endpoint_semaphores: dict[UUID, _EndpointSemaphore] = {}
+        self._dns_cache: OrderedDict[str, tuple[float, bool]] = OrderedDict()
+
+    async def allowed_url(self, url: str) -> bool:
+        """
+        Webhooks can only be sent over HTTPS, to global IPs.
+        Webhooks can not be sent to loopback or "internal" or "reserved" ranges
+        """
+        parsed = urlparse(url)
+
+        if parsed.scheme != "https":
+            return False
+
+        hostname = parsed.hostname
+        if hostname is None:
+            return False
+
+        now = time.monotonic()
+        cached = self._dns_cache.get(hostname)
+        if cached is not None:
+            expires_at, allowed = cached
+            if expires_at > now:
+                self._dns_cache.move_to_end(hostname)
+                return allowed
+            del self._dns_cache[hostname]
+
+        allowed = await self._resolve_global(hostname)
+        self._dns_cache[hostname] = (now + self.dns_cache_ttl, allowed)
+        # Evict the least recently used hostnames
+        while len(self._dns_cache) > self.dns_cache_size:
+            self._dns_cache.popitem(last=False)
+        return allowed
+
+    async def post(
+        self,
+        endpoint_id: UUID,
+        url: str,
+        *,
+        content: str,
+        headers: Mapping[str, str],
+    ) -> httpx.Response:
+        async with self._endpoint_slot(endpoint_id):
+            return await self._get_client().post(url, content=content, headers=headers)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._reset()
+
+    async def _resolve_global(self, hostname: str) -> bool:
+        loop = asyncio.get_running_loop()
+        try:
+            info = await loop.getaddrinfo(hostname, 0)
+        except:  # noqa: E722
+            return False
+
+        # must resolve to at least one address
+        if len(info) == 0:
+            return False
+
+        for family, type, proto, canonname, sockaddr in info:
+            if (
+                family != socket.AddressFamily.AF_INET
+                and family != socket.AddressFamily.AF_INET6
+            ):
+                return False
+
+            ip = sockaddr[0]
+
+            ipp = IPAddress(ip)
+            if not ipp.is_global():
+                return False
+
+        return True
+
+    @asynccontextmanager
+    async def _endpoint_slot(self, endpoint_id: UUID) -> AsyncIterator[None]:
+        self._ensure_loop()
+        endpoint_semaphore = self._endpoint_semaphores.get(endpoint_id)
+        if endpoint_semaphore is None:
+            endpoint_semaphore = _EndpointSemaphore(self.max_concurrency_per_endpoint)
+            self._endpoint_semaphores[endpoint_id] = endpoint_semaphore
+
+        endpoint_semaphore.users += 1
+        try:
+            try:
+                async with asyncio.timeout(self.endpoint_slot_timeout):
+                    await endpoint_semaphore.semaphore.acquire()
+            except TimeoutError as e:
+                raise WebhookEndpointBusy(
+                    endpoint_id, self.endpoint_slot_timeout
+                ) from e
+            try:
+                yield
+            finally:
+                endpoint_semaphore.semaphore.release()
+        finally:
+            endpoint_semaphore.users -= 1
+            if endpoint_semaphore.users == 0:
+                self._endpoint_semaphores.pop(endpoint_id, None)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        self._ensure_loop()
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                ),
+            )
+        return self._client
+
+    def _ensure_loop(self) -> None:
+        # The client and the semaphores are bound to the event loop they were
+        # first used in: start from a clean state if the loop changed.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None:
+                log.debug("polar.webhook.delivery.loop_changed")
+            self._reset()
+            self._loop = loop
+
+    def _reset(self) -> None:
+        self._loop = None
+        self._client = None
+        self._endpoint_semaphores = {}
+
+
+webhook_delivery = WebhookDeliveryEngine(
+    timeout=settings.WEBHOOK_DELIVERY_TIMEOUT_SECONDS,
+    max_connections=settings.WEBHOOK_DELIVERY_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.WEBHOOK_DELIVERY_MAX_KEEPALIVE_CONNECTIONS,
+    max_concurrency_per_endpoint=settings.WEBHOOK_DELIVERY_MAX_CONCURRENCY_PER_ENDPOINT,
+    endpoint_slot_timeout=settings.WEBHOOK_DELIVERY_ENDPOINT_SLOT_TIMEOUT_SECONDS,
+    dns_cache_ttl=settings.WEBHOOK_DNS_CACHE_TTL_SECONDS,
+    dns_cache_size=settings.WEBHOOK_DNS_CACHE_SIZE,
+)
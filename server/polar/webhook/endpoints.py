@@ -5,7 +5,11 @@ from pydantic import UUID4
 
 from polar.authz.service import AccessType, Authz
 from polar.exceptions import NotPermitted, ResourceNotFound, Unauthorized
-from polar.kit.pagination import ListResource, PaginationParamsQuery
+from polar.kit.pagination import (
+    CursorPaginationParamsQuery,
+    ListResource,
+    PaginationParamsQuery,
+)
 from polar.models import WebhookEndpoint
 from polar.organization.schemas import OrganizationID
 from polar.postgres import AsyncSession, get_db_session
@@ -157,7 +161,7 @@ async def delete_webhook_endpoint(
     response_model=ListResource[WebhookDeliverySchema],
 )
 async def list_webhook_deliveries(
-    pagination: PaginationParamsQuery,
+    pagination: CursorPaginationParamsQuery,
     auth_subject: WebhooksRead,
     endpoint_id: UUID4 | None = Query(
         None, description="Filter by webhook endpoint ID."
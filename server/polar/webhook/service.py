@@ -1,8 +1,9 @@
 from collections.abc import Sequence
+from typing import Any
 from uuid import UUID
 
 import structlog
-from sqlalchemy import Select, and_, desc, or_, select, text
+from sqlalchemy import Select, and_, desc, insert, or_, select, text
 from sqlalchemy.orm import contains_eager, joinedload
 
 from polar.auth.models import AuthSubject, is_organization, is_user
@@ -16,7 +17,11 @@ from polar.models.organization import Organization
 from polar.models.user import User
 from polar.models.user_organization import UserOrganization
 from polar.models.webhook_delivery import WebhookDelivery
-from polar.models.webhook_endpoint import WebhookEndpoint, WebhookEventType
+from polar.models.webhook_endpoint import (
+    WebhookEndpoint,
+    WebhookEventType,
+    WebhookFormat,
+)
 from polar.models.webhook_event import WebhookEvent
 from polar.organization.resolver import get_payload_organization
 from polar.webhook.schemas import (
@@ -238,23 +243,51 @@ class WebhookService:
         target: Organization | User,
         payload: BaseWebhookPayload,
     ) -> None:
-        for e in await self._get_event_target_endpoints(
+        endpoints = await self._get_event_target_endpoints(
             session, event=payload.type, target=target
-        ):
-            try:
-                payload_data = payload.get_payload(e.format, target)
-                event_type = WebhookEvent(
-                    webhook_endpoint_id=e.id, payload=payload_data
+        )
+
+        # Render each format only once, whatever the number of endpoints
+        formatted_payloads: dict[WebhookFormat, str | None] = {}
+        values: list[dict[str, Any]] = []
+        for endpoint in endpoints:
+            if endpoint.format not in formatted_payloads:
+                formatted_payloads[endpoint.format] = self._get_formatted_payload(
+                    payload, endpoint.format, target
                 )
-                session.add(event_type)
-                await session.flush()
-                enqueue_job("webhook_event.send", webhook_event_id=event_type.id)
-            except UnsupportedTarget as e:
-                # Log the error but do not raise to not fail the whole request
-                log.error(e.message)
-                continue
-            except SkipEvent:
+            payload_data = formatted_payloads[endpoint.format]
+            if payload_data is None:
                 continue
+            values.append(
+                {
+                    "id": WebhookEvent.generate_id(),
+                    "webhook_endpoint_id": endpoint.id,
+                    "payload": payload_data,
+                }
+            )
+
+        if not values:
+            return
+
+        statement = insert(WebhookEvent).values(values).returning(WebhookEvent.id)
+        result = await session.execute(statement)
+        for webhook_event_id in result.scalars().all():
+            enqueue_job("webhook_event.send", webhook_event_id=webhook_event_id)
+
+    def _get_formatted_payload(
+        self,
+        payload: BaseWebhookPayload,
+        format: WebhookFormat,
+        target: Organization | User,
+    ) -> str | None:
+        try:
+            return payload.get_payload(format, target)
+        except UnsupportedTarget as e:
+            # Log the error but do not raise to not fail the whole request
+            log.error(e.message)
+            return None
+        except SkipEvent:
+            return None
 
     def _get_readable_endpoints_statement(
         self, auth_subject: AuthSubject[User | Organization]
@@ -1,13 +1,10 @@
 import base64
-import socket
 from collections.abc import Mapping
-from urllib.parse import urlparse
 from uuid import UUID
 
 import httpx
 import structlog
 from arq import Retry
-from netaddr import IPAddress
 from standardwebhooks.webhooks import Webhook as StandardWebhook
 
 from polar.kit.db.postgres import AsyncSession
@@ -22,6 +19,7 @@ from polar.worker import (
     task,
 )
 
+from .delivery import WebhookEndpointBusy, webhook_delivery
 from .service import webhook as webhook_service
 
 log: Logger = structlog.get_logger()
@@ -41,44 +39,8 @@ async def webhook_event_send(
         )
 
 
-def allowed_url(url: str) -> bool:
-    """
-    Webhooks can only be sent over HTTPS, to global IPs.
-    Webhooks can not be sent to loopback or "internal" or "reserved" ranges
-    """
-
-    parsed = urlparse(url)
-
-    if parsed.scheme != "https":
-        return False
-
-    try:
-        info = socket.getaddrinfo(
-            parsed.hostname,
-            0,
-            # 0  # port, required
-        )
-    except:  # noqa: E722
-        return False
-
-    # must resolve to at least one address
-    if len(info) == 0:
-        return False
-
-    for family, type, proto, canonname, sockaddr in info:
-        if (
-            family != socket.AddressFamily.AF_INET
-            and family != socket.AddressFamily.AF_INET6
-        ):
-            return False
-
-        ip = sockaddr[0]
-
-        ipp = IPAddress(ip)
-        if not ipp.is_global():
-            return False
-
-    return True
+async def allowed_url(url: str) -> bool:
+    return await webhook_delivery.allowed_url(url)
 
 
 async def _webhook_event_send(
@@ -91,7 +53,7 @@ async def _webhook_event_send(
     if not event:
         raise Exception(f"webhook event not found id={webhook_event_id}")
 
-    if not allowed_url(event.webhook_endpoint.url):
+    if not await allowed_url(event.webhook_endpoint.url):
         raise Exception(
             f"invalid webhook url id={webhook_event_id} url={event.webhook_endpoint.url}"
         )
@@ -119,15 +81,21 @@ async def _webhook_event_send(
     )
 
     try:
-        response = httpx.post(
+        response = await webhook_delivery.post(
+            event.webhook_endpoint_id,
             event.webhook_endpoint.url,
             content=event.payload,
             headers=headers,
-            timeout=20.0,
         )
         delivery.http_code = response.status_code
         event.last_http_code = response.status_code
         response.raise_for_status()
+    # Endpoint saturated: nothing was sent, so there is no delivery to record
+    except WebhookEndpointBusy as e:
+        if ctx["job_try"] >= MAX_RETRIES:
+            event.succeeded = False
+        else:
+            raise Retry(compute_backoff(ctx["job_try"])) from e
     # Error
     except httpx.HTTPError as e:
         delivery.succeeded = False
@@ -141,9 +109,9 @@ async def _webhook_event_send(
     else:
         delivery.succeeded = True
         event.succeeded = True
-    # Either way, save the delivery
+    # Either way, save the delivery, if a request was actually sent
     finally:
-        assert delivery.succeeded is not None
-        session.add(delivery)
+        if delivery.succeeded is not None:
+            session.add(delivery)
         session.add(event)
         await session.commit()
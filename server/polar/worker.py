@@ -3,8 +3,9 @@ import contextlib
 import contextvars
 import functools
 import random
+import time
 import uuid
-from collections.abc import AsyncIterator, Awaitable, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
 from datetime import datetime
 from enum import Enum
 from typing import Any, ParamSpec, TypeAlias, TypedDict, TypeVar, cast
@@ -16,13 +17,18 @@ from apscheduler.triggers.cron import CronTrigger
 from arq import func
 from arq.connections import ArqRedis, RedisSettings
 from arq.connections import create_pool as arq_create_pool
+from arq.constants import job_key_prefix, result_key_prefix
 from arq.cron import CronJob
+from arq.jobs import serialize_job
 from arq.typing import SecondsTimedelta
+from arq.utils import timestamp_ms, to_ms, to_unix_ms
 from arq.worker import Function
 from pydantic import BaseModel
+from redis.exceptions import WatchError
 
 from polar.config import settings
 from polar.context import ExecutionContext
+from polar.eventstream.service import flush_published_events
 from polar.kit.db.postgres import (
     AsyncEngine,
     AsyncSession,
@@ -35,10 +41,11 @@ from polar.logfire import instrument_httpx, instrument_sqlalchemy
 from polar.logging import generate_correlation_id
 from polar.postgres import create_async_engine
 from polar.redis import Redis
+from polar.webhook.delivery import webhook_delivery
 
 log = structlog.get_logger()
 
-JobToEnqueue: TypeAlias = tuple[str, tuple[Any], dict[str, Any]]
+JobToEnqueue: TypeAlias = tuple[str, tuple[Any, ...], dict[str, Any]]
 _jobs_to_enqueue = contextvars.ContextVar[list[JobToEnqueue]](
     "polar_worker_jobs_to_enqueue", default=[]
 )
@@ -112,6 +119,8 @@ class WorkerSettings:
         redis = ctx["raw_redis"]
         await redis.close()
 
+        await webhook_delivery.close()
+
         log.info("polar.worker.shutdown")
 
     @staticmethod
@@ -254,12 +263,108 @@ def enqueue_job(
     log.debug("polar.worker.job_enqueued", name=name, args=args, kwargs=kwargs)
 
 
+async def bulk_enqueue_jobs(
+    arq_pool: ArqRedis, jobs: Sequence[JobToEnqueue]
+) -> Sequence[str]:
+    """
+    Enqueue several jobs in a single Redis transaction.
+
+    It follows the same semantics as `ArqRedis.enqueue_job`: a job is skipped if
+    a job or a result with the same ID already exists.
+
+    Args:
+        arq_pool: The ARQ Redis pool.
+        jobs: The jobs to enqueue, as buffered by `enqueue_job`.
+
+    Returns:
+        The IDs of the jobs that were actually enqueued.
+    """
+    enqueue_time_ms = timestamp_ms()
+    prepared_jobs: dict[str, tuple[str, int, int, bytes]] = {}
+    for name, args, kwargs in jobs:
+        kwargs = dict(kwargs)
+        job_id: str = kwargs.pop("_job_id", None) or uuid.uuid4().hex
+        queue_name: str = kwargs.pop("_queue_name", None) or arq_pool.default_queue_name
+        defer_until: datetime | None = kwargs.pop("_defer_until", None)
+        defer_by_ms = to_ms(kwargs.pop("_defer_by", None))
+        expires_ms = to_ms(kwargs.pop("_expires", None))
+        job_try: int | None = kwargs.pop("_job_try", None)
+
+        # Same job ID twice in the batch: only the first one would be enqueued
+        if job_id in prepared_jobs:
+            continue
+
+        if defer_until is not None:
+            score = to_unix_ms(defer_until)
+        elif defer_by_ms:
+            score = enqueue_time_ms + defer_by_ms
+        else:
+            score = enqueue_time_ms
+        expires_ms = expires_ms or score - enqueue_time_ms + arq_pool.expires_extra_ms
+
+        job = serialize_job(
+            name,
+            args,
+            kwargs,
+            job_try,
+            enqueue_time_ms,
+            serializer=arq_pool.job_serializer,
+        )
+        prepared_jobs[job_id] = (queue_name, score, expires_ms, job)
+
+    if not prepared_jobs:
+        return []
+
+    job_ids = list(prepared_jobs.keys())
+    job_keys = [job_key_prefix + job_id for job_id in job_ids]
+    result_keys = [result_key_prefix + job_id for job_id in job_ids]
+
+    async with arq_pool.pipeline(transaction=True) as pipe:
+        await pipe.watch(*job_keys)
+        existing = await pipe.mget(job_keys + result_keys)
+        enqueued_job_ids = [
+            job_id
+            for i, job_id in enumerate(job_ids)
+            if existing[i] is None and existing[len(job_ids) + i] is None
+        ]
+        if not enqueued_job_ids:
+            await pipe.reset()
+            return []
+
+        pipe.multi()
+        for job_id in enqueued_job_ids:
+            queue_name, score, expires_ms, job = prepared_jobs[job_id]
+            pipe.psetex(job_key_prefix + job_id, expires_ms, job)
+            pipe.zadd(queue_name, {job_id: score})
+        try:
+            await pipe.execute()
+        except WatchError:
+            # A job got enqueued since we checked: fallback to one-by-one enqueue
+            log.debug("polar.worker.bulk_enqueue_jobs.watch_error")
+        else:
+            return enqueued_job_ids
+
+    enqueued_job_ids = []
+    for name, args, kwargs in jobs:
+        arq_job = await arq_pool.enqueue_job(name, *args, **kwargs)
+        if arq_job is not None:
+            enqueued_job_ids.append(arq_job.job_id)
+    return enqueued_job_ids
+
+
 async def flush_enqueued_jobs(arq_pool: ArqRedis) -> None:
     if _jobs_to_enqueue_list := _jobs_to_enqueue.get([]):
-        log.debug("polar.worker.flush_enqueued_jobs")
+        start = time.perf_counter()
+        enqueued_job_ids = await bulk_enqueue_jobs(arq_pool, _jobs_to_enqueue_list)
+        duration_ms = (time.perf_counter() - start) * 1000
         for name, args, kwargs in _jobs_to_enqueue_list:
-            await arq_pool.enqueue_job(name, *args, **kwargs)
             log.debug("polar.worker.job_flushed", name=name, args=args, kwargs=kwargs)
+        log.info(
+            "polar.worker.flush_enqueued_jobs",
+            count=len(_jobs_to_enqueue_list),
+            enqueued=len(enqueued_job_ids),
+            duration_ms=round(duration_ms, 2),
+        )
         _jobs_to_enqueue.set([])
 
 
@@ -293,6 +398,7 @@ def task_hooks(
 
         arq_pool = job_context["redis"]
         await flush_enqueued_jobs(arq_pool)
+        await flush_published_events(get_worker_redis(job_context))
 
         log.info("polar.worker.job_ended")
         structlog.contextvars.unbind_contextvars(
@@ -395,6 +501,7 @@ __all__ = [
     "task",
     "lifespan",
     "enqueue_job",
+    "bulk_enqueue_jobs",
     "JobContext",
     "AsyncSessionMaker",
     "ArqRedis",
@@ -0,0 +1,67 @@
+import timeit
+import uuid
+
+import typer
+from pydantic import TypeAdapter
+
+from polar.email import renderer as email_renderer_module
+from polar.kit.utils import utc_now
+from polar.models.notification import Notification
+from polar.models.pledge import PledgeType
+from polar.notifications.notification import (
+    MaintainerPledgeCreatedNotificationPayload,
+    NotificationType,
+)
+from polar.notifications.notification import Notification as NotificationSchema
+from polar.notifications.service import notifications as notifications_service
+
+cli = typer.Typer()
+
+
+def build_notification() -> Notification:
+    payload = MaintainerPledgeCreatedNotificationPayload(
+        pledger_name="pledging_org",
+        issue_url="https://github.com/testorg/testrepo/issues/123",
+        issue_title="issue title",
+        issue_number=123,
+        pledge_amount="123.45",
+        issue_org_name="testorg",
+        issue_repo_name="testrepo",
+        maintainer_has_stripe_account=False,
+        pledge_type=PledgeType.pay_directly,
+        pledge_id=None,
+    )
+    return Notification(
+        id=uuid.uuid4(),
+        created_at=utc_now(),
+        user_id=uuid.uuid4(),
+        type=NotificationType.maintainer_pledge_created,
+        payload=payload.model_dump(mode="json"),
+    )
+
+
+def render_uncached(notification: Notification) -> None:
+    # What every notification used to cost: a fresh adapter and renderer
+    adapter: TypeAdapter[NotificationSchema] = TypeAdapter(NotificationSchema)
+    payload = adapter.validate_python(notification).payload
+    email_renderer_module._email_renderers.clear()
+    payload.render()
+
+
+def render_cached(notification: Notification) -> None:
+    notifications_service.parse_payload(notification).render()
+
+
+@cli.command()
+def benchmark_notification_render(number: int = 200) -> None:
+    """Measure the cost of rendering a notification email."""
+    notification = build_notification()
+    render_cached(notification)  # Warm up caches
+
+    for name, f in (("uncached", render_uncached), ("cached", render_cached)):
+        duration = timeit.timeit(lambda: f(notification), number=number)
+        typer.echo(f"{name}: {duration / number * 1000:.3f} ms per notification")
+
+
+if __name__ == "__main__":
+    cli()
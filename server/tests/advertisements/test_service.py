@@ -1,5 +1,6 @@
 import pytest
 import pytest_asyncio
+from sqlalchemy import select
 
 from polar.advertisement.service import (
     advertisement_campaign as advertisement_campaign_service,
@@ -7,8 +8,15 @@ from polar.advertisement.service import (
 from polar.auth.models import AuthSubject
 from polar.kit.db.postgres import AsyncSession
 from polar.kit.pagination import PaginationParams
-from polar.models import Benefit, Organization, User, UserOrganization
+from polar.models import (
+    AdvertisementCampaign,
+    Benefit,
+    Organization,
+    User,
+    UserOrganization,
+)
 from polar.models.benefit import BenefitType
+from polar.redis import Redis
 from tests.fixtures.database import SaveFixture
 from tests.fixtures.random_objects import (
     create_advertisement_campaign,
@@ -97,12 +105,51 @@ class TestList:
 @pytest.mark.skip_db_asserts
 class TestTrackView:
     async def test_valid(
-        self, save_fixture: SaveFixture, session: AsyncSession, user: User
+        self,
+        save_fixture: SaveFixture,
+        session: AsyncSession,
+        redis: Redis,
+        user: User,
     ) -> None:
         campaign = await create_advertisement_campaign(save_fixture, user=user)
         assert campaign.views == 0
 
-        updated_campaign = await advertisement_campaign_service.track_view(
-            session, campaign
+        await advertisement_campaign_service.track_view(redis, campaign)
+        await advertisement_campaign_service.track_view(redis, campaign)
+
+        flushed = await advertisement_campaign_service.flush_views(session, redis)
+        assert flushed == 1
+
+        views = await session.scalar(
+            select(AdvertisementCampaign.views).where(
+                AdvertisementCampaign.id == campaign.id
+            )
+        )
+        assert views == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+class TestGetViews:
+    async def test_pending(
+        self,
+        save_fixture: SaveFixture,
+        session: AsyncSession,
+        redis: Redis,
+        user: User,
+    ) -> None:
+        campaign = await create_advertisement_campaign(save_fixture, user=user)
+        other_campaign = await create_advertisement_campaign(save_fixture, user=user)
+
+        await advertisement_campaign_service.track_view(redis, campaign)
+        await advertisement_campaign_service.flush_views(session, redis)
+        await advertisement_campaign_service.track_view(redis, campaign)
+
+        flushed_campaign = await session.get(AdvertisementCampaign, campaign.id)
+        assert flushed_campaign is not None
+        assert flushed_campaign.views == 1
+
+        views = await advertisement_campaign_service.get_views(
+            redis, [flushed_campaign, other_campaign]
         )
-        assert updated_campaign.views == 1
+        assert views == {campaign.id: 2, other_campaign.id: 0}
@@ -0,0 +1,149 @@
+import contextlib
+import io
+import zipfile
+from collections.abc import AsyncIterator
+from typing import cast
+
+import httpx
+import pytest
+import respx
+from sqlalchemy import true
+
+from polar.article.export import export_articles
+from polar.kit.db.postgres import AsyncSessionMaker
+from polar.kit.utils import utc_now
+from polar.models import Article, Organization, User
+from polar.models.article import ArticleVisibility
+from polar.postgres import AsyncSession, sql
+from tests.fixtures.database import SaveFixture
+
+from .test_service import create_article
+
+
+@pytest.mark.asyncio
+async def test_export_articles(
+    respx_mock: respx.MockRouter,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    user: User,
+    organization: Organization,
+) -> None:
+    articles: list[Article] = []
+    for i in range(3):
+        article = await create_article(
+            save_fixture,
+            user=user,
+            organization=organization,
+            visibility=ArticleVisibility.public,
+            paid_subscribers_only=False,
+            published_at=utc_now(),
+        )
+        article.og_image_url = f"https://example.com/images/og-{i}.png"
+        article.body = (
+            "Hello\n\n"
+            f"![](https://7vk6rcnylug0u6hg.public.blob.vercel-storage.com/body-{i}.png)"
+        )
+        await save_fixture(article)
+        articles.append(article)
+
+    respx_mock.get(url__regex=r"https://example\.com/images/.*").mock(
+        return_value=httpx.Response(200, content=b"OG" * 10_000)
+    )
+    respx_mock.get(url__regex=r".*\.vercel-storage\.com/.*").mock(
+        return_value=httpx.Response(200, content=b"BODY")
+    )
+
+    @contextlib.asynccontextmanager
+    async def sessionmaker() -> AsyncIterator[AsyncSession]:
+        yield session
+
+    # then
+    session.expunge_all()
+
+    statement = (
+        sql.select(Article)
+        .add_columns(true())
+        .where(Article.organization_id == organization.id)
+    )
+    chunks = [
+        chunk
+        async for chunk in export_articles(
+            cast(AsyncSessionMaker, sessionmaker), statement
+        )
+    ]
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    for i, article in enumerate(articles):
+        folder = f"articles/{article.slug}"
+        assert archive.read(f"{folder}/og-{i}.png") == b"OG" * 10_000
+        assert archive.read(f"{folder}/body-{i}.png") == b"BODY"
+        content = archive.read(f"{folder}/{article.slug}.md").decode()
+        assert f"og_image_url: ./og-{i}.png" in content
+        assert f"![](./body-{i}.png" in content
+
+
+class _FailingStream(httpx.AsyncByteStream):
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield b"PART"
+        raise httpx.ReadError("Connection lost")
+
+
+@pytest.mark.asyncio
+async def test_export_articles_failed_assets(
+    respx_mock: respx.MockRouter,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    user: User,
+    organization: Organization,
+) -> None:
+    article = await create_article(
+        save_fixture,
+        user=user,
+        organization=organization,
+        visibility=ArticleVisibility.public,
+        paid_subscribers_only=False,
+        published_at=utc_now(),
+    )
+    article.og_image_url = "https://example.com/images/og.png"
+    article.body = (
+        "Hello\n\n"
+        "![](https://7vk6rcnylug0u6hg.public.blob.vercel-storage.com/body.png)"
+    )
+    await save_fixture(article)
+
+    respx_mock.get("https://example.com/images/og.png").mock(
+        return_value=httpx.Response(404)
+    )
+    respx_mock.get(url__regex=r".*\.vercel-storage\.com/.*").mock(
+        return_value=httpx.Response(200, stream=_FailingStream())
+    )
+
+    @contextlib.asynccontextmanager
+    async def sessionmaker() -> AsyncIterator[AsyncSession]:
+        yield session
+
+    # then
+    session.expunge_all()
+
+    statement = (
+        sql.select(Article)
+        .add_columns(true())
+        .where(Article.organization_id == organization.id)
+    )
+    chunks = [
+        chunk
+        async for chunk in export_articles(
+            cast(AsyncSessionMaker, sessionmaker), statement
+        )
+    ]
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    folder = f"articles/{article.slug}"
+    names = archive.namelist()
+    assert f"{folder}/og.png" not in names
+    assert b"og.png" in archive.read(f"{folder}/og.png.error.txt")
+    assert archive.read(f"{folder}/body.png") == b"PART"
+    assert b"body.png" in archive.read(f"{folder}/body.png.error.txt")
+    assert f"{folder}/{article.slug}.md" in names
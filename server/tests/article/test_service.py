@@ -6,6 +6,7 @@ from datetime import datetime
 
 import pytest
 import pytest_asyncio
+from pytest_mock import MockerFixture
 
 from polar.article.service import article_service
 from polar.auth.models import Anonymous, AuthSubject, Subject
@@ -611,3 +612,50 @@ class TestListReceivers:
         receivers = await article_service.list_receivers(session, organization.id, True)
         assert len(receivers) == 1
         assert receivers[0] == (user.id, True, True)
+
+
+@pytest.mark.asyncio
+class TestEnqueueSend:
+    async def test_chunks(
+        self,
+        mocker: MockerFixture,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        user: User,
+        organization: Organization,
+    ) -> None:
+        mocker.patch("polar.article.service.SEND_CHUNK_SIZE", 2)
+        enqueue_job_mock = mocker.patch("polar.article.service.enqueue_job")
+
+        subscribers = [await create_user(save_fixture) for _ in range(3)]
+        for subscriber in subscribers:
+            await create_articles_subscription(
+                save_fixture,
+                user=subscriber,
+                organization=organization,
+                paid_subscriber=False,
+            )
+        article = await create_article(
+            save_fixture,
+            user=user,
+            organization=organization,
+            visibility=ArticleVisibility.public,
+            paid_subscribers_only=False,
+            published_at=utc_now(),
+        )
+
+        # then
+        session.expunge_all()
+
+        article = await article_service.enqueue_send(session, article)
+
+        assert article.email_sent_to_count == 3
+        assert enqueue_job_mock.call_count == 2
+        receivers = [
+            receiver
+            for call in enqueue_job_mock.call_args_list
+            for receiver in call.kwargs["receivers"]
+        ]
+        assert sorted(receivers) == sorted(
+            (subscriber.id, False, False) for subscriber in subscribers
+        )
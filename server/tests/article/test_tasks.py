@@ -0,0 +1,86 @@
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+import respx
+from pytest_mock import MockerFixture
+
+from polar.article.tasks import UNSUBSCRIBE_ID_PLACEHOLDER, articles_send_to_users
+from polar.config import settings
+from polar.email.sender import Email
+from polar.kit.utils import utc_now
+from polar.models import Organization, User
+from polar.models.article import ArticleVisibility
+from polar.postgres import AsyncSession
+from polar.worker import JobContext, PolarWorkerContext
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.random_objects import create_user
+
+from .test_service import create_article, create_articles_subscription
+
+
+@pytest.mark.asyncio
+async def test_articles_send_to_users(
+    mocker: MockerFixture,
+    respx_mock: respx.MockRouter,
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    user: User,
+    organization: Organization,
+) -> None:
+    article = await create_article(
+        save_fixture,
+        user=user,
+        organization=organization,
+        visibility=ArticleVisibility.public,
+        paid_subscribers_only=False,
+        published_at=utc_now(),
+    )
+    receivers = [await create_user(save_fixture) for _ in range(3)]
+    subscriptions = [
+        await create_articles_subscription(
+            save_fixture,
+            user=receiver,
+            organization=organization,
+            paid_subscriber=False,
+        )
+        for receiver in receivers
+    ]
+
+    render_route = respx_mock.post(
+        f"{settings.FRONTEND_BASE_URL}/email/article/{article.id}"
+    ).mock(
+        return_value=httpx.Response(
+            200, text=f"<a href='?id={UNSUBSCRIBE_ID_PLACEHOLDER}'>Unsubscribe</a>"
+        )
+    )
+    email_sender_mock = AsyncMock()
+    mocker.patch("polar.article.tasks.get_email_sender", return_value=email_sender_mock)
+
+    # then
+    session.expunge_all()
+
+    for chunk in (receivers[:2], receivers[2:]):
+        await articles_send_to_users(
+            job_context,
+            article.id,
+            [(receiver.id, False, False) for receiver in chunk],
+            polar_worker_context,
+        )
+
+    # Rendered once, then shared between chunks
+    assert render_route.call_count == 1
+
+    emails: list[Email] = [
+        email
+        for call in email_sender_mock.send_many.call_args_list
+        for email in call.args[0]
+    ]
+    assert len(emails) == 3
+    for receiver, subscription in zip(receivers, subscriptions):
+        email = next(e for e in emails if e.to_email_addr == receiver.email)
+        assert str(subscription.id) in email.html_content
+        assert UNSUBSCRIBE_ID_PLACEHOLDER not in email.html_content
+        assert str(subscription.id) in email.email_headers["List-Unsubscribe"]
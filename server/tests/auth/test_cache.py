@@ -0,0 +1,154 @@
+import asyncio
+import json
+import uuid
+from collections.abc import AsyncIterator
+
+import pytest
+import pytest_asyncio
+from pytest_mock import MockerFixture
+
+from polar.auth.cache import INVALIDATION_CHANNEL, AuthSubjectCache
+from polar.auth.dependencies import _get_token_auth_subject
+from polar.auth.models import AuthMethod
+from polar.auth.scope import Scope
+from polar.config import settings
+from polar.eventstream.multiplexer import EventStreamMultiplexer
+from polar.eventstream.service import _events_to_publish
+from polar.exceptions import NotPermitted
+from polar.kit.crypto import get_token_hash
+from polar.kit.utils import utc_now
+from polar.models import User
+from polar.postgres import AsyncSession
+from polar.redis import Redis
+from tests.fixtures.database import SaveFixture
+
+
+def build_user(**kwargs: object) -> User:
+    return User(id=uuid.uuid4(), username="user", email="user@example.com", **kwargs)
+
+
+@pytest_asyncio.fixture
+async def listening_cache(
+    redis: Redis,
+) -> AsyncIterator[AuthSubjectCache]:
+    cache = AuthSubjectCache(max_size=2, ttl=60)
+    multiplexer = EventStreamMultiplexer(redis)
+    listener = asyncio.create_task(cache.listen(multiplexer))
+    await asyncio.sleep(0.05)
+    yield cache
+    listener.cancel()
+    await multiplexer.close()
+
+
+def set_entry(
+    cache: AuthSubjectCache, token_hash: str, user: User, expires_at: float = 2**32
+) -> None:
+    cache.set(
+        token_hash,
+        subject=user,
+        scopes={Scope.web_default},
+        method=AuthMethod.PERSONAL_ACCESS_TOKEN,
+        expires_at=expires_at,
+    )
+
+
+@pytest.mark.asyncio
+class TestAuthSubjectCache:
+    async def test_not_listening(self) -> None:
+        cache = AuthSubjectCache(max_size=2, ttl=60)
+        set_entry(cache, "a", build_user())
+        assert cache.get("a") is None
+
+    async def test_get_set(self, listening_cache: AuthSubjectCache) -> None:
+        user = build_user()
+        set_entry(listening_cache, "a", user)
+
+        entry = listening_cache.get("a")
+        assert entry is not None
+        assert entry.subject_type is User
+        assert entry.subject_id == user.id
+        assert entry.scopes == {Scope.web_default}
+
+    async def test_expired(self, listening_cache: AuthSubjectCache) -> None:
+        set_entry(listening_cache, "a", build_user(), expires_at=0)
+        assert listening_cache.get("a") is None
+
+    async def test_lru(self, listening_cache: AuthSubjectCache) -> None:
+        set_entry(listening_cache, "a", build_user())
+        set_entry(listening_cache, "b", build_user())
+        assert listening_cache.get("a") is not None
+        set_entry(listening_cache, "c", build_user())
+
+        assert listening_cache.get("a") is not None
+        assert listening_cache.get("b") is None
+        assert listening_cache.get("c") is not None
+
+    async def test_invalidate(self, listening_cache: AuthSubjectCache) -> None:
+        _events_to_publish.set([])
+        set_entry(listening_cache, "a", build_user())
+
+        listening_cache.invalidate("a")
+
+        assert listening_cache.get("a") is None
+        assert _events_to_publish.get() == [
+            (json.dumps({"token_hashes": ["a"]}), [INVALIDATION_CHANNEL])
+        ]
+        _events_to_publish.set([])
+
+    async def test_remote_invalidation(
+        self, redis: Redis, listening_cache: AuthSubjectCache
+    ) -> None:
+        set_entry(listening_cache, "a", build_user())
+        set_entry(listening_cache, "b", build_user())
+
+        await redis.publish(INVALIDATION_CHANNEL, json.dumps({"token_hashes": ["a"]}))
+        await asyncio.sleep(0.05)
+
+        assert listening_cache.get("a") is None
+        assert listening_cache.get("b") is not None
+
+
+@pytest.mark.asyncio
+class TestGetTokenAuthSubject:
+    async def test_cached(
+        self,
+        mocker: MockerFixture,
+        session: AsyncSession,
+        listening_cache: AuthSubjectCache,
+        user: User,
+    ) -> None:
+        mocker.patch("polar.auth.dependencies.auth_subject_cache", listening_cache)
+        set_entry(
+            listening_cache, get_token_hash("TOKEN", secret=settings.SECRET), user
+        )
+
+        # then
+        session.expunge_all()
+
+        auth_subject = await _get_token_auth_subject(session, "TOKEN")
+
+        assert auth_subject is not None
+        assert auth_subject.subject.id == user.id
+        assert auth_subject.scopes == {Scope.web_default}
+
+    async def test_cached_blocked(
+        self,
+        mocker: MockerFixture,
+        save_fixture: SaveFixture,
+        session: AsyncSession,
+        listening_cache: AuthSubjectCache,
+        user: User,
+    ) -> None:
+        mocker.patch("polar.auth.dependencies.auth_subject_cache", listening_cache)
+        set_entry(
+            listening_cache, get_token_hash("TOKEN", secret=settings.SECRET), user
+        )
+
+        user.blocked_at = utc_now()
+        await save_fixture(user)
+
+        # then
+        session.expunge_all()
+
+        with pytest.raises(NotPermitted):
+            await _get_token_auth_subject(session, "TOKEN")
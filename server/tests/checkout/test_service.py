@@ -44,6 +44,7 @@ from polar.models.product_price import (
     ProductPriceType,
 )
 from polar.postgres import AsyncSession
+from polar.redis import Redis
 from tests.fixtures.auth import AuthSubjectFixture
 from tests.fixtures.database import SaveFixture
 from tests.fixtures.random_objects import (
@@ -133,11 +134,12 @@ async def checkout_confirmed_recurring(
 class TestCreate:
     @pytest.mark.auth
     async def test_not_existing_price(
-        self, session: AsyncSession, auth_subject: AuthSubject[User]
+        self, session: AsyncSession, redis: Redis, auth_subject: AuthSubject[User]
     ) -> None:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.create(
                 session,
+                redis,
                 CheckoutCreate(
                     payment_processor=PaymentProcessor.stripe,
                     product_price_id=uuid.uuid4(),
@@ -152,12 +154,14 @@ class TestCreate:
     async def test_not_writable_price(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         product_one_time: Product,
     ) -> None:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.create(
                 session,
+                redis,
                 CheckoutCreate(
                     payment_processor=PaymentProcessor.stripe,
                     product_price_id=product_one_time.prices[0].id,
@@ -173,6 +177,7 @@ class TestCreate:
         self,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         user_organization: UserOrganization,
         product_one_time: Product,
@@ -186,6 +191,7 @@ class TestCreate:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.create(
                 session,
+                redis,
                 CheckoutCreate(
                     payment_processor=PaymentProcessor.stripe, product_price_id=price.id
                 ),
@@ -200,6 +206,7 @@ class TestCreate:
         self,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         user_organization: UserOrganization,
         product_one_time: Product,
@@ -209,6 +216,7 @@ class TestCreate:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.create(
                 session,
+                redis,
                 CheckoutCreate(
                     payment_processor=PaymentProcessor.stripe,
                     product_price_id=product_one_time.prices[0].id,
@@ -226,6 +234,7 @@ class TestCreate:
         amount: int,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         user_organization: UserOrganization,
         product_one_time_custom_price: Product,
@@ -239,6 +248,7 @@ class TestCreate:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.create(
                 session,
+                redis,
                 CheckoutCreate(
                     payment_processor=PaymentProcessor.stripe,
                     product_price_id=product_one_time_custom_price.prices[0].id,
@@ -262,6 +272,7 @@ class TestCreate:
         self,
         payload: dict[str, Any],
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         user_organization: UserOrganization,
         product_one_time: Product,
@@ -272,6 +283,7 @@ class TestCreate:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.create(
                 session,
+                redis,
                 CheckoutCreate.model_validate(
                     {
                         "payment_processor": PaymentProcessor.stripe,
@@ -291,6 +303,7 @@ class TestCreate:
         self,
         amount: int | None,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         user_organization: UserOrganization,
         product_one_time: Product,
@@ -299,6 +312,7 @@ class TestCreate:
         assert isinstance(price, ProductPriceFixed)
         checkout = await checkout_service.create(
             session,
+            redis,
             CheckoutCreate(
                 payment_processor=PaymentProcessor.stripe,
                 product_price_id=price.id,
@@ -323,6 +337,7 @@ class TestCreate:
         self,
         amount: int | None,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         user_organization: UserOrganization,
         product_one_time_free_price: Product,
@@ -331,6 +346,7 @@ class TestCreate:
         assert isinstance(price, ProductPriceFree)
         checkout = await checkout_service.create(
             session,
+            redis,
             CheckoutCreate(
                 payment_processor=PaymentProcessor.stripe,
                 product_price_id=price.id,
@@ -356,6 +372,7 @@ class TestCreate:
         amount: int | None,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         user_organization: UserOrganization,
         product_one_time_custom_price: Product,
@@ -366,6 +383,7 @@ class TestCreate:
 
         checkout = await checkout_service.create(
             session,
+            redis,
             CheckoutCreate(
                 payment_processor=PaymentProcessor.stripe,
                 product_price_id=price.id,
@@ -391,6 +409,7 @@ class TestCreate:
     async def test_valid_tax_id(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         user_organization: UserOrganization,
         product_one_time: Product,
@@ -399,6 +418,7 @@ class TestCreate:
         assert isinstance(price, ProductPriceFixed)
         checkout = await checkout_service.create(
             session,
+            redis,
             CheckoutCreate(
                 payment_processor=PaymentProcessor.stripe,
                 product_price_id=price.id,
@@ -415,6 +435,7 @@ class TestCreate:
     async def test_valid_success_url_with_interpolation(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User],
         user_organization: UserOrganization,
         product_one_time: Product,
@@ -423,6 +444,7 @@ class TestCreate:
         assert isinstance(price, ProductPriceFixed)
         checkout = await checkout_service.create(
             session,
+            redis,
             CheckoutCreate(
                 payment_processor=PaymentProcessor.stripe,
                 product_price_id=price.id,
@@ -442,6 +464,7 @@ class TestCreate:
     async def test_valid_success_url_with_invalid_interpolation_variable(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User],
         user_organization: UserOrganization,
         product_one_time: Product,
@@ -450,6 +473,7 @@ class TestCreate:
         assert isinstance(price, ProductPriceFixed)
         checkout = await checkout_service.create(
             session,
+            redis,
             CheckoutCreate(
                 payment_processor=PaymentProcessor.stripe,
                 product_price_id=price.id,
@@ -468,6 +492,7 @@ class TestCreate:
     async def test_silent_calculate_tax_error(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         calculate_tax_mock: AsyncMock,
         user_organization: UserOrganization,
@@ -482,6 +507,7 @@ class TestCreate:
 
         checkout = await checkout_service.create(
             session,
+            redis,
             CheckoutCreate(
                 payment_processor=PaymentProcessor.stripe,
                 product_price_id=price.id,
@@ -497,6 +523,7 @@ class TestCreate:
     async def test_valid_calculate_tax(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User | Organization],
         calculate_tax_mock: AsyncMock,
         user_organization: UserOrganization,
@@ -509,6 +536,7 @@ class TestCreate:
 
         checkout = await checkout_service.create(
             session,
+            redis,
             CheckoutCreate(
                 payment_processor=PaymentProcessor.stripe,
                 product_price_id=price.id,
@@ -526,11 +554,12 @@ class TestCreate:
 @pytest.mark.skip_db_asserts
 class TestClientCreate:
     async def test_not_existing_price(
-        self, session: AsyncSession, auth_subject: AuthSubject[Anonymous]
+        self, session: AsyncSession, redis: Redis, auth_subject: AuthSubject[Anonymous]
     ) -> None:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.client_create(
                 session,
+                redis,
                 CheckoutCreatePublic(
                     product_price_id=uuid.uuid4(),
                 ),
@@ -541,6 +570,7 @@ class TestClientCreate:
         self,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[Anonymous],
         product_one_time: Product,
     ) -> None:
@@ -553,6 +583,7 @@ class TestClientCreate:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.client_create(
                 session,
+                redis,
                 CheckoutCreatePublic(product_price_id=price.id),
                 auth_subject,
             )
@@ -561,6 +592,7 @@ class TestClientCreate:
         self,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[Anonymous],
         product_one_time: Product,
     ) -> None:
@@ -569,6 +601,7 @@ class TestClientCreate:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.client_create(
                 session,
+                redis,
                 CheckoutCreatePublic(
                     product_price_id=product_one_time.prices[0].id,
                 ),
@@ -578,6 +611,7 @@ class TestClientCreate:
     async def test_valid_fixed_price(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[Anonymous],
         product_one_time: Product,
     ) -> None:
@@ -585,6 +619,7 @@ class TestClientCreate:
         assert isinstance(price, ProductPriceFixed)
         checkout = await checkout_service.client_create(
             session,
+            redis,
             CheckoutCreatePublic(product_price_id=price.id),
             auth_subject,
         )
@@ -597,6 +632,7 @@ class TestClientCreate:
     async def test_valid_free_price(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[Anonymous],
         product_one_time_free_price: Product,
     ) -> None:
@@ -604,6 +640,7 @@ class TestClientCreate:
         assert isinstance(price, ProductPriceFree)
         checkout = await checkout_service.client_create(
             session,
+            redis,
             CheckoutCreatePublic(product_price_id=price.id),
             auth_subject,
         )
@@ -616,6 +653,7 @@ class TestClientCreate:
     async def test_valid_custom_price(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[Anonymous],
         product_one_time_custom_price: Product,
     ) -> None:
@@ -625,6 +663,7 @@ class TestClientCreate:
 
         checkout = await checkout_service.client_create(
             session,
+            redis,
             CheckoutCreatePublic(product_price_id=price.id),
             auth_subject,
         )
@@ -641,6 +680,7 @@ class TestClientCreate:
     async def test_valid_direct_user(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User],
         product_one_time: Product,
     ) -> None:
@@ -648,6 +688,7 @@ class TestClientCreate:
         assert isinstance(price, ProductPriceFixed)
         checkout = await checkout_service.client_create(
             session,
+            redis,
             CheckoutCreatePublic(product_price_id=price.id),
             auth_subject,
         )
@@ -660,6 +701,7 @@ class TestClientCreate:
     async def test_valid_indirect_user(
         self,
         session: AsyncSession,
+        redis: Redis,
         auth_subject: AuthSubject[User],
         product_one_time: Product,
     ) -> None:
@@ -667,6 +709,7 @@ class TestClientCreate:
         assert isinstance(price, ProductPriceFixed)
         checkout = await checkout_service.client_create(
             session,
+            redis,
             CheckoutCreatePublic(product_price_id=price.id),
             auth_subject,
         )
@@ -681,6 +724,7 @@ class TestCheckoutLinkCreate:
         self,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         product_one_time: Product,
     ) -> None:
         price = await create_product_price_fixed(
@@ -691,12 +735,13 @@ class TestCheckoutLinkCreate:
         )
         checkout_link = await create_checkout_link(save_fixture, price=price)
         with pytest.raises(PolarRequestValidationError):
-            await checkout_service.checkout_link_create(session, checkout_link)
+            await checkout_service.checkout_link_create(session, redis, checkout_link)
 
     async def test_archived_product(
         self,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         product_one_time: Product,
     ) -> None:
         product_one_time.is_archived = True
@@ -705,12 +750,13 @@ class TestCheckoutLinkCreate:
             save_fixture, price=product_one_time.prices[0]
         )
         with pytest.raises(PolarRequestValidationError):
-            await checkout_service.checkout_link_create(session, checkout_link)
+            await checkout_service.checkout_link_create(session, redis, checkout_link)
 
     async def test_valid(
         self,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         product_one_time: Product,
     ) -> None:
         price = product_one_time.prices[0]
@@ -720,7 +766,9 @@ class TestCheckoutLinkCreate:
             success_url="https://example.com/success",
             user_metadata={"key": "value"},
         )
-        checkout = await checkout_service.checkout_link_create(session, checkout_link)
+        checkout = await checkout_service.checkout_link_create(
+            session, redis, checkout_link
+        )
 
         assert checkout.product_price == price
         assert checkout.product == product_one_time
@@ -734,11 +782,13 @@ class TestUpdate:
     async def test_not_existing_price(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_fixed: Checkout,
     ) -> None:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.update(
                 session,
+                redis,
                 checkout_one_time_fixed,
                 CheckoutUpdate(
                     product_price_id=uuid.uuid4(),
@@ -749,6 +799,7 @@ class TestUpdate:
         self,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         product_one_time: Product,
         checkout_one_time_fixed: Checkout,
     ) -> None:
@@ -761,6 +812,7 @@ class TestUpdate:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.update(
                 session,
+                redis,
                 checkout_one_time_fixed,
                 CheckoutUpdate(
                     product_price_id=price.id,
@@ -770,12 +822,14 @@ class TestUpdate:
     async def test_price_from_different_product(
         self,
         session: AsyncSession,
+        redis: Redis,
         product_one_time_custom_price: Product,
         checkout_one_time_fixed: Checkout,
     ) -> None:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.update(
                 session,
+                redis,
                 checkout_one_time_fixed,
                 CheckoutUpdate(
                     product_price_id=product_one_time_custom_price.prices[0].id,
@@ -788,6 +842,7 @@ class TestUpdate:
         amount: int,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_custom: Checkout,
     ) -> None:
         price = checkout_one_time_custom.product.prices[0]
@@ -799,6 +854,7 @@ class TestUpdate:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.update(
                 session,
+                redis,
                 checkout_one_time_custom,
                 CheckoutUpdate(
                     amount=amount,
@@ -808,11 +864,13 @@ class TestUpdate:
     async def test_not_open(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_confirmed_one_time: Checkout,
     ) -> None:
         with pytest.raises(NotOpenCheckout):
             await checkout_service.update(
                 session,
+                redis,
                 checkout_confirmed_one_time,
                 CheckoutUpdate(
                     customer_email="customer@example.com",
@@ -845,6 +903,7 @@ class TestUpdate:
         updated_values: dict[str, Any],
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         checkout_recurring_fixed: Checkout,
     ) -> None:
         for key, value in initial_values.items():
@@ -854,6 +913,7 @@ class TestUpdate:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.update(
                 session,
+                redis,
                 checkout_recurring_fixed,
                 CheckoutUpdate.model_validate(updated_values),
             )
@@ -862,6 +922,7 @@ class TestUpdate:
         self,
         save_fixture: SaveFixture,
         session: AsyncSession,
+        redis: Redis,
         product: Product,
         checkout_recurring_fixed: Checkout,
     ) -> None:
@@ -870,6 +931,7 @@ class TestUpdate:
         )
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_recurring_fixed,
             CheckoutUpdate(
                 product_price_id=new_price.id,
@@ -884,10 +946,12 @@ class TestUpdate:
     async def test_valid_fixed_price_amount_update(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_fixed: Checkout,
     ) -> None:
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_one_time_fixed,
             CheckoutUpdate(
                 amount=4242,
@@ -901,10 +965,12 @@ class TestUpdate:
     async def test_valid_custom_price_amount_update(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_custom: Checkout,
     ) -> None:
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_one_time_custom,
             CheckoutUpdate(
                 amount=4242,
@@ -915,10 +981,12 @@ class TestUpdate:
     async def test_valid_free_price_amount_update(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_free: Checkout,
     ) -> None:
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_one_time_free,
             CheckoutUpdate(
                 amount=4242,
@@ -932,10 +1000,12 @@ class TestUpdate:
     async def test_valid_tax_id(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_custom: Checkout,
     ) -> None:
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_one_time_custom,
             CheckoutUpdate(
                 customer_billing_address=Address.model_validate({"country": "FR"}),
@@ -949,6 +1019,7 @@ class TestUpdate:
     async def test_valid_unset_tax_id(
         self,
         session: AsyncSession,
+        redis: Redis,
         save_fixture: SaveFixture,
         checkout_one_time_custom: Checkout,
     ) -> None:
@@ -957,6 +1028,7 @@ class TestUpdate:
 
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_one_time_custom,
             CheckoutUpdate(
                 customer_billing_address=Address.model_validate({"country": "US"}),
@@ -972,6 +1044,7 @@ class TestUpdate:
     async def test_silent_calculate_tax_error(
         self,
         session: AsyncSession,
+        redis: Redis,
         calculate_tax_mock: AsyncMock,
         checkout_one_time_fixed: Checkout,
     ) -> None:
@@ -981,6 +1054,7 @@ class TestUpdate:
 
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_one_time_fixed,
             CheckoutUpdate(
                 customer_billing_address=Address.model_validate({"country": "US"}),
@@ -994,6 +1068,7 @@ class TestUpdate:
     async def test_valid_calculate_tax(
         self,
         session: AsyncSession,
+        redis: Redis,
         calculate_tax_mock: AsyncMock,
         checkout_one_time_fixed: Checkout,
     ) -> None:
@@ -1001,6 +1076,7 @@ class TestUpdate:
 
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_one_time_fixed,
             CheckoutUpdate(
                 customer_billing_address=Address.model_validate({"country": "FR"}),
@@ -1014,6 +1090,7 @@ class TestUpdate:
     async def test_ignore_email_update_if_customer_set(
         self,
         session: AsyncSession,
+        redis: Redis,
         save_fixture: SaveFixture,
         user: User,
         checkout_one_time_fixed: Checkout,
@@ -1024,6 +1101,7 @@ class TestUpdate:
 
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_one_time_fixed,
             CheckoutUpdate(customer_email="updatedemail@example.com"),
         )
@@ -1033,10 +1111,12 @@ class TestUpdate:
     async def test_valid_metadata(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_free: Checkout,
     ) -> None:
         checkout = await checkout_service.update(
             session,
+            redis,
             checkout_one_time_free,
             CheckoutUpdate(
                 metadata={"key": "value"},
@@ -1052,11 +1132,13 @@ class TestConfirm:
     async def test_missing_amount_on_custom_price(
         self,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_custom: Checkout,
     ) -> None:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.confirm(
                 session,
+                redis,
                 checkout_one_time_custom,
                 CheckoutConfirmStripe.model_validate(
                     {
@@ -1080,21 +1162,24 @@ class TestConfirm:
         self,
         payload: dict[str, str],
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_fixed: Checkout,
     ) -> None:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.confirm(
                 session,
+                redis,
                 checkout_one_time_fixed,
                 CheckoutConfirmStripe.model_validate(payload),
             )
 
     async def test_not_open(
-        self, session: AsyncSession, checkout_confirmed_one_time: Checkout
+        self, session: AsyncSession, redis: Redis, checkout_confirmed_one_time: Checkout
     ) -> None:
         with pytest.raises(NotOpenCheckout):
             await checkout_service.confirm(
                 session,
+                redis,
                 checkout_confirmed_one_time,
                 CheckoutConfirmStripe.model_validate(
                     {"confirmation_token_id": "CONFIRMATION_TOKEN_ID"}
@@ -1105,6 +1190,7 @@ class TestConfirm:
         self,
         calculate_tax_mock: AsyncMock,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_fixed: Checkout,
     ) -> None:
         calculate_tax_mock.side_effect = IncompleteTaxLocation(
@@ -1114,6 +1200,7 @@ class TestConfirm:
         with pytest.raises(PolarRequestValidationError):
             await checkout_service.confirm(
                 session,
+                redis,
                 checkout_one_time_fixed,
                 CheckoutConfirmStripe.model_validate(
                     {
@@ -1141,6 +1228,7 @@ class TestConfirm:
         expected_tax_metadata: dict[str, str],
         stripe_service_mock: MagicMock,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_fixed: Checkout,
     ) -> None:
         stripe_service_mock.create_customer.return_value = SimpleNamespace(
@@ -1151,6 +1239,7 @@ class TestConfirm:
         )
         checkout = await checkout_service.confirm(
             session,
+            redis,
             checkout_one_time_fixed,
             CheckoutConfirmStripe.model_validate(
                 {
@@ -1183,6 +1272,7 @@ class TestConfirm:
         stripe_service_mock: MagicMock,
         mocker: MockerFixture,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_free: Checkout,
     ) -> None:
         enqueue_job_mock = mocker.patch("polar.checkout.service.enqueue_job")
@@ -1193,6 +1283,7 @@ class TestConfirm:
 
         checkout = await checkout_service.confirm(
             session,
+            redis,
             checkout_one_time_free,
             CheckoutConfirmStripe.model_validate(
                 {
@@ -1219,6 +1310,7 @@ class TestConfirm:
         save_fixture: SaveFixture,
         stripe_service_mock: MagicMock,
         session: AsyncSession,
+        redis: Redis,
         checkout_one_time_fixed: Checkout,
     ) -> None:
         user = await create_user(save_fixture, stripe_customer_id="STRIPE_CUSTOMER_ID")
@@ -1232,6 +1324,7 @@ class TestConfirm:
 
         checkout = await checkout_service.confirm(
             session,
+            redis,
             checkout_one_time_fixed,
             CheckoutConfirmStripe.model_validate(
                 {
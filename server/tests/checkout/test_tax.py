@@ -1,7 +1,24 @@
+from collections.abc import Iterator
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
 import pytest
+import stripe as stripe_lib
 from pydantic_extra_types.country import CountryAlpha2
+from pytest_mock import MockerFixture
 
-from polar.checkout.tax import TaxID, TaxIDFormat, validate_tax_id
+from polar.checkout.tax import (
+    IncompleteTaxLocation,
+    InvalidTaxLocation,
+    TaxCalculationCache,
+    TaxID,
+    TaxIDFormat,
+    calculate_tax,
+    tax_calculation_cache,
+    validate_tax_id,
+)
+from polar.kit.address import Address
+from polar.redis import Redis
 
 
 @pytest.mark.parametrize(
@@ -42,3 +59,128 @@ def test_validate_tax_id_valid(
 def test_validate_tax_id_invalid(number: str, country: CountryAlpha2) -> None:
     with pytest.raises(ValueError):
         validate_tax_id(number, country)
+
+
+@pytest.fixture(autouse=True)
+def clear_tax_calculation_cache() -> Iterator[None]:
+    yield
+    tax_calculation_cache.clear()
+
+
+@pytest.fixture
+def create_tax_calculation_mock(mocker: MockerFixture) -> AsyncMock:
+    return mocker.patch(
+        "polar.checkout.tax.stripe_service.create_tax_calculation",
+        new_callable=AsyncMock,
+        return_value=SimpleNamespace(tax_amount_exclusive=200),
+    )
+
+
+ADDRESS = Address(country="FR")  # type: ignore
+
+
+@pytest.mark.asyncio
+class TestCalculateTax:
+    async def test_local_cache(
+        self, redis: Redis, create_tax_calculation_mock: AsyncMock
+    ) -> None:
+        for _ in range(2):
+            tax_amount = await calculate_tax(redis, "usd", 1000, "PRODUCT", ADDRESS, [])
+            assert tax_amount == 200
+
+        create_tax_calculation_mock.assert_awaited_once()
+        assert tax_calculation_cache.stats == {"miss": 1, "local": 1}
+
+    async def test_redis_cache(
+        self, redis: Redis, create_tax_calculation_mock: AsyncMock
+    ) -> None:
+        await calculate_tax(redis, "usd", 1000, "PRODUCT", ADDRESS, [])
+        # Simulate another process, with an empty local cache
+        tax_calculation_cache._local.clear()
+
+        tax_amount = await calculate_tax(redis, "usd", 1000, "PRODUCT", ADDRESS, [])
+        assert tax_amount == 200
+
+        create_tax_calculation_mock.assert_awaited_once()
+        assert tax_calculation_cache.stats == {"miss": 1, "redis": 1}
+
+    async def test_different_inputs(
+        self, redis: Redis, create_tax_calculation_mock: AsyncMock
+    ) -> None:
+        await calculate_tax(redis, "usd", 1000, "PRODUCT", ADDRESS, [])
+        await calculate_tax(redis, "usd", 2000, "PRODUCT", ADDRESS, [])
+
+        assert create_tax_calculation_mock.await_count == 2
+
+    async def test_incomplete_tax_location(
+        self, redis: Redis, create_tax_calculation_mock: AsyncMock
+    ) -> None:
+        create_tax_calculation_mock.side_effect = stripe_lib.InvalidRequestError(
+            "Missing postal code",
+            "customer_details[address][postal_code]",
+            json_body={
+                "error": {
+                    "message": "Missing postal code",
+                    "param": "customer_details[address][postal_code]",
+                }
+            },
+        )
+
+        with pytest.raises(IncompleteTaxLocation):
+            await calculate_tax(redis, "usd", 1000, "PRODUCT", ADDRESS, [])
+
+        tax_calculation_cache._local.clear()
+        with pytest.raises(IncompleteTaxLocation):
+            await calculate_tax(redis, "usd", 1000, "PRODUCT", ADDRESS, [])
+
+        create_tax_calculation_mock.assert_awaited_once()
+        [key] = await redis.keys("checkout:tax_calculation:*")
+        ttl = await redis.ttl(key)
+        assert 0 < ttl <= tax_calculation_cache.error_ttl.total_seconds()
+
+    async def test_invalid_tax_location(
+        self, redis: Redis, create_tax_calculation_mock: AsyncMock
+    ) -> None:
+        create_tax_calculation_mock.side_effect = stripe_lib.StripeError(
+            "Invalid location",
+            json_body={
+                "error": {
+                    "message": "Invalid location",
+                    "code": "customer_tax_location_invalid",
+                }
+            },
+            code="customer_tax_location_invalid",
+        )
+
+        errors: list[InvalidTaxLocation] = []
+        for _ in range(3):
+            with pytest.raises(InvalidTaxLocation) as excinfo:
+                await calculate_tax(redis, "usd", 1000, "PRODUCT", ADDRESS, [])
+            errors.append(excinfo.value)
+
+        create_tax_calculation_mock.assert_awaited_once()
+        # A new exception is raised on each cache hit
+        assert errors[1] is not errors[2]
+        assert errors[1].stripe_error is not errors[2].stripe_error
+
+    async def test_other_error_not_cached(
+        self, redis: Redis, create_tax_calculation_mock: AsyncMock
+    ) -> None:
+        create_tax_calculation_mock.side_effect = stripe_lib.APIConnectionError(
+            "Connection error"
+        )
+
+        for _ in range(2):
+            with pytest.raises(stripe_lib.APIConnectionError):
+                await calculate_tax(redis, "usd", 1000, "PRODUCT", ADDRESS, [])
+
+        assert create_tax_calculation_mock.await_count == 2
+
+    async def test_local_cache_size(
+        self, redis: Redis, create_tax_calculation_mock: AsyncMock
+    ) -> None:
+        cache = TaxCalculationCache(local_size=2)
+        for key in ("a", "b", "c"):
+            await cache.set(redis, key, 100)
+
+        assert list(cache._local.keys()) == ["b", "c"]
@@ -44,7 +44,10 @@ class TestSearch:
         assert response.status_code == 200
         json = response.json()
 
-        assert {"items": [], "pagination": {"total_count": 0, "max_page": 0}} == json
+        assert {
+            "items": [],
+            "pagination": {"total_count": 0, "max_page": 0, "next_cursor": None},
+        } == json
 
     @pytest.mark.auth
     async def test_with_data(
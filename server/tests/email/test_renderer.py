@@ -1,4 +1,4 @@
-from polar.email.renderer import EmailRenderer
+from polar.email.renderer import EmailRenderer, get_email_renderer
 
 email_renderer = EmailRenderer()
 
@@ -14,3 +14,28 @@ def test_render_from_string() -> None:
     assert rendered_subject == "Hello, John!"
     assert rendered_body.startswith("<!DOCTYPE html")
     assert "<p>Hi, John! Welcome to Polar!</p>" in rendered_body
+
+
+def test_render_from_string_cached() -> None:
+    renderer = EmailRenderer(string_templates_cache_size=2)
+
+    renderer.render_from_string("Hello, {{ name }}!", "Hi!", context={"name": "A"})
+    assert len(renderer._string_templates) == 2
+
+    rendered_subject, _ = renderer.render_from_string(
+        "Hello, {{ name }}!", "Hi!", context={"name": "B"}
+    )
+    assert rendered_subject == "Hello, B!"
+    assert len(renderer._string_templates) == 2
+
+    # Least recently used templates are evicted
+    renderer.render_from_string("Bye, {{ name }}!", "Hi!", context={"name": "A"})
+    assert len(renderer._string_templates) == 2
+
+
+def test_get_email_renderer_reused() -> None:
+    assert get_email_renderer() is get_email_renderer()
+    assert get_email_renderer({"order": "polar.order"}) is get_email_renderer(
+        {"order": "polar.order"}
+    )
+    assert get_email_renderer() is not get_email_renderer({"order": "polar.order"})
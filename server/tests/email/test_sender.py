@@ -0,0 +1,104 @@
+import asyncio
+import json
+from email import message_from_bytes
+from pathlib import Path
+
+import httpx
+import pytest
+
+from polar.email.sender import Email, FileEmailSender, ResendEmailSender
+
+
+def build_email(to_email_addr: str) -> Email:
+    return Email(
+        to_email_addr=to_email_addr, subject="Hello", html_content="<p>Hello</p>"
+    )
+
+
+@pytest.mark.asyncio
+class TestResendEmailSender:
+    async def test_send_to_user(self) -> None:
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"id": "EMAIL_ID"})
+
+        sender = ResendEmailSender("API_KEY", transport=httpx.MockTransport(handler))
+        await sender.send_to_user(
+            to_email_addr="user@example.com", subject="Hello", html_content="Hi"
+        )
+
+        assert len(requests) == 1
+        request = requests[0]
+        assert request.url.path == "/emails"
+        assert request.headers["Authorization"] == "Bearer API_KEY"
+        assert json.loads(request.content) == {
+            "from": "Polar <polarsource@posts.polar.sh>",
+            "to": ["user@example.com"],
+            "subject": "Hello",
+            "html": "Hi",
+            "headers": {},
+            "reply_to": "Polar Support <support@polar.sh>",
+        }
+
+    async def test_send_many(self) -> None:
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            count = len(json.loads(request.content))
+            return httpx.Response(
+                200, json={"data": [{"id": f"EMAIL_{i}"} for i in range(count)]}
+            )
+
+        sender = ResendEmailSender("API_KEY", transport=httpx.MockTransport(handler))
+        sender.batch_size = 2
+        await sender.send_many([build_email(f"user{i}@example.com") for i in range(3)])
+
+        assert [request.url.path for request in requests] == [
+            "/emails/batch",
+            "/emails/batch",
+        ]
+        assert [len(json.loads(request.content)) for request in requests] == [2, 1]
+
+    async def test_error(self) -> None:
+        sender = ResendEmailSender(
+            "API_KEY", transport=httpx.MockTransport(lambda _: httpx.Response(422))
+        )
+        with pytest.raises(httpx.HTTPStatusError):
+            await sender.send_many([build_email("user@example.com")])
+
+
+def test_resend_client_closed_on_event_loop_change() -> None:
+    closed: list[bool] = []
+
+    class Transport(httpx.MockTransport):
+        async def aclose(self) -> None:
+            closed.append(True)
+
+    sender = ResendEmailSender(
+        "API_KEY",
+        transport=Transport(lambda _: httpx.Response(200, json={"id": "EMAIL_ID"})),
+    )
+    asyncio.run(sender.send_many([build_email("user@example.com")]))
+    assert closed == []
+
+    asyncio.run(sender.send_many([build_email("user@example.com")]))
+    assert closed == [True]
+
+
+@pytest.mark.asyncio
+async def test_file_email_sender(tmp_path: Path) -> None:
+    sender = FileEmailSender(tmp_path)
+    await sender.send_many(
+        [build_email("user1@example.com"), build_email("user2@example.com")]
+    )
+
+    messages = [message_from_bytes(path.read_bytes()) for path in tmp_path.iterdir()]
+    assert {message["To"] for message in messages} == {
+        "user1@example.com",
+        "user2@example.com",
+    }
+    assert messages[0]["Subject"] == "Hello"
+    assert messages[0]["From"] == "Polar <noreply@notifications.polar.sh>"
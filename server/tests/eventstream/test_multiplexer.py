@@ -0,0 +1,81 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+import pytest_asyncio
+
+from polar.eventstream.multiplexer import EventStreamMultiplexer, Subscription
+from polar.redis import Redis
+
+
+@pytest_asyncio.fixture
+async def multiplexer(redis: Redis) -> AsyncIterator[EventStreamMultiplexer]:
+    multiplexer = EventStreamMultiplexer(redis, max_queue_size=2)
+    yield multiplexer
+    await multiplexer.close()
+
+
+async def receive(subscription: Subscription) -> str:
+    return await asyncio.wait_for(anext(aiter(subscription)), timeout=1)
+
+
+async def publish(redis: Redis, channel: str, message: str) -> None:
+    await redis.publish(channel, message)
+    # Let the reader task dispatch the message
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+class TestEventStreamMultiplexer:
+    async def test_fan_out(
+        self, redis: Redis, multiplexer: EventStreamMultiplexer
+    ) -> None:
+        async with multiplexer.subscribe(["user:1", "org:1"]) as subscription_1:
+            async with multiplexer.subscribe(["user:2", "org:1"]) as subscription_2:
+                assert multiplexer.channels == {"user:1", "user:2", "org:1"}
+
+                await publish(redis, "org:1", "ORG")
+                assert await receive(subscription_1) == "ORG"
+                assert await receive(subscription_2) == "ORG"
+
+                await publish(redis, "user:2", "USER")
+                assert await receive(subscription_2) == "USER"
+                assert subscription_1._queue.empty()
+
+    async def test_reference_counting(
+        self, redis: Redis, multiplexer: EventStreamMultiplexer
+    ) -> None:
+        async with multiplexer.subscribe(["user:1", "org:1"]):
+            async with multiplexer.subscribe(["org:1"]):
+                assert await redis.pubsub_numsub("org:1") == [("org:1", 1)]
+            assert multiplexer.channels == {"user:1", "org:1"}
+        assert multiplexer.channels == set()
+        assert await redis.pubsub_numsub("org:1") == [("org:1", 0)]
+
+    async def test_slow_client(
+        self, redis: Redis, multiplexer: EventStreamMultiplexer
+    ) -> None:
+        async with multiplexer.subscribe(["org:1"]) as slow_subscription:
+            async with multiplexer.subscribe(["org:1"]) as subscription:
+                for i in range(3):
+                    await publish(redis, "org:1", str(i))
+                    assert await receive(subscription) == str(i)
+
+                assert slow_subscription.closed
+                assert [message async for message in slow_subscription] == []
+                assert multiplexer.channels == {"org:1"}
+
+    async def test_should_exit(self, redis: Redis) -> None:
+        should_exit = False
+        multiplexer = EventStreamMultiplexer(
+            redis, should_exit=lambda: should_exit, should_exit_interval=0.01
+        )
+        async with multiplexer.subscribe(["org:1"]) as subscription:
+            should_exit = True
+            messages = await asyncio.wait_for(_collect(subscription), timeout=1)
+            assert messages == []
+        await multiplexer.close()
+
+
+async def _collect(subscription: Subscription) -> list[str]:
+    return [message async for message in subscription]
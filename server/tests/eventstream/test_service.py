@@ -0,0 +1,66 @@
+import uuid
+
+import pytest
+from redis.asyncio.client import PubSub
+
+from polar.eventstream.service import (
+    Event,
+    _events_to_publish,
+    flush_published_events,
+    publish,
+)
+from polar.redis import Redis
+
+
+async def get_events(pubsub: PubSub) -> list[tuple[str, Event]]:
+    events: list[tuple[str, Event]] = []
+    # Subscribe confirmations are returned as None, so try a few times
+    for _ in range(10):
+        message = await pubsub.get_message(timeout=0.01)
+        if message is not None:
+            events.append(
+                (message["channel"], Event.model_validate_json(message["data"]))
+            )
+    return events
+
+
+@pytest.mark.asyncio
+class TestPublish:
+    async def test_buffered(self, redis: Redis) -> None:
+        _events_to_publish.set([])
+        user_id = uuid.uuid4()
+        organization_id = uuid.uuid4()
+
+        async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(f"user:{user_id}", f"org:{organization_id}")
+
+            await publish("user.event", {"a": 1}, user_id=user_id)
+            await publish(
+                "org.event", {"b": 2}, user_id=user_id, organization_id=organization_id
+            )
+            assert await get_events(pubsub) == []
+
+            await flush_published_events(redis)
+            assert _events_to_publish.get() == []
+
+            events = await get_events(pubsub)
+
+        assert [(channel, event.key) for channel, event in events] == [
+            (f"user:{user_id}", "user.event"),
+            (f"user:{user_id}", "org.event"),
+            (f"org:{organization_id}", "org.event"),
+        ]
+
+    async def test_immediate(self, redis: Redis) -> None:
+        _events_to_publish.set([])
+        user_id = uuid.uuid4()
+
+        async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(f"user:{user_id}")
+
+            await publish("user.event", {}, user_id=user_id, redis=redis)
+
+            events = await get_events(pubsub)
+            assert [event.key for _, event in events] == ["user.event"]
+
+        assert _events_to_publish.get() == []
@@ -1,5 +1,6 @@
-from collections.abc import AsyncGenerator
-from typing import Any
+import contextlib
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any, cast
 
 import pytest
 import pytest_asyncio
@@ -9,7 +10,8 @@ from polar.app import app
 from polar.auth.dependencies import get_auth_subject
 from polar.auth.models import AuthSubject, Subject
 from polar.checkout.ip_geolocation import _get_client_dependency
-from polar.postgres import AsyncSession, get_db_session
+from polar.kit.db.postgres import AsyncSessionMaker
+from polar.postgres import AsyncSession, get_db_session, get_db_sessionmaker
 from polar.redis import Redis, get_redis
 
 
@@ -20,7 +22,14 @@ async def client(
     session: AsyncSession,
     redis: Redis,
 ) -> AsyncGenerator[AsyncClient, None]:
+    @contextlib.asynccontextmanager
+    async def sessionmaker() -> AsyncIterator[AsyncSession]:
+        yield session
+
     app.dependency_overrides[get_db_session] = lambda: session
+    app.dependency_overrides[get_db_sessionmaker] = lambda: cast(
+        AsyncSessionMaker, sessionmaker
+    )
     app.dependency_overrides[get_redis] = lambda: redis
     app.dependency_overrides[get_auth_subject] = lambda: auth_subject
     app.dependency_overrides[_get_client_dependency] = lambda: None
@@ -52,4 +61,5 @@ async def client(
         yield client
 
     app.dependency_overrides.pop(get_db_session)
+    app.dependency_overrides.pop(get_db_sessionmaker)
     app.dependency_overrides.pop(get_auth_subject)
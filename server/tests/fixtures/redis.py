@@ -8,4 +8,4 @@ from polar.redis import Redis
 
 @pytest_asyncio.fixture(autouse=True)
 async def redis() -> AsyncIterator[Redis]:
-    yield FakeAsyncRedis()
+    yield FakeAsyncRedis(decode_responses=True)
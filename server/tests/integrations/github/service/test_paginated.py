@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from polar.integrations.github.service.paginated import github_paginated_service
+from polar.kit.hook import Hook
+from polar.models import ExternalOrganization, Repository
+from polar.postgres import AsyncSession
+from polar.redis import Redis
+from polar.repository.hooks import SyncCompletedHook, SyncedBatchHook
+
+
+def build_page(start: int, count: int) -> list[Any]:
+    return [
+        SimpleNamespace(id=i, pull_request=None) for i in range(start, start + count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_store_paginated_resource_batch(
+    session: AsyncSession,
+    redis: Redis,
+    external_organization: ExternalOrganization,
+    public_repository: Repository,
+) -> None:
+    pages = {1: build_page(0, 3), 2: build_page(3, 3), 3: build_page(6, 2)}
+    # Same item twice in a page, and an item to skip
+    pages[2].append(pages[2][0])
+    pages[3].append(SimpleNamespace(id=100, pull_request=True))
+
+    events: list[str] = []
+
+    async def fetch_page(page: int) -> Any:
+        events.append(f"fetch:{page}")
+        return pages.get(page, [])
+
+    async def store_many(
+        session: AsyncSession, redis: Redis, *, data: list[Any], **kwargs: Any
+    ) -> list[Any]:
+        await asyncio.sleep(0)  # Database round-trip
+        events.append(f"store:{[item.id for item in data]}")
+        return [MagicMock(id=item.id) for item in data]
+
+    on_batch_sync = AsyncMock()
+    on_batch_sync_signal: Hook[SyncedBatchHook] = Hook()
+    on_batch_sync_signal.add(on_batch_sync)
+    on_completed = AsyncMock()
+    on_completed_signal: Hook[SyncCompletedHook] = Hook()
+    on_completed_signal.add(on_completed)
+
+    def skip_if_pr(item: Any) -> bool:
+        return bool(item.pull_request)
+
+    # then
+    session.expunge_all()
+
+    synced, errors = await github_paginated_service.store_paginated_resource_batch(
+        session,
+        redis,
+        fetch_page=fetch_page,
+        per_page=3,
+        store_resources_method=store_many,
+        organization=external_organization,
+        repository=public_repository,
+        resource_type="issue",
+        skip_condition=skip_if_pr,
+        on_batch_sync_signal=on_batch_sync_signal,
+        on_completed_signal=on_completed_signal,
+    )
+
+    assert synced == 10
+    assert errors == 0
+
+    # Next page is requested while the current one is stored
+    assert events == [
+        "fetch:1",
+        "fetch:2",
+        "store:[0, 1, 2]",
+        "fetch:3",
+        "store:[3, 4, 5]",
+        "fetch:4",
+        "store:[6, 7]",
+    ]
+
+    assert on_batch_sync.await_count == 3
+    assert on_batch_sync.await_args is not None
+    last_hook: SyncedBatchHook = on_batch_sync.await_args.args[0]
+    assert [record.id for record in last_hook.records] == [6, 7]
+    assert last_hook.synced == 10
+    on_completed.assert_awaited_once()
@@ -13,6 +13,7 @@ from polar.external_organization.schemas import (
 )
 from polar.integrations.github import client as github
 from polar.integrations.github import service, types
+from polar.integrations.github.coalesce import coalesce_event
 from polar.integrations.github.tasks import webhook as webhook_tasks
 from polar.kit import utils
 from polar.kit.extensions.sqlalchemy import sql
@@ -518,6 +519,75 @@ async def test_webhook_repositories_removed(
     response_mock.assert_called()
 
 
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+async def test_webhook_coalesced(
+    job_context: JobContext,
+    mocker: MockerFixture,
+    github_webhook: TestWebhookFactory,
+) -> None:
+    enqueue_job_mock = mocker.patch("polar.integrations.github.coalesce.enqueue_job")
+    tasks_enqueue_job_mock = mocker.patch(
+        "polar.integrations.github.tasks.webhook.enqueue_job"
+    )
+
+    labeled = github_webhook.create("issues.labeled")
+    opened = github_webhook.create("issues.opened")
+    redis = job_context["raw_redis"]
+    for hook in (labeled, opened, labeled):
+        await coalesce_event(
+            redis,
+            f"issues.{hook['action']}",
+            "issues",
+            hook["action"],
+            hook.json,
+        )
+
+    enqueue_job_mock.assert_called_once()
+    key = enqueue_job_mock.call_args.args[1]
+
+    await webhook_tasks.issue_events_coalesced(
+        job_context, key, polar_context=PolarWorkerContext()
+    )
+
+    assert [call.args for call in tasks_enqueue_job_mock.call_args_list] == [
+        ("github.webhook.issues.opened", "issues", "opened", opened.json),
+        ("github.webhook.issues.labeled", "issues", "labeled", labeled.json),
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+async def test_webhook_coalesced_labels(
+    job_context: JobContext,
+    mocker: MockerFixture,
+    github_webhook: TestWebhookFactory,
+) -> None:
+    enqueue_job_mock = mocker.patch("polar.integrations.github.coalesce.enqueue_job")
+    tasks_enqueue_job_mock = mocker.patch(
+        "polar.integrations.github.tasks.webhook.enqueue_job"
+    )
+
+    polar_labeled = github_webhook.create("issues.labeled").json
+    polar_labeled["label"] = {**polar_labeled["label"], "name": "Polar"}
+    bug_labeled = github_webhook.create("issues.labeled").json
+    bug_labeled["label"] = {**bug_labeled["label"], "name": "bug"}
+    redis = job_context["raw_redis"]
+    # The Polar label is added, then the bug label, in the same window
+    for payload in (polar_labeled, bug_labeled):
+        await coalesce_event(redis, "issues.labeled", "issues", "labeled", payload)
+
+    key = enqueue_job_mock.call_args.args[1]
+    await webhook_tasks.issue_events_coalesced(
+        job_context, key, polar_context=PolarWorkerContext()
+    )
+
+    assert [call.args for call in tasks_enqueue_job_mock.call_args_list] == [
+        ("github.webhook.issues.labeled", "issues", "labeled", polar_labeled),
+        ("github.webhook.issues.labeled", "issues", "labeled", bug_labeled),
+    ]
+
+
 @pytest.mark.asyncio
 async def test_webhook_issues_opened(
     job_context: JobContext,
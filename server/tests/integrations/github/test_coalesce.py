@@ -0,0 +1,110 @@
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.integrations.github.coalesce import (
+    COALESCE_WINDOW,
+    coalesce_event,
+    pop_events,
+)
+from polar.redis import Redis
+
+KEY = "github:webhook:coalesce:1:2:3"
+
+
+@pytest.fixture
+def enqueue_job_mock(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch("polar.integrations.github.coalesce.enqueue_job")
+
+
+def build_payload(action: str, title: str, label: str | None) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "action": action,
+        "installation": {"id": 1},
+        "repository": {"id": 2},
+        "issue": {"number": 3, "title": title},
+    }
+    if label is not None:
+        payload["label"] = {"name": label}
+    return payload
+
+
+async def send(redis: Redis, action: str, title: str, label: str | None = None) -> bool:
+    return await coalesce_event(
+        redis,
+        f"issues.{action}",
+        "issues",
+        action,
+        build_payload(action, title, label),
+    )
+
+
+@pytest.mark.asyncio
+class TestCoalesceEvent:
+    async def test_not_coalesced(
+        self, redis: Redis, enqueue_job_mock: MagicMock
+    ) -> None:
+        assert not await coalesce_event(
+            redis,
+            "installation.created",
+            "installation",
+            "created",
+            {"installation": {"id": 1}},
+        )
+        assert not await coalesce_event(
+            redis,
+            "repository.edited",
+            "repository",
+            "edited",
+            build_payload("", "", None),
+        )
+        enqueue_job_mock.assert_not_called()
+
+    async def test_coalesced(self, redis: Redis, enqueue_job_mock: MagicMock) -> None:
+        assert await send(redis, "edited", "A")
+        assert await send(redis, "labeled", "B")
+        assert await send(redis, "edited", "C")
+
+        enqueue_job_mock.assert_called_once_with(
+            "github.webhook.coalesced", KEY, _defer_by=COALESCE_WINDOW
+        )
+
+        events = await pop_events(redis, KEY)
+        assert [
+            (event_name, payload["issue"]["title"])
+            for event_name, _, _, payload in events
+        ] == [("issues.labeled", "B"), ("issues.edited", "C")]
+
+        # Next window
+        assert await pop_events(redis, KEY) == []
+        assert await send(redis, "edited", "D")
+        assert enqueue_job_mock.call_count == 2
+
+    async def test_labels(self, redis: Redis, enqueue_job_mock: MagicMock) -> None:
+        assert await send(redis, "labeled", "A", "Polar")
+        assert await send(redis, "labeled", "B", "bug")
+        assert await send(redis, "unlabeled", "C", "wontfix")
+        assert await send(redis, "unlabeled", "D", "Polar")
+        assert await send(redis, "labeled", "E", "bug")
+        assert await send(redis, "unlabeled", "F", "wontfix")
+
+        events = await pop_events(redis, KEY)
+        assert [
+            (event_name, payload["label"]["name"], payload["issue"]["title"])
+            for event_name, _, _, payload in events
+        ] == [
+            ("issues.labeled", "Polar", "A"),
+            ("issues.unlabeled", "Polar", "D"),
+            ("issues.labeled", "bug", "E"),
+            ("issues.unlabeled", "wontfix", "F"),
+        ]
+
+    async def test_discarding_event(
+        self, redis: Redis, enqueue_job_mock: MagicMock
+    ) -> None:
+        assert await send(redis, "edited", "A")
+        assert not await send(redis, "deleted", "A")
+
+        assert await pop_events(redis, KEY) == []
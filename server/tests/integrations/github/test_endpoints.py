@@ -4,6 +4,7 @@ from httpx import AsyncClient
 from pytest_mock import MockerFixture
 
 from polar.integrations.github.service.secret_scanning import InvalidSignature
+from tests.fixtures.webhook import TestWebhookFactory
 
 
 @pytest.mark.asyncio
@@ -88,3 +89,41 @@ class TestSecretScanning:
 
         assert response.status_code == 200
         assert response.json() == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+class TestWebhook:
+    async def test_coalesced(
+        self, github_webhook: TestWebhookFactory, mocker: MockerFixture
+    ) -> None:
+        enqueue_job_mock = mocker.patch(
+            "polar.integrations.github.endpoints.enqueue_job"
+        )
+        coalesce_enqueue_job_mock = mocker.patch(
+            "polar.integrations.github.coalesce.enqueue_job"
+        )
+
+        hook = github_webhook.create("issues.labeled")
+        for _ in range(3):
+            response = await hook.send()
+            assert response.status_code == 200
+            assert response.json()["success"] is True
+
+        enqueue_job_mock.assert_not_called()
+        coalesce_enqueue_job_mock.assert_called_once()
+
+    async def test_not_coalesced(
+        self, github_webhook: TestWebhookFactory, mocker: MockerFixture
+    ) -> None:
+        enqueue_job_mock = mocker.patch(
+            "polar.integrations.github.endpoints.enqueue_job"
+        )
+
+        hook = github_webhook.create("issues.deleted")
+        response = await hook.send()
+
+        assert response.status_code == 200
+        enqueue_job_mock.assert_called_once_with(
+            "github.webhook.issues.deleted", "issues", "deleted", hook.json
+        )
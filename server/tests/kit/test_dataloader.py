@@ -0,0 +1,68 @@
+import asyncio
+from collections.abc import Sequence
+
+import pytest
+
+from polar.kit.dataloader import DataLoader
+
+
+class BatchLoadSpy:
+    def __init__(self, fail: bool = False) -> None:
+        self.calls: list[list[int]] = []
+        self.fail = fail
+
+    async def __call__(self, keys: Sequence[int]) -> dict[int, str]:
+        self.calls.append(list(keys))
+        if self.fail:
+            raise ValueError("Batch failed")
+        return {key: str(key) for key in keys if key % 2 == 0}
+
+
+@pytest.mark.asyncio
+class TestDataLoader:
+    async def test_load_many(self) -> None:
+        batch_load = BatchLoadSpy()
+        loader = DataLoader(batch_load)
+
+        assert await loader.load_many([2, 3, 4]) == ["2", None, "4"]
+        assert batch_load.calls == [[2, 3, 4]]
+
+    async def test_concurrent_loads(self) -> None:
+        batch_load = BatchLoadSpy()
+        loader = DataLoader(batch_load)
+
+        results = await asyncio.gather(loader.load(2), loader.load(4), loader.load(2))
+
+        assert list(results) == ["2", "4", "2"]
+        assert batch_load.calls == [[2, 4]]
+
+    async def test_cache(self) -> None:
+        batch_load = BatchLoadSpy()
+        loader = DataLoader(batch_load)
+
+        await loader.load_many([2, 3])
+        assert await loader.load(2) == "2"
+        assert await loader.load(3) is None
+        assert await loader.load(4) == "4"
+
+        assert batch_load.calls == [[2, 3], [4]]
+
+    async def test_prime(self) -> None:
+        batch_load = BatchLoadSpy()
+        loader = DataLoader(batch_load)
+
+        loader.prime(1, "primed")
+
+        assert await loader.load(1) == "primed"
+        assert batch_load.calls == []
+
+    async def test_failure(self) -> None:
+        batch_load = BatchLoadSpy(fail=True)
+        loader = DataLoader(batch_load)
+
+        with pytest.raises(ValueError):
+            await loader.load(2)
+
+        batch_load.fail = False
+        assert await loader.load(2) == "2"
+        assert batch_load.calls == [[2], [2]]
@@ -0,0 +1,175 @@
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import UnaryExpression, asc, desc, nulls_last, select
+
+from polar.exceptions import PolarRequestValidationError
+from polar.kit.pagination import (
+    CursorPagination,
+    PaginationCount,
+    PaginationParams,
+    paginate,
+)
+from polar.models import Order, Product, Subscription, User
+from polar.postgres import AsyncSession
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.random_objects import create_order
+
+
+@pytest_asyncio.fixture
+async def orders(
+    save_fixture: SaveFixture,
+    product: Product,
+    subscription: Subscription,
+    user: User,
+) -> list[Order]:
+    orders: list[Order] = []
+    for i, amount in enumerate([100, 200, 200, 300, 200]):
+        orders.append(
+            await create_order(
+                save_fixture,
+                product=product,
+                user=user,
+                amount=amount,
+                subscription=subscription if i % 2 == 0 else None,
+                created_at=datetime(2024, 1, 1 + i, tzinfo=UTC),
+            )
+        )
+    return orders
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+class TestPaginateCursor:
+    @pytest.mark.parametrize(
+        "order_by",
+        [
+            [desc(Order.created_at)],
+            [asc(Order.amount)],
+            [desc(Order.amount), asc(Order.created_at)],
+            [asc(Order.subscription_id)],
+            [desc(Order.subscription_id)],
+            [asc(Order.subscription_id).nulls_first()],
+            [desc(Order.subscription_id).nulls_last()],
+            [nulls_last(desc(Order.subscription_id)), asc(Order.amount)],
+        ],
+    )
+    async def test_pages(
+        self,
+        order_by: list[UnaryExpression[Any]],
+        session: AsyncSession,
+        orders: list[Order],
+    ) -> None:
+        statement = select(Order).order_by(*order_by)
+
+        expected_result = await session.execute(statement.order_by(Order.id))
+        expected_ids = [order.id for order in expected_result.scalars().all()]
+
+        ids: list[UUID] = []
+        cursor: str | None = None
+        for _ in range(3):
+            pagination = PaginationParams(1, 2, CursorPagination(cursor))
+            results, count = await paginate(session, statement, pagination=pagination)
+            assert count == 5
+            ids += [order.id for order in results]
+            assert pagination.cursor is not None
+            cursor = pagination.cursor.next_cursor
+            if cursor is None:
+                break
+
+        assert cursor is None
+        assert ids == expected_ids
+
+    async def test_estimate_count(
+        self, session: AsyncSession, orders: list[Order]
+    ) -> None:
+        statement = select(Order).order_by(desc(Order.created_at))
+        pagination = PaginationParams(
+            1, 2, CursorPagination(count=PaginationCount.estimate)
+        )
+
+        results, count = await paginate(session, statement, pagination=pagination)
+
+        assert len(results) == 2
+        assert count >= 0
+        assert pagination.cursor is not None
+        assert pagination.cursor.next_cursor is not None
+
+    async def test_estimate_count_bound_parameters(
+        self, session: AsyncSession, orders: list[Order], user: User
+    ) -> None:
+        statement = (
+            select(Order)
+            .where(Order.user_id == user.id, Order.amount.in_([100, 200]))
+            .order_by(desc(Order.created_at))
+        )
+        pagination = PaginationParams(
+            1, 2, CursorPagination(count=PaginationCount.estimate)
+        )
+
+        results, count = await paginate(session, statement, pagination=pagination)
+
+        assert len(results) == 2
+        assert count >= 0
+
+    @pytest.mark.parametrize(
+        "count_mode,expected_count",
+        [(PaginationCount.skip, 5), (PaginationCount.exact, 6)],
+    )
+    async def test_next_page_count(
+        self,
+        count_mode: PaginationCount,
+        expected_count: int,
+        save_fixture: SaveFixture,
+        session: AsyncSession,
+        orders: list[Order],
+        product: Product,
+        user: User,
+    ) -> None:
+        statement = select(Order).order_by(desc(Order.created_at))
+        pagination = PaginationParams(1, 2, CursorPagination(count=count_mode))
+        _, count = await paginate(session, statement, pagination=pagination)
+        assert count == 5
+        assert pagination.cursor is not None
+
+        await create_order(save_fixture, product=product, user=user)
+
+        next_pagination = PaginationParams(
+            1, 2, CursorPagination(pagination.cursor.next_cursor, count_mode)
+        )
+        _, count = await paginate(session, statement, pagination=next_pagination)
+        assert count == expected_count
+
+    async def test_cursor_other_sorting(
+        self, session: AsyncSession, orders: list[Order]
+    ) -> None:
+        pagination = PaginationParams(1, 2, CursorPagination())
+        await paginate(
+            session,
+            select(Order).order_by(desc(Order.created_at)),
+            pagination=pagination,
+        )
+        assert pagination.cursor is not None
+
+        with pytest.raises(PolarRequestValidationError):
+            await paginate(
+                session,
+                select(Order).order_by(asc(Order.amount)),
+                pagination=PaginationParams(
+                    1, 2, CursorPagination(pagination.cursor.next_cursor)
+                ),
+            )
+
+    @pytest.mark.parametrize("cursor", ["invalid", "W10=", "WyJhIiwgW3sieCI6IDF9XV0="])
+    async def test_invalid_cursor(
+        self, cursor: str, session: AsyncSession, orders: list[Order]
+    ) -> None:
+        with pytest.raises(PolarRequestValidationError):
+            await paginate(
+                session,
+                select(Order).order_by(desc(Order.created_at)),
+                pagination=PaginationParams(1, 2, CursorPagination(cursor)),
+            )
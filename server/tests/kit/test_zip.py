@@ -0,0 +1,24 @@
+import io
+import zipfile
+
+from polar.kit.zip import IterableZipWriter
+
+
+def test_iterable_zip_writer() -> None:
+    writer = IterableZipWriter()
+    chunks: list[bytes] = []
+
+    with writer.open("folder/file.bin") as f:
+        for _ in range(3):
+            f.write(b"a" * 1000)
+            chunks.append(writer.getchunk())
+    writer.writestr("folder/file.md", "Hello")
+    chunks.append(writer.getchunk())
+    writer.close()
+    chunks.append(writer.getchunk())
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert archive.namelist() == ["folder/file.bin", "folder/file.md"]
+    assert archive.read("folder/file.bin") == b"a" * 3000
+    assert archive.read("folder/file.md") == b"Hello"
@@ -3,6 +3,7 @@ from uuid import UUID
 import pytest
 from dateutil.relativedelta import relativedelta
 from httpx import AsyncClient
+from pytest_mock import MockerFixture
 
 from polar.auth.models import AuthSubject
 from polar.benefit.schemas import (
@@ -106,6 +107,7 @@ class TestLicenseKeyEndpoints:
     )
     async def test_update(
         self,
+        mocker: MockerFixture,
         session: AsyncSession,
         redis: Redis,
         client: AsyncClient,
@@ -130,6 +132,7 @@ class TestLicenseKeyEndpoints:
         lk = await license_key_service.get(session, id)
         assert lk
 
+        enqueue_job_mock = mocker.patch("polar.license_key.service.enqueue_job")
         expires = utc_now() + relativedelta(months=1)
         expires_at = expires.strftime("%Y-%m-%dT%H:%M:%S")
         response = await client.patch(
@@ -147,6 +150,7 @@ class TestLicenseKeyEndpoints:
         assert updated["limit_usage"] == 10
         assert updated["limit_activations"] == 5
         assert updated["expires_at"] == expires_at
+        enqueue_job_mock.assert_called_once_with("license_key.invalidate_cache", lk.id)
 
     @pytest.mark.auth(
         AuthSubjectFixture(subject="user"),
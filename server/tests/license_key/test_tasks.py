@@ -0,0 +1,48 @@
+from uuid import UUID
+
+import pytest
+
+from polar.benefit.schemas import BenefitLicenseKeysCreateProperties
+from polar.license_key import cache
+from polar.license_key.service import license_key as license_key_service
+from polar.license_key.tasks import invalidate_cache
+from polar.models import Organization, Product, User
+from polar.postgres import AsyncSession
+from polar.redis import Redis
+from polar.worker import JobContext, PolarWorkerContext
+from tests.fixtures.database import SaveFixture
+from tests.fixtures.license_key import TestLicenseKey
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+class TestInvalidateCache:
+    async def test_valid(
+        self,
+        job_context: JobContext,
+        polar_worker_context: PolarWorkerContext,
+        session: AsyncSession,
+        redis: Redis,
+        save_fixture: SaveFixture,
+        user: User,
+        organization: Organization,
+        product: Product,
+    ) -> None:
+        _, granted = await TestLicenseKey.create_benefit_and_grant(
+            session,
+            redis,
+            save_fixture,
+            user=user,
+            organization=organization,
+            product=product,
+            properties=BenefitLicenseKeysCreateProperties(prefix="testing"),
+        )
+        license_key = await license_key_service.get_loaded(
+            session, UUID(granted["license_key_id"])
+        )
+        assert license_key is not None
+        await cache.store(redis, license_key)
+
+        await invalidate_cache(job_context, license_key.id, polar_worker_context)
+
+        assert await cache.get(redis, organization.id, license_key.key) is None
@@ -6,7 +6,9 @@ import pytest_asyncio
 
 from polar.auth.models import AuthSubject
 from polar.enums import SubscriptionRecurringInterval
+from polar.kit.utils import utc_now
 from polar.metrics.queries import Interval
+from polar.metrics.schemas import MetricsResponse
 from polar.metrics.service import metrics as metrics_service
 from polar.models import (
     Order,
@@ -19,6 +21,7 @@ from polar.models import (
 from polar.models.product_price import ProductPriceType
 from polar.models.subscription import SubscriptionStatus
 from polar.postgres import AsyncSession
+from polar.redis import Redis
 from tests.fixtures.auth import AuthSubjectFixture
 from tests.fixtures.database import SaveFixture
 from tests.fixtures.random_objects import (
@@ -105,6 +108,7 @@ ORDERS: dict[str, OrderFixture] = {
 
 
 async def _create_fixtures(
+    session: AsyncSession,
     save_fixture: SaveFixture,
     user: User,
     organization: Organization,
@@ -150,15 +154,20 @@ async def _create_fixtures(
         )
         orders[key] = order
 
+    await metrics_service.refresh_rollups(session)
+
     return products, subscriptions, orders
 
 
 @pytest_asyncio.fixture
 async def fixtures(
-    save_fixture: SaveFixture, user: User, organization: Organization
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    user: User,
+    organization: Organization,
 ) -> tuple[dict[str, Product], dict[str, Subscription], dict[str, Order]]:
     return await _create_fixtures(
-        save_fixture, user, organization, PRODUCTS, SUBSCRIPTIONS, ORDERS
+        session, save_fixture, user, organization, PRODUCTS, SUBSCRIPTIONS, ORDERS
     )
 
 
@@ -488,7 +497,7 @@ class TestGetMetrics:
             },
         }
         await _create_fixtures(
-            save_fixture, user, organization, PRODUCTS, subscriptions, {}
+            session, save_fixture, user, organization, PRODUCTS, subscriptions, {}
         )
 
         metrics = await metrics_service.get_metrics(
@@ -570,8 +579,8 @@ class TestGetMetrics:
         In the current implementation, the subscription is counted as if it was active
         the whole interval.
 
-        This behavior can be tweaked by changing the comparison from `>` to `>=` in the
-        `get_active_subscriptions_cte` query.
+        This behavior can be tweaked by changing the comparison from `<` to `<=` in the
+        `_ended_before` clause of the active subscriptions metrics.
         """
         subscriptions: dict[str, SubscriptionFixture] = {
             "subscription_1": {
@@ -581,7 +590,7 @@ class TestGetMetrics:
             }
         }
         await _create_fixtures(
-            save_fixture, user, organization, PRODUCTS, subscriptions, {}
+            session, save_fixture, user, organization, PRODUCTS, subscriptions, {}
         )
 
         metrics = await metrics_service.get_metrics(
@@ -619,3 +628,205 @@ class TestGetMetrics:
         assert feb.renewed_subscriptions_revenue == 0
         assert feb.active_subscriptions == 0
         assert feb.monthly_recurring_revenue == 0
+
+    @pytest.mark.auth
+    async def test_values_open_bucket(
+        self,
+        save_fixture: SaveFixture,
+        session: AsyncSession,
+        auth_subject: AuthSubject[User],
+        user_organization: UserOrganization,
+        user: User,
+        organization: Organization,
+        fixtures: tuple[dict[str, Product], dict[str, Subscription], dict[str, Order]],
+    ) -> None:
+        products, _, _ = fixtures
+        now = utc_now()
+
+        # Not rolled up yet: should be read from the raw tables
+        subscription = await create_subscription(
+            save_fixture,
+            product=products["monthly_subscription"],
+            user=user,
+            status=SubscriptionStatus.active,
+            started_at=now,
+        )
+        await create_order(
+            save_fixture,
+            product=products["monthly_subscription"],
+            user=user,
+            amount=100_00,
+            created_at=now,
+            subscription=subscription,
+        )
+
+        metrics = await metrics_service.get_metrics(
+            session,
+            auth_subject,
+            start_date=now.date(),
+            end_date=now.date(),
+            interval=Interval.day,
+        )
+
+        assert len(metrics.periods) == 1
+        period = metrics.periods[0]
+        assert period.orders == 1
+        assert period.revenue == 100_00
+        assert period.new_subscriptions == 1
+        assert period.new_subscriptions_revenue == 100_00
+        assert period.active_subscriptions == 3
+        assert period.monthly_recurring_revenue == 300_00
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+class TestRefreshRollups:
+    @pytest.mark.auth
+    async def test_timestamps(
+        self,
+        save_fixture: SaveFixture,
+        session: AsyncSession,
+        auth_subject: AuthSubject[User],
+        user_organization: UserOrganization,
+        user: User,
+        organization: Organization,
+        fixtures: tuple[dict[str, Product], dict[str, Subscription], dict[str, Order]],
+    ) -> None:
+        products, subscriptions, _ = fixtures
+
+        subscription = subscriptions["subscription_1"]
+        subscription.ended_at = datetime(2024, 3, 15, 12, tzinfo=UTC)
+        await save_fixture(subscription)
+        await create_order(
+            save_fixture,
+            product=products["one_time_product"],
+            user=user,
+            amount=50_00,
+            created_at=datetime(2024, 1, 1, 0, 30, tzinfo=UTC),
+        )
+
+        async def _get_metrics() -> MetricsResponse:
+            return await metrics_service.get_metrics(
+                session,
+                auth_subject,
+                start_date=date(2024, 1, 1),
+                end_date=date(2024, 4, 1),
+                interval=Interval.month,
+            )
+
+        # Rollups are stale until refreshed
+        metrics = await _get_metrics()
+        assert metrics.periods[0].orders == 2
+        assert metrics.periods[3].active_subscriptions == 1
+
+        await metrics_service.refresh_rollups(
+            session,
+            organization.id,
+            [
+                datetime(2024, 1, 1, 0, 30, tzinfo=UTC),
+                datetime(2024, 3, 15, 12, 5, tzinfo=UTC),
+            ],
+        )
+
+        metrics = await _get_metrics()
+        jan = metrics.periods[0]
+        assert jan.orders == 3
+        assert jan.revenue == 250_00
+        assert jan.one_time_products == 2
+        mar = metrics.periods[2]
+        assert mar.active_subscriptions == 1
+        apr = metrics.periods[3]
+        assert apr.active_subscriptions == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+class TestGetMetricsCache:
+    @pytest.mark.auth
+    async def test_closed_periods(
+        self,
+        save_fixture: SaveFixture,
+        session: AsyncSession,
+        redis: Redis,
+        auth_subject: AuthSubject[User],
+        user_organization: UserOrganization,
+        user: User,
+        organization: Organization,
+        fixtures: tuple[dict[str, Product], dict[str, Subscription], dict[str, Order]],
+    ) -> None:
+        products, _, _ = fixtures
+
+        async def _get_metrics() -> MetricsResponse:
+            return await metrics_service.get_metrics(
+                session,
+                auth_subject,
+                start_date=date(2024, 1, 1),
+                end_date=date(2024, 12, 31),
+                interval=Interval.month,
+                redis=redis,
+            )
+
+        metrics = await _get_metrics()
+        assert metrics.periods[0].orders == 2
+
+        await create_order(
+            save_fixture,
+            product=products["one_time_product"],
+            user=user,
+            amount=50_00,
+            created_at=datetime(2024, 1, 15, tzinfo=UTC),
+        )
+        await metrics_service.refresh_rollups(session, organization.id)
+
+        # Served from the cache
+        cached_metrics = await _get_metrics()
+        assert cached_metrics == metrics
+
+        await metrics_service.invalidate_cache(redis, organization.id)
+
+        metrics = await _get_metrics()
+        assert len(metrics.periods) == 12
+        assert metrics.periods[0].orders == 3
+        assert metrics.periods[0].revenue == 250_00
+
+    @pytest.mark.auth
+    async def test_open_period(
+        self,
+        save_fixture: SaveFixture,
+        session: AsyncSession,
+        redis: Redis,
+        auth_subject: AuthSubject[User],
+        user_organization: UserOrganization,
+        user: User,
+        organization: Organization,
+        fixtures: tuple[dict[str, Product], dict[str, Subscription], dict[str, Order]],
+    ) -> None:
+        products, _, _ = fixtures
+        today = utc_now().date()
+
+        async def _get_metrics() -> MetricsResponse:
+            return await metrics_service.get_metrics(
+                session,
+                auth_subject,
+                start_date=date(2024, 1, 1),
+                end_date=today,
+                interval=Interval.month,
+                redis=redis,
+            )
+
+        metrics = await _get_metrics()
+        assert metrics.periods[-1].orders == 0
+
+        await create_order(
+            save_fixture,
+            product=products["one_time_product"],
+            user=user,
+            amount=50_00,
+            created_at=utc_now(),
+        )
+
+        # The open period is recomputed, even without invalidation
+        metrics = await _get_metrics()
+        assert metrics.periods[0].orders == 2
+        assert metrics.periods[-1].orders == 1
+        assert metrics.periods[-1].revenue == 50_00
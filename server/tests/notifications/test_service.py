@@ -0,0 +1,77 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.kit.extensions.sqlalchemy import sql
+from polar.models import Organization, User, UserOrganization
+from polar.models.notification import Notification
+from polar.models.pledge import PledgeType
+from polar.notifications.notification import (
+    MaintainerPledgeCreatedNotificationPayload,
+    NotificationType,
+)
+from polar.notifications.service import PartialNotification
+from polar.notifications.service import notifications as notification_service
+from polar.postgres import AsyncSession
+
+
+def build_notification() -> PartialNotification:
+    return PartialNotification(
+        type=NotificationType.maintainer_pledge_created,
+        payload=MaintainerPledgeCreatedNotificationPayload(
+            pledger_name="pledging_org",
+            issue_url="https://github.com/testorg/testrepo/issues/123",
+            issue_title="issue title",
+            issue_number=123,
+            pledge_amount="123.45",
+            issue_org_name="testorg",
+            issue_repo_name="testrepo",
+            maintainer_has_stripe_account=False,
+            pledge_type=PledgeType.pay_directly,
+            pledge_id=None,
+        ),
+    )
+
+
+@pytest.mark.asyncio
+class TestSendToOrgMembers:
+    async def test_no_members(
+        self, mocker: MockerFixture, session: AsyncSession, organization: Organization
+    ) -> None:
+        enqueue_job_mock = mocker.patch("polar.notifications.service.enqueue_job")
+
+        # then
+        session.expunge_all()
+
+        await notification_service.send_to_org_members(
+            session, organization.id, build_notification()
+        )
+
+        enqueue_job_mock.assert_not_called()
+
+    async def test_members(
+        self,
+        mocker: MockerFixture,
+        session: AsyncSession,
+        organization: Organization,
+        user: User,
+        user_second: User,
+        user_organization: UserOrganization,
+        user_organization_second: UserOrganization,
+    ) -> None:
+        enqueue_job_mock = mocker.patch("polar.notifications.service.enqueue_job")
+
+        # then
+        session.expunge_all()
+
+        await notification_service.send_to_org_members(
+            session, organization.id, build_notification()
+        )
+
+        result = await session.execute(sql.select(Notification))
+        notifications = result.scalars().all()
+        assert {n.user_id for n in notifications} == {user.id, user_second.id}
+
+        enqueue_job_mock.assert_called_once_with(
+            "notifications.send_batch",
+            notification_ids=[n.id for n in notifications],
+        )
@@ -0,0 +1,49 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from pytest_mock import MockerFixture
+
+from polar.models import Organization, User, UserOrganization
+from polar.notifications.notification import NotificationPayloadBase
+from polar.notifications.service import notifications as notification_service
+from polar.notifications.tasks.email import notifications_send_batch
+from polar.postgres import AsyncSession
+from polar.worker import JobContext, PolarWorkerContext
+
+from .test_service import build_notification
+
+
+@pytest.mark.asyncio
+async def test_notifications_send_batch(
+    mocker: MockerFixture,
+    job_context: JobContext,
+    polar_worker_context: PolarWorkerContext,
+    session: AsyncSession,
+    organization: Organization,
+    user: User,
+    user_second: User,
+    user_organization: UserOrganization,
+    user_organization_second: UserOrganization,
+) -> None:
+    mocker.patch("polar.notifications.service.enqueue_job")
+    notification_ids = await notification_service.send_to_users(
+        session, [user.id, user_second.id], build_notification()
+    )
+    await session.commit()
+
+    sender_mock = mocker.patch(
+        "polar.notifications.tasks.email.sender", new_callable=AsyncMock
+    )
+    render_spy = mocker.spy(NotificationPayloadBase, "render")
+
+    # then
+    session.expunge_all()
+
+    await notifications_send_batch(
+        job_context, list(notification_ids), polar_worker_context
+    )
+
+    assert render_spy.call_count == 1
+    sender_mock.send_many.assert_awaited_once()
+    emails = sender_mock.send_many.call_args.args[0]
+    assert {email.to_email_addr for email in emails} == {user.email, user_second.email}
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from pytest_mock import MockerFixture
@@ -31,7 +31,7 @@ class TestRevokeLeaked:
         session: AsyncSession,
         mocker: MockerFixture,
     ) -> None:
-        email_sender_mock = MagicMock()
+        email_sender_mock = AsyncMock()
         mocker.patch(
             "polar.oauth2.service.oauth2_token.get_email_sender",
             return_value=email_sender_mock,
@@ -62,7 +62,7 @@ class TestRevokeLeaked:
         user: User,
         mocker: MockerFixture,
     ) -> None:
-        email_sender_mock = MagicMock()
+        email_sender_mock = AsyncMock()
         mocker.patch(
             "polar.oauth2.service.oauth2_token.get_email_sender",
             return_value=email_sender_mock,
@@ -106,7 +106,7 @@ class TestRevokeLeaked:
         user_organization: UserOrganization,
         mocker: MockerFixture,
     ) -> None:
-        email_sender_mock = MagicMock()
+        email_sender_mock = AsyncMock()
         mocker.patch(
             "polar.oauth2.service.oauth2_token.get_email_sender",
             return_value=email_sender_mock,
@@ -140,7 +140,7 @@ class TestRevokeLeaked:
         user: User,
         mocker: MockerFixture,
     ) -> None:
-        email_sender_mock = MagicMock()
+        email_sender_mock = AsyncMock()
         mocker.patch(
             "polar.oauth2.service.oauth2_token.get_email_sender",
             return_value=email_sender_mock,
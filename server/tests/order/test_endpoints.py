@@ -1,3 +1,5 @@
+import csv
+
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
@@ -64,6 +66,45 @@ class TestListOrders:
         assert json["pagination"]["total_count"] == len(orders)
 
 
+@pytest.mark.asyncio
+@pytest.mark.http_auto_expunge
+class TestExportOrders:
+    async def test_anonymous(self, client: AsyncClient) -> None:
+        response = await client.get("/v1/orders/export")
+
+        assert response.status_code == 401
+
+    @pytest.mark.auth
+    async def test_user_not_organization_member(
+        self, client: AsyncClient, orders: list[Order]
+    ) -> None:
+        response = await client.get("/v1/orders/export")
+
+        assert response.status_code == 200
+
+        rows = list(csv.reader(response.text.splitlines()))
+        assert len(rows) == 1
+
+    @pytest.mark.auth(
+        AuthSubjectFixture(scopes={Scope.web_default}),
+        AuthSubjectFixture(subject="organization", scopes={Scope.orders_read}),
+    )
+    async def test_valid(
+        self,
+        client: AsyncClient,
+        user_organization: UserOrganization,
+        orders: list[Order],
+    ) -> None:
+        response = await client.get("/v1/orders/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+
+        rows = list(csv.reader(response.text.splitlines()))
+        assert rows[0][:2] == ["Date", "Order ID"]
+        assert [row[1] for row in rows[1:]] == [str(order.id) for order in orders]
+
+
 @pytest.mark.asyncio
 @pytest.mark.http_auto_expunge
 class TesGetOrdersStatistics:
@@ -289,7 +289,12 @@ class TestCreateOrderFromStripe:
         assert updated_payment_transaction is not None
         assert updated_payment_transaction.order_id == order.id
 
-        enqueue_job_mock.assert_called_once_with(
+        enqueue_job_mock.assert_any_call(
+            "metrics.refresh_rollups",
+            organization_id=product.organization_id,
+            timestamps=[order.created_at],
+        )
+        enqueue_job_mock.assert_any_call(
             "order.discord_notification",
             order_id=order.id,
         )
@@ -436,7 +441,12 @@ class TestCreateOrderFromStripe:
         assert updated_payment_transaction is not None
         assert updated_payment_transaction.order_id == order.id
 
-        enqueue_job_mock.assert_called_once_with(
+        enqueue_job_mock.assert_any_call(
+            "metrics.refresh_rollups",
+            organization_id=product.organization_id,
+            timestamps=[order.created_at],
+        )
+        enqueue_job_mock.assert_any_call(
             "order.discord_notification",
             order_id=order.id,
         )
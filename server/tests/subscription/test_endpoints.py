@@ -1,3 +1,4 @@
+import csv
 from datetime import datetime
 
 import pytest
@@ -45,3 +46,81 @@ class TestListSubscriptions:
             assert "user" in item
             assert "github_username" in item["user"]
             assert "email" in item["user"]
+
+    @pytest.mark.auth
+    @pytest.mark.parametrize(
+        "sorting,expected_amounts",
+        [
+            ("amount", [1000, 2000, None]),
+            ("-amount", [2000, 1000, None]),
+        ],
+    )
+    async def test_cursor_sorting_amount(
+        self,
+        sorting: str,
+        expected_amounts: list[int | None],
+        save_fixture: SaveFixture,
+        client: AsyncClient,
+        user: User,
+        user_organization: UserOrganization,
+        product: Product,
+    ) -> None:
+        for i, amount in enumerate([2000, None, 1000]):
+            subscription = await create_active_subscription(
+                save_fixture,
+                product=product,
+                user=user,
+                stripe_subscription_id=f"SUBSCRIPTION_ID_{i}",
+            )
+            subscription.amount = amount
+            await save_fixture(subscription)
+
+        amounts: list[int | None] = []
+        cursor: str | None = None
+        for _ in range(len(expected_amounts)):
+            params: dict[str, str | int] = {"sorting": sorting, "limit": 1}
+            if cursor is not None:
+                params["cursor"] = cursor
+            response = await client.get("/v1/subscriptions/", params=params)
+
+            assert response.status_code == 200
+            json = response.json()
+            assert json["pagination"]["total_count"] == 3
+            amounts += [item["amount"] for item in json["items"]]
+            cursor = json["pagination"]["next_cursor"]
+
+        assert cursor is None
+        assert amounts == expected_amounts
+
+
+@pytest.mark.asyncio
+@pytest.mark.http_auto_expunge
+class TestExportSubscriptions:
+    async def test_anonymous(self, client: AsyncClient) -> None:
+        response = await client.get("/v1/subscriptions/export")
+
+        assert response.status_code == 401
+
+    @pytest.mark.auth
+    async def test_valid(
+        self,
+        save_fixture: SaveFixture,
+        client: AsyncClient,
+        user: User,
+        user_organization: UserOrganization,
+        product: Product,
+    ) -> None:
+        await create_active_subscription(
+            save_fixture, product=product, user=user, started_at=datetime(2023, 1, 1)
+        )
+
+        response = await client.get("/v1/subscriptions/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+
+        rows = list(csv.reader(response.text.splitlines()))
+        assert len(rows) == 2
+        assert rows[0][0] == "Email"
+        assert rows[1][0] == user.email
+        assert rows[1][4] == product.name
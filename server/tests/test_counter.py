@@ -0,0 +1,106 @@
+import pytest
+
+from polar.counter import BufferedCounter
+from polar.redis import Redis
+
+
+@pytest.mark.asyncio
+class TestBufferedCounter:
+    async def test_flush_empty(self, redis: Redis) -> None:
+        counter = BufferedCounter("test")
+        applied: list[dict[str, int]] = []
+
+        async def apply(increments: dict[str, int]) -> None:
+            applied.append(increments)
+
+        assert await counter.flush(redis, apply) == 0
+        assert applied == []
+
+    async def test_flush(self, redis: Redis) -> None:
+        counter = BufferedCounter("test")
+        await counter.increment(redis, "a")
+        await counter.increment(redis, "a")
+        await counter.increment(redis, "b", 5)
+        applied: list[dict[str, int]] = []
+
+        async def apply(increments: dict[str, int]) -> None:
+            applied.append(increments)
+
+        assert await counter.flush(redis, apply) == 2
+        assert applied == [{"a": 2, "b": 5}]
+
+        assert await counter.flush(redis, apply) == 0
+        assert len(applied) == 1
+
+    async def test_flush_failure_retried(self, redis: Redis) -> None:
+        counter = BufferedCounter("test")
+        await counter.increment(redis, "a")
+
+        async def failing_apply(increments: dict[str, int]) -> None:
+            raise RuntimeError()
+
+        with pytest.raises(RuntimeError):
+            await counter.flush(redis, failing_apply)
+
+        # New increments accumulate aside while the failed batch is pending
+        await counter.increment(redis, "a")
+        applied: list[dict[str, int]] = []
+
+        async def apply(increments: dict[str, int]) -> None:
+            applied.append(increments)
+
+        assert await counter.flush(redis, apply) == 1
+        assert await counter.flush(redis, apply) == 1
+        assert applied == [{"a": 1}, {"a": 1}]
+
+    async def test_flush_failure_dead_letter(self, redis: Redis) -> None:
+        counter = BufferedCounter("test", max_retries=1)
+        await counter.increment(redis, "a")
+
+        async def failing_apply(increments: dict[str, int]) -> None:
+            raise RuntimeError()
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await counter.flush(redis, failing_apply)
+
+        await counter.increment(redis, "b")
+        applied: list[dict[str, int]] = []
+
+        async def apply(increments: dict[str, int]) -> None:
+            applied.append(increments)
+
+        assert await counter.flush(redis, apply) == 1
+        assert applied == [{"b": 1}]
+        assert await redis.hgetall(counter.dead_letter_key) == {"a": "1"}
+
+    async def test_get_pending(self, redis: Redis) -> None:
+        counter = BufferedCounter("test")
+        assert await counter.get_pending(redis, []) == {}
+        assert await counter.get_pending(redis, ["a"]) == {"a": 0}
+
+        await counter.increment(redis, "a", 2)
+        await counter.increment(redis, "b")
+
+        async def failing_apply(increments: dict[str, int]) -> None:
+            raise RuntimeError()
+
+        # The failed batch is still pending, along with the new increments
+        with pytest.raises(RuntimeError):
+            await counter.flush(redis, failing_apply)
+        await counter.increment(redis, "a")
+
+        assert await counter.get_pending(redis, ["a", "b", "c"]) == {
+            "a": 3,
+            "b": 1,
+            "c": 0,
+        }
+        assert await counter.get_all_pending(redis) == {"a": 3, "b": 1}
+
+        async def apply(increments: dict[str, int]) -> None:
+            pass
+
+        await counter.flush(redis, apply)
+        await counter.flush(redis, apply)
+        assert await counter.get_pending(redis, ["a", "b"]) == {"a": 0, "b": 0}
+        assert await counter.get_all_pending(redis) == {}
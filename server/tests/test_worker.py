@@ -0,0 +1,73 @@
+import pytest
+from arq import ArqRedis
+from arq.constants import default_queue_name, job_key_prefix
+from arq.jobs import deserialize_job
+from fakeredis import FakeAsyncRedis
+
+from polar.worker import (
+    _jobs_to_enqueue,
+    bulk_enqueue_jobs,
+    enqueue_job,
+    flush_enqueued_jobs,
+)
+
+
+@pytest.fixture
+def arq_pool() -> ArqRedis:
+    # arq stores pickled jobs: it needs a connection that doesn't decode responses
+    return ArqRedis(connection_pool=FakeAsyncRedis().connection_pool)
+
+
+@pytest.mark.asyncio
+class TestBulkEnqueueJobs:
+    async def test_empty(self, arq_pool: ArqRedis) -> None:
+        assert await bulk_enqueue_jobs(arq_pool, []) == []
+
+    async def test_valid(self, arq_pool: ArqRedis) -> None:
+        enqueued_job_ids = await bulk_enqueue_jobs(
+            arq_pool,
+            [
+                ("task.a", (1,), {"_job_id": "a", "foo": "bar"}),
+                ("task.b", (), {"_job_id": "b"}),
+                ("task.c", (), {"_job_id": "c", "_queue_name": "arq:queue:other"}),
+            ],
+        )
+
+        assert enqueued_job_ids == ["a", "b", "c"]
+        assert await arq_pool.zcard(default_queue_name) == 2
+        assert await arq_pool.zcard("arq:queue:other") == 1
+
+        job_a = await arq_pool.get(job_key_prefix + "a")
+        assert job_a is not None
+        job_def = deserialize_job(job_a)
+        assert job_def.function == "task.a"
+        assert job_def.args == (1,)
+        assert job_def.kwargs == {"foo": "bar"}
+
+    async def test_existing_and_duplicate_job_ids(self, arq_pool: ArqRedis) -> None:
+        await arq_pool.enqueue_job("task.a", _job_id="a")
+
+        enqueued_job_ids = await bulk_enqueue_jobs(
+            arq_pool,
+            [
+                ("task.a", (), {"_job_id": "a"}),
+                ("task.b", (), {"_job_id": "b"}),
+                ("task.b", (), {"_job_id": "b"}),
+            ],
+        )
+
+        assert enqueued_job_ids == ["b"]
+        assert await arq_pool.zcard(default_queue_name) == 2
+
+
+@pytest.mark.asyncio
+async def test_flush_enqueued_jobs(arq_pool: ArqRedis) -> None:
+    _jobs_to_enqueue.set([])
+
+    enqueue_job("task.a", foo="bar")
+    enqueue_job("task.b")
+
+    await flush_enqueued_jobs(arq_pool)
+
+    assert await arq_pool.zcard(default_queue_name) == 2
+    assert _jobs_to_enqueue.get() == []
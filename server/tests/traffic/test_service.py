@@ -1,19 +1,23 @@
 import datetime
+import uuid
 
 import pytest
 
 from polar.kit.extensions.sqlalchemy import sql
+from polar.kit.pagination import PaginationParams
 from polar.models.article import Article
 from polar.models.organization import Organization
 from polar.models.traffic import Traffic
 from polar.postgres import AsyncSession
-from polar.traffic.schemas import TrafficStatisticsPeriod
+from polar.redis import Redis
+from polar.traffic.schemas import TrafficReferrer, TrafficStatisticsPeriod
 from polar.traffic.service import traffic_service
 
 
 @pytest.mark.asyncio
 async def test_article_add(
     session: AsyncSession,
+    redis: Redis,
     article: Article,
     organization: Organization,
     second_organization: Organization,
@@ -24,7 +28,7 @@ async def test_article_add(
     # 30 views in february
     for i in range(10):
         await traffic_service.add(
-            session,
+            redis,
             location_href="https://polar.sh/hello",
             referrer=None,
             article_id=article.id,
@@ -33,7 +37,7 @@ async def test_article_add(
 
     for i in range(10):
         await traffic_service.add(
-            session,
+            redis,
             location_href="https://polar.sh/hello",
             referrer="https://google.com/",
             article_id=article.id,
@@ -42,7 +46,7 @@ async def test_article_add(
 
     for i in range(10):
         await traffic_service.add(
-            session,
+            redis,
             location_href="https://polar.sh/hello",
             referrer="https://google.com/",
             article_id=article.id,
@@ -51,7 +55,7 @@ async def test_article_add(
 
     # traffic with both article and org id
     await traffic_service.add(
-        session,
+        redis,
         location_href="https://polar.sh/hello",
         referrer="https://google.com/",
         article_id=article.id,
@@ -62,7 +66,7 @@ async def test_article_add(
     # 5 views in november (outside of range)
     for i in range(50):
         await traffic_service.add(
-            session,
+            redis,
             location_href="https://polar.sh/hello",
             referrer="https://google.com/",
             article_id=article.id,
@@ -72,7 +76,7 @@ async def test_article_add(
     # 8 views in december
     for i in range(4):
         await traffic_service.add(
-            session,
+            redis,
             location_href="https://polar.sh/hello",
             referrer="https://google.com/",
             article_id=article.id,
@@ -80,7 +84,7 @@ async def test_article_add(
         )
     for i in range(4):
         await traffic_service.add(
-            session,
+            redis,
             location_href="https://polar.sh/hello",
             referrer="https://google.com/",
             article_id=article.id,
@@ -89,15 +93,18 @@ async def test_article_add(
 
     # traffic in other organization (no affect on result)
     await traffic_service.add(
-        session,
+        redis,
         location_href="https://polar.sh/hello",
         referrer="https://google.com/",
         organization_id=second_organization.id,
         date=datetime.date(2024, 2, 19),
     )
 
+    await traffic_service.flush_views(session, redis)
+
     monthly = await traffic_service.views_statistics(
         session,
+        redis,
         article_ids=[article.id],
         start_date=datetime.date(2023, 12, 1),
         end_date=datetime.date(2024, 3, 1),
@@ -129,6 +136,7 @@ async def test_article_add(
 
     daily = await traffic_service.views_statistics(
         session,
+        redis,
         article_ids=[article.id],
         start_date=datetime.date(2024, 2, 17),
         end_date=datetime.date(2024, 2, 25),
@@ -173,6 +181,7 @@ async def test_article_add(
 @pytest.mark.asyncio
 async def test_organization_add(
     session: AsyncSession,
+    redis: Redis,
     organization: Organization,
     second_organization: Organization,
     article: Article,
@@ -183,7 +192,7 @@ async def test_organization_add(
     # 15 views in february
     for i in range(10):
         await traffic_service.add(
-            session,
+            redis,
             location_href="https://polar.sh/hello",
             referrer=None,
             organization_id=organization.id,
@@ -192,7 +201,7 @@ async def test_organization_add(
 
     for i in range(5):
         await traffic_service.add(
-            session,
+            redis,
             location_href="https://polar.sh/hello",
             referrer="https://google.com/",
             organization_id=organization.id,
@@ -201,7 +210,7 @@ async def test_organization_add(
 
     # 1 page view that has both article and organization ids
     await traffic_service.add(
-        session,
+        redis,
         location_href="https://polar.sh/hello",
         referrer="https://google.com/",
         organization_id=organization.id,
@@ -211,15 +220,18 @@ async def test_organization_add(
 
     # traffic in other organization (no affect on result)
     await traffic_service.add(
-        session,
+        redis,
         location_href="https://polar.sh/hello",
         referrer="https://google.com/",
         organization_id=second_organization.id,
         date=datetime.date(2024, 2, 19),
     )
 
+    await traffic_service.flush_views(session, redis)
+
     monthly = await traffic_service.views_statistics(
         session,
+        redis,
         organization_id=organization.id,
         start_date=datetime.date(2023, 12, 1),
         end_date=datetime.date(2024, 3, 1),
@@ -253,3 +265,133 @@ async def test_organization_add(
     stmt = sql.select(Traffic).order_by(Traffic.date)
     r = await session.execute(stmt)
     assert 4 == len(r.scalars().unique().all())
+
+
+@pytest.mark.asyncio
+async def test_flush_views_accumulates(
+    session: AsyncSession, redis: Redis, organization: Organization
+) -> None:
+    session.expunge_all()
+
+    for _ in range(3):
+        await traffic_service.add(
+            redis,
+            location_href="https://polar.sh/hello",
+            organization_id=organization.id,
+            date=datetime.date(2024, 2, 19),
+        )
+    assert await traffic_service.flush_views(session, redis) == 1
+
+    await traffic_service.add(
+        redis,
+        location_href="https://polar.sh/hello",
+        organization_id=organization.id,
+        date=datetime.date(2024, 2, 19),
+    )
+    assert await traffic_service.flush_views(session, redis) == 1
+    assert await traffic_service.flush_views(session, redis) == 0
+
+    stmt = sql.select(Traffic)
+    r = await session.execute(stmt)
+    traffic = r.scalars().one()
+    assert traffic.views == 4
+
+
+@pytest.mark.asyncio
+async def test_flush_views_unknown_ids(
+    session: AsyncSession, redis: Redis, article: Article, organization: Organization
+) -> None:
+    session.expunge_all()
+
+    await traffic_service.add(
+        redis,
+        location_href="https://polar.sh/hello",
+        article_id=uuid.uuid4(),
+        date=datetime.date(2024, 2, 19),
+    )
+    await traffic_service.add(
+        redis,
+        location_href="https://polar.sh/hello",
+        article_id=article.id,
+        organization_id=uuid.uuid4(),
+        date=datetime.date(2024, 2, 19),
+    )
+    await traffic_service.add(
+        redis,
+        location_href="https://polar.sh/hello",
+        organization_id=organization.id,
+        date=datetime.date(2024, 2, 19),
+    )
+    assert await traffic_service.flush_views(session, redis) == 3
+
+    await traffic_service.add(
+        redis,
+        location_href="https://polar.sh/hello",
+        article_id=article.id,
+        date=datetime.date(2024, 2, 19),
+    )
+    assert await traffic_service.flush_views(session, redis) == 1
+
+    stmt = sql.select(Traffic)
+    r = await session.execute(stmt)
+    assert {
+        (traffic.article_id, traffic.organization_id, traffic.views)
+        for traffic in r.scalars().all()
+    } == {(None, organization.id, 1), (article.id, None, 1)}
+
+
+@pytest.mark.asyncio
+async def test_pending_views(
+    session: AsyncSession, redis: Redis, article: Article
+) -> None:
+    session.expunge_all()
+
+    for _ in range(2):
+        await traffic_service.add(
+            redis,
+            location_href="https://polar.sh/hello",
+            referrer="https://google.com/",
+            article_id=article.id,
+            date=datetime.date(2024, 2, 19),
+        )
+    await traffic_service.flush_views(session, redis)
+
+    # Not flushed yet
+    for _ in range(3):
+        await traffic_service.add(
+            redis,
+            location_href="https://polar.sh/hello",
+            referrer="https://google.com/",
+            article_id=article.id,
+            date=datetime.date(2024, 2, 20),
+        )
+    await traffic_service.add(
+        redis,
+        location_href="https://polar.sh/hello",
+        referrer="https://google.com/",
+        article_id=uuid.uuid4(),
+        date=datetime.date(2024, 2, 20),
+    )
+
+    daily = await traffic_service.views_statistics(
+        session,
+        redis,
+        article_ids=[article.id],
+        start_date=datetime.date(2024, 2, 19),
+        end_date=datetime.date(2024, 2, 20),
+        interval="day",
+        start_of_last_period=datetime.date(2024, 2, 20),
+        group_by_article=False,
+    )
+    assert [period.views for period in daily] == [2, 3]
+
+    referrers, count = await traffic_service.referrers(
+        session,
+        redis,
+        article_ids=[article.id],
+        start_date=datetime.date(2024, 2, 1),
+        end_date=datetime.date(2024, 2, 29),
+        pagination=PaginationParams(1, 10),
+    )
+    assert count == 1
+    assert referrers == [TrafficReferrer(referrer="https://google.com/", views=5)]
@@ -565,3 +565,64 @@ class TestSyncStripeFees:
         assert fee_transaction_10.type == TransactionType.processor_fee
         assert fee_transaction_10.processor_fee_type == ProcessorFeeType.payment
         assert fee_transaction_10.amount == -150
+
+    async def test_sync_stripe_fees_checkpoint(
+        self,
+        mocker: MockerFixture,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        stripe_service_mock: MagicMock,
+    ) -> None:
+        mocker.patch(
+            "polar.transaction.service.processor_fee.SYNC_STRIPE_FEES_PAGE_SIZE", 2
+        )
+        checkpoint = datetime.datetime(2024, 10, 1, tzinfo=datetime.UTC)
+        balance_transactions = [
+            stripe_lib.BalanceTransaction.construct_from(
+                {
+                    "created": int(checkpoint.timestamp()) + 10 - i,
+                    "id": f"STRIPE_BALANCE_TRANSACTION_ID_{i}",
+                    "net": -100 * i,
+                    "currency": "usd",
+                    "description": "Connect (2024-01-01 - 2024-01-31): Payout Fee",
+                },
+                None,
+            )
+            for i in range(1, 6)
+        ]
+        stripe_service_mock.list_balance_transactions.return_value = (
+            create_async_iterator(balance_transactions)
+        )
+
+        # Already synced, in the middle of a page
+        await save_fixture(
+            Transaction(
+                created_at=checkpoint,
+                type=TransactionType.processor_fee,
+                processor=PaymentProcessor.stripe,
+                processor_fee_type=ProcessorFeeType.payout,
+                currency="usd",
+                amount=-200,
+                account_currency="usd",
+                account_amount=-200,
+                tax_amount=0,
+                fee_balance_transaction_id="STRIPE_BALANCE_TRANSACTION_ID_2",
+            )
+        )
+
+        # then
+        session.expunge_all()
+
+        fee_transactions = await processor_fee_transaction_service.sync_stripe_fees(
+            session
+        )
+
+        stripe_service_mock.list_balance_transactions.assert_called_once_with(
+            type="stripe_fee", created_gte=int(checkpoint.timestamp())
+        )
+        assert [t.fee_balance_transaction_id for t in fee_transactions] == [
+            "STRIPE_BALANCE_TRANSACTION_ID_1",
+            "STRIPE_BALANCE_TRANSACTION_ID_3",
+            "STRIPE_BALANCE_TRANSACTION_ID_4",
+            "STRIPE_BALANCE_TRANSACTION_ID_5",
+        ]
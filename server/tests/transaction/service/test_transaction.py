@@ -1,11 +1,19 @@
 import uuid
 
 import pytest
+from sqlalchemy import update
 
 from polar.authz.service import Authz
 from polar.exceptions import NotPermitted, ResourceNotFound
 from polar.kit.pagination import PaginationParams
-from polar.models import Account, Organization, Transaction, User, UserOrganization
+from polar.models import (
+    Account,
+    AccountBalance,
+    Organization,
+    Transaction,
+    User,
+    UserOrganization,
+)
 from polar.models.transaction import TransactionType
 from polar.postgres import AsyncSession
 from polar.transaction.service.transaction import transaction as transaction_service
@@ -236,6 +244,67 @@ class TestGetSummary:
         )
 
 
+@pytest.mark.asyncio
+class TestGetTransactionsSum:
+    async def test_valid(
+        self,
+        session: AsyncSession,
+        account: Account,
+        account_transactions: list[Transaction],
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        assert await transaction_service.get_transactions_sum(
+            session, account.id
+        ) == sum(t.amount for t in account_transactions)
+        for type in TransactionType:
+            assert await transaction_service.get_transactions_sum(
+                session, account.id, type=type
+            ) == sum(t.amount for t in account_transactions if t.type == type)
+
+
+@pytest.mark.asyncio
+class TestReconcileAccountBalances:
+    async def test_consistent(
+        self,
+        session: AsyncSession,
+        account: Account,
+        account_transactions: list[Transaction],
+    ) -> None:
+        # then
+        session.expunge_all()
+
+        reconciled = await transaction_service.reconcile_account_balances(session)
+        assert account.id not in reconciled
+
+    async def test_diverged(
+        self,
+        session: AsyncSession,
+        account: Account,
+        account_transactions: list[Transaction],
+    ) -> None:
+        await session.execute(
+            update(AccountBalance)
+            .where(AccountBalance.account_id == account.id)
+            .values(amount=0, transfers_amount=AccountBalance.transfers_amount + 100)
+        )
+
+        # then
+        session.expunge_all()
+
+        reconciled = await transaction_service.reconcile_account_balances(session)
+        assert reconciled == [account.id]
+
+        account_balance = await transaction_service.get_account_balance(
+            session, account.id
+        )
+        assert account_balance.amount == sum(t.amount for t in account_transactions)
+        assert account_balance.transfers_amount == sum(
+            t.amount for t in account_transactions if t.type == TransactionType.balance
+        )
+
+
 @pytest.mark.asyncio
 class TestLookup:
     async def test_not_existing(self, session: AsyncSession, user_second: User) -> None:
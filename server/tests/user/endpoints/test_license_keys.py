@@ -4,6 +4,7 @@ import pytest
 from dateutil.relativedelta import relativedelta
 from freezegun import freeze_time
 from httpx import AsyncClient
+from pytest_mock import MockerFixture
 
 from polar.benefit.schemas import (
     BenefitLicenseKeyActivationProperties,
@@ -11,6 +12,7 @@ from polar.benefit.schemas import (
     BenefitLicenseKeysCreateProperties,
 )
 from polar.kit.utils import generate_uuid, utc_now
+from polar.license_key.schemas import LICENSE_KEY_BATCH_MAX_SIZE, LicenseKeyUpdate
 from polar.license_key.service import license_key as license_key_service
 from polar.models import Organization, Product, User
 from polar.postgres import AsyncSession
@@ -620,3 +622,345 @@ class TestUserLicenseKeyEndpoints:
             },
         )
         assert response.status_code == 200
+
+    async def test_validate_cached(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        client: AsyncClient,
+        save_fixture: SaveFixture,
+        user: User,
+        organization: Organization,
+        product: Product,
+        mocker: MockerFixture,
+    ) -> None:
+        benefit, granted = await TestLicenseKey.create_benefit_and_grant(
+            session,
+            redis,
+            save_fixture,
+            user=user,
+            organization=organization,
+            product=product,
+            properties=BenefitLicenseKeysCreateProperties(
+                prefix="testing", limit_usage=10
+            ),
+        )
+        id = UUID(granted["license_key_id"])
+        lk = await license_key_service.get(session, id)
+        assert lk
+
+        get_or_raise_by_key_spy = mocker.spy(license_key_service, "get_or_raise_by_key")
+        for i in range(1, 3):
+            response = await client.post(
+                "/v1/users/license-keys/validate",
+                json={
+                    "key": lk.key,
+                    "organization_id": str(organization.id),
+                    "increment_usage": 1,
+                },
+            )
+            assert response.status_code == 200
+            data = response.json()
+            assert data["id"] == str(lk.id)
+            assert data["user"]["id"] == str(user.id)
+            assert data["usage"] == i
+            assert data["validations"] == i
+
+        get_or_raise_by_key_spy.assert_called_once()
+
+        await license_key_service.update(
+            session, redis, license_key=lk, updates=LicenseKeyUpdate(limit_usage=2)
+        )
+        response = await client.post(
+            "/v1/users/license-keys/validate",
+            json={
+                "key": lk.key,
+                "organization_id": str(organization.id),
+                "increment_usage": 1,
+            },
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "License key only has 0 more usages."
+
+        await license_key_service.user_revoke(session, redis, user, benefit, lk.id)
+        response = await client.post(
+            "/v1/users/license-keys/validate",
+            json={"key": lk.key, "organization_id": str(organization.id)},
+        )
+        assert response.status_code == 404
+
+    async def test_validate_batch(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        client: AsyncClient,
+        save_fixture: SaveFixture,
+        user: User,
+        organization: Organization,
+        product: Product,
+    ) -> None:
+        benefit, granted = await TestLicenseKey.create_benefit_and_grant(
+            session,
+            redis,
+            save_fixture,
+            user=user,
+            organization=organization,
+            product=product,
+            properties=BenefitLicenseKeysCreateProperties(
+                prefix="testing", limit_usage=2
+            ),
+        )
+        lk = await license_key_service.get(session, UUID(granted["license_key_id"]))
+        assert lk
+        _, revoked_granted = await TestLicenseKey.create_grant(
+            session, redis, save_fixture, benefit, user=user, product=product
+        )
+        revoked_lk = await license_key_service.get(
+            session, UUID(revoked_granted["license_key_id"])
+        )
+        assert revoked_lk
+        await license_key_service.user_revoke(
+            session, redis, user, benefit, revoked_lk.id
+        )
+
+        response = await client.post(
+            "/v1/users/license-keys/validate/batch",
+            json={
+                "items": [
+                    {
+                        "key": lk.key,
+                        "organization_id": str(organization.id),
+                        "increment_usage": 1,
+                    },
+                    {"key": "UNKNOWN", "organization_id": str(organization.id)},
+                    {"key": revoked_lk.key, "organization_id": str(organization.id)},
+                    {
+                        "key": lk.key,
+                        "organization_id": str(organization.id),
+                        "increment_usage": 1,
+                    },
+                    {
+                        "key": lk.key,
+                        "organization_id": str(organization.id),
+                        "increment_usage": 1,
+                    },
+                ]
+            },
+        )
+        assert response.status_code == 200
+        results = response.json()
+        assert len(results) == 5
+
+        assert results[0]["key"] == lk.key
+        assert results[0]["error"] is None
+        assert results[0]["license_key"]["usage"] == 1
+
+        assert results[1]["license_key"] is None
+        assert results[1]["error"]["error"] == "ResourceNotFound"
+        assert results[1]["error"]["status_code"] == 404
+
+        assert results[2]["error"]["detail"] == "License key is no longer active."
+
+        assert results[3]["license_key"]["usage"] == 2
+        assert results[3]["license_key"]["validations"] == 2
+
+        assert results[4]["error"]["status_code"] == 400
+        assert results[4]["error"]["detail"] == "License key only has 0 more usages."
+
+    async def test_validate_batch_activations(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        client: AsyncClient,
+        save_fixture: SaveFixture,
+        user: User,
+        organization: Organization,
+        product: Product,
+    ) -> None:
+        _, granted = await TestLicenseKey.create_benefit_and_grant(
+            session,
+            redis,
+            save_fixture,
+            user=user,
+            organization=organization,
+            product=product,
+            properties=BenefitLicenseKeysCreateProperties(
+                prefix="testing",
+                activations=BenefitLicenseKeyActivationProperties(
+                    limit=2, enable_user_admin=True
+                ),
+            ),
+        )
+        lk = await license_key_service.get(session, UUID(granted["license_key_id"]))
+        assert lk
+
+        response = await client.post(
+            "/v1/users/license-keys/activate",
+            json={
+                "key": lk.key,
+                "organization_id": str(organization.id),
+                "label": "test",
+                "conditions": {"major_version": 1},
+            },
+        )
+        assert response.status_code == 200
+        activation_id = response.json()["id"]
+
+        response = await client.post(
+            "/v1/users/license-keys/validate/batch",
+            json={
+                "items": [
+                    {
+                        "key": lk.key,
+                        "organization_id": str(organization.id),
+                        "activation_id": activation_id,
+                        "conditions": {"major_version": 1},
+                        "increment_usage": 1,
+                    },
+                    {
+                        "key": lk.key,
+                        "organization_id": str(organization.id),
+                        "activation_id": activation_id,
+                        "conditions": {"major_version": 2},
+                    },
+                    {
+                        "key": lk.key,
+                        "organization_id": str(organization.id),
+                        "activation_id": str(generate_uuid()),
+                    },
+                    {
+                        "key": lk.key,
+                        "organization_id": str(organization.id),
+                        "increment_usage": 2,
+                    },
+                ]
+            },
+        )
+        assert response.status_code == 200
+        results = response.json()
+
+        assert results[0]["error"] is None
+        assert results[0]["license_key"]["activation"]["id"] == activation_id
+        assert results[0]["license_key"]["usage"] == 1
+        assert results[0]["license_key"]["validations"] == 1
+
+        assert results[1]["error"]["detail"] == (
+            "License key does not match required conditions"
+        )
+        assert results[2]["error"]["status_code"] == 404
+
+        assert results[3]["error"] is None
+        assert results[3]["license_key"]["activation"] is None
+        assert results[3]["license_key"]["usage"] == 3
+        assert results[3]["license_key"]["validations"] == 2
+
+    async def test_validate_batch_too_many(self, client: AsyncClient) -> None:
+        response = await client.post(
+            "/v1/users/license-keys/validate/batch",
+            json={
+                "items": [
+                    {"key": f"KEY-{i}", "organization_id": str(generate_uuid())}
+                    for i in range(LICENSE_KEY_BATCH_MAX_SIZE + 1)
+                ]
+            },
+        )
+        assert response.status_code == 422
+
+    async def test_activate_batch(
+        self,
+        session: AsyncSession,
+        redis: Redis,
+        client: AsyncClient,
+        save_fixture: SaveFixture,
+        user: User,
+        organization: Organization,
+        product: Product,
+    ) -> None:
+        benefit, granted = await TestLicenseKey.create_benefit_and_grant(
+            session,
+            redis,
+            save_fixture,
+            user=user,
+            organization=organization,
+            product=product,
+            properties=BenefitLicenseKeysCreateProperties(
+                prefix="testing",
+                activations=BenefitLicenseKeyActivationProperties(
+                    limit=2, enable_user_admin=True
+                ),
+            ),
+        )
+        lk = await license_key_service.get(session, UUID(granted["license_key_id"]))
+        assert lk
+        _, no_activation_granted = await TestLicenseKey.create_benefit_and_grant(
+            session,
+            redis,
+            save_fixture,
+            user=user,
+            organization=organization,
+            product=product,
+            properties=BenefitLicenseKeysCreateProperties(prefix="testing"),
+        )
+        no_activation_lk = await license_key_service.get(
+            session, UUID(no_activation_granted["license_key_id"])
+        )
+        assert no_activation_lk
+
+        response = await client.post(
+            "/v1/users/license-keys/activate",
+            json={
+                "key": lk.key,
+                "organization_id": str(organization.id),
+                "label": "existing",
+            },
+        )
+        assert response.status_code == 200
+
+        response = await client.post(
+            "/v1/users/license-keys/activate/batch",
+            json={
+                "items": [
+                    {
+                        "key": lk.key,
+                        "organization_id": str(organization.id),
+                        "label": "first",
+                    },
+                    {
+                        "key": no_activation_lk.key,
+                        "organization_id": str(organization.id),
+                        "label": "second",
+                    },
+                    {
+                        "key": lk.key,
+                        "organization_id": str(organization.id),
+                        "label": "third",
+                    },
+                    {
+                        "key": "UNKNOWN",
+                        "organization_id": str(organization.id),
+                        "label": "fourth",
+                    },
+                ]
+            },
+        )
+        assert response.status_code == 200
+        results = response.json()
+        assert len(results) == 4
+
+        assert results[0]["error"] is None
+        assert results[0]["activation"]["label"] == "first"
+        assert results[0]["activation"]["license_key"]["id"] == str(lk.id)
+
+        assert results[1]["activation"] is None
+        assert results[1]["error"]["status_code"] == 403
+        assert (
+            results[1]["error"]["detail"] == "License key does not require activation"
+        )
+
+        assert results[2]["error"]["status_code"] == 403
+        assert (
+            results[2]["error"]["detail"]
+            == "License key activation limit already reached"
+        )
+
+        assert results[3]["error"]["status_code"] == 404
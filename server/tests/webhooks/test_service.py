@@ -4,6 +4,7 @@ from unittest.mock import MagicMock
 
 import pytest
 from pytest_mock import MockerFixture
+from sqlalchemy import select
 
 from polar.auth.models import AuthSubject
 from polar.auth.scope import Scope
@@ -16,11 +17,13 @@ from polar.models import (
     WebhookEndpoint,
     WebhookEvent,
 )
-from polar.models.webhook_endpoint import WebhookFormat
+from polar.models.webhook_endpoint import WebhookEventType, WebhookFormat
 from polar.postgres import AsyncSession
 from polar.webhook.schemas import HttpsUrl, WebhookEndpointCreate, WebhookEndpointUpdate
 from polar.webhook.service import webhook as webhook_service
+from polar.webhook.webhooks import WebhookOrganizationUpdatedPayload
 from tests.fixtures.auth import AuthSubjectFixture
+from tests.fixtures.database import SaveFixture
 
 
 @pytest.fixture
@@ -406,3 +409,79 @@ class TestRedeliverEvent:
             session, authz, auth_subject, webhook_event_organization.id
         )
         enqueue_job_mock.assert_called_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skip_db_asserts
+class TestSendPayload:
+    async def test_fan_out(
+        self,
+        session: AsyncSession,
+        save_fixture: SaveFixture,
+        mocker: MockerFixture,
+        organization: Organization,
+        enqueue_job_mock: MagicMock,
+    ) -> None:
+        endpoints: list[WebhookEndpoint] = []
+        for format in [
+            WebhookFormat.raw,
+            WebhookFormat.raw,
+            WebhookFormat.discord,
+            WebhookFormat.slack,
+        ]:
+            endpoint = WebhookEndpoint(
+                url="https://example.com/hook",
+                format=format,
+                organization_id=organization.id,
+                secret="mysecret",
+                events=[WebhookEventType.organization_updated],
+            )
+            await save_fixture(endpoint)
+            endpoints.append(endpoint)
+
+        not_subscribed_endpoint = WebhookEndpoint(
+            url="https://example.com/hook",
+            format=WebhookFormat.raw,
+            organization_id=organization.id,
+            secret="mysecret",
+            events=[],
+        )
+        await save_fixture(not_subscribed_endpoint)
+
+        get_payload_spy = mocker.spy(WebhookOrganizationUpdatedPayload, "get_payload")
+
+        await webhook_service.send(
+            session, organization, (WebhookEventType.organization_updated, organization)
+        )
+
+        assert get_payload_spy.call_count == 3
+        assert enqueue_job_mock.call_count == 4
+
+        events = (
+            (
+                await session.execute(
+                    select(WebhookEvent).where(
+                        WebhookEvent.webhook_endpoint_id.in_(
+                            [endpoint.id for endpoint in endpoints]
+                            + [not_subscribed_endpoint.id]
+                        )
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+        assert len(events) == 4
+        assert {event.webhook_endpoint_id for event in events} == {
+            endpoint.id for endpoint in endpoints
+        }
+        assert {
+            call.kwargs["webhook_event_id"] for call in enqueue_job_mock.call_args_list
+        } == {event.id for event in events}
+
+        raw_payloads = {
+            event.payload
+            for event in events
+            if event.webhook_endpoint_id in {endpoints[0].id, endpoints[1].id}
+        }
+        assert len(raw_payloads) == 1
@@ -1,3 +1,5 @@
+import asyncio
+import uuid
 from typing import cast
 
 import httpx
@@ -5,11 +7,13 @@ import pytest
 import respx
 from arq import Retry
 from pytest_mock import MockerFixture
+from sqlalchemy import select
 from standardwebhooks.webhooks import Webhook as StandardWebhook
 
 from polar.kit.db.postgres import AsyncSession
 from polar.models.organization import Organization
 from polar.models.subscription import Subscription
+from polar.models.webhook_delivery import WebhookDelivery
 from polar.models.webhook_endpoint import (
     WebhookEndpoint,
     WebhookEventType,
@@ -17,6 +21,7 @@ from polar.models.webhook_endpoint import (
 )
 from polar.models.webhook_event import WebhookEvent
 from polar.subscription.service import subscription as subscription_service
+from polar.webhook.delivery import WebhookDeliveryEngine, WebhookEndpointBusy
 from polar.webhook.service import webhook as webhook_service
 from polar.webhook.tasks import (
     MAX_RETRIES,
@@ -278,9 +283,176 @@ async def test_webhook_standard_webhooks_compatible(
 
 @pytest.mark.asyncio
 async def test_allowed_url() -> None:
-    assert allowed_url("https://example.com/webhooks")
-    assert allowed_url("https://example.com:5000/webhooks")
-    assert allowed_url("http://example.com:5000/webhooks") is False  # http
-    assert allowed_url("https://127.0.0.1:5000/webhooks") is False  # loopback
-    assert allowed_url("https://::1/webhooks") is False  # loopback
-    assert allowed_url("https://foo.invalid:5000/webhooks") is False  # does not resolve
+    assert await allowed_url("https://example.com/webhooks")
+    assert await allowed_url("https://example.com:5000/webhooks")
+    assert await allowed_url("http://example.com:5000/webhooks") is False  # http
+    assert await allowed_url("https://127.0.0.1:5000/webhooks") is False  # loopback
+    assert await allowed_url("https://::1/webhooks") is False  # loopback
+    assert (
+        await allowed_url("https://foo.invalid:5000/webhooks") is False
+    )  # does not resolve
+
+
+@pytest.mark.asyncio
+async def test_allowed_url_dns_cache(mocker: MockerFixture) -> None:
+    engine = WebhookDeliveryEngine(
+        timeout=1.0,
+        max_connections=1,
+        max_keepalive_connections=1,
+        max_concurrency_per_endpoint=1,
+        endpoint_slot_timeout=1.0,
+        dns_cache_ttl=60,
+        dns_cache_size=10,
+    )
+    resolve_mock = mocker.patch.object(
+        engine, "_resolve_global", autospec=True, return_value=True
+    )
+
+    assert await engine.allowed_url("https://example.com/webhooks")
+    assert await engine.allowed_url("https://example.com/other")
+    resolve_mock.assert_awaited_once_with("example.com")
+
+    engine.dns_cache_ttl = 0
+    assert await engine.allowed_url("https://example.org/webhooks")
+    assert await engine.allowed_url("https://example.org/webhooks")
+    assert resolve_mock.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_allowed_url_dns_cache_size(mocker: MockerFixture) -> None:
+    engine = WebhookDeliveryEngine(
+        timeout=1.0,
+        max_connections=1,
+        max_keepalive_connections=1,
+        max_concurrency_per_endpoint=1,
+        endpoint_slot_timeout=1.0,
+        dns_cache_ttl=60,
+        dns_cache_size=2,
+    )
+    resolve_mock = mocker.patch.object(
+        engine, "_resolve_global", autospec=True, return_value=True
+    )
+
+    assert await engine.allowed_url("https://a.example.com/webhooks")
+    assert await engine.allowed_url("https://b.example.com/webhooks")
+    assert await engine.allowed_url("https://a.example.com/webhooks")
+    assert await engine.allowed_url("https://c.example.com/webhooks")
+
+    # b is the least recently used hostname
+    assert list(engine._dns_cache.keys()) == ["a.example.com", "c.example.com"]
+    assert resolve_mock.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_delivery_endpoint_concurrency(respx_mock: respx.MockRouter) -> None:
+    engine = WebhookDeliveryEngine(
+        timeout=1.0,
+        max_connections=10,
+        max_keepalive_connections=10,
+        max_concurrency_per_endpoint=2,
+        endpoint_slot_timeout=1.0,
+        dns_cache_ttl=60,
+        dns_cache_size=10,
+    )
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_response(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200)
+
+    respx_mock.post("https://example.com/hook").mock(side_effect=slow_response)
+
+    endpoint_id = uuid.uuid4()
+    responses = await asyncio.gather(
+        *(
+            engine.post(endpoint_id, "https://example.com/hook", content="", headers={})
+            for _ in range(6)
+        )
+    )
+    await engine.close()
+
+    assert all(response.status_code == 200 for response in responses)
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_delivery_endpoint_slot_timeout(respx_mock: respx.MockRouter) -> None:
+    engine = WebhookDeliveryEngine(
+        timeout=1.0,
+        max_connections=10,
+        max_keepalive_connections=10,
+        max_concurrency_per_endpoint=1,
+        endpoint_slot_timeout=0.01,
+        dns_cache_ttl=60,
+        dns_cache_size=10,
+    )
+
+    async def slow_response(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.1)
+        return httpx.Response(200)
+
+    respx_mock.post("https://example.com/hook").mock(side_effect=slow_response)
+
+    endpoint_id = uuid.uuid4()
+    results = await asyncio.gather(
+        *(
+            engine.post(endpoint_id, "https://example.com/hook", content="", headers={})
+            for _ in range(2)
+        ),
+        return_exceptions=True,
+    )
+    await engine.close()
+
+    assert isinstance(results[0], httpx.Response)
+    assert isinstance(results[1], WebhookEndpointBusy)
+    assert engine._endpoint_semaphores == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.http_auto_expunge
+async def test_webhook_delivery_endpoint_busy(
+    mocker: MockerFixture,
+    session: AsyncSession,
+    save_fixture: SaveFixture,
+    organization: Organization,
+    job_context: JobContext,
+) -> None:
+    endpoint = WebhookEndpoint(
+        url="https://example.com/hook",
+        format=WebhookFormat.raw,
+        organization_id=organization.id,
+        secret="mysecret",
+    )
+    await save_fixture(endpoint)
+
+    event = WebhookEvent(webhook_endpoint_id=endpoint.id, payload='{"foo":"bar"}')
+    await save_fixture(event)
+
+    mocker.patch("polar.webhook.tasks.allowed_url", return_value=True)
+    mocker.patch(
+        "polar.webhook.tasks.webhook_delivery.post",
+        side_effect=WebhookEndpointBusy(endpoint.id, 1.0),
+    )
+
+    # then
+    session.expunge_all()
+
+    job_context["job_try"] = 1
+    with pytest.raises(Retry):
+        await _webhook_event_send(
+            session=session,
+            ctx=job_context,
+            webhook_event_id=event.id,
+        )
+
+    # No request was sent, so no delivery is recorded
+    result = await session.execute(
+        select(WebhookDelivery).where(WebhookDelivery.webhook_event_id == event.id)
+    )
+    assert result.scalars().all() == []